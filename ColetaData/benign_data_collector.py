@@ -18,7 +18,6 @@ import time
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
-import win32evtlog
 import win32con
 import win32api
 import win32process
@@ -29,6 +28,11 @@ import csv
 import os
 import sys
 
+# Módulos compartilhados entre detectores e coletores
+sys.path.append(str(Path(__file__).resolve().parent.parent / "utils"))
+from event_sources import live_event_source
+from event_checkpoint import CheckpointedReader, EventCheckpoint
+
 class BenignAPICollector:
     """
     Coletor de chamadas de API de aplicativos benignos
@@ -183,37 +187,20 @@ class BenignAPICollector:
         
         end_time = datetime.now() + timedelta(minutes=duration_minutes)
         
+        # Leitura incremental: continua do último registro processado
+        # (checkpoint em output_dir) em vez de reler o log a cada 2 segundos;
+        # com EvtSubscribe disponível os eventos chegam sem polling
+        source = live_event_source()
+        checkpoint = EventCheckpoint(self.output_dir / "sysmon_checkpoint.json", source.checkpoint_key)
+        reader = CheckpointedReader(source, checkpoint, poll_interval=2, from_end=True)
+        
         try:
-            # Conectar ao log do Sysmon
-            hand = win32evtlog.OpenEventLog(None, "Microsoft-Windows-Sysmon/Operational")
-            
-            while datetime.now() < end_time and self.collection_active:
-                try:
-                    # Ler eventos recentes
-                    events = win32evtlog.ReadEventLog(
-                        hand,
-                        win32evtlog.EVENTLOG_BACKWARDS_READ | win32evtlog.EVENTLOG_SEQUENTIAL_READ,
-                        0
-                    )
-                    
-                    for event in events:
-                        if event.TimeGenerated > datetime.now() - timedelta(minutes=1):
-                            self._process_sysmon_event(event)
-                    
-                    time.sleep(2)  # Verificar a cada 2 segundos
-                    
-                except Exception as e:
-                    self.logger.debug(f"Erro na leitura de eventos: {e}")
-                    time.sleep(5)
-                    
+            for event in reader.events(lambda: datetime.now() < end_time and self.collection_active):
+                self._process_sysmon_event(event)
+                
         except Exception as e:
             self.logger.error(f"Erro no monitoramento: {e}")
-        finally:
-            try:
-                win32evtlog.CloseEventLog(hand)
-            except:
-                pass
-                
+            
         self.logger.info("Monitoramento concluído")
         
     def _process_sysmon_event(self, event):
@@ -4,7 +4,6 @@ Sistema para capturar chamadas de API de aplicações benignas em máquina virtu
 Baseado no formato mal-api-2019 dataset
 """
 
-import win32evtlog
 import win32con
 import win32event
 import xml.etree.ElementTree as ET
@@ -14,11 +13,19 @@ import psutil
 import os
 import logging
 from datetime import datetime
-from collections import defaultdict, deque
+from collections import defaultdict
 from pathlib import Path
 import json
 import threading
 import subprocess
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "utils"))
+from api_tokens import ApiSequence, ApiTokenTable
+from event_sources import live_event_source
+from event_checkpoint import CheckpointedReader, EventCheckpoint
+from process_sampler import ProcessSampler
+from process_table import ProcessTable
 
 class BenignAPICollector:
     """
@@ -44,7 +51,9 @@ class BenignAPICollector:
         self._setup_logging()
         
         # Buffer de API calls por processo
-        self.process_api_calls = defaultdict(lambda: deque(maxlen=1000))
+        # (IDs internados em array('H') em vez de strings repetidas por processo)
+        self.api_tokens = ApiTokenTable()
+        self.process_api_calls = defaultdict(lambda: ApiSequence(self.api_tokens, maxlen=1000))
         self.process_info = {}
         
         # Controle de coleta
@@ -59,6 +68,15 @@ class BenignAPICollector:
             "python.exe", "java.exe", "spotify.exe", "discord.exe"
         }
         
+        # Monitoramento alternativo (sem Sysmon): descoberta por deltas e
+        # leitura apenas dos processos-alvo a cada segundo
+        self.process_table = ProcessTable()
+        self.process_table.subscribe(on_spawn=self._on_process_spawn, on_exit=self._on_process_exit)
+        self.activity_sampler = ProcessSampler(
+            self._sample_process_activity, interval=1, max_concurrent=None,
+            attrs=('cpu_percent', 'memory_info')
+        )
+        
         # Mapeamento de eventos Sysmon para API calls
         self.event_to_api = {
             1: "CreateProcess",      # Process creation
@@ -92,24 +110,22 @@ class BenignAPICollector:
         )
         self.logger = logging.getLogger(__name__)
     
-    def _get_sysmon_events(self):
+    def _get_sysmon_events(self, end_time=None):
         """
         Monitorar eventos do Sysmon
-        Gera eventos conforme eles chegam
+        Gera eventos conforme eles chegam, em ordem, continuando do último
+        registro processado (checkpoint em output_dir) ou, na primeira coleta,
+        dos eventos gravados a partir de agora (EvtSubscribe quando disponível)
         """
+        source = live_event_source()
+        checkpoint = EventCheckpoint(self.output_dir / "sysmon_checkpoint.json", source.checkpoint_key)
+        reader = CheckpointedReader(source, checkpoint, poll_interval=1.0, from_end=True)
+        
+        def running():
+            return self.collecting and (end_time is None or time.time() < end_time)
+        
         try:
-            # Abrir log de eventos do Sysmon
-            hand = win32evtlog.OpenEventLog(None, "Microsoft-Windows-Sysmon/Operational")
-            
-            flags = win32evtlog.EVENTLOG_BACKWARDS_READ | win32evtlog.EVENTLOG_SEQUENTIAL_READ
-            
-            # Obter eventos mais recentes primeiro
-            events = win32evtlog.ReadEventLog(hand, flags, 0)
-            
-            for event in events:
-                if not self.collecting:
-                    break
-                
+            for event in reader.events(running):
                 try:
                     # Verificar se o evento tem dados XML válidos
                     if hasattr(event, 'StringInserts') and event.StringInserts:
@@ -129,8 +145,6 @@ class BenignAPICollector:
                         self.logger.warning(f"Erro ao processar evento: {e}")
                     continue
             
-            win32evtlog.CloseEventLog(hand)
-            
         except Exception as e:
             self.logger.error(f"Erro ao acessar eventos Sysmon: {e}")
             self.logger.info("Verifique se o Sysmon está instalado e configurado")
@@ -227,55 +241,9 @@ class BenignAPICollector:
         
         while self.collecting:
             try:
-                for proc in psutil.process_iter(['pid', 'name', 'exe']):
-                    try:
-                        if proc.info['name'] in self.target_processes:
-                            pid = proc.info['pid']
-                            name = proc.info['name']
-                            
-                            # Simular chamadas de API baseadas em atividade do processo
-                            if pid not in self.process_info:
-                                self.process_info[pid] = {
-                                    'name': name,
-                                    'start_time': datetime.now(),
-                                    'api_count': 0
-                                }
-                                
-                                # Adicionar APIs típicas de inicialização
-                                startup_apis = [
-                                    "ldrloaddll", "ldrgetprocedureaddress", "ntallocatevirtualmemory",
-                                    "ntcreatefile", "regopenkeyexa", "ntqueryvaluekey"
-                                ]
-                                
-                                for api in startup_apis:
-                                    self.process_api_calls[pid].append(api)
-                                    self.process_info[pid]['api_count'] += 1
-                            
-                            # Adicionar APIs baseadas na atividade
-                            try:
-                                # Verificar uso de CPU/memória para inferir atividade
-                                cpu_percent = proc.cpu_percent()
-                                memory_info = proc.memory_info()
-                                
-                                if cpu_percent > 0.1:  # Processo ativo
-                                    active_apis = [
-                                        "getsystemmetrics", "ntdelayexecution", "getcursorpos"
-                                    ]
-                                    for api in active_apis:
-                                        self.process_api_calls[pid].append(api)
-                                        self.process_info[pid]['api_count'] += 1
-                                
-                                if memory_info.rss > 50 * 1024 * 1024:  # > 50MB
-                                    memory_apis = ["ntallocatevirtualmemory", "ntfreevirtualmemory"]
-                                    for api in memory_apis:
-                                        self.process_api_calls[pid].append(api)
-                                        self.process_info[pid]['api_count'] += 1
-                            
-                            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                                continue
-                    
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        continue
+                # Processos-alvo novos chegam por _on_process_spawn
+                self.process_table.poll()
+                self.activity_sampler.poll()
                 
                 time.sleep(1)  # Intervalo de monitoramento
                 
@@ -283,6 +251,56 @@ class BenignAPICollector:
                 self.logger.error(f"Erro no monitoramento alternativo: {e}")
                 time.sleep(5)
     
+    def _on_process_spawn(self, info):
+        """Processo novo na tabela de processos: acompanhar se for alvo"""
+        if info['name'] not in self.target_processes:
+            return
+        
+        pid = info['pid']
+        name = info['name']
+        
+        # Simular chamadas de API baseadas em atividade do processo
+        if pid not in self.process_info:
+            self.process_info[pid] = {
+                'name': name,
+                'start_time': datetime.now(),
+                'api_count': 0
+            }
+            
+            # Adicionar APIs típicas de inicialização
+            startup_apis = [
+                "ldrloaddll", "ldrgetprocedureaddress", "ntallocatevirtualmemory",
+                "ntcreatefile", "regopenkeyexa", "ntqueryvaluekey"
+            ]
+            
+            for api in startup_apis:
+                self.process_api_calls[pid].append(api)
+                self.process_info[pid]['api_count'] += 1
+        
+        self.activity_sampler.track(pid)
+    
+    def _on_process_exit(self, info):
+        self.activity_sampler.untrack(info['pid'])
+    
+    def _sample_process_activity(self, pid, info):
+        """Adicionar APIs baseadas na atividade (CPU/memória pré-carregados)"""
+        cpu_percent = info['cpu_percent']
+        memory_info = info['memory_info']
+        
+        if cpu_percent and cpu_percent > 0.1:  # Processo ativo
+            active_apis = [
+                "getsystemmetrics", "ntdelayexecution", "getcursorpos"
+            ]
+            for api in active_apis:
+                self.process_api_calls[pid].append(api)
+                self.process_info[pid]['api_count'] += 1
+        
+        if memory_info and memory_info.rss > 50 * 1024 * 1024:  # > 50MB
+            memory_apis = ["ntallocatevirtualmemory", "ntfreevirtualmemory"]
+            for api in memory_apis:
+                self.process_api_calls[pid].append(api)
+                self.process_info[pid]['api_count'] += 1
+    
     def start_collection(self, duration_minutes=30, min_api_calls=50):
         """
         Iniciar coleta de dados benignos
@@ -308,7 +326,7 @@ class BenignAPICollector:
         
         try:
             # Tentar usar Sysmon primeiro
-            for event in self._get_sysmon_events():
+            for event in self._get_sysmon_events(end_time):
                 if not self.collecting or time.time() > end_time:
                     break
                 
@@ -14,13 +14,18 @@ import psutil
 import os
 import logging
 from datetime import datetime
-from collections import defaultdict, deque
+from collections import defaultdict
 from pathlib import Path
 import json
 import threading
 import subprocess
+import sys
 import re
 
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "utils"))
+from api_tokens import ApiSequence, ApiTokenTable
+from process_table import ProcessTable
+
 class MalwareAPICollector:
     """
     Coletor especializado para capturar chamadas de API do malware polimórfico
@@ -47,10 +52,15 @@ class MalwareAPICollector:
         self._setup_logging()
         
         # Buffer de API calls por processo
-        self.malware_api_calls = defaultdict(lambda: deque(maxlen=2000))  # Maior buffer para malware
+        # (IDs internados em array('H') em vez de strings repetidas por processo)
+        self.api_tokens = ApiTokenTable()
+        self.malware_api_calls = defaultdict(lambda: ApiSequence(self.api_tokens, maxlen=2000))  # Maior buffer para malware
         self.malware_processes = {}
         self.child_processes = set()  # Processos filhos do malware
         
+        # Descoberta por deltas: cada verificação só olha processos novos
+        self.process_table = ProcessTable()
+        
         # Controle de coleta
         self.collecting = False
         self.malware_detected = False
@@ -117,31 +127,32 @@ class MalwareAPICollector:
         """
         Detectar quando o malware é executado
         Retorna PID do processo se encontrado
+        
+        Só os processos criados desde a chamada anterior são verificados (a
+        primeira chamada inclui todos os processos já em execução).
         """
-        for proc in psutil.process_iter(['pid', 'name', 'exe', 'ppid', 'create_time']):
-            try:
-                if proc.info['name'] and self.target_executable in proc.info['name'].lower():
-                    pid = proc.info['pid']
+        spawned, _ = self.process_table.poll()
+        for info in spawned:
+            if info['name'] and self.target_executable in info['name'].lower():
+                pid = info['pid']
+                
+                if pid not in self.malware_processes:
+                    self.malware_processes[pid] = {
+                        'name': info['name'],
+                        'exe_path': info['exe'],
+                        'ppid': info['ppid'],
+                        'start_time': datetime.fromtimestamp(info['create_time']),
+                        'api_count': 0,
+                        'behavior_score': 0
+                    }
                     
-                    if pid not in self.malware_processes:
-                        self.malware_processes[pid] = {
-                            'name': proc.info['name'],
-                            'exe_path': proc.info['exe'],
-                            'ppid': proc.info['ppid'],
-                            'start_time': datetime.fromtimestamp(proc.info['create_time']),
-                            'api_count': 0,
-                            'behavior_score': 0
-                        }
-                        
-                        self.malware_detected = True
-                        self.logger.warning(f"🚨 MALWARE DETECTADO: {proc.info['name']} (PID: {pid})")
-                        
-                        # Detectar processos filhos
-                        self._detect_child_processes(pid)
-                        
-                        return pid
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
+                    self.malware_detected = True
+                    self.logger.warning(f"🚨 MALWARE DETECTADO: {info['name']} (PID: {pid})")
+                    
+                    # Detectar processos filhos
+                    self._detect_child_processes(pid)
+                    
+                    return pid
         return None
     
     def _detect_child_processes(self, parent_pid):
@@ -18,6 +18,13 @@ from sklearn.preprocessing import LabelEncoder
 # import matplotlib.pyplot as plt  # Opcional
 # import seaborn as sns             # Opcional
 import json
+import sys
+
+# Exportação do RandomForest compilado (utils/compiled_forest.py)
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "utils"))
+from compiled_forest import CompiledForest, compiled_path_for
+from model_bundle import save_bundle
+from malapi_loader import load_mal_api
 
 class DefensiveModelTrainer:
     """
@@ -73,42 +80,24 @@ class DefensiveModelTrainer:
         )
         self.logger = logging.getLogger(__name__)
     
-    def load_mal_api_2019(self, data_file, labels_file):
+    def load_mal_api_2019(self, data_file, labels_file, families=('Spyware',), use_index=False):
         """
-        Carregar dados do mal-api-2019 (somente Spyware)
+        Carregar dados do mal-api-2019 (por padrão somente Spyware)
         
         Args:
             data_file: Arquivo all_analysis_data.txt
             labels_file: Arquivo labels.csv
+            families: Famílias a manter (None = todas)
+            use_index: Usar/criar índice de offsets para ler só as linhas selecionadas
         """
         print("📁 Carregando dados mal-api-2019...")
         
         try:
-            # Carregar labels
-            labels_df = pd.read_csv(labels_file, header=None, names=['label'])
-            
-            # Filtrar apenas Spyware
-            spyware_indices = labels_df[labels_df['label'] == 'Spyware'].index.tolist()
-            self.logger.info(f"Encontrados {len(spyware_indices)} samples de Spyware no mal-api-2019")
-            
-            # Carregar dados de API calls
-            with open(data_file, 'r', encoding='utf-8', errors='ignore') as f:
-                all_lines = f.readlines()
-            
-            # Extrair apenas linhas correspondentes ao Spyware
-            spyware_data = []
-            for idx in spyware_indices:
-                if idx < len(all_lines):
-                    api_calls = all_lines[idx].strip()
-                    if api_calls:  # Ignorar linhas vazias
-                        spyware_data.append({
-                            'api_calls': api_calls,
-                            'label': 'Spyware'
-                        })
+            # Leitura em streaming: só as linhas das famílias selecionadas ficam em memória
+            mal_api_df = load_mal_api(data_file, labels_file, families, use_index=use_index)
+            families_text = ', '.join(families) if families else 'todas as famílias'
             
-            mal_api_df = pd.DataFrame(spyware_data)
-            
-            print(f"✅ Carregados {len(mal_api_df)} samples de Spyware do mal-api-2019")
+            print(f"✅ Carregados {len(mal_api_df)} samples ({families_text}) do mal-api-2019")
             self.logger.info(f"Dados mal-api-2019 carregados: {len(mal_api_df)} amostras")
             
             return mal_api_df
@@ -456,6 +445,15 @@ class DefensiveModelTrainer:
         encoder_file = self.output_dir / f"{model_name}_encoder.joblib"
         joblib.dump(self.label_encoder, encoder_file)
         
+        # Exportar floresta compilada (arrays NumPy) para inferência rápida
+        compiled_file = compiled_path_for(model_file)
+        CompiledForest.from_sklearn(self.model).save(compiled_file)
+        
+        # Bundle único versionado (modelo + vocabulário/IDF + classes), carregável com mmap
+        bundle_file = self.output_dir / f"{model_name}.bundle"
+        save_bundle(bundle_file, self.model, self.vectorizer, self.label_encoder,
+                    metadata={'model_name': model_name, 'metrics': self.training_metrics})
+        
         # Salvar informações do treinamento
         info = {
             'model_name': model_name,
@@ -464,6 +462,8 @@ class DefensiveModelTrainer:
             'model_file': str(model_file),
             'vectorizer_file': str(vectorizer_file),
             'encoder_file': str(encoder_file),
+            'compiled_model_file': str(compiled_file),
+            'bundle_file': str(bundle_file),
             'classes': list(self.label_encoder.classes_),
             'metrics': self.training_metrics,
             'dataset_info': {
@@ -480,6 +480,8 @@ class DefensiveModelTrainer:
         print(f"   - Modelo: {model_file.name}")
         print(f"   - Vectorizer: {vectorizer_file.name}")
         print(f"   - Encoder: {encoder_file.name}")
+        print(f"   - Modelo compilado: {compiled_file.name}")
+        print(f"   - Bundle: {bundle_file.name}")
         print(f"   - Info: {info_file.name}")
         
         return model_file, info_file
@@ -4,21 +4,31 @@ Monitora chamadas de API em tempo real e detecta malware polimórfico
 Integração com Discord webhook para alertas imediatos
 """
 
+import argparse
 import joblib
 import time
 import json
 import psutil
 import logging
 import threading
-import requests
-import queue
 import hashlib
 import random
+import sys
 from datetime import datetime, timedelta
 from collections import defaultdict, deque
 from pathlib import Path
 import numpy as np
 
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "utils"))
+from compiled_forest import CompiledForest, load_scorer
+from model_bundle import ModelBundle, is_bundle_data
+from detection_policy import PolicyReloader
+from api_tokens import ApiSequence, ApiTokenTable
+from process_sampler import ProcessSampler
+from process_table import ProcessTable
+from alert_dispatcher import AlertDispatcher
+from inference_server import InferenceClient, default_address
+
 class RealtimeMalwareDetector:
     """
     Detector de malware em tempo real usando modelo Random Forest
@@ -26,24 +36,67 @@ class RealtimeMalwareDetector:
     Envia alertas via Discord webhook quando malware é detectado
     """
     
-    def __init__(self, model_path, vectorizer_path, encoder_path, config_path=None):
-        """Inicializar detector em tempo real"""
+    def __init__(self, model_path, vectorizer_path=None, encoder_path=None, config_path=None,
+                 model_server=None):
+        """
+        Inicializar detector em tempo real
+        
+        model_path pode ser o bundle único (.bundle) com todos os componentes;
+        nesse caso vectorizer_path e encoder_path não são necessários.
+        model_server: endereço do servidor de inferência; com ele o modelo
+        não é carregado neste processo (equivale a model_server.enabled).
+        """
         print("🛡️ SISTEMA DE DETECÇÃO EM TEMPO REAL - MODELO DEFENSIVO")
         print("=" * 65)
         
         self._setup_logging()
-        self._load_model_components(model_path, vectorizer_path, encoder_path)
         self.config = self._load_config(config_path)
         
+        # Modelo local ou servidor de inferência compartilhado com outros detectores
+        self.inference_client = None
+        server_options = self.config.get('model_server') or {}
+        if model_server:
+            server_options = {**server_options, 'enabled': True, 'address': model_server}
+        if server_options.get('enabled'):
+            self._connect_model_server(server_options)
+        else:
+            self._load_model_components(model_path, vectorizer_path, encoder_path)
+        self.policy_reloader = PolicyReloader(self.config, config_path)
+        
         # Buffers para monitoramento
-        self.process_api_calls = defaultdict(lambda: deque(maxlen=1000))
+        # (IDs internados em array('H') em vez de strings repetidas por processo)
+        self.api_tokens = ApiTokenTable()
+        self.process_api_calls = defaultdict(lambda: ApiSequence(self.api_tokens, maxlen=1000))
         self.process_info = {}
         self.detection_results = deque(maxlen=100)
         
+        # Amostragem de atividade: um único agendador para todos os processos
+        # acompanhados (no lugar de uma thread por PID)
+        self.sampler = ProcessSampler(
+            self._sample_process_activity,
+            interval=self.config['sample_interval'],
+            max_concurrent=self.config['max_concurrent_analysis']
+        )
+        
+        # Descoberta por deltas (spawn/exit) em vez de varrer todos os processos
+        self.process_table = ProcessTable()
+        self.process_table.subscribe(on_spawn=self._on_process_spawn, on_exit=self._on_process_exit)
+        
         # Controle de detecção
         self.monitoring = False
         self.detection_thread = None
-        self.alert_queue = queue.Queue()
+        
+        # Alertas Discord enviados em segundo plano (agrupados, com retentativas
+        # e fila em disco); a detecção só enfileira
+        self.alert_dispatcher = None
+        if self.config.get('discord_webhook'):
+            self.alert_dispatcher = AlertDispatcher.from_config(
+                self.config['discord_webhook'],
+                self.config.get('alert_delivery'),
+                build_embed=self._discord_embed,
+                on_delivered=self._on_alerts_delivered,
+                logger=self.logger
+            )
         
         # Estatísticas
         self.stats = {
@@ -81,30 +134,66 @@ class RealtimeMalwareDetector:
         print("🤖 Carregando modelo treinado...")
         
         try:
-            self.model = joblib.load(model_path)
-            print(f"✅ Modelo carregado: {Path(model_path).name}")
-            
-            self.vectorizer = joblib.load(vectorizer_path)
-            print(f"✅ Vectorizer carregado: {Path(vectorizer_path).name}")
+            # Arrays do bundle ficam mapeados em memória (compartilhados entre processos)
+            loaded = joblib.load(model_path, mmap_mode='r')
+            self.feature_selector = None
+            self.pca = None
             
-            self.label_encoder = joblib.load(encoder_path)
-            print(f"✅ Label encoder carregado: {Path(encoder_path).name}")
+            if is_bundle_data(loaded):
+                bundle = ModelBundle(loaded)
+                self.model = bundle.model
+                self.vectorizer = bundle.tfidf_vectorizer
+                self.label_encoder = bundle.label_encoder
+                self.feature_selector = bundle.feature_selector
+                self.pca = bundle.pca
+                print(f"✅ Bundle do modelo carregado: {Path(model_path).name} "
+                      f"(versão {bundle.version}, {bundle.metadata.get('model_type')})")
+            else:
+                self.model = loaded
+                print(f"✅ Modelo carregado: {Path(model_path).name}")
+                
+                self.vectorizer = joblib.load(vectorizer_path)
+                print(f"✅ Vectorizer carregado: {Path(vectorizer_path).name}")
+                
+                self.label_encoder = joblib.load(encoder_path)
+                print(f"✅ Label encoder carregado: {Path(encoder_path).name}")
             
             print(f"📊 Classes detectáveis: {list(self.label_encoder.classes_)}")
             print(f"🌳 Número de estimadores: {self.model.n_estimators}")
             
+            # Avaliador compilado (arrays NumPy) com o mesmo resultado do sklearn
+            self.scorer = load_scorer(self.model, model_path)
+            if isinstance(self.scorer, CompiledForest):
+                print("⚡ Inferência usando floresta compilada")
+            
             self.logger.info("Componentes do modelo carregados com sucesso")
             
         except Exception as e:
             self.logger.error(f"Erro ao carregar modelo: {e}")
             raise
     
+    def _connect_model_server(self, options):
+        """Usar o servidor de inferência (utils/inference_server.py) no lugar do modelo local"""
+        print("🤖 Conectando ao servidor de inferência...")
+        
+        try:
+            self.inference_client = InferenceClient(options.get('address'), options.get('authkey'),
+                                                    options.get('timeout', 5.0))
+            print(f"✅ Servidor de inferência: {self.inference_client.address} "
+                  f"(modelo {self.inference_client.info.get('model')})")
+            print(f"📊 Classes detectáveis: {self.inference_client.classes}")
+            self.logger.info("Conectado ao servidor de inferência")
+        except Exception as e:
+            self.logger.error(f"Erro ao conectar ao servidor de inferência: {e}")
+            raise
+    
     def _load_config(self, config_path):
         """Carregar configurações do detector"""
         default_config = {
             "detection_threshold": 0.7,
             "analysis_interval": 5,
             "min_api_calls": 50,
+            "max_analysis_attempts": 3,   # Falhas de inferência antes de desistir do processo
             "discord_webhook": None,
             "whitelist_processes": [
                 "svchost.exe", "System", "smss.exe", "csrss.exe",
@@ -113,10 +202,24 @@ class RealtimeMalwareDetector:
                 "python.exe", "code.exe", "chrome.exe", "firefox.exe"
             ],
             "suspicious_extensions": [".exe", ".dll", ".scr", ".bat", ".ps1"],
+            "suspicious_directories": ["temp", "tmp", "appdata\\local\\temp", "users\\public"],
             "max_concurrent_analysis": 10,
+            "sample_interval": 2,
             "quarantine_detected": False,
             "auto_terminate": False,
-            "detailed_logging": True
+            "detailed_logging": True,
+            "alert_delivery": {
+                "max_batch": 10,              # Embeds por mensagem (limite do Discord)
+                "batch_window": 0.5,          # Segundos agrupando uma rajada
+                "max_retries": 5,
+                "spill_path": "detection_logs/alertas_pendentes.jsonl"
+            },
+            "model_server": {
+                "enabled": False,             # Inferência no servidor compartilhado
+                "address": None,              # Padrão: named pipe local (inference_server.py)
+                "authkey": None,
+                "timeout": 5.0                # Segundos aguardando a resposta
+            }
         }
         
         if config_path and Path(config_path).exists():
@@ -140,35 +243,11 @@ class RealtimeMalwareDetector:
         while self.monitoring:
             try:
                 current_time = time.time()
+                self._reload_policy()
                 
-                for proc in psutil.process_iter(['pid', 'name', 'exe', 'create_time']):
-                    try:
-                        pid = proc.info['pid']
-                        name = proc.info['name']
-                        
-                        if name in self.config['whitelist_processes']:
-                            continue
-                        
-                        if pid not in self.process_info and pid not in self.analyzed_processes:
-                            exe_path = proc.info.get('exe', '')
-                            create_time = proc.info.get('create_time', current_time)
-                            
-                            if self._is_suspicious_process(name, exe_path):
-                                self.process_info[pid] = {
-                                    'name': name,
-                                    'exe_path': exe_path,
-                                    'create_time': datetime.fromtimestamp(create_time),
-                                    'api_count': 0,
-                                    'suspicious_score': 0,
-                                    'analyzed': False
-                                }
-                                
-                                self._start_api_collection(pid)
-                                
-                                self.logger.info(f"Novo processo suspeito detectado: {name} (PID: {pid})")
-                    
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        continue
+                # Processos novos/encerrados chegam por _on_process_spawn/_on_process_exit
+                self.process_table.poll()
+                self.sampler.poll()
                 
                 if current_time - last_check >= self.config['analysis_interval']:
                     self._analyze_collected_apis()
@@ -180,29 +259,67 @@ class RealtimeMalwareDetector:
                 self.logger.error(f"Erro no monitoramento: {e}")
                 time.sleep(5)
     
+    def _on_process_spawn(self, info):
+        """Processo novo (ou existente no primeiro poll) na tabela de processos"""
+        pid = info['pid']
+        name = info['name']
+        
+        if name and name.lower() in self.policy_reloader.policy.whitelist:
+            return
+        
+        if pid not in self.process_info and pid not in self.analyzed_processes:
+            exe_path = info.get('exe') or ''
+            
+            if self._is_suspicious_process(name, exe_path):
+                self.process_info[pid] = {
+                    'name': name,
+                    'exe_path': exe_path,
+                    'create_time': datetime.fromtimestamp(info['create_time']),
+                    'api_count': 0,
+                    'suspicious_score': 0,
+                    'analyzed': False,
+                    'failed_attempts': 0
+                }
+                
+                self._start_api_collection(pid)
+                
+                self.logger.info(f"Novo processo suspeito detectado: {name} (PID: {pid})")
+    
+    def _on_process_exit(self, info):
+        """Processo encerrado: análise final se pendente e descarte do estado (o PID pode ser reutilizado)"""
+        pid = info['pid']
+        self.sampler.untrack(pid)
+        
+        # APIs suficientes e ainda sem análise: analisar agora, antes de perder o estado
+        process = self.process_info.get(pid)
+        if process is not None and not process['analyzed']:
+            self._analyze_collected_apis(pids={pid})
+        
+        self.analyzed_processes.discard(pid)
+        self.process_info.pop(pid, None)
+        api_calls = self.process_api_calls.pop(pid, None)
+        if api_calls is not None:
+            api_calls.clear()
+    
     def _is_suspicious_process(self, name, exe_path):
         """Verificar se processo é suspeito"""
         if not name or not exe_path:
             return False
         
-        name_lower = name.lower()
-        for ext in self.config['suspicious_extensions']:
-            if name_lower.endswith(ext):
-                return True
-        
-        suspicious_paths = ['temp', 'tmp', 'appdata\\local\\temp', 'users\\public']
-        exe_lower = exe_path.lower()
-        for path in suspicious_paths:
-            if path in exe_lower:
-                return True
-        
-        return False
+        policy = self.policy_reloader.policy
+        return bool(policy.suspicious_extension(name) or policy.suspicious_directory(exe_path))
+    
+    def _reload_policy(self):
+        """Recompilar whitelist/extensões se o arquivo de configuração mudou"""
+        try:
+            if self.policy_reloader.check():
+                self.logger.info("Listas de processos recarregadas da configuração")
+        except Exception as e:
+            self.logger.warning(f"Erro ao recarregar configuração: {e}")
     
     def _start_api_collection(self, pid):
         """Iniciar coleta de APIs para um processo específico"""
         try:
-            proc = psutil.Process(pid)
-            
             startup_apis = [
                 'ldrloaddll', 'ldrgetprocedureaddress', 'ntallocatevirtualmemory',
                 'ntcreatefile', 'regopenkeyexa', 'ntqueryvaluekey'
@@ -212,94 +329,116 @@ class RealtimeMalwareDetector:
                 self.process_api_calls[pid].append(api)
                 self.process_info[pid]['api_count'] += 1
             
-            threading.Thread(
-                target=self._monitor_process_activity,
-                args=(pid,),
-                daemon=True
-            ).start()
+            self.sampler.track(pid)
             
         except Exception as e:
             self.logger.warning(f"Erro ao iniciar coleta para PID {pid}: {e}")
     
-    def _monitor_process_activity(self, pid):
-        """Monitorar atividade de um processo específico"""
-        try:
-            while self.monitoring and pid in self.process_info:
-                try:
-                    proc = psutil.Process(pid)
-                    if not proc.is_running():
-                        break
-                    
-                    cpu_percent = proc.cpu_percent()
-                    
-                    if cpu_percent > 1.0:
-                        activity_apis = ['getsystemmetrics', 'ntdelayexecution', 'getcursorpos']
-                        for api in activity_apis:
-                            self.process_api_calls[pid].append(api)
-                            self.process_info[pid]['api_count'] += 1
-                    
-                    if random.random() < 0.1:
-                        suspicious_apis = [
-                            'setwindowshookexa', 'createremotethread', 'ntwritevirtualmemory',
-                            'internetopena', 'httpsendrequest', 'regsetvalueexa'
-                        ]
-                        api = random.choice(suspicious_apis)
-                        self.process_api_calls[pid].append(api)
-                        self.process_info[pid]['api_count'] += 1
-                        self.process_info[pid]['suspicious_score'] += 1
-                    
-                    time.sleep(2)
-                    
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    break
+    def _sample_process_activity(self, pid, info):
+        """Amostra de atividade de um processo (chamada pelo agendador)"""
+        if pid not in self.process_info:
+            self.sampler.untrack(pid)
+            return
         
-        except Exception as e:
-            self.logger.warning(f"Erro no monitoramento do processo {pid}: {e}")
+        # cpu_percent pré-carregado pelo agendador (Process em cache entre passadas)
+        cpu_percent = info.get('cpu_percent') or 0.0
+        
+        if cpu_percent > 1.0:
+            activity_apis = ['getsystemmetrics', 'ntdelayexecution', 'getcursorpos']
+            for api in activity_apis:
+                self.process_api_calls[pid].append(api)
+                self.process_info[pid]['api_count'] += 1
+        
+        if random.random() < 0.1:
+            suspicious_apis = [
+                'setwindowshookexa', 'createremotethread', 'ntwritevirtualmemory',
+                'internetopena', 'httpsendrequest', 'regsetvalueexa'
+            ]
+            api = random.choice(suspicious_apis)
+            self.process_api_calls[pid].append(api)
+            self.process_info[pid]['api_count'] += 1
+            self.process_info[pid]['suspicious_score'] += 1
+    
+    def _predict_sequences(self, api_strings):
+        """Probabilidades e classe prevista de cada sequência (modelo local ou servidor)"""
+        if self.inference_client is not None:
+            return self.inference_client.predict(api_strings)
+        
+        X = self.vectorizer.transform(api_strings)
+        if self.feature_selector is not None:
+            X = self.feature_selector.transform(X)
+        if self.pca is not None:
+            X = self.pca.transform(X)
+        
+        probabilities = self.scorer.predict_proba(X)
+        predicted_classes = self.label_encoder.inverse_transform(np.argmax(probabilities, axis=1))
+        return probabilities, list(predicted_classes)
     
-    def _analyze_collected_apis(self):
-        """Analisar APIs coletadas usando o modelo"""
-        for pid, api_calls in list(self.process_api_calls.items()):
-            if (len(api_calls) >= self.config['min_api_calls'] and 
+    def _analyze_collected_apis(self, pids=None):
+        """
+        Analisar APIs coletadas usando o modelo (uma inferência para todos os processos prontos)
+        
+        pids: restringir a estes processos (ex.: processo encerrado)
+        """
+        ready = [
+            (pid, api_calls) for pid, api_calls in list(self.process_api_calls.items())
+            if ((pids is None or pid in pids) and 
+                len(api_calls) >= self.config['min_api_calls'] and 
                 pid in self.process_info and 
-                not self.process_info[pid]['analyzed']):
+                not self.process_info[pid]['analyzed'])
+        ]
+        if not ready:
+            return
+        
+        try:
+            probabilities, predicted_classes = self._predict_sequences(
+                [' '.join(api_calls) for _, api_calls in ready])
+        except Exception as e:
+            # Processos continuam pendentes e entram no próximo ciclo (até max_analysis_attempts)
+            self.logger.error(f"Erro na análise de {len(ready)} processo(s): {e}")
+            max_attempts = self.config.get('max_analysis_attempts', 3)
+            for pid, _ in ready:
+                info = self.process_info[pid]
+                info['failed_attempts'] = info.get('failed_attempts', 0) + 1
+                if info['failed_attempts'] >= max_attempts:
+                    self.logger.warning(f"Processo {info['name']} (PID: {pid}) não analisado "
+                                        f"após {info['failed_attempts']} tentativas")
+                    info['analyzed'] = True
+                    self.analyzed_processes.add(pid)
+            return
+        
+        for (pid, api_calls), prediction_proba, predicted_class in zip(ready, probabilities, predicted_classes):
+            try:
+                confidence = np.max(prediction_proba)
                 
-                try:
-                    api_string = ' '.join(api_calls)
-                    X = self.vectorizer.transform([api_string])
-                    
-                    prediction_proba = self.model.predict_proba(X)[0]
-                    prediction_class_idx = np.argmax(prediction_proba)
-                    confidence = prediction_proba[prediction_class_idx]
-                    predicted_class = self.label_encoder.inverse_transform([prediction_class_idx])[0]
-                    
-                    self.process_info[pid]['analyzed'] = True
-                    self.stats['processes_analyzed'] += 1
-                    
-                    if (predicted_class != 'Benign' and 
-                        confidence >= self.config['detection_threshold']):
-                        
-                        self._handle_malware_detection(pid, predicted_class, confidence, api_calls)
-                    
-                    else:
-                        process_name = self.process_info[pid]['name']
-                        self.logger.info(f"Processo benigno: {process_name} (PID: {pid}, Conf: {confidence:.3f})")
-                    
-                    self.detection_results.append({
-                        'timestamp': datetime.now(),
-                        'pid': pid,
-                        'process_name': self.process_info[pid]['name'],
-                        'predicted_class': predicted_class,
-                        'confidence': confidence,
-                        'api_count': len(api_calls),
-                        'is_malware': predicted_class != 'Benign'
-                    })
+                self.process_info[pid]['analyzed'] = True
+                self.stats['processes_analyzed'] += 1
+                
+                if (predicted_class != 'Benign' and 
+                    confidence >= self.config['detection_threshold']):
                     
-                except Exception as e:
-                    self.logger.error(f"Erro na análise do processo {pid}: {e}")
-                    self.process_info[pid]['analyzed'] = True
+                    self._handle_malware_detection(pid, predicted_class, confidence, api_calls)
                 
-                finally:
-                    self.analyzed_processes.add(pid)
+                else:
+                    process_name = self.process_info[pid]['name']
+                    self.logger.info(f"Processo benigno: {process_name} (PID: {pid}, Conf: {confidence:.3f})")
+                
+                self.detection_results.append({
+                    'timestamp': datetime.now(),
+                    'pid': pid,
+                    'process_name': self.process_info[pid]['name'],
+                    'predicted_class': predicted_class,
+                    'confidence': confidence,
+                    'api_count': len(api_calls),
+                    'is_malware': predicted_class != 'Benign'
+                })
+                
+            except Exception as e:
+                self.logger.error(f"Erro na análise do processo {pid}: {e}")
+                self.process_info[pid]['analyzed'] = True
+            
+            finally:
+                self.analyzed_processes.add(pid)
     
     def _handle_malware_detection(self, pid, malware_type, confidence, api_calls):
         """Manipular detecção de malware"""
@@ -326,7 +465,8 @@ class RealtimeMalwareDetector:
             'top_apis': list(api_calls)[-20:]
         }
         
-        self.alert_queue.put(alert)
+        if self.alert_dispatcher:
+            self.alert_dispatcher.submit(alert)
         
         if self.config.get('quarantine_detected', False):
             self._quarantine_process(pid)
@@ -358,86 +498,58 @@ class RealtimeMalwareDetector:
         except Exception as e:
             self.logger.error(f"Erro ao terminar processo {pid}: {e}")
     
-    def _alert_sender(self):
-        """Thread para enviar alertas via Discord"""
-        while self.monitoring:
-            try:
-                alert = self.alert_queue.get(timeout=5)
-                
-                if alert and self.config.get('discord_webhook'):
-                    self._send_discord_alert(alert)
-                
-            except queue.Empty:
-                continue
-            except Exception as e:
-                self.logger.error(f"Erro no envio de alertas: {e}")
+    def _on_alerts_delivered(self, alerts):
+        """Chamado pela thread de envio após cada mensagem entregue"""
+        self.stats['alerts_sent'] += len(alerts)
+        self.logger.info(f"{len(alerts)} alerta(s) enviado(s) via Discord com sucesso")
     
-    def _send_discord_alert(self, alert):
-        """Enviar alerta via Discord webhook"""
-        try:
-            webhook_url = self.config['discord_webhook']
-            
-            embed = {
-                "title": "🚨 MALWARE DETECTADO - MODELO DEFENSIVO",
-                "color": 0xFF0000,
-                "timestamp": alert['timestamp'],
-                "fields": [
-                    {
-                        "name": "Processo",
-                        "value": f"`{alert['process_name']}` (PID: {alert['process_id']})",
-                        "inline": True
-                    },
-                    {
-                        "name": "Tipo de Malware",
-                        "value": f"`{alert['malware_type']}`",
-                        "inline": True
-                    },
-                    {
-                        "name": "Confiança",
-                        "value": f"{alert['confidence']:.1%}",
-                        "inline": True
-                    },
-                    {
-                        "name": "APIs Coletadas",
-                        "value": str(alert['api_count']),
-                        "inline": True
-                    },
-                    {
-                        "name": "Score Suspeito",
-                        "value": str(alert['suspicious_score']),
-                        "inline": True
-                    },
-                    {
-                        "name": "Caminho do Executável",
-                        "value": f"`{alert['executable_path']}`",
-                        "inline": False
-                    },
-                    {
-                        "name": "Principais APIs",
-                        "value": f"`{', '.join(alert['top_apis'][:10])}`",
-                        "inline": False
-                    }
-                ],
-                "footer": {
-                    "text": "Modelo Defensivo - Sistema de Detecção em Tempo Real"
+    def _discord_embed(self, alert):
+        """Embed do Discord para um alerta"""
+        return {
+            "title": "🚨 MALWARE DETECTADO - MODELO DEFENSIVO",
+            "color": 0xFF0000,
+            "timestamp": alert['timestamp'],
+            "fields": [
+                {
+                    "name": "Processo",
+                    "value": f"`{alert['process_name']}` (PID: {alert['process_id']})",
+                    "inline": True
+                },
+                {
+                    "name": "Tipo de Malware",
+                    "value": f"`{alert['malware_type']}`",
+                    "inline": True
+                },
+                {
+                    "name": "Confiança",
+                    "value": f"{alert['confidence']:.1%}",
+                    "inline": True
+                },
+                {
+                    "name": "APIs Coletadas",
+                    "value": str(alert['api_count']),
+                    "inline": True
+                },
+                {
+                    "name": "Score Suspeito",
+                    "value": str(alert['suspicious_score']),
+                    "inline": True
+                },
+                {
+                    "name": "Caminho do Executável",
+                    "value": f"`{alert['executable_path']}`",
+                    "inline": False
+                },
+                {
+                    "name": "Principais APIs",
+                    "value": f"`{', '.join(alert['top_apis'][:10])}`",
+                    "inline": False
                 }
+            ],
+            "footer": {
+                "text": "Modelo Defensivo - Sistema de Detecção em Tempo Real"
             }
-            
-            payload = {
-                "embeds": [embed],
-                "username": "Modelo Defensivo"
-            }
-            
-            response = requests.post(webhook_url, json=payload, timeout=10)
-            
-            if response.status_code == 204:
-                self.stats['alerts_sent'] += 1
-                self.logger.info("Alerta enviado via Discord com sucesso")
-            else:
-                self.logger.error(f"Erro ao enviar alerta Discord: {response.status_code}")
-        
-        except Exception as e:
-            self.logger.error(f"Erro ao enviar alerta Discord: {e}")
+        }
     
     def start_monitoring(self):
         """Iniciar monitoramento em tempo real"""
@@ -464,9 +576,8 @@ class RealtimeMalwareDetector:
         self.detection_thread.daemon = True
         self.detection_thread.start()
         
-        alert_thread = threading.Thread(target=self._alert_sender)
-        alert_thread.daemon = True
-        alert_thread.start()
+        if self.alert_dispatcher:
+            self.alert_dispatcher.start()
         
         try:
             while self.monitoring:
@@ -480,9 +591,12 @@ class RealtimeMalwareDetector:
         """Imprimir status do monitoramento"""
         uptime = datetime.now() - self.stats['start_time']
         active_processes = len(self.process_info)
+        sampler = self.sampler.metrics()
         
         print(f"📊 Status: {uptime} | "
+              f"Processos no sistema: {len(self.process_table)} | "
               f"Processos ativos: {active_processes} | "
+              f"Amostrados: {sampler['tracked']} ({sampler['samples_per_second']:.1f}/s) | "
               f"Analisados: {self.stats['processes_analyzed']} | "
               f"Malware: {self.stats['malware_detected']} | "
               f"Alertas: {self.stats['alerts_sent']}")
@@ -498,6 +612,13 @@ class RealtimeMalwareDetector:
         if self.detection_thread:
             self.detection_thread.join(timeout=5)
         
+        if self.alert_dispatcher:
+            # Alertas não entregues ficam na fila em disco para a próxima execução
+            self.alert_dispatcher.stop()
+        
+        if self.inference_client:
+            self.inference_client.close()
+        
         total_time = datetime.now() - self.stats['start_time']
         
         print(f"\n📊 ESTATÍSTICAS FINAIS:")
@@ -505,6 +626,13 @@ class RealtimeMalwareDetector:
         print(f"   Processos analisados: {self.stats['processes_analyzed']}")
         print(f"   Malware detectado: {self.stats['malware_detected']}")
         print(f"   Alertas enviados: {self.stats['alerts_sent']}")
+        if self.alert_dispatcher:
+            delivery = self.alert_dispatcher.metrics()
+            print(f"   Entrega de alertas: p50 {delivery['latency_p50_ms']} ms, p95 {delivery['latency_p95_ms']} ms, "
+                  f"429 recebidos {delivery['rate_limited']}, em disco {delivery['spilled']}")
+        sampler = self.sampler.metrics()
+        print(f"   Amostras de atividade: {sampler['samples']} "
+              f"({sampler['samples_per_second']:.1f}/s, adiadas pelo limite: {sampler['deferred']})")
         print(f"   Taxa de detecção: {self.stats['malware_detected']}/{self.stats['processes_analyzed']}")
         
         self.logger.info("Monitoramento finalizado")
@@ -517,6 +645,12 @@ def main():
     print("Integração com Discord para alertas em tempo real")
     print()
     
+    parser = argparse.ArgumentParser(description='Detector de malware em tempo real')
+    parser.add_argument('--model-server', nargs='?', const=default_address(), metavar='ENDERECO',
+                        help='Usar o servidor de inferência (utils/inference_server.py) em vez de '
+                             'carregar o modelo neste processo')
+    args = parser.parse_args()
+    
     model_files = {
         'model': '../ModelTraining/trained_models/defensive_model_polymorphic.joblib',
         'vectorizer': '../ModelTraining/trained_models/defensive_model_polymorphic_vectorizer.joblib',
@@ -524,9 +658,14 @@ def main():
         'config': 'detection_config.json'
     }
     
+    # Preferir o bundle único quando existir (carregamento memory-mapped)
+    bundle_file = '../ModelTraining/trained_models/defensive_model_polymorphic.bundle'
+    if Path(bundle_file).exists():
+        model_files.update({'model': bundle_file, 'vectorizer': None, 'encoder': None})
+    
     missing_files = []
     for name, path in model_files.items():
-        if name != 'config' and not Path(path).exists():
+        if path and name != 'config' and not args.model_server and not Path(path).exists():
             missing_files.append(f"{name}: {path}")
     
     if missing_files:
@@ -541,7 +680,8 @@ def main():
             model_path=model_files['model'],
             vectorizer_path=model_files['vectorizer'],
             encoder_path=model_files['encoder'],
-            config_path=model_files['config'] if Path(model_files['config']).exists() else None
+            config_path=model_files['config'] if Path(model_files['config']).exists() else None,
+            model_server=args.model_server
         )
         
         detector.start_monitoring()
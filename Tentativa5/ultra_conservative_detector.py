@@ -24,6 +24,7 @@ from pathlib import Path
 import logging
 from collections import defaultdict, Counter
 import hashlib
+import sys
 
 # ML Libraries - Conservador
 from sklearn.ensemble import RandomForestClassifier
@@ -37,6 +38,9 @@ from sklearn.metrics import precision_score, recall_score, f1_score
 # Importar validador
 from realism_validator import RealismValidator
 
+sys.path.append(str(Path(__file__).resolve().parent.parent / "utils"))
+from near_duplicates import remove_near_duplicates
+
 warnings.filterwarnings('ignore')
 
 class UltraConservativeMalwareDetector:
@@ -305,36 +309,9 @@ class UltraConservativeMalwareDetector:
         return df_filtered
 
     def _remove_similar_samples(self, df, api_column, threshold):
-        """Remover amostras muito similares (implementação simples)"""
-        unique_samples = []
-        api_texts = df[api_column].tolist()
-        
-        for i, text in enumerate(api_texts):
-            is_unique = True
-            text_words = set(text.split())
-            
-            for unique_text in unique_samples:
-                unique_words = set(unique_text.split())
-                
-                # Calcular similaridade básica (Jaccard)
-                intersection = len(text_words & unique_words)
-                union = len(text_words | unique_words)
-                similarity = intersection / union if union > 0 else 0
-                
-                if similarity > threshold:
-                    is_unique = False
-                    break
-            
-            if is_unique:
-                unique_samples.append(text)
-        
-        # Manter apenas indices únicos
-        unique_indices = []
-        for unique_text in unique_samples:
-            idx = df[df[api_column] == unique_text].index[0]
-            unique_indices.append(idx)
-        
-        return df.loc[unique_indices].copy()
+        """Remover amostras muito similares (Jaccard > threshold) via MinHash/LSH"""
+        kept_positions = remove_near_duplicates(df[api_column].tolist(), threshold)
+        return df.iloc[kept_positions].copy()
 
     def _calculate_dataset_fingerprint(self, df):
         """Calcular fingerprint único do dataset"""
@@ -406,7 +383,8 @@ class UltraConservativeMalwareDetector:
             max_df=vectorization_config['max_df'],
             analyzer=vectorization_config['analyzer'],
             lowercase=vectorization_config['lowercase'],
-            token_pattern=vectorization_config['token_pattern']
+            token_pattern=vectorization_config['token_pattern'],
+            dtype=np.float32
         )
         
         X_vectorized = self.vectorizer.fit_transform(text_data)
@@ -422,9 +400,9 @@ class UltraConservativeMalwareDetector:
             k=k_best
         )
         
-        # Conversão para array denso para feature selection
-        X_dense = X_vectorized.toarray()
-        X_selected = self.feature_selector.fit_transform(X_dense, self.label_encoder.fit_transform(['Benign', 'Spyware'] * (len(X_dense)//2)))
+        # Seleção direto na matriz esparsa (CSR), sem densificar o TF-IDF
+        n_samples = X_vectorized.shape[0]
+        X_selected = self.feature_selector.fit_transform(X_vectorized, self.label_encoder.fit_transform(['Benign', 'Spyware'] * (n_samples//2)))
         
         self.logger.info(f"📉 Seleção: {X_vectorized.shape[1]} → {X_selected.shape[1]} features")
         
@@ -435,7 +413,7 @@ class UltraConservativeMalwareDetector:
             selected_names = [feature_names[i] for i in selected_features if i < len(feature_names)]
             self.logger.debug(f"🔍 Features selecionadas: {selected_names[:10]}...")
         
-        return pd.DataFrame(X_selected)
+        return pd.DataFrame.sparse.from_spmatrix(X_selected)
 
     def _critical_preprocessing_checks(self, X_processed, y_encoded):
         """Verificações críticas do pré-processamento"""
@@ -463,8 +441,12 @@ class UltraConservativeMalwareDetector:
         balance = min(counts) / max(counts)
         self.logger.info(f"⚖️ Balanceamento: {balance:.3f}")
         
-        # Check 4: Variabilidade das features
-        zero_var = (X_processed.var() == 0).sum()
+        # Check 4: Variabilidade das features (coluna constante = mínimo igual ao máximo)
+        if hasattr(X_processed, 'sparse'):
+            X_columns = X_processed.sparse.to_coo().tocsc()
+            zero_var = int((X_columns.min(axis=0).toarray() == X_columns.max(axis=0).toarray()).sum())
+        else:
+            zero_var = (X_processed.var() == 0).sum()
         if zero_var > 0:
             self.logger.warning(f"⚠️ {zero_var} features com variância zero")
         
@@ -0,0 +1,310 @@
+"""
+BENCHMARK DO DETECTOR: THROUGHPUT E LATÊNCIA
+Mede, com o SysmonMalwareDetector real e um fluxo Sysmon sintético:
+
+- parse: _parse_sysmon_event por evento
+- dispatch: _dispatch_event (handlers + estado por processo) por evento
+- threat_score: _calculate_threat_score por processo
+- preprocess: _preprocess_sample (TF-IDF/seleção/PCA) por processo
+- inference: predict_proba e _predict_batch com um processo por chamada x
+  lotes de --batch-sizes processos (tempo por processo)
+- latency: eventos -> alerta com o pipeline completo (replay em tempo real
+  nas taxas de --rates); mede do instante em que o CreateRemoteThread de um
+  processo malicioso "acontece" até _handle_malware_detection
+
+Sem --model usa o modelo sintético dos testes; com --model mede o modelo
+treinado (bundle ou dict joblib) e registra o hash do arquivo no JSON, para
+comparar versões do modelo com --compare.
+
+Uso:
+    python bench_detector.py --output detector.json
+    python bench_detector.py --model modelo_novo.joblib --compare detector.json --output novo.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "utils"))
+from detection_sistem import SysmonMalwareDetector
+from event_sources import ReplayEventSource
+from model_bundle import load_model_file
+
+from synthetic_sysmon import sysmon_stream, write_model, write_stream
+
+
+def percentile(values, fraction):
+    """Percentil por vizinho mais próximo (values já ordenados)"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def summarize(seconds, scale=1e6, unit='us'):
+    """Média e percentis de uma lista de durações (s) na unidade pedida"""
+    values = sorted(seconds)
+    total = sum(values)
+    return {
+        'count': len(values),
+        f'mean_{unit}': round(total / len(values) * scale, 3) if values else 0.0,
+        f'p50_{unit}': round(percentile(values, 0.50) * scale, 3),
+        f'p95_{unit}': round(percentile(values, 0.95) * scale, 3),
+        f'p99_{unit}': round(percentile(values, 0.99) * scale, 3),
+        f'max_{unit}': round(values[-1] * scale, 3) if values else 0.0
+    }
+
+
+def time_each(func, items, repeat=3):
+    """Duração de cada chamada func(item), em repeat passadas pelos itens"""
+    durations = []
+    clock = time.perf_counter
+    for _ in range(repeat):
+        for item in items:
+            started = clock()
+            func(item)
+            durations.append(clock() - started)
+    summary = summarize(durations)
+    summary['ops_per_second'] = round(len(durations) / sum(durations), 1) if durations else 0.0
+    return summary
+
+
+def model_info(path, detector):
+    data = Path(path).read_bytes()
+    info = {
+        'path': str(path),
+        'sha256': hashlib.sha256(data).hexdigest()[:16],
+        'size_mb': round(len(data) / 1024 / 1024, 2),
+        'scorer': type(detector.scorer).__name__
+    }
+    metadata = load_model_file(path).get('metadata')
+    if metadata:
+        info['metadata'] = {key: metadata.get(key) for key in ('model_type', 'created_at') if key in metadata}
+    return info
+
+
+def new_detector(model_path, events_path, speed=0):
+    detector = SysmonMalwareDetector(model_path, event_source=ReplayEventSource(events_path, speed=speed))
+    detector.config['quarantine_enabled'] = False
+    detector.config['save_evidence'] = False
+    return detector
+
+
+def read_all(source):
+    source.open()
+    records = []
+    while not source.exhausted:
+        records.extend(source.read())
+    return records
+
+
+def bench_components(model_path, events, processes, repeat):
+    """Custos por operação no fluxo de fundo (sem processos maliciosos)"""
+    events_path = write_stream('componentes.jsonl', sysmon_stream(events, processes=processes)[0])
+    detector = new_detector(model_path, events_path)
+    records = read_all(detector.event_source)
+
+    result = {'parse': time_each(detector._parse_sysmon_event, records, repeat)}
+    parsed = [item for item in map(detector._parse_sysmon_event, records) if item]
+    result['dispatch'] = time_each(detector._dispatch_event, parsed, repeat)
+
+    calls = {pid: list(buffer) for pid, buffer in detector.process_api_calls.items()
+             if len(buffer) >= detector.config['min_api_calls']}
+    pids = list(calls)
+    result['threat_score'] = time_each(lambda pid: detector._calculate_threat_score(pid, calls[pid]),
+                                       pids, repeat)
+
+    sequences = [' '.join(calls[pid]) for pid in pids]
+    result['preprocess'] = time_each(detector._preprocess_sample, sequences, repeat)
+
+    return result, detector, pids, calls, sequences, model_info(model_path, detector)
+
+
+def bench_inference(detector, pids, calls, sequences, batch_sizes, repeat):
+    """Tempo por processo: uma chamada por processo x uma chamada por lote"""
+    X = detector._preprocess_batch(sequences)
+    results = []
+    for size in batch_sizes:
+        size = min(size, len(pids))
+        rows = [X[i:i + 1] for i in range(size)]
+        single = min(_elapsed(lambda: [detector.scorer.predict_proba(row) for row in rows])
+                     for _ in range(repeat))
+        batched = min(_elapsed(lambda: detector.scorer.predict_proba(X[:size])) for _ in range(repeat))
+
+        batch_pids = pids[:size]
+        batch_calls = [calls[pid] for pid in batch_pids]
+        pipeline_single = min(_elapsed(lambda: [detector._predict(calls[pid], pid) for pid in batch_pids])
+                              for _ in range(repeat))
+        pipeline_batched = min(_elapsed(lambda: detector._predict_batch(batch_calls, batch_pids))
+                               for _ in range(repeat))
+
+        results.append({
+            'batch_size': size,
+            'predict_proba_single_us': round(single / size * 1e6, 2),
+            'predict_proba_batched_us': round(batched / size * 1e6, 2),
+            'predict_proba_speedup': round(single / batched, 1),
+            'predict_batch_single_us': round(pipeline_single / size * 1e6, 2),
+            'predict_batch_batched_us': round(pipeline_batched / size * 1e6, 2),
+            'predict_batch_speedup': round(pipeline_single / pipeline_batched, 1)
+        })
+    return results
+
+
+def _elapsed(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def bench_latency(model_path, rate, seconds, processes, malicious_every):
+    """Replay em tempo real na taxa rate; latência evento -> alerta por processo malicioso"""
+    events, triggers = sysmon_stream(int(rate * seconds), rate, processes, malicious_every)
+    events_path = write_stream(f'latencia_{rate}.jsonl', events)
+    detector = new_detector(model_path, events_path, speed=1.0)
+    source = detector.event_source
+
+    read_at, detected_at = {}, {}
+    replay_start = []
+    read_batch = source.read
+
+    def timed_read():
+        batch = read_batch()
+        now = time.perf_counter()
+        if batch and not replay_start:
+            replay_start.append(now)
+        for record in batch:
+            pid = triggers.get(record.RecordNumber)
+            if pid is not None:
+                read_at[pid] = (now, record.RecordNumber)
+        return batch
+
+    handle_detection = detector._handle_malware_detection
+
+    def timed_detection(pid, result):
+        detected_at.setdefault(str(pid), time.perf_counter())
+        handle_detection(pid, result)
+
+    source.read = timed_read
+    detector._handle_malware_detection = timed_detection
+
+    started = time.perf_counter()
+    detector.running = True
+    detector._monitor_sysmon_events()
+    elapsed = time.perf_counter() - started
+
+    # Instante em que o evento "acontece": início do replay + posição no fluxo / taxa
+    end_to_end, read_delay = [], []
+    for pid, (read_time, record_number) in read_at.items():
+        due = replay_start[0] + (record_number - 1) / rate
+        read_delay.append(max(0.0, read_time - due))
+        if pid in detected_at:
+            end_to_end.append(detected_at[pid] - due)
+
+    return {
+        'rate': rate,
+        'events': len(events),
+        'achieved_events_per_second': round(detector.stats['events_processed'] / elapsed, 1),
+        'malicious_processes': len(triggers),
+        'detected': len(end_to_end),
+        'event_to_alert': summarize(end_to_end, scale=1e3, unit='ms'),
+        'event_to_read': summarize(read_delay, scale=1e3, unit='ms'),
+        'pipeline': {name: {key: stage[key] for key in ('max_depth', 'dropped', 'coalesced') if key in stage}
+                     for name, stage in detector.pipeline.metrics().items() if name != 'reader'}
+    }
+
+
+def compare(current, previous, tolerance):
+    """Variação das métricas de tempo (_us/_ms) em relação a um resultado anterior"""
+    changes = {}
+
+    def walk(new, old, path):
+        if isinstance(new, dict) and isinstance(old, dict):
+            for key in new:
+                if key in old:
+                    walk(new[key], old[key], f"{path}.{key}" if path else key)
+        elif isinstance(new, list) and isinstance(old, list):
+            for i, (a, b) in enumerate(zip(new, old)):
+                walk(a, b, f"{path}[{i}]")
+        elif (isinstance(new, (int, float)) and isinstance(old, (int, float))
+              and path.endswith(('_us', '_ms')) and old > 0):
+            change = (new - old) / old * 100
+            changes[path] = {'before': old, 'after': new, 'change_pct': round(change, 1),
+                             'regression': change > tolerance}
+
+    walk({k: v for k, v in current.items() if k not in ('params', 'model')},
+         {k: v for k, v in previous.items() if k not in ('params', 'model')}, '')
+    return {
+        'previous_model': previous.get('model'),
+        'tolerance_pct': tolerance,
+        'regressions': sorted(path for path, change in changes.items() if change['regression']),
+        'metrics': changes
+    }
+
+
+def run_benchmark(model=None, events=20000, processes=200, repeat=3, batch_sizes=(1, 16, 64, 200),
+                  rates=(1000, 5000, 10000), seconds=3.0, malicious_every=500):
+    model_path = Path(model).resolve() if model else None
+    workdir = tempfile.mkdtemp(prefix='bench_detector_')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        if model_path is None:
+            model_path = write_model(Path(workdir) / 'modelo.joblib')
+        components, detector, pids, calls, sequences, info = bench_components(
+            model_path, events, processes, repeat)
+        inference = bench_inference(detector, pids, calls, sequences, batch_sizes, repeat)
+        detector.shutdown_logging()
+        latency = [bench_latency(model_path, rate, seconds, processes, malicious_every) for rate in rates]
+    finally:
+        os.chdir(cwd)
+
+    return {
+        'benchmark': 'detector',
+        'params': {'events': events, 'processes': processes, 'repeat': repeat,
+                   'batch_sizes': list(batch_sizes), 'rates': list(rates), 'seconds': seconds,
+                   'malicious_every': malicious_every},
+        'model': info,
+        'components': components,
+        'inference': inference,
+        'latency': latency
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: throughput e latência do detector')
+    parser.add_argument('--model', help='Modelo treinado (padrão: modelo sintético)')
+    parser.add_argument('--events', type=int, default=20000, help='Eventos nos benchmarks de componentes')
+    parser.add_argument('--processes', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 16, 64, 200])
+    parser.add_argument('--rates', type=int, nargs='+', default=[1000, 5000, 10000],
+                        help='Eventos/segundo no teste de latência')
+    parser.add_argument('--seconds', type=float, default=3.0, help='Duração do replay em cada taxa')
+    parser.add_argument('--malicious-every', type=int, default=500,
+                        help='Eventos de fundo entre processos maliciosos')
+    parser.add_argument('--compare', help='JSON de uma execução anterior')
+    parser.add_argument('--tolerance', type=float, default=10.0,
+                        help='Aumento (%%) de tempo considerado regressão')
+    parser.add_argument('--output', help='Arquivo JSON de saída')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.model, args.events, args.processes, args.repeat, args.batch_sizes,
+                           args.rates, args.seconds, args.malicious_every)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            result['comparison'] = compare(result, json.load(f), args.tolerance)
+
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
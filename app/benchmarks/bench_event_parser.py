@@ -0,0 +1,171 @@
+"""
+BENCHMARK: PARSER NOMEADO (SCHEMA) x PARSER POSICIONAL ANTIGO
+Compara, por evento, o parser antigo do detector (índices fixos em
+StringInserts, 6 Event IDs) com parse_sysmon_record (schema dos 29 Event
+IDs) em dois fluxos:
+
+- background: tráfego sintético do detector (eventos 1, 3, 7, 8, 10, 11)
+- all_ids: um evento de cada Event ID de 1 a 29
+
+e em dois formatos de entrada:
+
+- live: só StringInserts, como o PyEventLogRecord do win32evtlog
+- replay: SysmonRecord com EventData nomeado (XML/JSONL)
+
+Cada parser roda --repeat vezes (alternados) e vale o menor tempo de CPU.
+Além do tempo, registra quantos campos não vazios cada parser entrega.
+
+Uso:
+    python bench_event_parser.py --events 20000 --output parser.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "utils"))
+from event_sources import SysmonRecord, record_from_dict
+from sysmon_schema import SYSMON_SCHEMA, parse_sysmon_record
+
+from synthetic_sysmon import sysmon_event, sysmon_stream
+
+
+def legacy_parse_event(event):
+    """_parse_event_xml anterior ao schema (referência do benchmark)"""
+    xml_data = event.StringInserts
+    if not xml_data:
+        return None
+
+    event_dict = {
+        'EventID': event.EventID & 0xFFFF,
+        'TimeCreated': event.TimeGenerated,
+        'Computer': event.ComputerName
+    }
+    event_id = event_dict['EventID']
+    if event_id == 1:
+        event_dict.update({
+            'ProcessId': xml_data[3] if len(xml_data) > 3 else None,
+            'Image': xml_data[4] if len(xml_data) > 4 else None,
+            'CommandLine': xml_data[10] if len(xml_data) > 10 else None,
+            'ParentImage': xml_data[13] if len(xml_data) > 13 else None
+        })
+    elif event_id == 3:
+        event_dict.update({
+            'ProcessId': xml_data[3] if len(xml_data) > 3 else None,
+            'Image': xml_data[4] if len(xml_data) > 4 else None,
+            'DestinationIp': xml_data[14] if len(xml_data) > 14 else None,
+            'DestinationPort': xml_data[16] if len(xml_data) > 16 else None
+        })
+    elif event_id == 7:
+        event_dict.update({
+            'ProcessId': xml_data[3] if len(xml_data) > 3 else None,
+            'Image': xml_data[4] if len(xml_data) > 4 else None,
+            'ImageLoaded': xml_data[5] if len(xml_data) > 5 else None
+        })
+    elif event_id == 8:
+        event_dict.update({
+            'SourceProcessId': xml_data[3] if len(xml_data) > 3 else None,
+            'TargetProcessId': xml_data[6] if len(xml_data) > 6 else None,
+            'SourceImage': xml_data[4] if len(xml_data) > 4 else None
+        })
+    elif event_id == 10:
+        event_dict.update({
+            'SourceProcessId': xml_data[3] if len(xml_data) > 3 else None,
+            'TargetProcessId': xml_data[6] if len(xml_data) > 6 else None,
+            'SourceImage': xml_data[4] if len(xml_data) > 4 else None,
+            'TargetImage': xml_data[7] if len(xml_data) > 7 else None
+        })
+    elif event_id == 11:
+        event_dict.update({
+            'ProcessId': xml_data[3] if len(xml_data) > 3 else None,
+            'Image': xml_data[4] if len(xml_data) > 4 else None,
+            'TargetFilename': xml_data[5] if len(xml_data) > 5 else None
+        })
+    return event_dict
+
+
+def all_ids_stream(count):
+    """count eventos percorrendo os Event IDs 1-29, todos os campos preenchidos"""
+    events = []
+    for n in range(count):
+        event_id = n % len(SYSMON_SCHEMA) + 1
+        fields = {name: f"{name}-{n}" for name in SYSMON_SCHEMA[event_id][1]}
+        fields.update({key: 1000 + n % 200 for key in ('ProcessId', 'SourceProcessId') if key in fields})
+        events.append(sysmon_event(event_id, n + 1, **fields))
+    return events
+
+
+def as_live(record):
+    """Mesmo evento só com StringInserts (sem EventData), como na leitura ao vivo"""
+    return SysmonRecord(record.EventID, record.TimeGenerated, record.ComputerName,
+                        record.RecordNumber, record.StringInserts)
+
+
+def filled_fields(parsed):
+    """Campos do EventData não vazios (o dict antigo também traz EventID, TimeCreated e Computer)"""
+    if isinstance(parsed, dict):
+        return sum(1 for value in parsed.values() if value not in (None, '')) - 3
+    return sum(1 for value in parsed if value not in (None, ''))
+
+
+def time_parsers(parsers, records, repeat):
+    """Menor tempo de CPU por evento (ns) de cada parser, em repeat passadas alternadas"""
+    best = {name: float('inf') for name in parsers}
+    clock = time.process_time_ns
+    for _ in range(repeat):
+        for name, parse in parsers.items():
+            started = clock()
+            for record in records:
+                parse(record)
+            best[name] = min(best[name], clock() - started)
+    return {name: elapsed / len(records) for name, elapsed in best.items()}
+
+
+def bench_stream(events, repeat):
+    replay = [record_from_dict(event) for event in events]
+    inputs = {'live': [as_live(record) for record in replay], 'replay': replay}
+    result = {}
+    for name, records in inputs.items():
+        timings = time_parsers({'legacy': legacy_parse_event, 'schema': parse_sysmon_record}, records, repeat)
+        legacy_ns, schema_ns = timings['legacy'], timings['schema']
+        result[name] = {
+            'legacy_ns': round(legacy_ns, 1),
+            'schema_ns': round(schema_ns, 1),
+            'speedup': round(legacy_ns / schema_ns, 2),
+            'legacy_fields_per_event': round(sum(map(filled_fields, map(legacy_parse_event, records)))
+                                             / len(records), 2),
+            'schema_fields_per_event': round(sum(map(filled_fields, map(parse_sysmon_record, records)))
+                                             / len(records), 2)
+        }
+    return result
+
+
+def run_benchmark(events=20000, repeat=20):
+    background, _ = sysmon_stream(events, malicious_every=500)
+    return {
+        'benchmark': 'event_parser',
+        'params': {'events': events, 'repeat': repeat},
+        'background': bench_stream(background, repeat),
+        'all_ids': bench_stream(all_ids_stream(events), repeat)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: parser nomeado x parser posicional')
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', help='Arquivo JSON de saída')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.events, args.repeat)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+BENCHMARK: SERVIDOR DE INFERÊNCIA COMPARTILHADO x MODELO POR PROCESSO
+Floresta sintética (--trees árvores) sobre sequências de API calls:
+
+- memory: RSS de um processo detector (interpretador novo) com o modelo
+  local x só com o cliente do servidor; total para 1/2/4/8 detectores (cada
+  um com sua cópia x um servidor + clientes)
+- local: um detector chamando o modelo local com 1 sequência por vez
+- server_cN: N detectores (conexões) pedindo 1 sequência por vez ao mesmo
+  tempo; o servidor junta os pedidos em micro-lotes (max_wait)
+
+Uso:
+    python bench_inference_server.py --trees 100 --clients 1 4 16 --output inference_server.json
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import joblib
+import psutil
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import LabelEncoder
+
+UTILS = Path(__file__).resolve().parent.parent.parent / "utils"
+sys.path.append(str(UTILS))
+from inference_server import InferenceClient, InferenceModel, default_address
+
+from bench_detector import summarize
+from synthetic_sysmon import BENIGN_SEQUENCES, MALWARE_SEQUENCES
+
+
+def random_sequences(count, seed=0):
+    """Sequências misturando APIs benignas e maliciosas (rótulo pela maioria)"""
+    rng = random.Random(seed)
+    benign = ' '.join(BENIGN_SEQUENCES).split()
+    malware = ' '.join(MALWARE_SEQUENCES).split()
+    sequences, labels = [], []
+    for _ in range(count):
+        share = rng.random()
+        calls = [rng.choice(malware if rng.random() < share else benign) for _ in range(rng.randint(20, 80))]
+        sequences.append(' '.join(calls))
+        labels.append('Trojan' if share > 0.5 else 'Benign')
+    return sequences, labels
+
+
+# Processo detector mínimo: só o que cada modo precisa importar
+DETECTOR_SCRIPT = """
+import sys, psutil
+sys.path.insert(0, sys.argv[1])
+from inference_server import InferenceClient, InferenceModel
+if sys.argv[2] == 'local':
+    model = InferenceModel(sys.argv[3])
+else:
+    model = InferenceClient(sys.argv[4])
+model.predict(['CreateProcess LoadLibrary'])
+print(psutil.Process().memory_info().rss)
+"""
+
+
+def write_model(path, trees, samples=10000):
+    sequences, labels = random_sequences(samples)
+    vectorizer = TfidfVectorizer(token_pattern=r'\S+', ngram_range=(1, 2), lowercase=False)
+    encoder = LabelEncoder()
+    model = RandomForestClassifier(n_estimators=trees, random_state=42).fit(
+        vectorizer.fit_transform(sequences), encoder.fit_transform(labels))
+    joblib.dump({'model': model, 'tfidf_vectorizer': vectorizer, 'label_encoder': encoder,
+                 'feature_selector': None, 'pca': None}, path)
+    return path
+
+
+def start_server(model_path, address, max_wait):
+    """Servidor pela linha de comando (python inference_server.py), como no deployment"""
+    process = subprocess.Popen([sys.executable, str(UTILS / 'inference_server.py'), '--model', str(model_path),
+                                '--address', address, '--max-wait-ms', str(max_wait * 1000)],
+                               stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    while True:
+        try:
+            InferenceClient(address).close()
+            return process
+        except OSError:
+            if time.monotonic() > deadline or process.poll() is not None:
+                process.kill()
+                raise RuntimeError('Servidor de inferência não iniciou')
+            time.sleep(0.1)
+
+
+def measure_rss(mode, model_path, address):
+    output = subprocess.run([sys.executable, '-c', DETECTOR_SCRIPT, str(UTILS), mode, str(model_path), address],
+                            capture_output=True, text=True, check=True).stdout
+    return int(output.split()[-1])
+
+
+def bench_local(model_path, sequences, seconds):
+    model = InferenceModel(model_path)
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        model.predict([random.choice(sequences)])
+        latencies.append(time.perf_counter() - started)
+    return {'rows_per_second': round(len(latencies) / seconds, 1),
+            'latency': summarize(latencies, scale=1e3, unit='ms')}
+
+
+def bench_clients(address, sequences, clients, seconds):
+    connections = [InferenceClient(address) for _ in range(clients)]
+    before = connections[0].server_stats()
+    latencies = [[] for _ in connections]
+    deadline = time.perf_counter() + seconds
+
+    def run(index):
+        rng = random.Random(index)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            connections[index].predict([rng.choice(sequences)])
+            latencies[index].append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    after = connections[0].server_stats()
+    for connection in connections:
+        connection.close()
+    rows = after['rows'] - before['rows']
+    batches = after['batches'] - before['batches']
+    return {
+        'rows_per_second': round(rows / seconds, 1),
+        'latency': summarize([value for values in latencies for value in values], scale=1e3, unit='ms'),
+        'rows_per_batch': round(rows / max(batches, 1), 2),
+        'coalesced_rows': rows - (after['unique_rows'] - before['unique_rows'])
+    }
+
+
+def run_benchmark(trees=100, clients=(1, 4, 16), seconds=3.0, max_wait=0.002, samples=10000, pool=500):
+    workdir = tempfile.mkdtemp(prefix='bench_inference_')
+    model_path = write_model(Path(workdir) / 'modelo.joblib', trees, samples)
+    address = str(Path(workdir) / 'inferencia.sock') if sys.platform != 'win32' else default_address()
+    sequences, _ = random_sequences(pool, seed=1)
+
+    server = start_server(model_path, address, max_wait)
+    try:
+        local_rss = measure_rss('local', model_path, address)
+        client_rss = measure_rss('client', model_path, address)
+        server_rss = psutil.Process(server.pid).memory_info().rss
+        memory = {
+            'model_file_mb': round(os.path.getsize(model_path) / 2**20, 2),
+            'detector_local_model_mb': round(local_rss / 2**20, 1),
+            'detector_client_mb': round(client_rss / 2**20, 1),
+            'server_mb': round(server_rss / 2**20, 1),
+            'total_mb': {str(n): {'local_models': round(n * local_rss / 2**20, 1),
+                                  'shared_server': round((server_rss + n * client_rss) / 2**20, 1)}
+                         for n in (1, 2, 4, 8)}
+        }
+
+        results = {'local': bench_local(model_path, sequences, seconds)}
+        for count in clients:
+            results[f'server_c{count}'] = bench_clients(address, sequences, count, seconds)
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        'benchmark': 'inference_server',
+        'params': {'trees': trees, 'samples': samples, 'clients': list(clients), 'seconds': seconds,
+                   'max_wait_ms': max_wait * 1000, 'distinct_sequences': pool},
+        'cpu_count': os.cpu_count(),
+        'memory': memory,
+        'results': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: servidor de inferência compartilhado')
+    parser.add_argument('--trees', type=int, default=100, help='Árvores da floresta sintética')
+    parser.add_argument('--samples', type=int, default=10000, help='Sequências de treino da floresta sintética')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16],
+                        help='Detectores pedindo ao mesmo tempo')
+    parser.add_argument('--seconds', type=float, default=3.0, help='Duração de cada medição')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0, help='Espera do servidor para formar um lote')
+    parser.add_argument('--output', help='Arquivo JSON de saída')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.trees, args.clients, args.seconds, args.max_wait_ms / 1000, args.samples)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
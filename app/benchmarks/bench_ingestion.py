@@ -0,0 +1,131 @@
+"""
+BENCHMARK: INGESTÃO POR ASSINATURA (PUSH) x POLLING
+Mede a latência evento -> handler do EventPipeline com a mesma fonte
+(PipeEventSource, eventos JSONL escritos em um os.pipe na taxa pedida) em
+três modos de leitura:
+
+- poll_100ms / poll_50ms: leitor dorme idle_sleep após cada leitura vazia
+  (comportamento anterior do detector)
+- push: leitor bloqueia em source.wait() e acorda com o evento
+
+O tempo de cada evento vai do os.write no pipe até o início do handler.
+Depois do fluxo, o pipeline fica --idle segundos sem eventos para contar
+as leituras vazias (acordadas do leitor) e o tempo de CPU gasto ocioso.
+
+Uso:
+    python bench_ingestion.py --rates 100 1000 --seconds 3 --output ingestion.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "utils"))
+from event_pipeline import EventPipeline
+from event_sources import PipeEventSource
+from sysmon_schema import parse_sysmon_record
+
+from bench_detector import summarize
+from synthetic_sysmon import sysmon_stream
+
+MODES = {
+    'poll_100ms': {'push': False, 'idle_sleep': 0.1},
+    'poll_50ms': {'push': False, 'idle_sleep': 0.05},
+    'push': {'push': True, 'idle_sleep': 0.1},
+}
+
+
+def write_paced(fd, events, rate, sent_at):
+    """Escrever um evento por vez no pipe, no instante previsto pela taxa"""
+    lines = [(event['EventRecordID'], (json.dumps(event) + '\n').encode('utf-8')) for event in events]
+    started = time.perf_counter()
+    for n, (record_number, line) in enumerate(lines):
+        delay = started + n / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        sent_at[record_number] = time.perf_counter()
+        os.write(fd, line)
+
+
+def run_mode(mode, events, rate, idle_seconds):
+    options = MODES[mode]
+    read_fd, write_fd = os.pipe()
+    source = PipeEventSource(os.fdopen(read_fd, 'r', encoding='utf-8'))
+    sent_at, latencies = {}, []
+
+    def handle(item):
+        record_number, _ = item
+        latencies.append(time.perf_counter() - sent_at[record_number])
+
+    pipeline = EventPipeline(
+        read_batch=source.read,
+        parse_event=lambda record: (record.RecordNumber, parse_sysmon_record(record)),
+        handle_event=handle,
+        analyze=lambda pid: None,
+        is_exhausted=lambda: source.exhausted,
+        config={'idle_sleep': options['idle_sleep'], 'wait_timeout': 1.0},
+        wait_events=source.wait if options['push'] else None
+    )
+    source.open()
+    pipeline.start()
+
+    write_paced(write_fd, events, rate, sent_at)
+    deadline = time.perf_counter() + 5
+    while len(latencies) < len(events) and time.perf_counter() < deadline:
+        time.sleep(0.01)
+
+    # Fonte aberta e sem eventos: acordadas e CPU do processo enquanto ocioso
+    empty_before = pipeline.empty_reads
+    cpu_before = time.process_time()
+    time.sleep(idle_seconds)
+    idle_wakeups = pipeline.empty_reads - empty_before
+    idle_cpu = time.process_time() - cpu_before
+
+    os.close(write_fd)
+    pipeline.finished.wait(5)
+
+    return {
+        'events': len(events),
+        'handled': len(latencies),
+        'event_to_handler': summarize(latencies, scale=1e3, unit='ms'),
+        'idle_wakeups_per_second': round(idle_wakeups / idle_seconds, 2),
+        'idle_cpu_ms_per_second': round(idle_cpu / idle_seconds * 1000, 3)
+    }
+
+
+def run_benchmark(rates=(100, 1000), seconds=3.0, idle=2.0):
+    results = []
+    for rate in rates:
+        events, _ = sysmon_stream(int(rate * seconds), rate)
+        results.append({'rate': rate,
+                        'modes': {mode: run_mode(mode, events, rate, idle) for mode in MODES}})
+    return {
+        'benchmark': 'ingestion',
+        'params': {'rates': list(rates), 'seconds': seconds, 'idle': idle},
+        'results': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: ingestão push x polling')
+    parser.add_argument('--rates', type=int, nargs='+', default=[100, 1000],
+                        help='Eventos/segundo escritos no pipe')
+    parser.add_argument('--seconds', type=float, default=3.0, help='Duração do fluxo em cada taxa')
+    parser.add_argument('--idle', type=float, default=2.0, help='Segundos ociosos medidos após o fluxo')
+    parser.add_argument('--output', help='Arquivo JSON de saída')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.rates, args.seconds, args.idle)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+BENCHMARK: CUSTO DO LOGGING NA INGESTÃO DE EVENTOS
+Reproduz --events eventos Sysmon sintéticos (criação de processo, conexão,
+arquivo e DLL de 200 processos) por _parse_sysmon_event + _dispatch_event,
+no ritmo de --rate eventos/segundo, e mede o tempo de CPU da thread de
+ingestão com o logging ligado e com logging.disable(). A escrita em disco
+acontece na thread do QueueListener e não entra na conta da ingestão.
+
+Cada modo roda --repeat vezes (alternados); vale o menor tempo.
+
+Uso:
+    python bench_logging.py --events 20000 --rate 10000 --output logging.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "utils"))
+from detection_sistem import SysmonMalwareDetector
+from event_sources import ReplayEventSource
+
+from synthetic_sysmon import sysmon_stream, write_model, write_stream
+
+
+def read_all(source):
+    source.open()
+    events = []
+    while not source.exhausted:
+        events.extend(source.read())
+    return events
+
+
+def ingest(detector, events, rate):
+    """CPU da thread de ingestão (s) para os eventos no ritmo rate (0 = sem pausa)"""
+    interval = 1.0 / rate if rate else 0.0
+    started_wall = time.perf_counter()
+    cpu = 0.0
+    for i in range(0, len(events), 100):
+        if interval:
+            delay = started_wall + i * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        started = time.thread_time()
+        for event in events[i:i + 100]:
+            parsed = detector._parse_sysmon_event(event)
+            if parsed:
+                detector._dispatch_event(parsed)
+        cpu += time.thread_time() - started
+    return cpu
+
+
+def run_once(model_path, events_path, rate, disabled):
+    detector = SysmonMalwareDetector(model_path, event_source=ReplayEventSource(events_path, speed=0))
+    events = read_all(detector.event_source)
+    if disabled:
+        logging.disable(logging.CRITICAL)
+    try:
+        cpu = ingest(detector, events, rate)
+    finally:
+        logging.disable(logging.NOTSET)
+    dropped = detector.log_queue.dropped
+    detector.shutdown_logging()
+    return cpu, dropped
+
+
+def run_benchmark(events=20000, rate=10000, repeat=5):
+    workdir = tempfile.mkdtemp(prefix='bench_logging_')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        write_model('modelo.joblib')
+        write_stream('eventos.jsonl', sysmon_stream(events, rate or 1000)[0])
+        logged, silent, dropped = [], [], 0
+        for _ in range(repeat):
+            cpu, lost = run_once('modelo.joblib', 'eventos.jsonl', rate, disabled=False)
+            logged.append(cpu)
+            dropped += lost
+            silent.append(run_once('modelo.joblib', 'eventos.jsonl', rate, disabled=True)[0])
+        log_lines = sum(1 for path in Path('logs').glob('*.jsonl') for _ in open(path, encoding='utf-8'))
+    finally:
+        os.chdir(cwd)
+
+    with_logging, without_logging = min(logged), min(silent)
+    return {
+        'benchmark': 'ingestion_logging',
+        'params': {'events': events, 'rate': rate, 'repeat': repeat},
+        'cpu_with_logging_s': round(with_logging, 4),
+        'cpu_without_logging_s': round(without_logging, 4),
+        'logging_share_pct': round((with_logging - without_logging) / with_logging * 100, 1),
+        'us_per_event_with_logging': round(with_logging / events * 1e6, 2),
+        'log_lines_written': log_lines,
+        'records_dropped': dropped
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: custo do logging na ingestão')
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--rate', type=int, default=10000, help='Eventos/segundo (0 = sem pausa)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Arquivo JSON de saída')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.events, args.rate, args.repeat)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+BENCHMARK: REMOÇÃO DE AMOSTRAS SIMILARES (JACCARD O(n²) x MINHASH/LSH)
+Compara o laço original de _remove_similar_samples (Jaccard contra todas as
+amostras mantidas) com o filtro MinHash + LSH em um corpus com famílias de
+quase-duplicatas, verificando se as amostras mantidas são as mesmas.
+
+Uso:
+    python bench_near_duplicates.py --samples 2000 5000 --threshold 0.9 --output dedup.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "utils"))
+from near_duplicates import NearDuplicateFilter, remove_near_duplicates_exact
+
+from synthetic_data import api_vocabulary
+
+
+def variant_corpus(n_samples, length=150, vocab_size=3000, variants_per_base=3, mutation=0.05, seed=42):
+    """Sequências base e variantes com uma fração de API calls substituídas"""
+    rng = np.random.default_rng(seed)
+    vocab = np.array(api_vocabulary(vocab_size))
+    texts = []
+    while len(texts) < n_samples:
+        base = rng.choice(vocab, size=length)
+        texts.append(' '.join(base))
+        for _ in range(variants_per_base):
+            variant = base.copy()
+            mutate = rng.random(length) < mutation
+            variant[mutate] = rng.choice(vocab, size=int(mutate.sum()))
+            texts.append(' '.join(variant))
+    texts = texts[:n_samples]
+    return [texts[i] for i in rng.permutation(n_samples)]
+
+
+def run_lsh(texts, threshold, num_perm):
+    started = time.perf_counter()
+    dedup = NearDuplicateFilter(threshold, num_perm=num_perm)
+    kept = [i for i, text in enumerate(texts) if dedup.add_if_unique(text.split())]
+    return kept, {
+        'seconds': round(time.perf_counter() - started, 4),
+        'kept': len(kept),
+        'jaccard_comparisons': dedup.comparisons,
+        'bands': dedup.bands,
+        'rows_per_band': dedup.rows
+    }
+
+
+def run_benchmark(sizes=(1000, 2000, 4000), threshold=0.9, num_perm=128, exact_max=4000):
+    results = []
+    for n_samples in sizes:
+        texts = variant_corpus(n_samples)
+        kept_lsh, lsh = run_lsh(texts, threshold, num_perm)
+        result = {'samples': n_samples, 'lsh': lsh}
+
+        if n_samples <= exact_max:
+            started = time.perf_counter()
+            kept_exact = remove_near_duplicates_exact(texts, threshold)
+            result['exact'] = {'seconds': round(time.perf_counter() - started, 4), 'kept': len(kept_exact)}
+            result['same_kept_samples'] = kept_exact == kept_lsh
+            result['speedup'] = round(result['exact']['seconds'] / max(lsh['seconds'], 1e-9), 1)
+        results.append(result)
+
+    return {
+        'benchmark': 'near_duplicates',
+        'params': {'threshold': threshold, 'num_perm': num_perm, 'exact_max': exact_max},
+        'results': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: Jaccard O(n²) x MinHash/LSH')
+    parser.add_argument('--samples', type=int, nargs='+', default=[1000, 2000, 4000])
+    parser.add_argument('--threshold', type=float, default=0.9)
+    parser.add_argument('--num-perm', type=int, default=128)
+    parser.add_argument('--exact-max', type=int, default=4000,
+                        help='Maior tamanho em que a versão O(n²) também é executada')
+    parser.add_argument('--output', help='Arquivo JSON de saída')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.samples, args.threshold, args.num_perm, args.exact_max)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
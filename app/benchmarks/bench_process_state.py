@@ -0,0 +1,80 @@
+"""
+BENCHMARK: MEMÓRIA DO ESTADO POR PROCESSO SOB ENXURRADA DE EVENTOS
+Registra API calls de PIDs sempre novos (o pior caso: cada evento de registro
+ou rede de um processo desconhecido cria estado) e acompanha a memória
+alocada (tracemalloc) ao longo do tempo com e sem limites.
+
+Uso:
+    python bench_process_state.py --events 2000000 --output state.json
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "utils"))
+from process_state import ProcessStateStore
+
+from synthetic_data import api_vocabulary
+
+
+def run_flood(store, events, calls_per_pid, samples=10):
+    vocab = api_vocabulary(300)
+    checkpoints = []
+    step = max(events // samples, 1)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    for i in range(events):
+        store.record(i // calls_per_pid, vocab[i % len(vocab)])
+        if (i + 1) % step == 0:
+            current, _ = tracemalloc.get_traced_memory()
+            checkpoints.append({'events': i + 1, 'allocated_mb': round(current / 1024 / 1024, 2),
+                                'processes': len(store)})
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'events_per_second': round(events / elapsed),
+        'peak_mb': round(peak / 1024 / 1024, 2),
+        'checkpoints': checkpoints,
+        'store': store.metrics()
+    }
+
+
+def run_benchmark(events=500000, calls_per_pid=20, max_processes=5000, memory_budget_mb=64):
+    unbounded = ProcessStateStore(max_processes=None, ttl_seconds=None, memory_budget_mb=None)
+    bounded = ProcessStateStore(max_processes=max_processes, memory_budget_mb=memory_budget_mb)
+    return {
+        'benchmark': 'process_state',
+        'params': {'events': events, 'calls_per_pid': calls_per_pid,
+                   'max_processes': max_processes, 'memory_budget_mb': memory_budget_mb},
+        'unbounded': run_flood(unbounded, events, calls_per_pid),
+        'bounded': run_flood(bounded, events, calls_per_pid)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: memória do estado por processo')
+    parser.add_argument('--events', type=int, default=500000)
+    parser.add_argument('--calls-per-pid', type=int, default=20)
+    parser.add_argument('--max-processes', type=int, default=5000)
+    parser.add_argument('--memory-budget-mb', type=int, default=64)
+    parser.add_argument('--output', help='Arquivo JSON de saída')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.events, args.calls_per_pid, args.max_processes, args.memory_budget_mb)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
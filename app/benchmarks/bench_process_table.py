@@ -0,0 +1,101 @@
+"""
+BENCHMARK: DESCOBERTA DE PROCESSOS (PROCESS_ITER x TABELA INCREMENTAL)
+Sobe --processes processos ociosos e mede o custo de CPU de uma passada de
+descoberta:
+
+- scan: psutil.process_iter(['pid', 'name', 'exe', 'create_time']) completo,
+  como os loops originais faziam a cada 1-2 segundos
+- ProcessTable com backend /proc e com backend psutil, já em regime (só os
+  processos criados entre duas passadas são descritos)
+
+A cada passada --churn processos novos são criados e encerrados para que os
+deltas não fiquem vazios.
+
+Uso:
+    python bench_process_table.py --processes 1000 --passes 50 --output discovery.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import psutil
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "utils"))
+from process_table import ProcBackend, ProcessTable, PsutilBackend
+
+SLEEPER = ['sleep', '600'] if sys.platform != 'win32' else [sys.executable, '-c', 'import time; time.sleep(600)']
+
+
+def spawn(count):
+    return [subprocess.Popen(SLEEPER) for _ in range(count)]
+
+
+def stop(children):
+    for child in children:
+        child.kill()
+    for child in children:
+        child.wait()
+
+
+def measure(step, passes, churn):
+    """Tempo de CPU médio por passada (ms), sem contar a criação dos processos"""
+    total = 0.0
+    for _ in range(passes):
+        children = spawn(churn)
+        started = time.process_time()
+        step()
+        total += time.process_time() - started
+        stop(children)
+    return round(total / passes * 1000, 3)
+
+
+def full_scan():
+    for proc in psutil.process_iter(['pid', 'name', 'exe', 'create_time']):
+        proc.info
+
+
+def run_benchmark(processes=1000, passes=50, churn=5):
+    idle = spawn(processes)
+    try:
+        result = {
+            'benchmark': 'process_discovery',
+            'params': {'processes': processes, 'passes': passes, 'churn': churn,
+                       'system_processes': len(psutil.pids())},
+            'process_iter_ms': measure(full_scan, passes, churn)
+        }
+
+        backends = {'psutil': PsutilBackend}
+        if sys.platform.startswith('linux'):
+            backends['proc'] = ProcBackend
+        for name, backend in backends.items():
+            table = ProcessTable(backend())
+            table.poll()
+            result[f'table_{name}_ms'] = measure(table.poll, passes, churn)
+            result[f'table_{name}_metrics'] = table.metrics()
+    finally:
+        stop(idle)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: descoberta de processos')
+    parser.add_argument('--processes', type=int, default=1000)
+    parser.add_argument('--passes', type=int, default=50)
+    parser.add_argument('--churn', type=int, default=5)
+    parser.add_argument('--output', help='Arquivo JSON de saída')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.processes, args.passes, args.churn)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
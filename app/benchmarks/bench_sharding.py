@@ -0,0 +1,113 @@
+"""
+BENCHMARK: ESCALA DO DETECTOR EM PROCESSOS (SHARDS POR PID)
+Replay de um fluxo Sysmon sintético o mais rápido possível com:
+
+- single: SysmonMalwareDetector em um único processo (referência)
+- workers_N: ShardedMalwareDetector com N workers (--workers, padrão 1 2 4 8)
+
+Throughput = eventos / tempo entre a primeira leitura e o último worker
+terminar (sem a criação dos processos e a carga do modelo, registradas em
+startup_s). O ganho só aparece com núcleos livres: cpu_count vai no JSON.
+
+Uso:
+    python bench_sharding.py --events 50000 --workers 1 2 4 8 --output sharding.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent / "utils"))
+from detection_sistem import SysmonMalwareDetector
+from event_sources import ReplayEventSource
+from sharded_detector import ShardedMalwareDetector
+
+from synthetic_sysmon import sysmon_stream, write_model, write_stream
+
+
+def replay(detector):
+    detector.config['quarantine_enabled'] = False
+    detector.config['save_evidence'] = False
+    started = time.perf_counter()
+    detector.running = True
+    detector._monitor_sysmon_events()
+    elapsed = time.perf_counter() - started
+    detector.shutdown_logging()
+    return elapsed
+
+
+def bench_single(model_path, events_path, count):
+    detector = SysmonMalwareDetector(model_path, event_source=ReplayEventSource(events_path, speed=0))
+    elapsed = replay(detector)
+    return {
+        'events_per_second': round(count / elapsed, 1),
+        'elapsed_s': round(elapsed, 3),
+        'detections': detector.stats['malware_detected']
+    }
+
+
+def bench_workers(model_path, events_path, count, workers):
+    detector = ShardedMalwareDetector(model_path, event_source=ReplayEventSource(events_path, speed=0),
+                                      workers=workers)
+    elapsed = replay(detector)
+    return {
+        'events_per_second': round(count / detector.dispatch_seconds, 1),
+        'elapsed_s': round(detector.dispatch_seconds, 3),
+        'startup_s': round(elapsed - detector.dispatch_seconds, 3),
+        'detections': detector.stats['malware_detected'],
+        'events_per_worker': detector.routed
+    }
+
+
+def run_benchmark(events=50000, processes=2000, malicious_every=500, workers=(1, 2, 4, 8)):
+    workdir = tempfile.mkdtemp(prefix='bench_sharding_')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        model_path = write_model(Path(workdir) / 'modelo.joblib')
+        stream, _ = sysmon_stream(events, processes=processes, malicious_every=malicious_every)
+        events_path = write_stream(Path(workdir) / 'eventos.jsonl', stream)
+
+        results = {'single': bench_single(model_path, events_path, len(stream))}
+        for count in workers:
+            results[f'workers_{count}'] = bench_workers(model_path, events_path, len(stream), count)
+    finally:
+        os.chdir(cwd)
+
+    base = results.get('workers_1', results['single'])['events_per_second']
+    for result in results.values():
+        result['speedup_vs_1_worker'] = round(result['events_per_second'] / base, 2)
+
+    return {
+        'benchmark': 'sharding',
+        'params': {'events': len(stream), 'processes': processes, 'malicious_every': malicious_every,
+                   'workers': list(workers)},
+        'cpu_count': os.cpu_count(),
+        'results': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark: detector em processos (1, 2, 4, 8 workers)')
+    parser.add_argument('--events', type=int, default=50000)
+    parser.add_argument('--processes', type=int, default=2000, help='PIDs distintos no fluxo')
+    parser.add_argument('--malicious-every', type=int, default=500)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--output', help='Arquivo JSON de saída')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.events, args.processes, args.malicious_every, args.workers)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
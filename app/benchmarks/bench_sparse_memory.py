@@ -0,0 +1,114 @@
+"""
+BENCHMARK: PIPELINE DE FEATURES DENSO x ESPARSO
+Compara memória (pico via tracemalloc) e tempo do caminho antigo, que
+densificava o TF-IDF com .toarray(), com o caminho esparso de ponta a ponta:
+TF-IDF -> SelectKBest -> (TruncatedSVD) -> RandomForest.predict_proba
+
+Uso:
+    python bench_sparse_memory.py --samples 2000 --max-features 5000 --output sparse.json
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+from scipy import sparse
+from sklearn.decomposition import PCA, TruncatedSVD
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_selection import SelectKBest, chi2, mutual_info_classif
+
+from synthetic_data import api_corpus
+
+SCORE_FUNCS = {'chi2': chi2, 'mutual_info': mutual_info_classif}
+
+
+def matrix_bytes(X):
+    """Memória ocupada pela matriz (densa ou CSR)"""
+    if sparse.issparse(X):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+def run_path(texts, y, dense, max_features, k_best, n_components, score_func):
+    """Executar o pipeline de treino + inferência medindo memória e tempo"""
+    result = {}
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    vectorizer = TfidfVectorizer(max_features=max_features, ngram_range=(1, 2),
+                                 token_pattern=r'\S+', lowercase=False,
+                                 dtype=np.float64 if dense else np.float32)
+    X = vectorizer.fit_transform(texts)
+    if dense:
+        X = X.toarray()
+    result['tfidf_bytes'] = matrix_bytes(X)
+
+    selector = SelectKBest(SCORE_FUNCS[score_func], k=min(k_best, X.shape[1]))
+    X = selector.fit_transform(X, y)
+    result['selected_bytes'] = matrix_bytes(X)
+
+    if n_components:
+        reducer = PCA(n_components) if dense else TruncatedSVD(n_components, random_state=42)
+        X = reducer.fit_transform(X)
+    result['reduced_bytes'] = matrix_bytes(X)
+    result['preprocess_seconds'] = round(time.perf_counter() - started, 4)
+
+    model = RandomForestClassifier(n_estimators=50, max_depth=12, random_state=42, n_jobs=1)
+    started_fit = time.perf_counter()
+    model.fit(X, y)
+    result['fit_seconds'] = round(time.perf_counter() - started_fit, 4)
+
+    started_predict = time.perf_counter()
+    model.predict_proba(X)
+    result['predict_proba_seconds'] = round(time.perf_counter() - started_predict, 4)
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result['peak_mb'] = round(peak / 1024 / 1024, 2)
+    result['total_seconds'] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def run_benchmark(samples=2000, length=200, max_features=5000, k_best=2500,
+                  n_components=0, score_func='chi2'):
+    texts, y = api_corpus(n_samples=samples, length=length, vocab_size=400)
+    dense = run_path(texts, y, True, max_features, k_best, n_components, score_func)
+    sparse_result = run_path(texts, y, False, max_features, k_best, n_components, score_func)
+
+    return {
+        'benchmark': 'sparse_memory',
+        'params': {'samples': samples, 'length': length, 'max_features': max_features,
+                   'k_best': k_best, 'n_components': n_components, 'score_func': score_func},
+        'dense': dense,
+        'sparse': sparse_result,
+        'peak_memory_ratio': round(dense['peak_mb'] / max(sparse_result['peak_mb'], 1e-9), 2),
+        'tfidf_memory_ratio': round(dense['tfidf_bytes'] / max(sparse_result['tfidf_bytes'], 1), 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de memória: pipeline denso x esparso')
+    parser.add_argument('--samples', type=int, default=2000)
+    parser.add_argument('--length', type=int, default=200, help='API calls por amostra')
+    parser.add_argument('--max-features', type=int, default=5000)
+    parser.add_argument('--k-best', type=int, default=2500)
+    parser.add_argument('--components', type=int, default=0,
+                        help='Componentes de PCA/TruncatedSVD (0 = sem redução)')
+    parser.add_argument('--score-func', choices=sorted(SCORE_FUNCS), default='chi2')
+    parser.add_argument('--output', help='Arquivo JSON de saída')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.samples, args.length, args.max_features, args.k_best,
+                           args.components, args.score_func)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+DADOS SINTÉTICOS PARA BENCHMARKS
+Corpus de sequências de API calls no formato do mal-api-2019 (tokens separados
+por espaço), com frequências de tokens em cauda longa como no dataset real.
+"""
+
+import numpy as np
+
+BASE_APIS = [
+    'NtCreateFile', 'NtReadFile', 'NtWriteFile', 'NtClose', 'LdrLoadDll', 'LdrGetProcedureAddress',
+    'NtAllocateVirtualMemory', 'NtProtectVirtualMemory', 'NtFreeVirtualMemory', 'RegOpenKeyExW',
+    'RegQueryValueExW', 'RegSetValueExW', 'RegCloseKey', 'CreateProcessInternalW', 'OpenProcess',
+    'WriteProcessMemory', 'CreateRemoteThread', 'VirtualAllocEx', 'InternetOpenA', 'InternetConnectA',
+    'HttpSendRequestA', 'CryptEncrypt', 'CryptDecrypt', 'GetSystemTimeAsFileTime', 'Sleep',
+    'FindFirstFileExW', 'GetFileAttributesW', 'SetWindowsHookExA', 'NtMapViewOfSection', 'DeleteFileW',
+]
+
+
+def api_vocabulary(size=300):
+    """Vocabulário de APIs: nomes reais seguidos de variantes numeradas"""
+    names = list(BASE_APIS)
+    i = 0
+    while len(names) < size:
+        names.append(f"{BASE_APIS[i % len(BASE_APIS)]}_{i}")
+        i += 1
+    return names[:size]
+
+
+def api_corpus(n_samples=2000, length=200, vocab_size=300, n_classes=2, seed=42):
+    """
+    Gerar corpus rotulado de sequências de API calls
+
+    Cada classe sorteia tokens com uma distribuição Zipf deslocada, de modo que
+    as classes compartilham tokens comuns mas diferem nos frequentes.
+    """
+    rng = np.random.default_rng(seed)
+    vocab = np.array(api_vocabulary(vocab_size))
+    ranks = np.arange(1, vocab_size + 1)
+
+    texts, labels = [], []
+    for i in range(n_samples):
+        label = i % n_classes
+        weights = 1.0 / np.roll(ranks, label * 7) ** 1.1
+        tokens = rng.choice(vocab, size=length, p=weights / weights.sum())
+        texts.append(' '.join(tokens))
+        labels.append(label)
+    return texts, np.array(labels)
@@ -0,0 +1,77 @@
+"""
+EVENTOS SYSMON E MODELO SINTÉTICOS PARA BENCHMARKS DO DETECTOR
+Reaproveita os geradores dos testes (conftest.py): tráfego benigno de fundo
+com processos de longa duração e, opcionalmente, processos maliciosos que
+injetam código (CreateRemoteThread) e acessam o lsass.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import LabelEncoder
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from conftest import BENIGN_SEQUENCES, MALWARE_SEQUENCES, malicious_activity, sysmon_event
+
+BACKGROUND_IMAGE = 'C:\\Program Files\\App\\app.exe'
+BACKGROUND_EVENTS = [
+    (1, {'Image': BACKGROUND_IMAGE, 'CommandLine': 'app.exe --sync'}),
+    (3, {'Image': BACKGROUND_IMAGE, 'DestinationIp': '10.0.0.8',
+         'DestinationHostname': 'updates.example.com', 'DestinationPort': 443}),
+    (11, {'Image': BACKGROUND_IMAGE, 'TargetFilename': 'C:\\Program Files\\App\\cache.dat'}),
+    (7, {'Image': BACKGROUND_IMAGE, 'ImageLoaded': 'C:\\Windows\\System32\\user32.dll'})
+]
+
+# Evento de malicious_activity() que dispara a análise imediata (CreateRemoteThread)
+TRIGGER_INDEX = 2
+
+
+def write_model(path):
+    """Modelo sintético no formato dos modelos treinados (mesmo do conftest)"""
+    texts = BENIGN_SEQUENCES * 4 + MALWARE_SEQUENCES * 4
+    labels = ['Benign'] * 12 + ['Trojan'] * 12
+    vectorizer = TfidfVectorizer(token_pattern=r'\S+', ngram_range=(1, 2), lowercase=False)
+    encoder = LabelEncoder()
+    model = RandomForestClassifier(n_estimators=8, max_depth=4, random_state=42).fit(
+        vectorizer.fit_transform(texts), encoder.fit_transform(labels))
+    joblib.dump({'model': model, 'tfidf_vectorizer': vectorizer, 'label_encoder': encoder,
+                 'feature_selector': None, 'pca': None}, path)
+    return path
+
+
+def sysmon_stream(count, rate=1000, processes=200, malicious_every=0):
+    """
+    count eventos espaçados em 1/rate segundos (TimeCreated)
+
+    A cada malicious_every eventos de fundo entra a sequência completa de um
+    processo malicioso (PIDs a partir de 50000). Devolve (eventos, gatilhos),
+    onde gatilhos mapeia o EventRecordID do CreateRemoteThread ao PID.
+    """
+    events, triggers = [], {}
+    malicious_pid = 50000
+    while len(events) < count:
+        record = len(events) + 1
+        if malicious_every and record % malicious_every == 0:
+            burst = malicious_activity(malicious_pid, start_record=record)
+            triggers[record + TRIGGER_INDEX] = str(malicious_pid)
+            events.extend(burst)
+            malicious_pid += 1
+            continue
+        event_id, fields = BACKGROUND_EVENTS[record % len(BACKGROUND_EVENTS)]
+        events.append(sysmon_event(event_id, record, ProcessId=1000 + record % processes, **fields))
+
+    events = events[:count]
+    for i, event in enumerate(events):
+        event['TimeCreated'] = 1_700_000_000 + i / rate
+    return events, {record: pid for record, pid in triggers.items() if record <= count}
+
+
+def write_stream(path, events):
+    with open(path, 'w', encoding='utf-8') as f:
+        for event in events:
+            f.write(json.dumps(event) + '\n')
+    return path
@@ -0,0 +1,112 @@
+"""
+FIXTURES DOS TESTES DO DETECTOR
+Modelo sintético pequeno e gravações de eventos Sysmon para replay
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import joblib
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import LabelEncoder
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "utils"))
+
+from sysmon_schema import SYSMON_SCHEMA
+
+# Campos do EventData na ordem do schema do Sysmon
+EVENT_FIELDS = {event_id: list(fields) for event_id, (_, fields) in SYSMON_SCHEMA.items()}
+
+BENIGN_SEQUENCES = [
+    'CreateProcess LoadLibrary:kernel32.dll CreateFile OpenProcess',
+    'CreateProcess LoadLibrary:user32.dll RegSetValue CreateFile',
+    'CreateProcess CreateFile CreateFile LoadLibrary:gdi32.dll',
+]
+MALWARE_SEQUENCES = [
+    'CreateProcess CreateRemoteThread OpenProcess:lsass.exe CreateFile:.exe',
+    'CreateRemoteThread connect:api.openai.com:443 CreateFile:.dll CreateRemoteThread',
+    'OpenProcess:lsass.exe CreateRemoteThread RawDiskAccess CreateFile:.exe',
+]
+
+
+def sysmon_event(event_id, record_number, **fields):
+    """Evento Sysmon em formato de dicionário (uma linha do JSONL de replay)"""
+    names = EVENT_FIELDS[event_id]
+    return {
+        'EventID': event_id,
+        'TimeCreated': 1_700_000_000 + record_number * 0.001,
+        'Computer': 'VM-TCC',
+        'EventRecordID': record_number,
+        'EventData': {name: str(fields.get(name, '')) for name in names}
+    }
+
+
+def malicious_activity(pid, start_record=1):
+    """Sequência de eventos de um processo que injeta código e acessa o lsass"""
+    image = f'C:\\Users\\Public\\payload_{pid}.exe'
+    events = [
+        (1, {'ProcessId': pid, 'Image': image, 'CommandLine': f'{image} --run'}),
+        (10, {'SourceProcessId': pid, 'SourceImage': image, 'TargetImage': 'C:\\Windows\\System32\\lsass.exe'}),
+        (8, {'SourceProcessId': pid, 'SourceImage': image, 'TargetProcessId': 4}),
+        (11, {'ProcessId': pid, 'Image': image, 'TargetFilename': 'C:\\Users\\Public\\drop.exe'}),
+        (3, {'ProcessId': pid, 'Image': image, 'DestinationIp': '10.0.0.5',
+             'DestinationHostname': 'api.openai.com', 'DestinationPort': 443}),
+    ]
+    return [sysmon_event(event_id, start_record + i, **fields)
+            for i, (event_id, fields) in enumerate(events)]
+
+
+@pytest.fixture
+def write_events(tmp_path):
+    """Gravar eventos em JSONL para ReplayEventSource"""
+    def _write(events, name='eventos.jsonl'):
+        path = tmp_path / name
+        with open(path, 'w', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event) + '\n')
+        return path
+    return _write
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    """Modelo sintético no mesmo formato dos modelos treinados (dict joblib)"""
+    texts = BENIGN_SEQUENCES * 4 + MALWARE_SEQUENCES * 4
+    labels = ['Benign'] * 12 + ['Trojan'] * 12
+
+    vectorizer = TfidfVectorizer(token_pattern=r'\S+', ngram_range=(1, 2), lowercase=False)
+    X = vectorizer.fit_transform(texts)
+    encoder = LabelEncoder()
+    y = encoder.fit_transform(labels)
+    model = RandomForestClassifier(n_estimators=8, max_depth=4, random_state=42).fit(X, y)
+
+    path = tmp_path / 'modelo.joblib'
+    joblib.dump({
+        'model': model,
+        'tfidf_vectorizer': vectorizer,
+        'label_encoder': encoder,
+        'feature_selector': None,
+        'pca': None,
+    }, path)
+    return path
+
+
+@pytest.fixture
+def make_detector(tmp_path, monkeypatch, model_path):
+    """Criar SysmonMalwareDetector com logs no diretório temporário"""
+    monkeypatch.chdir(tmp_path)
+    from detection_sistem import SysmonMalwareDetector
+
+    def _make(event_source=None, **config):
+        config_path = None
+        if config:
+            config_path = tmp_path / 'config.json'
+            config_path.write_text(json.dumps(config), encoding='utf-8')
+        detector = SysmonMalwareDetector(model_path, config_path, event_source=event_source)
+        detector.config['quarantine_enabled'] = False
+        detector.config['save_evidence'] = False
+        return detector
+    return _make
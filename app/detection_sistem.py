@@ -3,34 +3,76 @@ DETECTOR DE MALWARE INTEGRADO COM SYSMON
 Sistema completo de detecção em tempo real usando eventos do Sysmon
 """
 
-import joblib
+import numpy as np
+import sys
 import time
 import json
-import win32evtlog
-import win32con
-import win32event
-import win32api
 import psutil
 import logging
 import threading
 import xml.etree.ElementTree as ET
+from time import perf_counter_ns
 from datetime import datetime
-from collections import defaultdict, deque
+from collections import deque
 from pathlib import Path
 
+# Módulos compartilhados entre detectores e coletores
+sys.path.append(str(Path(__file__).resolve().parent.parent / "utils"))
+from event_sources import ReplayEventSource, PipeEventSource, live_event_source
+from event_pipeline import EventPipeline
+from feature_accumulator import FeatureAccumulator
+from compiled_forest import CompiledForest, load_scorer
+from model_bundle import load_model_file
+from detection_policy import PolicyReloader, process_basename
+from process_state import ProcessStateStore
+from api_tokens import ApiTokenTable
+from alert_dispatcher import AlertDispatcher
+from event_checkpoint import EventCheckpoint
+from sysmon_schema import parse_sysmon_record
+from structured_logging import SampledLogger, rotating_jsonl_handler, start_queue_logging, stop_queue_logging
+from instrumentation import MetricsRegistry, MetricsServer
+from sampling_profiler import SamplingProfiler, format_summary
+from threat_indicators import (IndicatorScanner, THREAT_PATTERNS, COMBINATION_PATTERNS,
+                               SUSPICIOUS_COMMANDS, AI_DOMAINS)
+
 class SysmonMalwareDetector:
     """
     Detector de malware integrado com Sysmon
     Monitora eventos em tempo real e detecta comportamentos maliciosos
     """
     
-    def __init__(self, model_path, config_path=None):
+    # Logging usado até a configuração ser carregada (depois vale config['logging'])
+    LOGGING_DEFAULTS = {
+        'max_bytes_mb': 10,                          # Rotação de cada arquivo .jsonl
+        'backup_count': 5,
+        'queue_size': 10000,                         # Registros aguardando escrita (excesso é descartado)
+        'debug_sample_every': {'events': 100, 'ml': 1},
+        'dir': 'logs',
+        'console_level': 'INFO'
+    }
+    
+    # Grupos do resumo de --profile (cada função entra no primeiro grupo que casar)
+    PROFILE_FOCUS = {
+        'parse': ('*._parse_sysmon_event', '*._parse_event_xml', 'event_sources:*'),
+        'alert': ('*._handle_malware_detection', '*._save_evidence', '*._quarantine_process',
+                  'alert_dispatcher:*'),
+        'handler': ('*._dispatch_event', '*._handle_*', '*._check_*', '*._record_api_call',
+                    'process_state:*', 'feature_accumulator:*'),
+        'scoring': ('*._calculate_threat_score', '*._evaluate_process', 'threat_indicators:*',
+                    'aho_corasick:*'),
+        'inference': ('*._analyze_processes', '*._predict_batch', '*._preprocess_batch',
+                      '*.predict_proba', 'compiled_forest:*')
+    }
+    
+    def __init__(self, model_path, config_path=None, event_source=None):
         """
         Inicializar detector com Sysmon
         
         Args:
             model_path: Caminho para modelo treinado (.joblib)
             config_path: Caminho para configuração (opcional)
+            event_source: Fonte de eventos (padrão: log ao vivo do Sysmon;
+                          use ReplayEventSource para reproduzir eventos gravados)
         """
         print("🛡️ DETECTOR DE MALWARE COM INTEGRAÇÃO SYSMON")
         print("=" * 60)
@@ -44,21 +86,72 @@ class SysmonMalwareDetector:
         
         # Carregar configurações
         self.config = self._load_config(config_path)
+        self._setup_logging(self.config.get('logging'))
+        
+        # Listas da configuração compiladas (recarregadas quando o arquivo muda)
+        self.policy_reloader = PolicyReloader(self.config, config_path, on_reload=self._on_policy_reload)
+        self.policy = self.policy_reloader.policy
         
-        # Buffers para API calls por processo
-        self.process_api_calls = defaultdict(lambda: deque(maxlen=500))  # Aumentado para malware polimórfico
-        self.process_info = {}
+        # Tabela de internamento: buffers guardam IDs inteiros em vez de strings
+        self.api_tokens = ApiTokenTable()
+        
+        # Contagens de n-gramas do TF-IDF atualizadas a cada API call (por processo)
+        self.feature_accumulator = FeatureAccumulator.from_vectorizer(self.tfidf_vectorizer, self.api_tokens)
+        
+        # Autômato único com todos os indicadores; contadores por processo a cada API call
+        self.indicator_scanner = IndicatorScanner({
+            **THREAT_PATTERNS,
+            **COMBINATION_PATTERNS,
+            'ai_keywords': self.config['polymorphic_detection'].get('ai_keywords', []),
+            'suspicious_commands': SUSPICIOUS_COMMANDS,
+            'ai_domains': AI_DOMAINS
+        }, table=self.api_tokens)
         
         # Histórico de detecções
         self.detections = deque(maxlen=1000)
         
+        # Histogramas de latência por estágio e métricas para o /metrics
+        self._setup_metrics()
+        
+        # Alertas do webhook saem por uma thread própria; a análise só enfileira
+        self.alert_dispatcher = None
+        if self.config.get('alert_webhook'):
+            self.alert_dispatcher = AlertDispatcher.from_config(
+                self.config['alert_webhook'],
+                self.config.get('alert_delivery'),
+                build_embed=self._webhook_embed,
+                on_delivered=self._on_alerts_delivered,
+                logger=self.logger,
+                latency_histogram=self.alert_latency
+            )
+        
         # Controle de execução
         self.running = False
-        self.sysmon_handle = None
+        self.event_source = event_source or live_event_source(
+            subscribe=self.config.get('ingestion', 'subscribe') == 'subscribe')
+        self.pipeline = None
+        self.checkpoint = None
+        
+        # Workers de inferência leem os buffers enquanto o handler os altera
+        self.state_lock = threading.RLock()
+        
+        # Estado por processo (buffer de API calls, janelas incrementais, info)
+        # com TTL, LRU e orçamento de memória
+        self.process_state = ProcessStateStore.from_config(
+            self.config['process_state'],
+            features_factory=self.feature_accumulator.new_window if self.feature_accumulator else None,
+            indicators_factory=self.indicator_scanner.new_window,
+            lock=self.state_lock,
+            table=self.api_tokens
+        )
+        self.process_api_calls = self.process_state.view('calls')
+        self.process_features = self.process_state.view('features')
+        self.process_indicators = self.process_state.view('indicators')
+        self.process_info = self.process_state.view('info')
+        self.pattern_counters = self.process_state.view('pattern_counters')
         
         # Cache para melhor performance
         self.process_cache = {}
-        self.last_cleanup = datetime.now()
         
         # Padrões específicos para malware polimórfico
         self.polymorphic_indicators = {
@@ -69,15 +162,13 @@ class SysmonMalwareDetector:
             'persistence': ['RegSetValue', 'CreateService', 'SetWindowsHookEx']
         }
         
-        # Contadores para padrões específicos
-        self.pattern_counters = defaultdict(lambda: defaultdict(int))
-        
         # Estatísticas avançadas
         self.stats = {
             'events_processed': 0,
             'processes_monitored': 0,
             'malware_detected': 0,
             'quarantined': 0,
+            'alerts_sent': 0,
             'false_positives': 0,
             'polymorphic_detected': 0,
             'memory_injections': 0,
@@ -122,77 +213,109 @@ class SysmonMalwareDetector:
         
         self.logger.info("✅ Detector inicializado com sucesso\n")
     
-    def _setup_logging(self):
-        """Configurar sistema de logging avançado"""
+    def _setup_logging(self, options=None):
+        """
+        Configurar logging assíncrono: o caminho quente só enfileira o registro;
+        uma thread formata (JSON lines) e grava em arquivos com rotação
+        """
+        options = {**self.LOGGING_DEFAULTS, **(options or {})}
         
         # Criar diretório de logs se não existir
-        log_dir = Path("logs")
-        log_dir.mkdir(exist_ok=True)
-        
-        # Configurar formatação detalhada
-        detailed_format = '%(asctime)s [%(levelname)8s] [%(name)s:%(lineno)d] %(message)s'
-        
-        # Configurar handler para arquivo principal
-        main_handler = logging.FileHandler(
-            log_dir / 'sysmon_detector.log', 
-            encoding='utf-8'
-        )
-        main_handler.setLevel(logging.INFO)
-        main_handler.setFormatter(logging.Formatter(detailed_format))
-        
-        # Handler para debugging detalhado
-        debug_handler = logging.FileHandler(
-            log_dir / 'sysmon_debug.log', 
-            encoding='utf-8'
-        )
-        debug_handler.setLevel(logging.DEBUG)
-        debug_handler.setFormatter(logging.Formatter(detailed_format))
+        log_dir = Path(options['dir'])
+        log_dir.mkdir(parents=True, exist_ok=True)
         
-        # Handler para eventos críticos
-        critical_handler = logging.FileHandler(
-            log_dir / 'sysmon_critical.log', 
-            encoding='utf-8'
-        )
-        critical_handler.setLevel(logging.CRITICAL)
-        critical_handler.setFormatter(logging.Formatter(detailed_format))
+        rotation = {
+            'max_bytes': int(options['max_bytes_mb'] * 1024 * 1024),
+            'backup_count': options['backup_count']
+        }
         
-        # Handler para console
+        # Handler para console (texto legível)
         console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
+        console_handler.setLevel(options['console_level'])
         console_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
         
-        # Configurar logger principal
+        handlers = [
+            # Arquivo principal, debugging detalhado e eventos críticos
+            rotating_jsonl_handler(log_dir / 'sysmon_detector.jsonl', logging.INFO, **rotation),
+            rotating_jsonl_handler(log_dir / 'sysmon_debug.jsonl', logging.DEBUG, **rotation),
+            rotating_jsonl_handler(log_dir / 'sysmon_critical.jsonl', logging.CRITICAL, **rotation),
+            console_handler,
+            # Arquivos específicos de eventos e de análise ML
+            rotating_jsonl_handler(log_dir / 'sysmon_events.jsonl', logger_name=f"{__name__}.events", **rotation),
+            rotating_jsonl_handler(log_dir / 'sysmon_ml_analysis.jsonl', logger_name=f"{__name__}.ml", **rotation)
+        ]
+        
+        # Logger principal: uma única fila; .events e .ml propagam para ela
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.DEBUG)
-        self.logger.addHandler(main_handler)
-        self.logger.addHandler(debug_handler)
-        self.logger.addHandler(critical_handler)
-        self.logger.addHandler(console_handler)
-        
-        # Logger específico para eventos
-        self.event_logger = logging.getLogger(f"{__name__}.events")
-        self.event_logger.setLevel(logging.DEBUG)
-        event_handler = logging.FileHandler(
-            log_dir / 'sysmon_events.log', 
-            encoding='utf-8'
-        )
-        event_handler.setFormatter(logging.Formatter(detailed_format))
-        self.event_logger.addHandler(event_handler)
-        
-        # Logger para análise ML
-        self.ml_logger = logging.getLogger(f"{__name__}.ml")
-        self.ml_logger.setLevel(logging.DEBUG)
-        ml_handler = logging.FileHandler(
-            log_dir / 'sysmon_ml_analysis.log', 
-            encoding='utf-8'
-        )
-        ml_handler.setFormatter(logging.Formatter(detailed_format))
-        self.ml_logger.addHandler(ml_handler)
+        self.log_queue = start_queue_logging(self.logger, handlers, options['queue_size'])
+        
+        # Loggers de alto volume com amostragem das mensagens DEBUG
+        sample_every = options['debug_sample_every']
+        self.event_logger = SampledLogger(logging.getLogger(f"{__name__}.events"), sample_every.get('events', 1))
+        self.event_logger.logger.setLevel(logging.DEBUG)
+        self.ml_logger = SampledLogger(logging.getLogger(f"{__name__}.ml"), sample_every.get('ml', 1))
+        self.ml_logger.logger.setLevel(logging.DEBUG)
+    
+    def shutdown_logging(self):
+        """Gravar os registros pendentes na fila e fechar os arquivos de log"""
+        stop_queue_logging(self.logger)
+    
+    def _setup_metrics(self):
+        """
+        Registrar histogramas de latência (caminho quente) e métricas lidas só
+        na coleta do /metrics (estatísticas, filas, descartes)
+        """
+        self.metrics = MetricsRegistry(prefix='sysmon_detector_')
+        self.metrics_server = None
+        
+        latency_help = 'Latência por estágio do detector em segundos'
+        self.parse_latency = self.metrics.histogram('stage_latency_seconds', latency_help, stage='parse')
+        self.handler_latency = self.metrics.histogram('stage_latency_seconds', latency_help, stage='handler')
+        self.feature_latency = self.metrics.histogram('stage_latency_seconds', latency_help, stage='features')
+        self.inference_latency = self.metrics.histogram('stage_latency_seconds', latency_help, stage='inference')
+        self.alert_latency = self.metrics.histogram('stage_latency_seconds', latency_help, stage='alert')
+        
+        for key in ('events_processed', 'malware_detected', 'alerts_sent', 'quarantined'):
+            self.metrics.counter(f'{key}_total', f'Total de {key} desde o início',
+                                 lambda key=key: self.stats[key])
+        self.metrics.counter('log_records_dropped_total', 'Registros de log descartados (fila cheia)',
+                             lambda: self.log_queue.dropped)
+        self.metrics.gauge('processes_tracked', 'Processos com estado em memória',
+                           lambda: len(self.process_state))
+        
+        # Filas do pipeline (existem só depois que o monitoramento começa)
+        for stage in ('parser', 'handler', 'inference'):
+            for key, kind, help_text in (
+                ('depth', 'gauge', 'Itens aguardando na fila do estágio'),
+                ('max_depth', 'gauge', 'Maior profundidade observada na fila do estágio'),
+                ('dropped', 'counter', 'Itens descartados com a fila cheia'),
+                ('coalesced', 'counter', 'Pedidos agrupados com um pedido já enfileirado')
+            ):
+                name = f'queue_{key}' if kind == 'gauge' else f'queue_{key}_total'
+                read = lambda stage=stage, key=key: self.pipeline.metrics()[stage][key]
+                getattr(self.metrics, kind)(name, help_text, read, stage=stage)
+        
+        for key in ('queued', 'failed', 'spilled'):
+            self.metrics.gauge(f'alert_{key}', f'Alertas do webhook: {key}',
+                               lambda key=key: self.alert_dispatcher.metrics()[key])
+    
+    def _start_metrics_server(self):
+        options = self.config.get('metrics') or {}
+        if not options.get('enabled'):
+            return
+        try:
+            self.metrics_server = MetricsServer(self.metrics, options.get('host', '127.0.0.1'),
+                                                options.get('port', 9108)).start()
+            self.logger.info(f"✓ Métricas em {self.metrics_server.url}")
+        except OSError as e:
+            self.metrics_server = None
+            self.logger.warning(f"Endpoint de métricas indisponível: {e}")
     
     def _load_model(self, model_path):
-        """Carregar modelo treinado"""
+        """Carregar modelo treinado (bundle único memory-mapped ou dict joblib legado)"""
         try:
-            model_data = joblib.load(model_path)
+            model_data = load_model_file(model_path)
             
             self.model = model_data['model']
             self.tfidf_vectorizer = model_data.get('tfidf_vectorizer')
@@ -201,7 +324,15 @@ class SysmonMalwareDetector:
             self.label_encoder = model_data.get('label_encoder')
             self.feature_selector = model_data.get('feature_selector')
             
+            # Floresta compilada quando o modelo é um RandomForest (mesmo resultado, sem overhead do sklearn)
+            self.scorer = load_scorer(self.model, model_path)
+            
             self.logger.info("✓ Modelo carregado com sucesso")
+            if 'metadata' in model_data:
+                self.logger.info(f"✓ Bundle do modelo: {model_data['metadata'].get('model_type')} "
+                                 f"criado em {model_data['metadata'].get('created_at')}")
+            if isinstance(self.scorer, CompiledForest):
+                self.logger.info(f"✓ Inferência com floresta compilada ({self.scorer.n_estimators} árvores)")
             
         except Exception as e:
             self.logger.error(f"❌ Erro ao carregar modelo: {e}")
@@ -253,7 +384,78 @@ class SysmonMalwareDetector:
             'suspicious_directories': [
                 'temp', 'tmp', 'appdata\\local\\temp', 'windows\\temp',
                 'programdata', 'users\\public'
-            ]
+            ],
+            
+            # Chaves de registro usadas para persistência
+            'persistence_keys': [
+                'run', 'runonce', 'services', 'currentversion\\run',
+                'currentversion\\runonce', 'winlogon', 'userinit'
+            ],
+            
+            # Estado por processo: limites de memória e descarte de processos inativos
+            'process_state': {
+                'buffer_size': 500,          # API calls por processo (malware polimórfico)
+                'max_processes': 5000,
+                'ttl_seconds': 3600,         # Sem atividade por 1 hora
+                'memory_budget_mb': 256      # Estimativa total dos buffers
+            },
+            
+            # Pipeline em estágios (filas limitadas entre leitura, parsing, handlers e ML)
+            'pipeline': {
+                'parse_queue_size': 100,         # Lotes lidos aguardando parsing
+                'handler_queue_size': 5000,      # Eventos parseados aguardando handler
+                'inference_queue_size': 1000,    # PIDs aguardando inferência
+                'inference_workers': 2,
+                'inference_submit_timeout': 0.5, # Espera máxima com a fila de inferência cheia
+                'idle_sleep': 0.1,               # Leitura por polling: pausa após leitura vazia
+                'wait_timeout': 1.0,             # Assinatura: espera máxima por evento (só para checar o stop)
+                'stop_timeout': 10.0             # stop(): espera máxima pelo esvaziamento das filas
+            },
+            
+            # Modo em processos (--workers): eventos divididos por PID entre workers
+            'sharding': {
+                'workers': 0,                # 0 = um worker por núcleo
+                'batch_size': 256,           # Eventos por envio a um worker
+                'queue_size': 64,            # Lotes aguardando em cada worker
+                'start_timeout': 120,        # Segundos para cada worker carregar o modelo
+                'progress_interval': 0.5,    # Segundos entre avisos de posição tratada (checkpoint)
+                'put_timeout': 1.0           # Espera por vaga na fila antes de verificar se o worker vive
+            },
+            
+            # 'subscribe': eventos entregues pelo EvtSubscribe assim que gravados;
+            # 'poll': ReadEventLog a cada idle_sleep segundos
+            'ingestion': 'subscribe',
+            
+            # Endpoint local no formato do Prometheus (GET /metrics)
+            'metrics': {
+                'enabled': True,
+                'host': '127.0.0.1',
+                'port': 9108
+            },
+            
+            # Último RecordNumber processado, para retomar a leitura após reinício
+            'checkpoint': {
+                'enabled': True,
+                'path': 'state/sysmon_checkpoint.json',
+                'save_interval': 1.0,        # Numa queda, relê no máximo ~1 s de eventos
+                'replay': False              # Replays recomeçam do início (--resume para continuar)
+            },
+            
+            # Logging assíncrono em JSON lines (ver LOGGING_DEFAULTS)
+            'logging': {
+                'max_bytes_mb': 10,
+                'backup_count': 5,
+                'queue_size': 10000,
+                'debug_sample_every': {'events': 100, 'ml': 1}
+            },
+            
+            # Entrega de alertas do webhook em segundo plano
+            'alert_delivery': {
+                'max_batch': 10,             # Embeds por mensagem (limite do Discord)
+                'batch_window': 0.5,         # Segundos agrupando uma rajada de detecções
+                'max_retries': 5,            # Backoff exponencial; 429 respeita Retry-After
+                'spill_path': 'logs/alertas_pendentes.jsonl'
+            }
         }
         
         if config_path and Path(config_path).exists():
@@ -272,19 +474,35 @@ class SysmonMalwareDetector:
         
         return default_config
     
+    def _on_policy_reload(self, policy):
+        self.policy = policy
+        self.logger.info("🔄 Listas de processos/arquivos recarregadas da configuração")
+    
+    def _reload_policy(self):
+        """Recompilar a política se o arquivo de configuração mudou"""
+        try:
+            self.policy_reloader.check()
+        except Exception as e:
+            self.logger.warning(f"Erro ao recarregar configuração: {e}")
+    
     def start(self):
         """Iniciar monitoramento com Sysmon"""
         self.logger.info("🚀 INICIANDO MONITORAMENTO COM SYSMON")
         self.logger.info("=" * 60)
         
-        # Verificar se Sysmon está instalado
+        # Verificar se Sysmon está instalado (ou se o arquivo de replay existe)
         if not self._check_sysmon():
-            self.logger.error("❌ Sysmon não está instalado ou não está executando")
-            self.logger.error("Execute o instalador do Sysmon primeiro")
+            self.logger.error("❌ Fonte de eventos indisponível")
+            self.logger.error("Execute o instalador do Sysmon primeiro ou informe um arquivo de replay")
             return
         
         self.running = True
         self.stats['start_time'] = datetime.now()
+        self._rate_mark = (time.monotonic(), self.stats['events_processed'])
+        
+        if self.alert_dispatcher:
+            self.alert_dispatcher.start()
+        self._start_metrics_server()
         
         # Thread para monitorar eventos do Sysmon
         monitor_thread = threading.Thread(target=self._monitor_sysmon_events, daemon=True)
@@ -313,28 +531,64 @@ class SysmonMalwareDetector:
         finally:
             self.stop()
     
+    def profile(self, output_prefix, interval=0.005):
+        """
+        Executar o monitoramento (replay) sob o profiler amostral
+        
+        Grava <output_prefix>.collapsed (pilhas para flamegraph) e
+        <output_prefix>_summary.json (amostras por função nos grupos de
+        PROFILE_FOCUS) e devolve o resumo.
+        """
+        profiler = SamplingProfiler(interval=interval)
+        with profiler:
+            self.start()
+        
+        output_prefix = Path(output_prefix)
+        collapsed_path = profiler.write_collapsed(output_prefix.with_name(output_prefix.name + '.collapsed'))
+        summary = profiler.summary(self.PROFILE_FOCUS)
+        summary['events_processed'] = self.stats['events_processed']
+        summary_path = output_prefix.with_name(output_prefix.name + '_summary.json')
+        summary_path.write_text(json.dumps(summary, indent=2), encoding='utf-8')
+        summary['files'] = {'collapsed': str(collapsed_path), 'summary': str(summary_path)}
+        return summary
+    
     def stop(self):
         """Parar monitoramento"""
         self.logger.info("🛑 Parando detector...")
         self.running = False
         
-        if self.sysmon_handle:
-            try:
-                win32evtlog.CloseEventLog(self.sysmon_handle)
-            except:
-                pass
+        # Parar o leitor e esperar os handlers antes de fechar a fonte e gravar o checkpoint
+        if self.pipeline:
+            self.pipeline.stop()
+            timeout = (self.config.get('pipeline') or {}).get('stop_timeout', 10.0)
+            if not self.pipeline.finished.wait(timeout):
+                self.logger.warning(f"Pipeline não terminou em {timeout}s; fechando a fonte assim mesmo")
+        
+        self.event_source.close()
+        
+        if self.checkpoint:
+            self.checkpoint.flush()
+        
+        if self.alert_dispatcher:
+            # Alertas não entregues ficam na fila em disco para a próxima execução
+            self.alert_dispatcher.stop()
+        
+        if self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
         
         self._print_final_statistics()
         self.logger.info("✅ Detector parado com sucesso")
+        self.shutdown_logging()
     
     def _check_sysmon(self):
-        """Verificar se Sysmon está instalado e executando"""
+        """Verificar se a fonte de eventos (Sysmon ou replay) está disponível"""
         try:
-            # Tentar abrir log do Sysmon
-            hand = win32evtlog.OpenEventLog(None, "Microsoft-Windows-Sysmon/Operational")
-            win32evtlog.CloseEventLog(hand)
+            if not self.event_source.is_available():
+                self.logger.error(f"Fonte de eventos '{self.event_source.name}' indisponível")
+                return False
             
-            self.logger.info("✓ Sysmon detectado e operacional")
+            self.logger.info(f"✓ Fonte de eventos '{self.event_source.name}' detectada e operacional")
             return True
             
         except Exception as e:
@@ -342,187 +596,142 @@ class SysmonMalwareDetector:
             return False
     
     def _monitor_sysmon_events(self):
-        """Thread otimizada para monitorar eventos do Sysmon em tempo real"""
+        """Thread que conduz o pipeline leitura -> parsing -> handlers -> inferência"""
         try:
-            # Abrir log do Sysmon
-            self.sysmon_handle = win32evtlog.OpenEventLog(
-                None, 
-                "Microsoft-Windows-Sysmon/Operational"
-            )
+            # Continuar do último evento processado na execução anterior
+            self._setup_checkpoint()
             
-            # Configurar para ler eventos mais recentes
-            flags = win32evtlog.EVENTLOG_FORWARDS_READ | win32evtlog.EVENTLOG_SEQUENTIAL_READ
+            # Abrir fonte de eventos (log do Sysmon ou arquivo de replay)
+            self.event_source.open()
             
-            self.logger.info("✓ Conectado ao log do Sysmon")
+            self.logger.info(f"✓ Conectado à fonte de eventos: {self.event_source.name}")
             self.event_logger.info("Iniciando captura de eventos Sysmon")
             
-            # Controle de performance
-            events_batch = []
-            last_batch_time = time.time()
-            batch_size = 50  # Processar em lotes para melhor performance
+            self.pipeline = EventPipeline(
+                read_batch=self.event_source.read,
+                parse_event=self._parse_sysmon_event,
+                handle_event=self._dispatch_event,
+                analyze=self._analyze_process,
+                is_exhausted=lambda: self.event_source.exhausted,
+                on_checkpoint=self.checkpoint.commit if self.checkpoint else None,
+                wait_events=self.event_source.wait if self.event_source.push else None,
+                config=self.config.get('pipeline'),
+                logger=self.logger
+            )
+            self.pipeline.start()
+            self.logger.info(f"✓ Pipeline iniciado ({self.pipeline.inference.workers} workers de inferência)")
             
-            while self.running:
-                try:
-                    # Ler eventos
-                    events = win32evtlog.ReadEventLog(
-                        self.sysmon_handle,
-                        flags,
-                        0
-                    )
-                    
-                    if events:
-                        current_time = time.time()
-                        
-                        for event in events:
-                            if not self.running:
-                                break
-                            
-                            events_batch.append(event)
-                            
-                            # Processar em lotes ou quando batch fica cheio
-                            if (len(events_batch) >= batch_size or 
-                                current_time - last_batch_time > 1.0):
-                                
-                                self._process_event_batch(events_batch)
-                                events_batch.clear()
-                                last_batch_time = current_time
-                        
-                        # Atualizar estatísticas de performance
-                        self.stats['events_per_second'] = len(events) / max(0.1, current_time - time.time())
-                        self.stats['last_event_time'] = datetime.now()
-                    else:
-                        # Sem eventos, processar batch restante se houver
-                        if events_batch:
-                            self._process_event_batch(events_batch)
-                            events_batch.clear()
-                    
-                    # Delay adaptativo baseado na carga de eventos
-                    if len(events_batch) > batch_size * 0.8:
-                        time.sleep(0.05)  # Muitos eventos, delay menor
-                    else:
-                        time.sleep(0.1)   # Poucos eventos, delay maior
-                    
-                except Exception as e:
-                    if self.running:
-                        self.logger.debug(f"Erro ao ler eventos: {e}")
-                        time.sleep(1)
+            # Aguardar o fim da leitura e o esvaziamento das filas
+            while not self.pipeline.finished.wait(0.5):
+                if not self.running:
+                    self.pipeline.stop()
+            
+            # Filas vazias: gravar a posição do último evento processado
+            if self.checkpoint:
+                self.checkpoint.flush()
+            
+            # Replay terminou: encerrar o detector
+            if self.running and self.event_source.exhausted:
+                self._finish_replay()
             
         except Exception as e:
             self.logger.error(f"Erro no monitoramento Sysmon: {e}")
             
+    def _setup_checkpoint(self):
+        """Carregar o checkpoint da fonte e posicionar a leitura após o último evento processado"""
+        options = self.config.get('checkpoint') or {}
+        self.checkpoint = None
+        if not options.get('enabled'):
+            return
+        if isinstance(self.event_source, (ReplayEventSource, PipeEventSource)) and not options.get('replay'):
+            return
+        
+        self.checkpoint = EventCheckpoint(options.get('path', 'state/sysmon_checkpoint.json'),
+                                          self.event_source.checkpoint_key,
+                                          options.get('save_interval', 1.0))
+        record_number = self.checkpoint.load()
+        if record_number:
+            self.event_source.resume_after(record_number)
+            self.logger.info(f"↪️ Retomando {self.event_source.name} após o registro {record_number}")
+    
+    def _finish_replay(self):
+        """Registrar throughput do replay e parar o detector"""
+        source = self.event_source
+        elapsed = getattr(source, 'elapsed', 0)
+        rate = getattr(source, 'events_per_second', 0)
+        
+        self.logger.info(f"🏁 Replay concluído: {self.stats['events_processed']} eventos "
+                         f"em {elapsed:.2f}s ({rate:.1f} eventos/segundo)")
+        self.running = False
+    
     def _process_event_batch(self, events_batch):
         """Processar lote de eventos para melhor performance"""
         for event in events_batch:
             try:
                 self._process_sysmon_event(event)
-                self.stats['events_processed'] += 1
             except Exception as e:
-                self.event_logger.debug(f"Erro ao processar evento em lote: {e}")
+                self.event_logger.debug("Erro ao processar evento em lote: %s", e)
     
     def _process_sysmon_event(self, event):
-        """Processar evento individual do Sysmon com logging detalhado"""
+        """Processar evento individual do Sysmon (parsing + handler na mesma thread)"""
+        parsed = self._parse_sysmon_event(event)
+        if parsed:
+            self._dispatch_event(parsed)
+    
+    def _parse_sysmon_event(self, event):
+        """Estágio de parsing: filtrar e extrair dados do evento"""
+        started = perf_counter_ns()
+        self.stats['events_processed'] += 1
         try:
             event_id = event.EventID & 0xFFFF  # Remover bits de severidade
             
-            # Log detalhado do evento
-            self.event_logger.debug(f"Processando evento ID {event_id} de {event.ComputerName}")
-            
             # Verificar se é um evento que monitoramos
             if event_id not in self.config['sysmon_events']:
-                self.event_logger.debug(f"Evento ID {event_id} não está na lista de monitoramento")
-                return
+                self.event_logger.debug("Evento ID %s não está na lista de monitoramento", event_id)
+                return None
             
             # Extrair dados do evento
             event_data = self._parse_event_xml(event)
             
             if not event_data:
-                self.event_logger.debug(f"Falha ao parsear evento ID {event_id}")
-                return
+                self.event_logger.debug("Falha ao parsear evento ID %s", event_id)
+                return None
             
-            # Log do evento parseado
-            self.event_logger.debug(f"Evento parseado: {event_data}")
+            # Log do evento parseado (amostrado; campos estruturados no JSON)
+            self.event_logger.debug("Evento ID %s parseado", event_id, extra={'fields': event_data})
+            return event_id, event_data
             
-            # Chamar handler apropriado
+        except Exception as e:
+            self.event_logger.error("Erro ao processar evento: %s", e)
+            self.logger.debug("Erro ao processar evento: %s", e)
+            return None
+        finally:
+            self.parse_latency.observe_since(started)
+    
+    def _dispatch_event(self, parsed):
+        """Estágio de handlers: chamar o handler apropriado do evento"""
+        started = perf_counter_ns()
+        event_id, event_data = parsed
+        try:
             handler = self.event_handlers.get(event_id)
             if handler:
                 handler(event_data)
-                self.event_logger.debug(f"Handler executado para evento ID {event_id}")
             else:
-                self.event_logger.warning(f"Handler não encontrado para evento ID {event_id}")
+                self.event_logger.warning("Handler não encontrado para evento ID %s", event_id)
             
         except Exception as e:
-            self.event_logger.error(f"Erro ao processar evento: {e}")
-            self.logger.debug(f"Erro ao processar evento: {e}")
+            self.event_logger.error("Erro ao processar evento: %s", e)
+            self.logger.debug("Erro ao processar evento: %s", e)
+        finally:
+            self.stats['last_event_time'] = datetime.now()
+            self.handler_latency.observe_since(started)
     
     def _parse_event_xml(self, event):
-        """Parser de evento do Sysmon (extração de dados XML)"""
+        """Parser de evento do Sysmon: campos nomeados pelo schema de cada Event ID"""
         try:
-            # Converter para XML
-            xml_data = event.StringInserts
-            
-            if not xml_data:
-                return None
-            
-            # Criar dicionário com dados do evento
-            event_dict = {
-                'EventID': event.EventID & 0xFFFF,
-                'TimeCreated': event.TimeGenerated,
-                'Computer': event.ComputerName
-            }
-            
-            # Adicionar campos específicos baseados no Event ID
-            if len(xml_data) > 0:
-                event_id = event_dict['EventID']
-                
-                if event_id == 1:  # Process Create
-                    event_dict.update({
-                        'ProcessId': xml_data[3] if len(xml_data) > 3 else None,
-                        'Image': xml_data[4] if len(xml_data) > 4 else None,
-                        'CommandLine': xml_data[10] if len(xml_data) > 10 else None,
-                        'ParentImage': xml_data[13] if len(xml_data) > 13 else None
-                    })
-                    
-                elif event_id == 3:  # Network Connect
-                    event_dict.update({
-                        'ProcessId': xml_data[3] if len(xml_data) > 3 else None,
-                        'Image': xml_data[4] if len(xml_data) > 4 else None,
-                        'DestinationIp': xml_data[14] if len(xml_data) > 14 else None,
-                        'DestinationPort': xml_data[16] if len(xml_data) > 16 else None
-                    })
-                    
-                elif event_id == 7:  # Image Load
-                    event_dict.update({
-                        'ProcessId': xml_data[3] if len(xml_data) > 3 else None,
-                        'Image': xml_data[4] if len(xml_data) > 4 else None,
-                        'ImageLoaded': xml_data[5] if len(xml_data) > 5 else None
-                    })
-                    
-                elif event_id == 8:  # CreateRemoteThread
-                    event_dict.update({
-                        'SourceProcessId': xml_data[3] if len(xml_data) > 3 else None,
-                        'TargetProcessId': xml_data[6] if len(xml_data) > 6 else None,
-                        'SourceImage': xml_data[4] if len(xml_data) > 4 else None
-                    })
-                    
-                elif event_id == 10:  # Process Access
-                    event_dict.update({
-                        'SourceProcessId': xml_data[3] if len(xml_data) > 3 else None,
-                        'TargetProcessId': xml_data[6] if len(xml_data) > 6 else None,
-                        'SourceImage': xml_data[4] if len(xml_data) > 4 else None,
-                        'TargetImage': xml_data[7] if len(xml_data) > 7 else None
-                    })
-                    
-                elif event_id == 11:  # File Create
-                    event_dict.update({
-                        'ProcessId': xml_data[3] if len(xml_data) > 3 else None,
-                        'Image': xml_data[4] if len(xml_data) > 4 else None,
-                        'TargetFilename': xml_data[5] if len(xml_data) > 5 else None
-                    })
-            
-            return event_dict
-            
+            return parse_sysmon_record(event)
         except Exception as e:
-            self.logger.debug(f"Erro ao parsear XML: {e}")
+            self.logger.debug("Erro ao parsear XML: %s", e)
             return None
     
     def _handle_process_create(self, event_data):
@@ -536,17 +745,17 @@ class SysmonMalwareDetector:
             return
         
         # Verificar whitelist
-        process_name = Path(image).name.lower() if image else ''
-        if process_name in [p.lower() for p in self.config['whitelist_processes']]:
-            self.event_logger.debug(f"Processo {process_name} está na whitelist - ignorando")
+        process_name = process_basename(image)
+        if process_name in self.policy.whitelist:
+            self.event_logger.debug("Processo %s está na whitelist - ignorando", process_name)
             return
         
         # Log detalhado do processo criado
-        self.event_logger.info(f"Novo processo: {process_name} (PID: {pid})")
-        self.event_logger.debug(f"Comando: {cmdline}")
+        self.event_logger.debug("Novo processo: %s (PID: %s)", process_name, pid)
+        self.event_logger.debug("Comando: %s", cmdline)
         
         # Adicionar à lista de processos monitorados
-        self.process_info[pid] = {
+        self.process_state.touch(pid).info = {
             'image': image,
             'cmdline': cmdline,
             'parent': event_data.get('ParentImage', ''),
@@ -556,7 +765,7 @@ class SysmonMalwareDetector:
         }
         
         # Registrar API call
-        self.process_api_calls[pid].append('CreateProcess')
+        self._record_api_call(pid, 'CreateProcess')
         
         # Verificações específicas para malware polimórfico
         self._check_polymorphic_indicators(pid, 'process_create', {
@@ -566,7 +775,7 @@ class SysmonMalwareDetector:
         })
         
         self.stats['processes_monitored'] += 1
-        self.event_logger.debug(f"Processo {pid} adicionado ao monitoramento")
+        self.event_logger.debug("Processo %s adicionado ao monitoramento", pid)
     
     def _handle_network_connect(self, event_data):
         """Handler otimizado para Event ID 3: Network Connection"""
@@ -579,7 +788,7 @@ class SysmonMalwareDetector:
             return
         
         # Log conexão de rede
-        self.event_logger.info(f"Conexão de rede PID {pid}: {dest_ip}:{dest_port} ({dest_hostname})")
+        self.event_logger.debug("Conexão de rede PID %s: %s:%s (%s)", pid, dest_ip, dest_port, dest_hostname)
         
         # Registrar API call detalhada
         if dest_hostname:
@@ -589,7 +798,7 @@ class SysmonMalwareDetector:
         else:
             api_call = "connect"
         
-        self.process_api_calls[pid].append(api_call)
+        self._record_api_call(pid, api_call)
         
         # Verificar indicadores de comunicação com IA
         self._check_ai_communication(pid, dest_hostname, dest_ip, dest_port)
@@ -608,12 +817,12 @@ class SysmonMalwareDetector:
         source_image = event_data.get('SourceImage', '')
         
         # Log crítico para injeção de código
-        self.logger.critical(f"🚨 INJEÇÃO DE CÓDIGO DETECTADA!")
-        self.logger.critical(f"Processo origem: {source_image} (PID: {source_pid})")
-        self.logger.critical(f"Processo destino: PID {target_pid}")
+        self.logger.critical("🚨 INJEÇÃO DE CÓDIGO DETECTADA!")
+        self.logger.critical("Processo origem: %s (PID: %s)", source_image, source_pid)
+        self.logger.critical("Processo destino: PID %s", target_pid)
         
         if source_pid:
-            self.process_api_calls[source_pid].append('CreateRemoteThread')
+            self._record_api_call(source_pid, 'CreateRemoteThread')
             
             # Marcar como altamente suspeito
             if source_pid in self.process_info:
@@ -622,9 +831,9 @@ class SysmonMalwareDetector:
             # Incrementar contador de injeções
             self.stats['memory_injections'] += 1
             
-            # Verificar imediatamente - injeção é comportamento crítico
-            self.logger.warning(f"Analisando processo {source_pid} imediatamente devido à injeção")
-            self._analyze_process(source_pid)
+            # Priorizar análise - injeção é comportamento crítico
+            self.logger.warning("Analisando processo %s imediatamente devido à injeção", source_pid)
+            self._request_analysis(source_pid)
             
             # Padrão polimórfico crítico
             self._check_polymorphic_indicators(source_pid, 'injection', {
@@ -641,24 +850,24 @@ class SysmonMalwareDetector:
         if not source_pid:
             return
         
-        target_name = Path(target_image).name.lower() if target_image else ''
+        target_name = process_basename(target_image)
         
         # Log acesso a processo
-        self.event_logger.debug(f"Acesso a processo: PID {source_pid} -> {target_name} (Access: {access_mask})")
+        self.event_logger.debug("Acesso a processo: PID %s -> %s (Access: %s)", source_pid, target_name, access_mask)
         
         # Verificar acesso a processos críticos
-        if target_name in [p.lower() for p in self.config['critical_processes']]:
-            self.logger.warning(f"⚠️ Acesso a processo crítico: {target_name}")
-            self.process_api_calls[source_pid].append(f"OpenProcess:{target_name}")
+        if target_name in self.policy.critical:
+            self.logger.warning("⚠️ Acesso a processo crítico: %s", target_name)
+            self._record_api_call(source_pid, f"OpenProcess:{target_name}")
             
             # Marcar como suspeito
             if source_pid in self.process_info:
                 self.process_info[source_pid]['suspicious_score'] += 30
             
             # Analisar imediatamente
-            self._analyze_process(source_pid)
+            self._request_analysis(source_pid)
         else:
-            self.process_api_calls[source_pid].append('OpenProcess')
+            self._record_api_call(source_pid, 'OpenProcess')
     
     def _handle_file_create(self, event_data):
         """Handler para Event ID 11: File Create"""
@@ -668,31 +877,28 @@ class SysmonMalwareDetector:
         if not pid or not filename:
             return
         
-        file_path = Path(filename)
-        file_ext = file_path.suffix.lower()
-        file_dir = str(file_path.parent).lower()
+        file_dir = filename[:max(filename.rfind('\\'), filename.rfind('/'), 0)]
         
         # Log criação de arquivo
-        self.event_logger.debug(f"Arquivo criado por PID {pid}: {filename}")
+        self.event_logger.debug("Arquivo criado por PID %s: %s", pid, filename)
         
         # Verificar extensões suspeitas
-        if file_ext in self.config['suspicious_extensions']:
-            self.logger.warning(f"⚠️ Arquivo suspeito criado: {filename}")
-            self.process_api_calls[pid].append(f"CreateFile:{file_ext}")
+        file_ext = self.policy.suspicious_extension(filename)
+        if file_ext:
+            self.logger.warning("⚠️ Arquivo suspeito criado: %s", filename)
+            self._record_api_call(pid, f"CreateFile:{file_ext}")
             
             # Marcar como suspeito
             if pid in self.process_info:
                 self.process_info[pid]['suspicious_score'] += 20
         else:
-            self.process_api_calls[pid].append('CreateFile')
+            self._record_api_call(pid, 'CreateFile')
         
         # Verificar diretórios suspeitos
-        for sus_dir in self.config['suspicious_directories']:
-            if sus_dir.lower() in file_dir:
-                self.logger.warning(f"⚠️ Arquivo criado em diretório suspeito: {file_dir}")
-                if pid in self.process_info:
-                    self.process_info[pid]['suspicious_score'] += 15
-                break
+        if self.policy.suspicious_directory(file_dir):
+            self.logger.warning("⚠️ Arquivo criado em diretório suspeito: %s", file_dir)
+            if pid in self.process_info:
+                self.process_info[pid]['suspicious_score'] += 15
     
     def _handle_registry_event(self, event_data):
         """Handler para Event IDs 12/13/14: Registry Events"""
@@ -700,16 +906,11 @@ class SysmonMalwareDetector:
         target_object = event_data.get('TargetObject', '')
         
         if pid:
-            self.process_api_calls[pid].append('RegSetValue')
+            self._record_api_call(pid, 'RegSetValue')
             
             # Verificar chaves de persistência
-            persistence_keys = [
-                'run', 'runonce', 'services', 'currentversion\\run',
-                'currentversion\\runonce', 'winlogon', 'userinit'
-            ]
-            
-            if any(key in target_object.lower() for key in persistence_keys):
-                self.logger.warning(f"⚠️ Modificação de registro de persistência: {target_object}")
+            if self.policy.is_persistence_key(target_object):
+                self.logger.warning("⚠️ Modificação de registro de persistência: %s", target_object)
                 if pid in self.process_info:
                     self.process_info[pid]['suspicious_score'] += 25
     
@@ -721,76 +922,73 @@ class SysmonMalwareDetector:
         
         if pid and image_loaded:
             dll_name = Path(image_loaded).name.lower()
-            self.process_api_calls[pid].append(f"LoadLibrary:{dll_name}")
+            self._record_api_call(pid, f"LoadLibrary:{dll_name}")
             
             # Verificar DLLs suspeitas
             suspicious_dlls = ['ntdll.dll', 'kernel32.dll', 'advapi32.dll', 'user32.dll']
             if dll_name in suspicious_dlls:
-                self.event_logger.debug(f"DLL crítica carregada: {dll_name}")
+                self.event_logger.debug("DLL crítica carregada: %s", dll_name)
     
     def _handle_file_time_change(self, event_data):
         """Handler para Event ID 2: File creation time changed"""
         pid = event_data.get('ProcessId')
         if pid:
-            self.process_api_calls[pid].append('SetFileTime')
-            self.event_logger.debug(f"Modificação de timestamp por PID {pid}")
+            self._record_api_call(pid, 'SetFileTime')
+            self.event_logger.debug("Modificação de timestamp por PID %s", pid)
     
     def _handle_process_terminate(self, event_data):
         """Handler para Event ID 5: Process terminated"""
         pid = event_data.get('ProcessId')
         if pid:
-            self.event_logger.info(f"Processo terminado: PID {pid}")
+            self.event_logger.debug("Processo terminado: PID %s", pid)
             # Limpar dados do processo
-            if pid in self.process_api_calls:
-                del self.process_api_calls[pid]
-            if pid in self.process_info:
-                del self.process_info[pid]
+            self.process_state.remove(pid)
     
     def _handle_driver_load(self, event_data):
         """Handler para Event ID 6: Driver loaded"""
         image_loaded = event_data.get('ImageLoaded', '')
         if image_loaded:
-            self.logger.warning(f"⚠️ Driver carregado: {image_loaded}")
+            self.logger.warning("⚠️ Driver carregado: %s", image_loaded)
     
     def _handle_raw_access_read(self, event_data):
         """Handler para Event ID 9: RawAccessRead"""
         pid = event_data.get('ProcessId')
         if pid:
-            self.process_api_calls[pid].append('RawDiskAccess')
-            self.logger.warning(f"⚠️ Acesso direto ao disco por PID {pid}")
+            self._record_api_call(pid, 'RawDiskAccess')
+            self.logger.warning("⚠️ Acesso direto ao disco por PID %s", pid)
     
     def _handle_file_stream_create(self, event_data):
         """Handler para Event ID 15: FileCreateStreamHash"""
         pid = event_data.get('ProcessId')
         if pid:
-            self.process_api_calls[pid].append('CreateFileStream')
+            self._record_api_call(pid, 'CreateFileStream')
     
     def _handle_pipe_create(self, event_data):
         """Handler para Event ID 17: Pipe Created"""
         pid = event_data.get('ProcessId')
         pipe_name = event_data.get('PipeName', '')
         if pid:
-            self.process_api_calls[pid].append(f"CreatePipe:{pipe_name}")
+            self._record_api_call(pid, f"CreatePipe:{pipe_name}")
     
     def _handle_pipe_connect(self, event_data):
         """Handler para Event ID 18: Pipe Connected"""
         pid = event_data.get('ProcessId')
         if pid:
-            self.process_api_calls[pid].append('ConnectPipe')
+            self._record_api_call(pid, 'ConnectPipe')
     
     def _handle_wmi_event(self, event_data):
         """Handler para Event IDs 19/20/21: WMI Events"""
         pid = event_data.get('ProcessId')
         if pid:
-            self.process_api_calls[pid].append('WMIEvent')
-            self.logger.warning(f"⚠️ Evento WMI por PID {pid}")
+            self._record_api_call(pid, 'WMIEvent')
+            self.logger.warning("⚠️ Evento WMI por PID %s", pid)
     
     def _handle_dns_query(self, event_data):
         """Handler para Event ID 22: DNS Query"""
         pid = event_data.get('ProcessId')
         query_name = event_data.get('QueryName', '')
         if pid:
-            self.process_api_calls[pid].append(f"DNSQuery:{query_name}")
+            self._record_api_call(pid, f"DNSQuery:{query_name}")
             
             # Verificar consultas suspeitas para IA
             self._check_ai_communication(pid, query_name, '', '')
@@ -799,20 +997,20 @@ class SysmonMalwareDetector:
         """Handler para Event ID 23: File Delete"""
         pid = event_data.get('ProcessId')
         if pid:
-            self.process_api_calls[pid].append('DeleteFile')
+            self._record_api_call(pid, 'DeleteFile')
     
     def _handle_clipboard_change(self, event_data):
         """Handler para Event ID 24: Clipboard Change"""
         pid = event_data.get('ProcessId')
         if pid:
-            self.process_api_calls[pid].append('ClipboardAccess')
+            self._record_api_call(pid, 'ClipboardAccess')
     
     def _handle_process_tampering(self, event_data):
         """Handler para Event ID 25: Process Tampering"""
         pid = event_data.get('ProcessId')
         if pid:
-            self.logger.critical(f"🚨 MANIPULAÇÃO DE PROCESSO DETECTADA: PID {pid}")
-            self.process_api_calls[pid].append('ProcessTampering')
+            self.logger.critical("🚨 MANIPULAÇÃO DE PROCESSO DETECTADA: PID %s", pid)
+            self._record_api_call(pid, 'ProcessTampering')
             if pid in self.process_info:
                 self.process_info[pid]['suspicious_score'] += 50
     
@@ -820,26 +1018,26 @@ class SysmonMalwareDetector:
         """Handler para Event ID 26: File Delete Logged"""
         pid = event_data.get('ProcessId')
         if pid:
-            self.process_api_calls[pid].append('FileDeleteLogged')
+            self._record_api_call(pid, 'FileDeleteLogged')
     
     def _handle_file_block(self, event_data):
         """Handler para Event ID 27: File Block Executable"""
         pid = event_data.get('ProcessId')
         if pid:
-            self.logger.warning(f"⚠️ Execução de arquivo bloqueada: PID {pid}")
-            self.process_api_calls[pid].append('FileBlocked')
+            self.logger.warning("⚠️ Execução de arquivo bloqueada: PID %s", pid)
+            self._record_api_call(pid, 'FileBlocked')
     
     def _handle_file_block_shredding(self, event_data):
         """Handler para Event ID 28: File Block Shredding"""
         pid = event_data.get('ProcessId')
         if pid:
-            self.process_api_calls[pid].append('FileShredding')
+            self._record_api_call(pid, 'FileShredding')
     
     def _handle_file_executable(self, event_data):
         """Handler para Event ID 29: File Executable Detected"""
         pid = event_data.get('ProcessId')
         if pid:
-            self.process_api_calls[pid].append('ExecutableDetected')
+            self._record_api_call(pid, 'ExecutableDetected')
     
     # Handlers para eventos não implementados
     def _handle_sysmon_state(self, event_data):
@@ -853,80 +1051,65 @@ class SysmonMalwareDetector:
     def _check_polymorphic_indicators(self, pid, event_type, event_details):
         """Verificar indicadores específicos de malware polimórfico"""
         try:
-            if pid not in self.pattern_counters:
-                self.pattern_counters[pid] = defaultdict(int)
+            counters = self.process_state.touch(pid).pattern_counters
             
             polymorphic_detected = False
             
             # Verificar padrões baseados no tipo de evento
             if event_type == 'injection':
-                self.pattern_counters[pid]['injection'] += 1
-                if self.pattern_counters[pid]['injection'] >= self.config['polymorphic_detection']['injection_threshold']:
-                    self.logger.critical(f"🚨 PADRÃO POLIMÓRFICO: Injeção de código detectada - PID {pid}")
+                counters['injection'] += 1
+                if counters['injection'] >= self.config['polymorphic_detection']['injection_threshold']:
+                    self.logger.critical("🚨 PADRÃO POLIMÓRFICO: Injeção de código detectada - PID %s", pid)
                     polymorphic_detected = True
             
             elif event_type == 'network':
-                self.pattern_counters[pid]['network'] += 1
+                counters['network'] += 1
                 destination = event_details.get('destination', '').lower()
                 
                 # Verificar comunicação com serviços de IA
-                ai_keywords = self.config['polymorphic_detection']['ai_keywords']
-                if any(keyword in destination for keyword in ai_keywords):
-                    self.pattern_counters[pid]['ai_communication'] += 1
+                if 'ai_keywords' in self.indicator_scanner.categories(destination):
+                    counters['ai_communication'] += 1
                     self.stats['ai_communications'] += 1
-                    self.logger.warning(f"⚠️ COMUNICAÇÃO COM IA DETECTADA: {destination} - PID {pid}")
+                    self.logger.warning("⚠️ COMUNICAÇÃO COM IA DETECTADA: %s - PID %s", destination, pid)
                     polymorphic_detected = True
             
             elif event_type == 'process_create':
-                cmdline = event_details.get('cmdline', '').lower()
+                cmdline = event_details.get('cmdline', '')
                 
                 # Verificar comandos suspeitos para polimorfismo
-                suspicious_commands = ['powershell', 'cmd', 'wscript', 'cscript', 'regsvr32', 'rundll32']
-                if any(cmd in cmdline for cmd in suspicious_commands):
-                    self.pattern_counters[pid]['suspicious_commands'] += 1
+                if 'suspicious_commands' in self.indicator_scanner.categories(cmdline):
+                    counters['suspicious_commands'] += 1
             
             # Se detectado comportamento polimórfico, marcar para análise imediata
             if polymorphic_detected:
                 self.stats['polymorphic_detected'] += 1
                 if pid in self.process_info:
                     self.process_info[pid]['suspicious_score'] += 40
-                self._analyze_process(pid)
+                self._request_analysis(pid)
                 
         except Exception as e:
-            self.logger.debug(f"Erro ao verificar indicadores polimórficos: {e}")
+            self.logger.debug("Erro ao verificar indicadores polimórficos: %s", e)
     
     def _check_ai_communication(self, pid, hostname, ip, port):
         """Verificar comunicação específica com serviços de IA"""
         try:
             # Verificar hostname
-            if hostname:
-                hostname_lower = hostname.lower()
-                ai_domains = [
-                    'openai.com', 'api.openai.com', 'chat.openai.com',
-                    'anthropic.com', 'api.anthropic.com',
-                    'googleapis.com', 'api.google.com',
-                    'azure.com', 'api.azure.com',
-                    'huggingface.co', 'api.huggingface.co'
-                ]
+            if hostname and 'ai_domains' in self.indicator_scanner.categories(hostname):
+                self.logger.critical("🚨 COMUNICAÇÃO COM IA CONFIRMADA: %s - PID %s", hostname, pid)
+                self.stats['ai_communications'] += 1
                 
-                for domain in ai_domains:
-                    if domain in hostname_lower:
-                        self.logger.critical(f"🚨 COMUNICAÇÃO COM IA CONFIRMADA: {hostname} - PID {pid}")
-                        self.stats['ai_communications'] += 1
-                        
-                        if pid in self.process_info:
-                            self.process_info[pid]['suspicious_score'] += 60
-                            
-                        # Analisar imediatamente
-                        self._analyze_process(pid)
-                        break
+                if pid in self.process_info:
+                    self.process_info[pid]['suspicious_score'] += 60
+                    
+                # Analisar imediatamente
+                self._request_analysis(pid)
             
             # Verificar portas comuns de APIs
             if port in ['80', '443', '8080', '8443']:
-                self.pattern_counters[pid]['api_calls'] += 1
+                self.process_state.touch(pid).pattern_counters['api_calls'] += 1
                 
         except Exception as e:
-            self.logger.debug(f"Erro ao verificar comunicação IA: {e}")
+            self.logger.debug("Erro ao verificar comunicação IA: %s", e)
     
     def _calculate_threat_score(self, pid, api_calls):
         """Calcular score de ameaça baseado em comportamentos específicos"""
@@ -937,169 +1120,234 @@ class SysmonMalwareDetector:
             if pid in self.process_info:
                 threat_score += self.process_info[pid].get('suspicious_score', 0)
             
-            # Score baseado em padrões de API calls
-            api_string = ' '.join(api_calls).lower()
-            
-            # Padrões específicos de malware polimórfico
-            polymorphic_patterns = {
-                'memory_operations': ['virtualalloc', 'writeprocessmemory', 'createremotethread'],
-                'injection_patterns': ['createremotethread', 'setwindowshook', 'ntmapviewofsection'],
-                'ai_communication': ['connect:api', 'connect:openai', 'httpsendrequest'],
-                'obfuscation': ['cryptencrypt', 'cryptdecrypt', 'base64'],
-                'persistence': ['regsetvalue', 'createservice', 'setwindowshook']
-            }
-            
-            for pattern_name, patterns in polymorphic_patterns.items():
-                pattern_count = sum(1 for pattern in patterns if pattern in api_string)
+            # Score baseado em padrões de API calls: contadores mantidos a cada
+            # API call registrada (reconstruídos só se o processo não tiver janela)
+            with self.state_lock:
+                indicators = self.process_indicators.get(pid)
+                if indicators is not None:
+                    counts = dict(indicators.category_counts)
+            if indicators is None:
+                counts = self.indicator_scanner.window_for(api_calls).category_counts
+            
+            for pattern_name in THREAT_PATTERNS:
+                pattern_count = counts.get(pattern_name, 0)
                 if pattern_count > 0:
                     threat_score += pattern_count * 15
-                    self.ml_logger.info(f"Padrão {pattern_name} detectado {pattern_count} vezes - PID {pid}")
+                    self.ml_logger.info("Padrão %s detectado %s vezes - PID %s", pattern_name, pattern_count, pid)
             
             # Bonus por combinação de padrões (comportamento polimórfico típico)
-            if ('createremotethread' in api_string and 
-                'connect:' in api_string and 
+            if (counts.get('combo_injection', 0) and 
+                counts.get('combo_network', 0) and 
                 len(api_calls) > 10):
                 threat_score += 50
-                self.ml_logger.warning(f"Combinação polimórfica detectada - PID {pid}")
+                self.ml_logger.warning("Combinação polimórfica detectada - PID %s", pid)
             
             return min(threat_score, 100)  # Cap em 100
             
         except Exception as e:
-            self.ml_logger.error(f"Erro ao calcular threat score: {e}")
+            self.ml_logger.error("Erro ao calcular threat score: %s", e)
             return 0
     def _periodic_analysis(self):
-        """Thread otimizada para análise periódica de processos"""
+        """Thread otimizada para análise periódica de processos (inferência em lote)"""
         while self.running:
             try:
                 self.ml_logger.debug("Iniciando análise periódica")
-                analyzed_count = 0
+                self._reload_policy()
                 
-                # Analisar todos os processos com dados suficientes
-                for pid in list(self.process_api_calls.keys()):
-                    api_calls = list(self.process_api_calls[pid])
-                    
-                    if len(api_calls) >= self.config['min_api_calls']:
-                        self.ml_logger.debug(f"Analisando processo {pid} com {len(api_calls)} API calls")
-                        self._analyze_process(pid)
-                        analyzed_count += 1
+                # Todos os processos com dados suficientes em uma única inferência
+                pids = self.process_state.pids_with_min_calls(self.config['min_api_calls'])
+                analyzed_count = self._analyze_processes(pids)
                 
-                # Limpar processos antigos periodicamente
-                current_time = datetime.now()
-                if (current_time - self.last_cleanup).seconds > 300:  # 5 minutos
-                    self._cleanup_old_processes()
-                    self.last_cleanup = current_time
+                # Descartar processos inativos (custo proporcional aos descartados)
+                self._cleanup_old_processes()
                 
-                self.ml_logger.debug(f"Análise periódica concluída: {analyzed_count} processos analisados")
+                self.ml_logger.debug("Análise periódica concluída: %s processos analisados", analyzed_count)
                 time.sleep(self.config['analysis_interval'])
                 
             except Exception as e:
-                self.logger.debug(f"Erro na análise periódica: {e}")
+                self.logger.debug("Erro na análise periódica: %s", e)
                 time.sleep(5)  # Esperar mais em caso de erro
     
+    def _record_api_call(self, pid, api_call):
+        """Registrar API call observada para o processo"""
+        self.process_state.record(pid, api_call)
+    
+    def _request_analysis(self, pid):
+        """Enviar PID para os workers de inferência sem bloquear os handlers"""
+        pipeline = self.pipeline
+        if pipeline is not None and pipeline.running:
+            if not pipeline.request_analysis(pid):
+                self.ml_logger.warning("Fila de inferência cheia - análise do PID %s descartada", pid)
+        else:
+            self._analyze_process(pid)
+    
     def _analyze_process(self, pid):
         """Analisar um processo específico com detecção aprimorada"""
+        self._analyze_processes([pid])
+    
+    def _analyze_processes(self, pids):
+        """
+        Analisar vários processos com uma única inferência do modelo
+        
+        Monta uma matriz esparsa com todos os PIDs elegíveis e executa cada
+        transformação e o predict_proba uma vez só.
+        """
         try:
-            api_calls = list(self.process_api_calls[pid])
-            
-            if len(api_calls) < self.config['min_api_calls']:
-                self.ml_logger.debug(f"Processo {pid} tem apenas {len(api_calls)} API calls - pulando análise")
-                return
+            batch_pids = []
+            batch_calls = []
+            batch_windows = []
+            with self.state_lock:
+                for pid in pids:
+                    api_calls = list(self.process_api_calls.get(pid, ()))
+                    if len(api_calls) < self.config['min_api_calls']:
+                        self.ml_logger.debug("Processo %s tem apenas %s API calls - pulando análise", pid, len(api_calls))
+                        continue
+                    batch_pids.append(pid)
+                    batch_calls.append(api_calls)
+                    batch_windows.append(self.process_features.get(pid))
+                
+                # Contagens prontas dos acumuladores (sem re-tokenizar os buffers)
+                counts = None
+                if self.feature_accumulator is not None and batch_pids and None not in batch_windows:
+                    counts = self.feature_accumulator.count_matrix(batch_windows)
             
-            self.ml_logger.info(f"Analisando processo {pid} com {len(api_calls)} API calls")
+            if not batch_pids:
+                return 0
             
-            # Calcular threat score customizado
-            threat_score = self._calculate_threat_score(pid, api_calls)
+            self.ml_logger.info("Analisando %s processo(s) em lote", len(batch_pids))
             
-            # Fazer predição do modelo ML
-            ml_result = self._predict(api_calls, pid)
+            # Fazer predição do modelo ML para o lote inteiro
+            ml_results = self._predict_batch(batch_calls, batch_pids, counts)
             
-            # Combinar resultados
-            if ml_result:
-                # Ajustar confiança baseado no threat score
-                adjusted_confidence = (ml_result['confidence'] + (threat_score / 100)) / 2
-                ml_result['threat_score'] = threat_score
-                ml_result['adjusted_confidence'] = adjusted_confidence
-                
-                # Decisão final considerando ambos os fatores
-                is_malware = (adjusted_confidence > self.config['detection_threshold'] or 
-                             threat_score > 70 or
-                             (ml_result['confidence'] > 0.4 and threat_score > 50))
-                
-                ml_result['is_malware'] = is_malware
-                
-                self.ml_logger.info(f"Análise PID {pid}: ML={ml_result['confidence']:.3f}, "
-                                  f"Threat={threat_score}, Adjusted={adjusted_confidence:.3f}, "
-                                  f"Malware={is_malware}")
-                
-                if is_malware:
-                    self._handle_malware_detection(pid, ml_result)
-                else:
-                    self.ml_logger.debug(f"Processo {pid} considerado benigno")
+            for pid, api_calls, ml_result in zip(batch_pids, batch_calls, ml_results):
+                try:
+                    self._evaluate_process(pid, api_calls, ml_result)
+                except Exception as e:
+                    self.logger.error("Erro ao analisar processo %s: %s", pid, e)
+                    self.ml_logger.error("Erro na análise do processo %s: %s", pid, e)
             
-            # Limpar buffer após análise (mas manter um histórico mínimo)
-            if len(api_calls) > 100:
-                # Manter últimas 50 API calls para contexto
-                self.process_api_calls[pid] = deque(api_calls[-50:], maxlen=500)
+            return len(batch_pids)
             
         except Exception as e:
-            self.logger.error(f"Erro ao analisar processo {pid}: {e}")
-            self.ml_logger.error(f"Erro na análise do processo {pid}: {e}")
+            self.logger.error("Erro ao analisar processos %s: %s", list(pids)[:10], e)
+            self.ml_logger.error("Erro na análise em lote: %s", e)
+            return 0
+    
+    def _evaluate_process(self, pid, api_calls, ml_result):
+        """Combinar predição ML e threat score e decidir sobre o processo"""
+        # Calcular threat score customizado
+        threat_score = self._calculate_threat_score(pid, api_calls)
+        
+        # Combinar resultados
+        if ml_result:
+            # Ajustar confiança baseado no threat score
+            adjusted_confidence = (ml_result['confidence'] + (threat_score / 100)) / 2
+            ml_result['threat_score'] = threat_score
+            ml_result['adjusted_confidence'] = adjusted_confidence
+            
+            # Decisão final considerando ambos os fatores
+            is_malware = (adjusted_confidence > self.config['detection_threshold'] or 
+                         threat_score > 70 or
+                         (ml_result['confidence'] > 0.4 and threat_score > 50))
+            
+            ml_result['is_malware'] = is_malware
+            
+            self.ml_logger.info("Análise PID %s: ML=%.3f, Threat=%s, Adjusted=%.3f, Malware=%s",
+                                pid, ml_result['confidence'], threat_score, adjusted_confidence, is_malware)
+            
+            if is_malware:
+                self._handle_malware_detection(pid, ml_result)
+            else:
+                self.ml_logger.debug("Processo %s considerado benigno", pid)
+        
+        # Limpar buffer após análise (mas manter um histórico mínimo)
+        if len(api_calls) > 100:
+            # Manter últimas 50 API calls para contexto
+            self.process_state.trim(pid, 50)
     
     def _predict(self, api_calls, pid):
         """Fazer predição otimizada sobre API calls"""
+        results = self._predict_batch([api_calls], [pid])
+        return results[0]
+    
+    def _predict_batch(self, api_calls_list, pids, counts=None):
+        """
+        Predição de vários processos com um único predict_proba
+        
+        counts: matriz de contagens dos acumuladores incrementais; quando
+        informada, o TF-IDF só aplica os pesos IDF (sem ' '.join e tokenização).
+        """
         try:
-            # Converter para string
-            api_sequence = ' '.join(api_calls)
-            
-            self.ml_logger.debug(f"Predição para PID {pid}: {api_sequence[:100]}...")
-            
-            # Pré-processar
-            X_processed = self._preprocess_sample(api_sequence)
+            started = perf_counter_ns()
+            if counts is not None:
+                X_processed = self._preprocess_batch(None, counts)
+            else:
+                # Converter para string
+                sequences = [' '.join(api_calls) for api_calls in api_calls_list]
+                
+                # Pré-processar o lote inteiro
+                X_processed = self._preprocess_batch(sequences)
+            self.feature_latency.observe_since(started)
             
-            # Predição
-            prediction = self.model.predict([X_processed])[0]
-            probabilities = self.model.predict_proba([X_processed])[0]
+            # Predição: a classe vem do argmax das probabilidades (mesmo critério do predict)
+            started = perf_counter_ns()
+            probabilities = self.scorer.predict_proba(X_processed)
+            self.inference_latency.observe_since(started)
+            predictions = self.scorer.classes_.take(probabilities.argmax(axis=1))
             
             # Label original
             if self.label_encoder:
-                predicted_label = self.label_encoder.inverse_transform([prediction])[0]
+                predicted_labels = self.label_encoder.inverse_transform(predictions)
             else:
-                predicted_label = str(prediction)
-            
-            confidence = max(probabilities)
-            
-            self.ml_logger.debug(f"Predição PID {pid}: {predicted_label} (confiança: {confidence:.3f})")
-            
-            return {
-                'pid': pid,
-                'prediction': predicted_label,
-                'confidence': confidence,
-                'probabilities': probabilities.tolist(),
-                'api_calls': api_calls,
-                'timestamp': datetime.now()
-            }
+                predicted_labels = [str(prediction) for prediction in predictions]
+            
+            confidences = probabilities.max(axis=1)
+            now = datetime.now()
+            
+            results = []
+            for i, pid in enumerate(pids):
+                self.ml_logger.debug("Predição PID %s: %s (confiança: %.3f)", pid, predicted_labels[i], confidences[i])
+                results.append({
+                    'pid': pid,
+                    'prediction': predicted_labels[i],
+                    'confidence': float(confidences[i]),
+                    'probabilities': probabilities[i].tolist(),
+                    'api_calls': api_calls_list[i],
+                    'timestamp': now
+                })
+            return results
             
         except Exception as e:
-            self.ml_logger.error(f"Erro na predição para PID {pid}: {e}")
-            return None
+            self.ml_logger.error("Erro na predição para PIDs %s: %s", list(pids)[:10], e)
+            return [None] * len(pids)
     
     def _preprocess_sample(self, api_sequence):
-        """Pré-processar amostra"""
-        # TF-IDF
-        if self.tfidf_vectorizer:
-            X = self.tfidf_vectorizer.transform([api_sequence]).toarray()
+        """Pré-processar amostra (matriz de uma linha, esparsa quando possível)"""
+        return self._preprocess_batch([api_sequence])
+    
+    def _preprocess_batch(self, api_sequences, counts=None):
+        """Pré-processar lote de amostras (uma linha por processo)"""
+        # TF-IDF (matriz esparsa com todas as amostras)
+        if counts is not None:
+            X = self.feature_accumulator.tfidf(counts)
+        elif self.tfidf_vectorizer:
+            X = self.tfidf_vectorizer.transform(api_sequences)
         else:
-            X = [[len(api_sequence.split())]]
+            X = np.array([[len(sequence.split())] for sequence in api_sequences])
         
         # Feature selection
         if self.feature_selector:
             X = self.feature_selector.transform(X)
         
-        # PCA
+        # PCA / TruncatedSVD (aceitam a matriz esparsa diretamente)
         if self.pca:
-            X = self.pca.transform(X)
+            try:
+                X = self.pca.transform(X)
+            except TypeError:
+                # PCA de versões antigas do scikit-learn não aceita entrada esparsa
+                X = self.pca.transform(X.toarray())
         
-        return X[0]
+        return X
     
     def _handle_malware_detection(self, pid, result):
         """Lidar com detecção de malware aprimorada"""
@@ -1158,40 +1406,85 @@ class SysmonMalwareDetector:
         if self.config.get('alert_webhook'):
             self._send_webhook_alert(result)
     
-    def _cleanup_old_processes(self):
-        """Limpar dados de processos otimizada"""
-        cleanup_count = 0
-        current_time = datetime.now()
-        
-        for pid in list(self.process_api_calls.keys()):
-            try:
-                # Verificar se processo ainda existe
-                psutil.Process(int(pid))
-                
-                # Verificar se processo é muito antigo (mais de 1 hora sem atividade)
-                if pid in self.process_info:
-                    first_seen = self.process_info[pid].get('first_seen', current_time)
-                    if (current_time - first_seen).seconds > 3600:  # 1 hora
-                        self.event_logger.debug(f"Removendo processo antigo: {pid}")
-                        if pid in self.process_api_calls:
-                            del self.process_api_calls[pid]
-                        if pid in self.process_info:
-                            del self.process_info[pid]
-                        if pid in self.pattern_counters:
-                            del self.pattern_counters[pid]
-                        cleanup_count += 1
-                        
-            except psutil.NoSuchProcess:
-                # Processo não existe mais, limpar
-                self.event_logger.debug(f"Removendo processo inexistente: {pid}")
-                if pid in self.process_api_calls:
-                    del self.process_api_calls[pid]
-                if pid in self.process_info:
-                    del self.process_info[pid]
-                if pid in self.pattern_counters:
-                    del self.pattern_counters[pid]
-                cleanup_count += 1
+    def _save_evidence(self, pid, result):
+        """Salvar evidências da detecção em JSON (logs/evidence)"""
+        try:
+            evidence_dir = Path("logs") / "evidence"
+            evidence_dir.mkdir(parents=True, exist_ok=True)
+            
+            evidence = {
+                'pid': pid,
+                'detected_at': datetime.now().isoformat(),
+                'result': {key: value for key, value in result.items() if key != 'api_calls'},
+                'api_calls': list(result['api_calls']),
+                'process_info': self.process_info.get(pid),
+                'pattern_counters': dict(self.pattern_counters.get(pid, {}))
+            }
+            
+            evidence_file = evidence_dir / f"evidencia_{pid}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
+            with open(evidence_file, 'w', encoding='utf-8') as f:
+                json.dump(evidence, f, indent=2, ensure_ascii=False, default=str)
+            
+            self.logger.info(f"📁 Evidências salvas: {evidence_file}")
+        except Exception as e:
+            self.logger.error(f"Erro ao salvar evidências do PID {pid}: {e}")
+    
+    def _quarantine_process(self, pid):
+        """Suspender o processo (processos críticos do sistema nunca são suspensos)"""
+        try:
+            proc = psutil.Process(int(pid))
+            if self.policy.is_critical(proc.name()):
+                self.logger.warning(f"Processo crítico {proc.name()} (PID: {pid}) não será suspenso")
+                return
+            
+            proc.suspend()
+            self.stats['quarantined'] += 1
+            self.logger.warning(f"🔒 Processo {pid} suspenso (quarentena)")
+        except (psutil.NoSuchProcess, psutil.AccessDenied, ValueError) as e:
+            self.logger.error(f"Erro ao colocar processo {pid} em quarentena: {e}")
+    
+    def _send_webhook_alert(self, result):
+        """Enfileirar alerta para o webhook (não bloqueia a análise)"""
+        if not self.alert_dispatcher:
+            return
         
+        pid = result['pid']
+        info = self.process_info.get(pid) or {}
+        self.alert_dispatcher.submit({
+            'timestamp': result['timestamp'].isoformat(),
+            'pid': pid,
+            'process_name': info.get('process_name', 'N/A'),
+            'image': info.get('image', 'N/A'),
+            'prediction': result['prediction'],
+            'confidence': result['confidence'],
+            'threat_score': result.get('threat_score'),
+            'api_calls': list(result['api_calls'])[:10]
+        })
+    
+    def _on_alerts_delivered(self, alerts):
+        """Chamado pela thread de envio após cada mensagem entregue"""
+        self.stats['alerts_sent'] += len(alerts)
+    
+    def _webhook_embed(self, alert):
+        """Embed do Discord para um alerta"""
+        return {
+            'title': '🚨 MALWARE DETECTADO - SYSMON',
+            'color': 0xFF0000,
+            'timestamp': alert['timestamp'],
+            'fields': [
+                {'name': 'Processo', 'value': f"`{alert['process_name']}` (PID: {alert['pid']})", 'inline': True},
+                {'name': 'Tipo', 'value': f"`{alert['prediction']}`", 'inline': True},
+                {'name': 'Confiança ML', 'value': f"{alert['confidence']:.1%}", 'inline': True},
+                {'name': 'Threat Score', 'value': str(alert['threat_score']), 'inline': True},
+                {'name': 'Imagem', 'value': f"`{alert['image']}`", 'inline': False},
+                {'name': 'API Calls', 'value': f"`{', '.join(alert['api_calls'])}`", 'inline': False}
+            ],
+            'footer': {'text': 'Modelo Defensivo - Detector Sysmon'}
+        }
+    
+    def _cleanup_old_processes(self):
+        """Descartar processos sem atividade além do TTL do armazenamento de estado"""
+        cleanup_count = self.process_state.expire()
         if cleanup_count > 0:
             self.logger.debug(f"Limpeza concluída: {cleanup_count} processos removidos")
     
@@ -1201,7 +1494,9 @@ class SysmonMalwareDetector:
             return
             
         uptime = datetime.now() - self.stats['start_time']
-        current_processes = len(self.process_api_calls)
+        state = self.process_state.metrics()
+        current_processes = state['processes']
+        self._update_event_rate()
         
         self.logger.info("=" * 60)
         self.logger.info("📊 STATUS DO DETECTOR")
@@ -1211,14 +1506,31 @@ class SysmonMalwareDetector:
         self.logger.info(f"📊 Eventos processados: {self.stats['events_processed']}")
         self.logger.info(f"👁️  Processos monitorados: {current_processes}")
         self.logger.info(f"🛡️  Total processos vistos: {self.stats['processes_monitored']}")
+        self.logger.info(f"🧠 Estado: ~{state['estimated_mb']} MB, {state['buffered_calls']} API calls "
+                         f"(descartes TTL {state['evicted_ttl']}, LRU {state['evicted_lru']}, "
+                         f"memória {state['evicted_memory']})")
         self.logger.info(f"🚨 Malware detectado: {self.stats['malware_detected']}")
         self.logger.info(f"🔒 Processos em quarentena: {self.stats['quarantined']}")
         self.logger.info(f"🧬 Comportamento polimórfico: {self.stats['polymorphic_detected']}")
         self.logger.info(f"💬 Comunicações IA: {self.stats['ai_communications']}")
         self.logger.info(f"💉 Injeções de memória: {self.stats['memory_injections']}")
         self.logger.info(f"📅 Última atividade: {self.stats.get('last_event_time', 'N/A')}")
+        
+        if self.pipeline is not None:
+            for name, stage in self.pipeline.metrics().items():
+                if 'depth' in stage:
+                    self.logger.info(f"📥 Fila {name}: {stage['depth']}/{stage['capacity']} "
+                                     f"(pico {stage['max_depth']}, descartes {stage['dropped']})")
         self.logger.info("=" * 60 + "\n")
     
+    def _update_event_rate(self):
+        """Eventos/segundo desde a medição anterior"""
+        now, processed = time.monotonic(), self.stats['events_processed']
+        last_time, last_processed = getattr(self, '_rate_mark', (now, processed))
+        if now > last_time:
+            self.stats['events_per_second'] = (processed - last_processed) / (now - last_time)
+        self._rate_mark = (now, processed)
+    
     def _print_final_statistics(self):
         """Imprimir estatísticas finais detalhadas"""
         if not self.stats.get('start_time'):
@@ -1234,6 +1546,13 @@ class SysmonMalwareDetector:
         self.logger.info(f"👁️  Processos monitorados: {self.stats['processes_monitored']}")
         self.logger.info(f"🚨 Malware detectado: {self.stats['malware_detected']}")
         self.logger.info(f"🔒 Processos em quarentena: {self.stats['quarantined']}")
+        if self.alert_dispatcher:
+            delivery = self.alert_dispatcher.metrics()
+            self.logger.info(f"📢 Alertas enviados: {delivery['delivered']} "
+                             f"(p50 {delivery['latency_p50_ms']} ms, p95 {delivery['latency_p95_ms']} ms, "
+                             f"429 recebidos {delivery['rate_limited']}, em disco {delivery['spilled']})")
+        if self.log_queue.dropped:
+            self.logger.warning(f"⚠️ Registros de log descartados (fila cheia): {self.log_queue.dropped}")
         self.logger.info(f"❌ Falsos positivos: {self.stats['false_positives']}")
         self.logger.info(f"🧬 Comportamento polimórfico: {self.stats['polymorphic_detected']}")
         self.logger.info(f"💬 Comunicações com IA: {self.stats['ai_communications']}")
@@ -1243,6 +1562,24 @@ class SysmonMalwareDetector:
             events_per_second = self.stats['events_processed'] / uptime.total_seconds()
             self.logger.info(f"📈 Taxa média de eventos: {events_per_second:.2f}/segundo")
         
+        if self.pipeline is not None:
+            for name, stage in self.pipeline.metrics().items():
+                if 'depth' in stage:
+                    self.logger.info(f"📥 Estágio {name}: {stage['processed']} itens, "
+                                     f"pico da fila {stage['max_depth']}/{stage['capacity']}, "
+                                     f"descartes {stage['dropped']}, agrupados {stage['coalesced']}")
+        
+        for labels, histogram in self.metrics.histograms('stage_latency_seconds').items():
+            latency = histogram.summary()
+            if latency['count']:
+                self.logger.info(f"⏱️  Latência {dict(labels)['stage']}: p50 {latency['p50_us']} µs, "
+                                 f"p99 {latency['p99_us']} µs ({latency['count']} medições)")
+        
+        state = self.process_state.metrics()
+        self.logger.info(f"🧠 Estado por processo: pico {state['peak_processes']} processos, "
+                         f"descartes TTL {state['evicted_ttl']}, LRU {state['evicted_lru']}, "
+                         f"memória {state['evicted_memory']}")
+        
         if self.stats['processes_monitored'] > 0:
             detection_rate = (self.stats['malware_detected'] / self.stats['processes_monitored']) * 100
             self.logger.info(f"🎯 Taxa de detecção: {detection_rate:.2f}%")
@@ -1266,6 +1603,10 @@ Exemplos de uso:
   python detection_sistem.py --model ../Tentativa2/optimized_malware_detector.joblib --config config.json
   python detection_sistem.py --model ../Tentativa2/optimized_malware_detector.joblib --threshold 0.5 --no-quarantine
   python detection_sistem.py --model ../Tentativa2/optimized_malware_detector.joblib --debug --verbose
+  python detection_sistem.py --model ../Tentativa2/optimized_malware_detector.joblib --replay eventos.xml --replay-speed 0
+  python detection_sistem.py --model ../Tentativa2/optimized_malware_detector.joblib --replay eventos.xml --profile
+  python detection_sistem.py --model ../Tentativa2/optimized_malware_detector.joblib --workers 4
+  tail -f eventos.jsonl | python detection_sistem.py --model ../Tentativa2/optimized_malware_detector.joblib --pipe -
   
 Configurações específicas para malware polimórfico:
   - Threshold padrão reduzido para 0.5 devido à complexidade do malware
@@ -1289,6 +1630,22 @@ Configurações específicas para malware polimórfico:
                        help='Habilitar logs verbosos')
     parser.add_argument('--test-mode', action='store_true',
                        help='Modo de teste - não termina processos')
+    parser.add_argument('--replay',
+                       help='Reproduzir eventos gravados (XML exportado do EVTX ou JSONL) em vez do Sysmon ao vivo')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Processos de detecção com os eventos divididos por PID (1 = processo único)')
+    parser.add_argument('--pipe',
+                       help="Receber eventos JSONL por um pipe (FIFO ou '-' para stdin), sem polling")
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                       help='Velocidade do replay (1.0 = tempo real, 0 = o mais rápido possível)')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continuar o replay do último evento processado (checkpoint)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Executar o replay sob o profiler amostral (requer --replay)')
+    parser.add_argument('--profile-output', default='profile/detector',
+                       help='Prefixo dos arquivos .collapsed e _summary.json do profile')
+    parser.add_argument('--profile-interval', type=float, default=5.0,
+                       help='Intervalo entre amostras do profiler em ms (padrão: 5)')
     
     args = parser.parse_args()
     
@@ -1301,8 +1658,13 @@ Configurações específicas para malware polimórfico:
         print(f"📝 Verbose: {'Habilitado' if args.verbose else 'Desabilitado'}")
         print("=" * 70)
         
-        # Verificar se está executando como administrador
-        if not ctypes.windll.shell32.IsUserAnAdmin():
+        if args.profile and not args.replay:
+            print("❌ ERRO: --profile requer um arquivo de eventos em --replay")
+            return
+        
+        # Verificar se está executando como administrador (apenas Windows)
+        windll = getattr(ctypes, 'windll', None)
+        if not (args.replay or args.pipe) and windll and not windll.shell32.IsUserAnAdmin():
             print("⚠️ AVISO: Execute como Administrador para melhor funcionalidade")
             print("Alguns recursos podem não funcionar corretamente\n")
         
@@ -1312,14 +1674,41 @@ Configurações específicas para malware polimórfico:
             print("Verifique o caminho do arquivo")
             return
         
+        # Fonte de eventos: Sysmon ao vivo ou replay de arquivo gravado
+        event_source = None
+        if args.replay:
+            if not Path(args.replay).exists():
+                print(f"❌ ERRO: Arquivo de replay não encontrado: {args.replay}")
+                return
+            event_source = ReplayEventSource(args.replay, speed=args.replay_speed)
+            speed_label = 'máxima' if event_source.speed == 0 else f"{event_source.speed}x"
+            print(f"🔁 Replay: {args.replay} (velocidade {speed_label})")
+        elif args.pipe:
+            event_source = PipeEventSource(args.pipe)
+            if not event_source.is_available():
+                print(f"❌ ERRO: Pipe não encontrado: {args.pipe}")
+                return
+            print(f"📥 Eventos pelo pipe: {args.pipe}")
+        
         # Inicializar detector
         print("🚀 Inicializando detector...")
-        detector = SysmonMalwareDetector(args.model, args.config)
+        if args.workers > 1:
+            from sharded_detector import ShardedMalwareDetector
+            detector = ShardedMalwareDetector(args.model, args.config, event_source=event_source,
+                                              workers=args.workers)
+            print(f"🧩 Modo em processos: {detector.workers} workers")
+        else:
+            detector = SysmonMalwareDetector(args.model, args.config, event_source=event_source)
         
         # Aplicar configurações da linha de comando
         detector.config['detection_threshold'] = args.threshold
         
-        if args.no_quarantine or args.test_mode:
+        if args.resume:
+            detector.config['checkpoint'] = {**detector.config.get('checkpoint', {}),
+                                             'enabled': True, 'replay': True}
+        
+        # PIDs do replay pertencem a outra máquina: nunca terminar processos locais
+        if args.no_quarantine or args.test_mode or args.replay or args.pipe:
             detector.config['quarantine_enabled'] = False
             print("⚠️ Quarentena desabilitada")
         
@@ -1345,6 +1734,14 @@ Configurações específicas para malware polimórfico:
         print(f"   - Análise a cada: {detector.config['analysis_interval']} segundos")
         print(f"   - Mín. API calls: {detector.config['min_api_calls']}")
         
+        if args.profile:
+            print(f"\n🔬 Profiling do replay (amostra a cada {args.profile_interval:g} ms)...")
+            summary = detector.profile(args.profile_output, interval=args.profile_interval / 1000)
+            print("\n" + format_summary(summary))
+            print(f"\n🔥 Pilhas colapsadas: {summary['files']['collapsed']}")
+            print(f"📄 Resumo por função: {summary['files']['summary']}")
+            return
+        
         # Iniciar monitoramento
         print("\n🎯 Iniciando monitoramento...")
         detector.start()
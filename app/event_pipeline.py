@@ -0,0 +1,284 @@
+"""
+PIPELINE DE EVENTOS EM ESTÁGIOS
+Separa leitura, parsing, handlers e inferência ML em threads próprias ligadas
+por filas limitadas, para que a latência do modelo não trave a leitura de
+eventos durante rajadas.
+
+    leitor -> [fila parse] -> parser -> [fila handler] -> handler
+                                                            |
+                                         [fila inferência] -> workers ML
+
+Filas cheias bloqueiam o estágio anterior (backpressure). Cada estágio expõe
+profundidade da fila, pico, itens processados, descartes e tempo ocupado.
+"""
+
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class PipelineStage:
+    """
+    Estágio do pipeline: fila limitada consumida por uma ou mais threads
+
+    Args:
+        name: Nome do estágio (usado nas métricas e nas threads)
+        func: Função chamada para cada item; o retorno (se não for None) é
+              enviado ao estágio seguinte
+        maxsize: Capacidade da fila de entrada
+        workers: Número de threads consumidoras
+        downstream: Estágio que recebe o retorno de func
+        logger: Logger para erros do estágio
+    """
+
+    def __init__(self, name, func, maxsize=100, workers=1, downstream=None, logger=None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.downstream = downstream
+        self.logger = logger
+
+        self.queue = queue.Queue(maxsize=maxsize)
+        self._threads = []
+        self._pending_keys = set()
+        self._keys_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        # Métricas do estágio
+        self.max_depth = 0
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, item, key=None, block=True, timeout=None):
+        """
+        Enfileirar item para o estágio
+
+        Com key, itens com a mesma chave ainda na fila são agrupados em um só.
+        Devolve False quando o item foi descartado (fila cheia após timeout).
+        """
+        if key is not None:
+            with self._keys_lock:
+                if key in self._pending_keys:
+                    self.coalesced += 1
+                    return True
+                self._pending_keys.add(key)
+
+        try:
+            self.queue.put((key, item), block=block, timeout=timeout)
+        except queue.Full:
+            if key is not None:
+                with self._keys_lock:
+                    self._pending_keys.discard(key)
+            with self._stats_lock:
+                self.dropped += 1
+            return False
+
+        with self._stats_lock:
+            self.submitted += 1
+            depth = self.queue.qsize()
+            if depth > self.max_depth:
+                self.max_depth = depth
+        return True
+
+    def finish(self):
+        """Sinalizar fim da entrada e aguardar os itens restantes"""
+        for _ in self._threads:
+            self.queue.put((None, _STOP))
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _run(self):
+        while True:
+            key, item = self.queue.get()
+            if item is _STOP:
+                break
+
+            if key is not None:
+                with self._keys_lock:
+                    self._pending_keys.discard(key)
+
+            started = time.perf_counter()
+            try:
+                result = self.func(item)
+                if result is not None and self.downstream is not None:
+                    self.downstream.submit(result)
+            except Exception as e:
+                with self._stats_lock:
+                    self.errors += 1
+                if self.logger:
+                    self.logger.debug(f"Erro no estágio {self.name}: {e}")
+            finally:
+                with self._stats_lock:
+                    self.processed += 1
+                    self.busy_seconds += time.perf_counter() - started
+
+    def metrics(self):
+        with self._stats_lock:
+            return {
+                'depth': self.queue.qsize(),
+                'capacity': self.queue.maxsize,
+                'max_depth': self.max_depth,
+                'submitted': self.submitted,
+                'processed': self.processed,
+                'dropped': self.dropped,
+                'coalesced': self.coalesced,
+                'errors': self.errors,
+                'busy_seconds': round(self.busy_seconds, 4),
+                'workers': self.workers
+            }
+
+
+class EventPipeline:
+    """
+    Pipeline leitor -> parser -> handler -> inferência
+
+    Args:
+        read_batch: Função sem argumentos que devolve um lote de eventos
+        parse_event: Converte um evento bruto em (event_id, event_data) ou None
+        handle_event: Executa o handler de (event_id, event_data)
+        analyze: Executa a inferência ML para uma chave (PID)
+        is_exhausted: Indica que a fonte terminou (replay)
+        config: Tamanhos de fila e número de workers
+        logger: Logger para erros
+        on_checkpoint: Chamado com o RecordNumber de cada evento depois que
+                       o handler dele terminou (parser e handler têm uma
+                       thread cada, então a ordem do log é mantida)
+        wait_events: Espera de uma fonte push (source.wait(timeout)); sem ela o
+                     leitor dorme idle_sleep segundos entre leituras vazias
+    """
+
+    def __init__(self, read_batch, parse_event, handle_event, analyze,
+                 is_exhausted=lambda: False, config=None, logger=None, on_checkpoint=None,
+                 wait_events=None):
+        config = config or {}
+        self.read_batch = read_batch
+        self.parse_event = parse_event
+        self.handle_event = handle_event
+        self.on_checkpoint = on_checkpoint
+        self.is_exhausted = is_exhausted
+        self.logger = logger
+        self.idle_sleep = config.get('idle_sleep', 0.1)
+        # Com fonte push o leitor acorda pelo evento; o timeout só limita a reação ao stop()
+        self.wait_events = wait_events
+        self.wait_timeout = config.get('wait_timeout', 1.0)
+        self.empty_reads = 0
+        self.inference_timeout = config.get('inference_submit_timeout', 0.5)
+
+        self.inference = PipelineStage(
+            'inference', analyze,
+            maxsize=config.get('inference_queue_size', 1000),
+            workers=config.get('inference_workers', 2),
+            logger=logger
+        )
+        self.handler = PipelineStage(
+            'handler', handle_event if on_checkpoint is None else self._handle_and_commit,
+            maxsize=config.get('handler_queue_size', 5000),
+            logger=logger
+        )
+        self.parser = PipelineStage(
+            'parser', self._parse_batch,
+            maxsize=config.get('parse_queue_size', 100),
+            logger=logger
+        )
+        self.stages = (self.parser, self.handler, self.inference)
+
+        self.running = False
+        self.finished = threading.Event()
+        self.events_read = 0
+        self._reader = None
+
+    def start(self):
+        self.running = True
+        self.finished.clear()
+        for stage in self.stages:
+            stage.start()
+        self._reader = threading.Thread(target=self._read_loop, name='reader', daemon=True)
+        self._reader.start()
+
+    def stop(self):
+        """Parar leitura sem esperar o esvaziamento das filas"""
+        self.running = False
+
+    def request_analysis(self, key):
+        """Pedir inferência para um PID (pedidos repetidos na fila são agrupados)"""
+        return self.inference.submit(key, key=key, timeout=self.inference_timeout)
+
+    def _read_loop(self):
+        try:
+            while self.running:
+                try:
+                    events = self.read_batch()
+                except Exception as e:
+                    if self.logger:
+                        self.logger.debug(f"Erro ao ler eventos: {e}")
+                    time.sleep(1)
+                    continue
+
+                if events:
+                    self.events_read += len(events)
+                    # Bloqueia enquanto o parser estiver atrasado (backpressure)
+                    self.parser.submit(list(events))
+                elif self.is_exhausted():
+                    break
+                else:
+                    self.empty_reads += 1
+                    if self.wait_events is not None:
+                        self.wait_events(self.wait_timeout)
+                    else:
+                        time.sleep(self.idle_sleep)
+        finally:
+            self._drain()
+
+    def _parse_batch(self, events):
+        if self.on_checkpoint is not None:
+            self._parse_batch_with_positions(events)
+            return
+        for event in events:
+            parsed = self.parse_event(event)
+            if parsed is not None:
+                self.handler.submit(parsed)
+
+    def _parse_batch_with_positions(self, events):
+        """Como _parse_batch, levando o RecordNumber de cada evento até o handler"""
+        parsed = None
+        for event in events:
+            parsed = self.parse_event(event)
+            if parsed is not None:
+                self.handler.submit((parsed, event.RecordNumber))
+        if parsed is None and events:
+            # Último evento do lote ignorado pelo parser: a posição avança mesmo assim
+            self.handler.submit((None, events[-1].RecordNumber))
+
+    def _handle_and_commit(self, item):
+        parsed, record_number = item
+        try:
+            if parsed is not None:
+                self.handle_event(parsed)
+        finally:
+            # Evento com erro também conta como processado (não é relido)
+            self.on_checkpoint(record_number)
+
+    def _drain(self):
+        """Esvaziar estágios em ordem após o fim da leitura"""
+        for stage in self.stages:
+            stage.finish()
+        self.running = False
+        self.finished.set()
+
+    def metrics(self):
+        data = {stage.name: stage.metrics() for stage in self.stages}
+        data['reader'] = {'events_read': self.events_read, 'empty_reads': self.empty_reads}
+        return data
@@ -0,0 +1,238 @@
+"""
+ACUMULADOR INCREMENTAL DE FEATURES TF-IDF
+Mantém, por processo, as contagens de unigramas/bigramas do vocabulário do
+TfidfVectorizer treinado. Cada API call registrada atualiza as contagens em
+O(1) (em relação ao tamanho do buffer); a análise só aplica IDF e normalização
+sobre o vetor pronto, sem refazer ' '.join() e a tokenização do buffer inteiro.
+
+O resultado é o mesmo de vectorizer.transform([' '.join(janela)]) para a
+janela atual de API calls do processo.
+
+A janela guarda IDs da tabela de internamento (api_tokens.py); a tokenização
+de cada ID é feita uma vez e indexada por ID, sem split de strings na análise.
+"""
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from api_tokens import ApiTokenTable, TokenRing
+
+
+class FeatureAccumulator:
+    """
+    Tokenização e pesos do TfidfVectorizer treinado, compartilhados entre processos
+
+    Use from_vectorizer() para construir; devolve None quando o vectorizer usa
+    um analisador que não pode ser reproduzido incrementalmente (ex.: char).
+    """
+
+    def __init__(self, vocabulary, idf, ngram_range=(1, 1), preprocess=None, tokenize=None,
+                 stop_words=None, norm='l2', sublinear_tf=False, binary=False, dtype=np.float64,
+                 table=None):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.min_n, self.max_n = ngram_range
+        self.preprocess = preprocess or (lambda text: text)
+        self.tokenize = tokenize or str.split
+        self.stop_words = stop_words
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+        self.dtype = dtype
+        self.n_features = len(vocabulary)
+        self.table = table if table is not None else ApiTokenTable()
+        self.table.on_reclaim.append(self._forget_ids)
+        self._id_tokens = []
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer, table=None):
+        """Criar acumulador a partir de um TfidfVectorizer já treinado"""
+        if vectorizer is None or not hasattr(vectorizer, 'vocabulary_'):
+            return None
+        if vectorizer.analyzer != 'word' or vectorizer.input != 'content':
+            return None
+
+        idf = vectorizer.idf_ if vectorizer.use_idf else None
+        return cls(
+            vocabulary=vectorizer.vocabulary_,
+            idf=idf,
+            ngram_range=vectorizer.ngram_range,
+            preprocess=vectorizer.build_preprocessor(),
+            tokenize=vectorizer.build_tokenizer(),
+            stop_words=vectorizer.get_stop_words(),
+            norm=vectorizer.norm,
+            sublinear_tf=vectorizer.sublinear_tf,
+            binary=vectorizer.binary,
+            dtype=vectorizer.dtype,
+            table=table
+        )
+
+    def new_window(self, maxlen=None, calls=None):
+        """
+        Criar janela de contagens para um novo processo
+
+        calls: TokenRing compartilhado com o buffer do processo; nesse caso o
+        dono do buffer chama removing()/added() em vez de append().
+        """
+        return ProcessFeatures(self, maxlen, calls)
+
+    def tokens(self, api_call):
+        """Tokens de uma API call (mesma tokenização do vectorizer)"""
+        tokens = self.tokenize(self.preprocess(api_call))
+        if self.stop_words:
+            tokens = [token for token in tokens if token not in self.stop_words]
+        return tuple(tokens)
+
+    def id_tokens(self, token_id):
+        """Tokens de uma API call internada (tokenizada uma vez por ID)"""
+        cache = self._id_tokens
+        if token_id < len(cache):
+            tokens = cache[token_id]
+            if tokens is not None:
+                return tokens
+        else:
+            cache.extend([None] * (token_id + 1 - len(cache)))
+        tokens = self.tokens(self.table.text(token_id))
+        cache[token_id] = tokens
+        return tokens
+
+    def _forget_ids(self, token_ids):
+        """IDs recuperados pela tabela: descartar os tokens em cache"""
+        cache = self._id_tokens
+        for token_id in token_ids:
+            if token_id < len(cache):
+                cache[token_id] = None
+
+    def count_matrix(self, windows):
+        """Matriz esparsa de contagens (uma linha por janela)"""
+        indptr = [0]
+        indices = []
+        data = []
+        for window in windows:
+            counts = window.counts
+            indices.extend(counts.keys())
+            data.extend(counts.values())
+            indptr.append(len(indices))
+
+        X = sparse.csr_matrix(
+            (np.asarray(data, dtype=self.dtype), np.asarray(indices, dtype=np.int32), indptr),
+            shape=(len(windows), self.n_features)
+        )
+        X.sort_indices()
+        return X
+
+    def tfidf(self, X):
+        """Aplicar binário/sublinear, IDF e normalização como o TfidfTransformer"""
+        if self.binary:
+            X.data.fill(1)
+        if self.sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1
+        if self.idf is not None:
+            X.data *= self.idf[X.indices]
+        if self.norm is not None:
+            X = normalize(X, norm=self.norm, copy=False)
+        return X
+
+    def transform(self, windows):
+        """Vetores TF-IDF das janelas dos processos"""
+        return self.tfidf(self.count_matrix(windows))
+
+
+class ProcessFeatures:
+    """
+    Janela de API calls de um processo com as contagens de n-gramas do vocabulário
+
+    Um n-grama é contado quando seu último token chega e descontado quando a
+    API call do seu primeiro token sai da janela.
+    """
+
+    __slots__ = ('accumulator', 'calls', 'counts', 'maxlen')
+
+    def __init__(self, accumulator, maxlen=None, calls=None):
+        self.accumulator = accumulator
+        self.calls = calls if calls is not None else TokenRing(maxlen)
+        self.counts = {}
+        self.maxlen = self.calls.capacity
+
+    def __len__(self):
+        return len(self.calls)
+
+    def append(self, api_call):
+        """Registrar API call no fim da janela"""
+        if self.calls.full:
+            self.removing()
+        self.calls.append(self.accumulator.table.intern(api_call))
+        self.added()
+
+    def trim(self, keep):
+        """Manter somente as últimas keep API calls"""
+        while len(self.calls) > keep:
+            self.removing()
+            self.calls.popleft()
+
+    def added(self):
+        """Contar os n-gramas que terminam na API call mais recente da janela"""
+        acc = self.accumulator
+        new_tokens = acc.id_tokens(self.calls[-1])
+        if not new_tokens:
+            return
+
+        history = self._tail_tokens(acc.max_n - 1, skip_last=True)
+        sequence = history + new_tokens
+        first_new = len(history)
+        vocabulary = acc.vocabulary
+        counts = self.counts
+
+        for n in range(acc.min_n, acc.max_n + 1):
+            for end in range(max(first_new, n - 1), len(sequence)):
+                index = vocabulary.get(sequence[end] if n == 1 else ' '.join(sequence[end - n + 1:end + 1]))
+                if index is not None:
+                    counts[index] = counts.get(index, 0) + 1
+
+    def removing(self):
+        """Descontar os n-gramas que começam na API call mais antiga (antes de removê-la)"""
+        acc = self.accumulator
+        old_tokens = acc.id_tokens(self.calls[0])
+        if not old_tokens:
+            return
+
+        following = self._head_tokens(acc.max_n - 1)
+        sequence = old_tokens + following
+        vocabulary = acc.vocabulary
+        counts = self.counts
+
+        for n in range(acc.min_n, acc.max_n + 1):
+            for start in range(min(len(old_tokens), len(sequence) - n + 1)):
+                index = vocabulary.get(sequence[start] if n == 1 else ' '.join(sequence[start:start + n]))
+                if index is not None:
+                    remaining = counts[index] - 1
+                    if remaining:
+                        counts[index] = remaining
+                    else:
+                        del counts[index]
+
+    def _tail_tokens(self, count, skip_last=False):
+        """Últimos tokens da janela (para formar n-gramas com a nova API call)"""
+        if count <= 0:
+            return ()
+        id_tokens = self.accumulator.id_tokens
+        tokens = ()
+        position = len(self.calls) - (2 if skip_last else 1)
+        while position >= 0 and len(tokens) < count:
+            tokens = id_tokens(self.calls[position]) + tokens
+            position -= 1
+        return tokens[-count:]
+
+    def _head_tokens(self, count):
+        """Tokens seguintes à API call mais antiga (para descontar n-gramas)"""
+        if count <= 0:
+            return ()
+        id_tokens = self.accumulator.id_tokens
+        tokens = ()
+        position = 1
+        while position < len(self.calls) and len(tokens) < count:
+            tokens += id_tokens(self.calls[position])
+            position += 1
+        return tokens[:count]
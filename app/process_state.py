@@ -0,0 +1,251 @@
+"""
+ARMAZENAMENTO LIMITADO DO ESTADO POR PROCESSO
+Buffer de API calls, janelas incrementais (TF-IDF e indicadores), informações
+e contadores de padrões de cada PID em um único registro, com:
+
+- TTL: processos sem atividade há mais de ttl_seconds são descartados
+- LRU: acima de max_processes, o processo há mais tempo inativo sai primeiro
+- orçamento de memória: estimativa total (registros + API calls guardadas)
+  limitada a memory_budget_mb, também com descarte LRU
+
+A ordem do OrderedDict é a ordem de última atividade, então TTL e LRU só
+olham o início da fila: o custo por API call registrada é O(1).
+
+O buffer guarda IDs da tabela de internamento em um TokenRing (2 bytes por
+API call), compartilhado com as janelas de TF-IDF e de indicadores. Cada ID no
+buffer é uma referência na tabela: API calls que saem do buffer (ou de um
+processo descartado) devolvem a referência, e a tabela reaproveita os IDs sem
+uso quando enche (destinos de rede, DNS e pipes são ilimitados).
+"""
+
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Mapping
+
+from api_tokens import ApiSequence, ApiTokenTable
+
+
+class ProcessState:
+    """Estado de um processo monitorado"""
+
+    __slots__ = ('pid', 'calls', 'features', 'indicators', 'info', 'pattern_counters', 'last_seen')
+
+    def __init__(self, pid, calls, features=None, indicators=None):
+        self.pid = pid
+        self.calls = calls
+        self.features = features
+        self.indicators = indicators
+        self.info = None
+        self.pattern_counters = defaultdict(int)
+        self.last_seen = time.monotonic()
+
+
+class StateView(Mapping):
+    """Visão somente leitura pid -> atributo do estado (ex.: calls, info)"""
+
+    def __init__(self, store, attribute):
+        self._store = store
+        self._attribute = attribute
+
+    def __getitem__(self, pid):
+        state = self._store.states.get(pid)
+        value = getattr(state, self._attribute) if state is not None else None
+        if value is None:
+            raise KeyError(pid)
+        return value
+
+    def __iter__(self):
+        attribute = self._attribute
+        with self._store.lock:
+            pids = [pid for pid, state in self._store.states.items()
+                    if getattr(state, attribute) is not None]
+        return iter(pids)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class ProcessStateStore:
+    """
+    Estado de todos os processos com TTL, LRU e orçamento de memória
+
+    features_factory/indicators_factory criam as janelas incrementais de um
+    novo processo (recebem o tamanho do buffer e o TokenRing compartilhado).
+    """
+
+    # Estimativas de memória usadas no orçamento (medidas com tracemalloc):
+    # registro + dicts de contagem, e custo por API call no buffer e nas contagens
+    STATE_BYTES = 1024
+    CALL_BYTES = 24
+
+    def __init__(self, buffer_size=500, max_processes=5000, ttl_seconds=3600, memory_budget_mb=256,
+                 features_factory=None, indicators_factory=None, lock=None, clock=time.monotonic,
+                 table=None):
+        self.table = table if table is not None else ApiTokenTable()
+        self.buffer_size = buffer_size
+        self.max_processes = max_processes
+        self.ttl_seconds = ttl_seconds
+        self.memory_budget = memory_budget_mb * 1024 * 1024 if memory_budget_mb else None
+        self.features_factory = features_factory
+        self.indicators_factory = indicators_factory
+        self.lock = lock or threading.RLock()
+        self.clock = clock
+
+        self.states = OrderedDict()
+        self.total_calls = 0
+        self.stats = {
+            'created': 0,
+            'removed': 0,
+            'evicted_ttl': 0,
+            'evicted_lru': 0,
+            'evicted_memory': 0,
+            'peak_processes': 0
+        }
+
+    @classmethod
+    def from_config(cls, config, **kwargs):
+        return cls(
+            buffer_size=config.get('buffer_size', 500),
+            max_processes=config.get('max_processes', 5000),
+            ttl_seconds=config.get('ttl_seconds', 3600),
+            memory_budget_mb=config.get('memory_budget_mb', 256),
+            **kwargs
+        )
+
+    def __len__(self):
+        return len(self.states)
+
+    def __contains__(self, pid):
+        return pid in self.states
+
+    def get(self, pid):
+        return self.states.get(pid)
+
+    def view(self, attribute):
+        return StateView(self, attribute)
+
+    @property
+    def estimated_bytes(self):
+        return len(self.states) * self.STATE_BYTES + self.total_calls * self.CALL_BYTES
+
+    def touch(self, pid):
+        """Estado do processo (criado se necessário), marcado como ativo agora"""
+        with self.lock:
+            now = self.clock()
+            state = self.states.get(pid)
+            if state is None:
+                calls = ApiSequence(self.table, self.buffer_size)
+                state = ProcessState(
+                    pid, calls,
+                    self.features_factory(self.buffer_size, calls.ring) if self.features_factory else None,
+                    self.indicators_factory(self.buffer_size, calls.ring) if self.indicators_factory else None
+                )
+                self.states[pid] = state
+                self.stats['created'] += 1
+            else:
+                self.states.move_to_end(pid)
+            state.last_seen = now
+            self._enforce_limits(now, keep=pid)
+            self.stats['peak_processes'] = max(self.stats['peak_processes'], len(self.states))
+            return state
+
+    def record(self, pid, api_call):
+        """Registrar API call no buffer e nas janelas incrementais do processo"""
+        with self.lock:
+            state = self.touch(pid)
+            token_id = self.table.acquire(api_call)
+            ring = state.calls.ring
+            windows = [w for w in (state.features, state.indicators) if w is not None]
+
+            full = ring.full
+            if full:
+                for window in windows:
+                    window.removing()
+            evicted = ring.append(token_id)
+            if evicted is not None:
+                self.table.release(evicted)
+            for window in windows:
+                window.added()
+            if not full:
+                self.total_calls += 1
+            if self.memory_budget is not None and self.estimated_bytes > self.memory_budget:
+                self._enforce_limits(state.last_seen, keep=pid)
+            return state
+
+    def trim(self, pid, keep):
+        """Manter somente as últimas keep API calls do processo"""
+        with self.lock:
+            state = self.states.get(pid)
+            if state is None:
+                return
+            ring = state.calls.ring
+            windows = [w for w in (state.features, state.indicators) if w is not None]
+            while len(ring) > keep:
+                for window in windows:
+                    window.removing()
+                self.table.release(ring.popleft())
+                self.total_calls -= 1
+
+    def remove(self, pid):
+        """Remover processo (ex.: encerrado); devolve o estado removido"""
+        with self.lock:
+            state = self._drop(pid)
+            if state is not None:
+                self.stats['removed'] += 1
+            return state
+
+    def expire(self):
+        """Descartar processos inativos além do TTL; devolve quantos saíram"""
+        with self.lock:
+            before = self.stats['evicted_ttl']
+            self._expire(self.clock())
+            return self.stats['evicted_ttl'] - before
+
+    def pids_with_min_calls(self, min_calls):
+        with self.lock:
+            return [pid for pid, state in self.states.items() if len(state.calls) >= min_calls]
+
+    def metrics(self):
+        with self.lock:
+            return {
+                'processes': len(self.states),
+                'buffered_calls': self.total_calls,
+                'estimated_mb': round(self.estimated_bytes / 1024 / 1024, 2),
+                **self.stats
+            }
+
+    def _drop(self, pid):
+        state = self.states.pop(pid, None)
+        if state is not None:
+            self.total_calls -= len(state.calls)
+            state.calls.clear()
+        return state
+
+    def _expire(self, now):
+        if not self.ttl_seconds:
+            return
+        deadline = now - self.ttl_seconds
+        while self.states:
+            pid, state = next(iter(self.states.items()))
+            if state.last_seen >= deadline:
+                break
+            self._drop(pid)
+            self.stats['evicted_ttl'] += 1
+
+    def _enforce_limits(self, now, keep=None):
+        self._expire(now)
+        while self.max_processes and len(self.states) > self.max_processes:
+            if not self._evict_oldest(keep, 'evicted_lru'):
+                break
+        while self.memory_budget is not None and self.estimated_bytes > self.memory_budget:
+            if not self._evict_oldest(keep, 'evicted_memory'):
+                break
+
+    def _evict_oldest(self, keep, reason):
+        for pid in self.states:
+            if pid != keep:
+                self._drop(pid)
+                self.stats[reason] += 1
+                return True
+        return False
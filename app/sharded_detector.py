@@ -0,0 +1,427 @@
+"""
+DETECTOR EM PROCESSOS (SHARDS POR PID)
+Handlers, threat score e inferência disputam o GIL em um único processo. No
+modo em processos, este processo só lê a fonte de eventos, calcula o PID de
+cada evento (PID de origem nos eventos 8 e 10) e envia lotes a N workers.
+Cada worker é um SysmonMalwareDetector completo, com o próprio modelo e o
+estado (API calls, info, indicadores) apenas dos seus PIDs, e devolve as
+detecções para um fluxo único de alertas neste processo.
+
+O checkpoint também fica neste processo: cada worker informa o último
+RecordNumber que seus handlers trataram e a posição gravada é a maior sem
+nenhum evento anterior ainda em lote, em fila ou em um worker atrasado.
+
+    leitor -> hash(PID) % N -> [fila] -> worker 0 (handlers + modelo) -\\
+                            -> [fila] -> worker 1 ...                   -> [detecções] -> alertas
+"""
+
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "utils"))
+from detection_sistem import SysmonMalwareDetector
+from event_sources import PushEventSource, SysmonRecord
+from sysmon_schema import event_pid
+
+# Configuração dos workers: alertas, métricas e checkpoint ficam no processo principal
+SHARD_OVERRIDES = {
+    'alert_webhook': None,
+    'metrics': {'enabled': False},
+    'checkpoint': {'enabled': False}
+}
+
+# Contadores dos workers somados às estatísticas do processo principal
+MERGED_STATS = ('processes_monitored', 'polymorphic_detected', 'memory_injections',
+                'ai_communications', 'false_positives')
+
+
+def shard_of(event, shards):
+    """Worker responsável pelo evento (todos os eventos de um PID vão para o mesmo)"""
+    return hash(event_pid(event)) % shards
+
+
+def _transportable(event):
+    """SysmonRecord serializável (o PyEventLogRecord do pywin32 não atravessa processos)"""
+    if type(event) is SysmonRecord:
+        return event
+    return SysmonRecord(event.EventID, None, event.ComputerName, event.RecordNumber,
+                        event.StringInserts or ())
+
+
+class QueueEventSource(PushEventSource):
+    """Lotes de eventos enviados pelo leitor (multiprocessing.Queue); None encerra"""
+
+    name = 'shard'
+
+    def __init__(self, events, batch_size=500):
+        super().__init__(batch_size)
+        self.events = events
+        self.delivered = 0
+        self._thread = None
+
+    def open(self):
+        super().open()
+        self._thread = threading.Thread(target=self._feed, name='shard-feed', daemon=True)
+        self._thread.start()
+
+    def _feed(self):
+        try:
+            while True:
+                batch = self.events.get()
+                if batch is None:
+                    break
+                self.delivered = batch[-1].RecordNumber
+                self.publish_many(batch)
+        finally:
+            self.end()
+
+
+class ShardProgress:
+    """
+    Checkpoint de um worker: informa ao processo principal o último RecordNumber tratado
+
+    Mesma interface do EventCheckpoint (commit/flush) usada pelo pipeline; em
+    vez de gravar em disco, envia ('progress', índice, RecordNumber) pela fila
+    de detecções ao alcançar o último evento recebido ou a cada interval segundos.
+    """
+
+    def __init__(self, index, detections, source, interval=0.5):
+        self.index = index
+        self.detections = detections
+        self.source = source
+        self.interval = interval
+        self.record_number = 0
+        self._reported = 0
+        self._reported_at = time.monotonic()
+
+    def commit(self, record_number):
+        if record_number <= self.record_number:
+            return
+        self.record_number = record_number
+        if record_number >= self.source.delivered or time.monotonic() - self._reported_at >= self.interval:
+            self._report()
+
+    def flush(self):
+        if self.record_number != self._reported:
+            self._report()
+
+    def _report(self):
+        self._reported = self.record_number
+        self._reported_at = time.monotonic()
+        self.detections.put(('progress', self.index, self.record_number))
+
+
+class ShardWorkerDetector(SysmonMalwareDetector):
+    """Detector de um worker: mesma configuração do processo principal, detecções devolvidas por fila"""
+
+    def __init__(self, index, config, detections, model_path, config_path, event_source):
+        self.shard_index = index
+        self.shard_config = config
+        self.detections_queue = detections
+        super().__init__(model_path, config_path, event_source)
+
+    def _setup_logging(self, options=None):
+        # Rotação de arquivo não é segura entre processos: cada worker tem o seu diretório
+        base = (self.shard_config.get('logging') or {}).get('dir', self.LOGGING_DEFAULTS['dir'])
+        super()._setup_logging({**(options or {}), 'dir': str(Path(base) / f"shard-{self.shard_index}"),
+                                'console_level': 'WARNING'})
+
+    def _load_config(self, config_path):
+        # Configuração já com as opções da linha de comando aplicadas no processo principal
+        return {**self.shard_config, **SHARD_OVERRIDES}
+
+    def _setup_checkpoint(self):
+        # Posição tratada enviada ao processo principal, que grava o checkpoint
+        interval = (self.shard_config.get('sharding') or {}).get('progress_interval', 0.5)
+        self.checkpoint = ShardProgress(self.shard_index, self.detections_queue, self.event_source, interval)
+
+    def _handle_malware_detection(self, pid, result):
+        """Enviar a detecção ao processo principal (fluxo único de alertas)"""
+        self.stats['malware_detected'] += 1
+        self.detections.append(result)
+        info = self.process_info.get(pid)
+        self.detections_queue.put(('detection', self.shard_index, {
+            'pid': pid,
+            'result': result,
+            'info': dict(info) if info else None,
+            'patterns': dict(self.pattern_counters.get(pid, {}))
+        }))
+
+
+def run_shard(index, model_path, config_path, config, events, detections):
+    """Processo worker: analisa os PIDs do shard até o leitor enviar o fim dos eventos"""
+    detector = ShardWorkerDetector(index, config, detections, model_path, config_path,
+                                   QueueEventSource(events))
+    detections.put(('ready', index, None))
+
+    detector.running = True
+    detector.stats['start_time'] = datetime.now()
+    threading.Thread(target=detector._periodic_analysis, daemon=True).start()
+    detector._monitor_sysmon_events()
+    detector.stop()
+    detections.put(('done', index, {key: detector.stats[key] for key in MERGED_STATS}))
+
+
+class ShardedMalwareDetector(SysmonMalwareDetector):
+    """
+    Detector dividido em processos por PID
+
+    Este processo lê a fonte, distribui os eventos e emite os alertas
+    (log crítico, evidências, quarentena, webhook) das detecções dos workers.
+
+    Args:
+        model_path: Caminho para modelo treinado (.joblib), carregado por cada worker
+        config_path: Caminho para configuração (opcional)
+        event_source: Fonte de eventos (padrão: log ao vivo do Sysmon)
+        workers: Número de processos (padrão: sharding.workers ou núcleos da máquina)
+    """
+
+    def __init__(self, model_path, config_path=None, event_source=None, workers=None):
+        super().__init__(model_path, config_path, event_source)
+        options = self.config.get('sharding') or {}
+        self.model_path = str(model_path)
+        self.config_path = str(config_path) if config_path else None
+        self.workers = max(1, int(workers or options.get('workers') or os.cpu_count() or 1))
+
+        self.routed = [0] * self.workers
+        self.shard_progress = [0] * self.workers
+        self.shard_stats = {}
+        self.dispatch_seconds = 0.0
+
+        self._processes = []
+        self._queues = []
+        self._delivered = [0] * self.workers
+        self._read_upto = 0
+        self._routes = []
+        self._detections = None
+        self._collector = None
+        self._shards_idle = threading.Event()
+        self._shards_idle.set()
+
+    def stop(self):
+        """Parar a leitura e aguardar os workers entregarem as últimas detecções"""
+        self.running = False
+        self.event_source.close()
+        self._shards_idle.wait()
+        super().stop()
+
+    def _monitor_sysmon_events(self):
+        """Thread que lê a fonte, distribui os eventos por PID e reúne as detecções"""
+        self._shards_idle.clear()
+        try:
+            self._setup_checkpoint()
+            self._start_shards()
+
+            self.event_source.open()
+            self.logger.info(f"✓ Conectado à fonte de eventos: {self.event_source.name}")
+
+            started = time.perf_counter()
+            self._route_events()
+            self._finish_shards()
+            self.dispatch_seconds = time.perf_counter() - started
+
+            if self.checkpoint:
+                self.checkpoint.commit(self._processed_position(self._routes))
+                self.checkpoint.flush()
+
+            if self.running and self.event_source.exhausted:
+                self._finish_replay()
+
+        except Exception as e:
+            # Worker morto ou travado: parar o detector; o checkpoint fica antes dos eventos não tratados
+            self.logger.error(f"Erro no monitoramento em processos: {e}")
+            self.running = False
+        finally:
+            self._stop_shards()
+            if self.checkpoint:
+                self.checkpoint.flush()
+            self._shards_idle.set()
+
+    def _start_shards(self):
+        """Criar os workers e aguardar cada um carregar o modelo"""
+        options = self.config.get('sharding') or {}
+        context = multiprocessing.get_context('spawn')
+        self.shard_progress = [0] * self.workers
+        self._delivered = [0] * self.workers
+        self._read_upto = 0
+        self._detections = context.Queue()
+        self._queues = [context.Queue(maxsize=options.get('queue_size', 64)) for _ in range(self.workers)]
+
+        config = dict(self.config)
+        self._processes = [
+            context.Process(target=run_shard, name=f"shard-{index}", daemon=True,
+                            args=(index, self.model_path, self.config_path, config, events, self._detections))
+            for index, events in enumerate(self._queues)
+        ]
+        for process in self._processes:
+            process.start()
+
+        ready = 0
+        while ready < self.workers:
+            kind, _, _ = self._detections.get(timeout=options.get('start_timeout', 120))
+            ready += kind == 'ready'
+
+        self._collector = threading.Thread(target=self._collect_detections, name='shard-detections',
+                                           daemon=True)
+        self._collector.start()
+        self.logger.info(f"✓ {self.workers} workers prontos (eventos divididos por PID)")
+
+    def _route_events(self):
+        """Ler a fonte e enviar cada evento ao worker do seu PID, em lotes"""
+        source, queues, shards = self.event_source, self._queues, self.workers
+        options = self.config.get('pipeline') or {}
+        idle_sleep = options.get('idle_sleep', 0.1)
+        wait_timeout = options.get('wait_timeout', 1.0)
+        batch_size = (self.config.get('sharding') or {}).get('batch_size', 256)
+        routes = self._routes = [[] for _ in queues]
+
+        def flush(index):
+            # Bloqueia enquanto o worker estiver atrasado (backpressure)
+            self._put(index, routes[index])
+            self._delivered[index] = routes[index][-1].RecordNumber
+            self.routed[index] += len(routes[index])
+            routes[index] = []
+
+        while self.running:
+            events = source.read()
+            if events:
+                for event in events:
+                    index = hash(event_pid(event)) % shards  # shard_of() sem a chamada extra
+                    route = routes[index]
+                    route.append(_transportable(event))
+                    if len(route) >= batch_size:
+                        flush(index)
+                self.stats['events_processed'] += len(events)
+                self._read_upto = events[-1].RecordNumber
+                if self.checkpoint:
+                    # Só avança até onde os workers já trataram tudo
+                    self.checkpoint.commit(self._processed_position(routes))
+                continue
+
+            # Sem eventos novos: entregar os lotes incompletos antes de esperar
+            for index, route in enumerate(routes):
+                if route:
+                    flush(index)
+            if self.checkpoint:
+                self.checkpoint.commit(self._processed_position())
+            if source.exhausted:
+                break
+            if source.push:
+                source.wait(wait_timeout)
+            else:
+                time.sleep(idle_sleep)
+
+        for index, route in enumerate(routes):
+            if route:
+                flush(index)
+
+    def _put(self, index, item):
+        """
+        Entregar um lote (ou o fim, None) à fila do worker sem bloquear para sempre
+
+        Levanta RuntimeError se o worker morreu com a fila cheia ou, depois do
+        stop(), não aceitou o lote em pipeline.stop_timeout segundos.
+        """
+        options = self.config.get('sharding') or {}
+        timeout = options.get('put_timeout', 1.0)
+        process = self._processes[index]
+        deadline = None
+        while True:
+            try:
+                self._queues[index].put(item, timeout=timeout)
+                return
+            except queue.Full:
+                pass
+            if not process.is_alive():
+                raise RuntimeError(f"Worker {index} encerrou (código {process.exitcode}) com eventos pendentes")
+            if not self.running:
+                if deadline is None:
+                    stop_timeout = (self.config.get('pipeline') or {}).get('stop_timeout', 10.0)
+                    deadline = time.monotonic() + stop_timeout
+                elif time.monotonic() > deadline:
+                    raise RuntimeError(f"Worker {index} não aceitou eventos após o stop()")
+
+    def _processed_position(self, routes=()):
+        """
+        Maior RecordNumber lido com todos os eventos até ele tratados pelos workers
+
+        Cada worker trata os eventos do seu shard em ordem: em um worker com
+        eventos entregues e ainda não tratados, a posição segura é o último
+        RecordNumber informado por ele; em um lote ainda não entregue, o
+        evento anterior ao primeiro do lote.
+        """
+        position = self._read_upto
+        for index, route in enumerate(routes):
+            if route:
+                position = min(position, route[0].RecordNumber - 1)
+        for delivered, progress in zip(self._delivered, self.shard_progress):
+            if delivered > progress:
+                position = min(position, progress)
+        return position
+
+    def _finish_shards(self):
+        """Sinalizar o fim aos workers e aguardar as detecções e estatísticas finais"""
+        for index in range(self.workers):
+            self._put(index, None)
+        for process in self._processes:
+            process.join()
+        self._collector.join()
+
+        for stats in self.shard_stats.values():
+            for key in MERGED_STATS:
+                self.stats[key] += stats[key]
+        self.logger.info(f"📦 Eventos por worker: {self.routed}")
+
+    def _stop_shards(self):
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+    def _collect_detections(self):
+        """Thread do fluxo único de alertas: detecções de todos os workers"""
+        done = set()
+        silent = set()
+        while len(done) < self.workers:
+            try:
+                kind, index, payload = self._detections.get(timeout=1)
+            except queue.Empty:
+                if not any(process.is_alive() for process in self._processes):
+                    break
+                # Worker encerrado sem 'done' (o aviso teria chegado em um ciclo de espera)
+                for index, process in enumerate(self._processes):
+                    if index in done or process.is_alive():
+                        continue
+                    if index in silent:
+                        self.logger.error(f"Worker {index} encerrou sem finalizar (código {process.exitcode})")
+                        done.add(index)
+                    silent.add(index)
+                continue
+
+            if kind == 'progress':
+                self.shard_progress[index] = payload
+            elif kind == 'detection':
+                self._on_shard_detection(payload)
+            elif kind == 'done':
+                done.add(index)
+                self.shard_stats[index] = payload
+
+    def _on_shard_detection(self, detection):
+        """Registrar o contexto do processo enviado pelo worker e emitir o alerta"""
+        pid = detection['pid']
+        with self.state_lock:
+            state = self.process_state.touch(pid)
+            if detection['info']:
+                state.info = detection['info']
+            state.pattern_counters.clear()
+            state.pattern_counters.update(detection['patterns'])
+        try:
+            self._handle_malware_detection(pid, detection['result'])
+        except Exception as e:
+            self.logger.error(f"Erro ao emitir alerta do PID {pid}: {e}")
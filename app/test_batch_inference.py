@@ -0,0 +1,70 @@
+"""
+TESTES DA INFERÊNCIA EM LOTE
+"""
+
+from conftest import BENIGN_SEQUENCES, MALWARE_SEQUENCES
+
+
+def _fill(detector, sequences):
+    for pid, sequence in enumerate(sequences, start=100):
+        for api_call in sequence.split():
+            detector._record_api_call(pid, api_call)
+
+
+def test_batch_matches_single_predictions(make_detector):
+    detector = make_detector()
+    sequences = BENIGN_SEQUENCES + MALWARE_SEQUENCES
+    calls = [sequence.split() for sequence in sequences]
+    pids = list(range(len(sequences)))
+
+    batch = detector._predict_batch(calls, pids)
+    single = [detector._predict(api_calls, pid) for api_calls, pid in zip(calls, pids)]
+
+    for b, s in zip(batch, single):
+        assert b['prediction'] == s['prediction']
+        assert b['probabilities'] == s['probabilities']
+    assert {r['prediction'] for r in batch} == {'Benign', 'Trojan'}
+
+
+def test_periodic_cycle_runs_model_once(make_detector, monkeypatch):
+    detector = make_detector()
+    _fill(detector, BENIGN_SEQUENCES * 10 + MALWARE_SEQUENCES * 10)
+
+    calls = []
+    original = detector.scorer.predict_proba
+    monkeypatch.setattr(detector.scorer, 'predict_proba',
+                        lambda X: calls.append(X.shape[0]) or original(X))
+
+    assert detector._analyze_processes(list(detector.process_api_calls)) == 60
+    assert calls == [60]
+    assert detector.stats['malware_detected'] >= 30
+
+
+def test_preprocess_stays_sparse(make_detector):
+    from scipy import sparse
+    from sklearn.decomposition import TruncatedSVD
+
+    detector = make_detector()
+    X = detector._preprocess_sample(MALWARE_SEQUENCES[0])
+    assert sparse.issparse(X) and X.shape[0] == 1
+
+    detector.pca = TruncatedSVD(n_components=3, random_state=0).fit(
+        detector.tfidf_vectorizer.transform(BENIGN_SEQUENCES + MALWARE_SEQUENCES))
+    assert detector._preprocess_batch(MALWARE_SEQUENCES).shape == (3, 3)
+
+
+def test_detector_loads_single_bundle(make_detector, model_path, tmp_path):
+    import joblib
+    from model_bundle import save_bundle
+
+    data = joblib.load(model_path)
+    bundle_path = save_bundle(tmp_path / 'modelo.bundle', data['model'], data['tfidf_vectorizer'],
+                              data['label_encoder'])
+    legacy = make_detector()
+
+    from detection_sistem import SysmonMalwareDetector
+    detector = SysmonMalwareDetector(bundle_path)
+    calls = [sequence.split() for sequence in MALWARE_SEQUENCES]
+    pids = [1, 2, 3]
+    assert ([r['probabilities'] for r in detector._predict_batch(calls, pids)] ==
+            [r['probabilities'] for r in legacy._predict_batch(calls, pids)])
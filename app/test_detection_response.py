@@ -0,0 +1,38 @@
+"""
+TESTES DA RESPOSTA A DETECÇÕES (EVIDÊNCIAS E ALERTAS EM SEGUNDO PLANO)
+"""
+
+import json
+import time
+
+from conftest import malicious_activity
+from event_sources import ReplayEventSource
+
+
+def test_detections_queue_alerts_and_save_evidence(make_detector, write_events, tmp_path):
+    events = []
+    for n, pid in enumerate((1111, 2222)):
+        events.extend(malicious_activity(pid, start_record=n * 10 + 1))
+
+    # Porta sem servidor: a análise não pode esperar pela rede
+    detector = make_detector(ReplayEventSource(write_events(events), speed=0),
+                             alert_webhook='http://127.0.0.1:9/webhook')
+    detector.config['save_evidence'] = True
+
+    started = time.perf_counter()
+    detector.running = True
+    detector._monitor_sysmon_events()
+    assert time.perf_counter() - started < 5
+
+    delivery = detector.alert_dispatcher.metrics()
+    assert delivery['submitted'] == detector.stats['malware_detected'] >= 2
+    assert delivery['queued'] == delivery['submitted']
+
+    evidence_files = sorted((tmp_path / 'logs' / 'evidence').glob('evidencia_*.json'))
+    assert len(evidence_files) == detector.stats['malware_detected']
+    evidence = json.loads(evidence_files[0].read_text(encoding='utf-8'))
+    assert evidence['process_info']['process_name'].startswith('payload_')
+    assert 'CreateRemoteThread' in evidence['api_calls']
+
+    embed = detector._webhook_embed(detector.alert_dispatcher.queue.get_nowait()['alert'])
+    assert embed['fields'][0]['value'].startswith('`payload_')
@@ -0,0 +1,45 @@
+"""
+TESTES DAS MÉTRICAS DO DETECTOR (LATÊNCIA POR ESTÁGIO E /metrics)
+"""
+
+import urllib.request
+
+from conftest import malicious_activity
+from event_sources import ReplayEventSource
+
+
+def test_replay_fills_stage_histograms_and_queue_metrics(make_detector, write_events):
+    events = []
+    for n, pid in enumerate((1111, 2222)):
+        events.extend(malicious_activity(pid, start_record=n * 10 + 1))
+    detector = make_detector(ReplayEventSource(write_events(events), speed=0))
+
+    detector.running = True
+    detector._monitor_sysmon_events()
+
+    latency = {dict(labels)['stage']: histogram.count
+               for labels, histogram in detector.metrics.histograms('stage_latency_seconds').items()}
+    assert latency['parse'] == len(events)
+    assert latency['handler'] == len(events)
+    assert latency['features'] >= 1 and latency['inference'] == latency['features']
+
+    text = detector.metrics.render()
+    assert f'sysmon_detector_events_processed_total {len(events)}' in text
+    assert 'sysmon_detector_queue_max_depth{stage="handler"}' in text
+    assert 'sysmon_detector_stage_latency_seconds_count{stage="parse"} 10' in text
+
+
+def test_metrics_endpoint_and_event_rate(make_detector):
+    detector = make_detector(metrics={'enabled': True, 'host': '127.0.0.1', 'port': 0})
+    detector._start_metrics_server()
+    try:
+        with urllib.request.urlopen(detector.metrics_server.url, timeout=5) as response:
+            body = response.read().decode('utf-8')
+        assert '# TYPE sysmon_detector_stage_latency_seconds histogram' in body
+    finally:
+        detector.metrics_server.stop()
+
+    detector._rate_mark = (0.0, 0)
+    detector.stats['events_processed'] = 500
+    detector._update_event_rate()
+    assert detector.stats['events_per_second'] > 0
@@ -0,0 +1,29 @@
+"""
+TESTES DO MODO --profile (REPLAY SOB O PROFILER AMOSTRAL)
+"""
+
+import json
+
+from conftest import malicious_activity
+from event_sources import ReplayEventSource
+
+
+def test_profile_replays_and_writes_collapsed_stacks_and_summary(make_detector, write_events, tmp_path):
+    events = []
+    for n in range(40):
+        events.extend(malicious_activity(1000 + n, start_record=n * 10 + 1))
+    detector = make_detector(ReplayEventSource(write_events(events), speed=0))
+
+    summary = detector.profile(tmp_path / 'profile' / 'detector', interval=0.001)
+
+    assert summary['events_processed'] == len(events)
+    assert set(summary['groups']) == set(detector.PROFILE_FOCUS)
+    assert summary['samples'] + summary['idle_samples'] > 0
+
+    collapsed = (tmp_path / 'profile' / 'detector.collapsed').read_text(encoding='utf-8')
+    for line in collapsed.splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert ';' in stack and int(count) > 0
+
+    saved = json.loads((tmp_path / 'profile' / 'detector_summary.json').read_text(encoding='utf-8'))
+    assert saved['groups'].keys() == summary['groups'].keys()
@@ -0,0 +1,32 @@
+"""
+TESTES DOS HANDLERS COM OS CAMPOS DO PARSER NOMEADO (EVENTOS 1-29)
+"""
+
+from conftest import sysmon_event
+from event_sources import ReplayEventSource
+
+
+def test_handlers_receive_named_fields_for_all_monitored_events(make_detector, write_events):
+    events = [
+        sysmon_event(1, 1, ProcessId=500, Image='C:\\a.exe', ParentImage='C:\\Windows\\explorer.exe'),
+        sysmon_event(3, 2, ProcessId=500, DestinationIp='10.0.0.5', DestinationHostname='api.openai.com',
+                     DestinationPort=443),
+        sysmon_event(10, 3, SourceProcessId=500, SourceImage='C:\\a.exe', TargetProcessId=600,
+                     TargetImage='C:\\Windows\\System32\\lsass.exe'),
+        sysmon_event(13, 4, ProcessId=500, TargetObject='HKLM\\Software\\Microsoft\\Windows\\CurrentVersion\\Run\\x'),
+        sysmon_event(17, 5, ProcessId=500, PipeName='\\evil'),
+        sysmon_event(22, 6, ProcessId=500, QueryName='api.openai.com'),
+        sysmon_event(23, 7, ProcessId=500, TargetFilename='C:\\tmp\\x.exe'),
+        sysmon_event(25, 8, ProcessId=500, Type='Image is replaced'),
+    ]
+    detector = make_detector()
+    source = ReplayEventSource(write_events(events), speed=0)
+    source.open()
+    for record in source.read():
+        detector._process_sysmon_event(record)
+
+    calls = list(detector.process_api_calls['500'])
+    assert calls == ['CreateProcess', 'connect:api.openai.com:443', 'OpenProcess:lsass.exe',
+                     'RegSetValue', 'CreatePipe:\\evil', 'DNSQuery:api.openai.com', 'DeleteFile',
+                     'ProcessTampering']
+    assert detector.process_state.get('500').info['parent'] == 'C:\\Windows\\explorer.exe'
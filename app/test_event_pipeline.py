@@ -0,0 +1,182 @@
+"""
+TESTES DO PIPELINE DE EVENTOS EM ESTÁGIOS
+"""
+
+import json
+import os
+import threading
+import time
+
+from conftest import malicious_activity
+from event_pipeline import EventPipeline, PipelineStage
+from event_sources import PipeEventSource, ReplayEventSource
+
+
+def test_stage_coalesces_pending_keys():
+    release = threading.Event()
+    seen = []
+
+    def slow(item):
+        release.wait(1)
+        seen.append(item)
+
+    stage = PipelineStage('inference', slow, maxsize=10)
+    stage.start()
+    stage.submit('first', key='first')
+    time.sleep(0.05)  # worker ocupado com 'first'
+
+    for _ in range(5):
+        stage.submit(42, key=42)
+    release.set()
+    stage.finish()
+
+    assert seen == ['first', 42]
+    assert stage.metrics()['coalesced'] == 4
+
+
+def test_stage_drops_when_full():
+    block = threading.Event()
+    stage = PipelineStage('inference', lambda item: block.wait(1), maxsize=1)
+    stage.start()
+    stage.submit(1, key=1)
+    time.sleep(0.05)
+    stage.submit(2, key=2)
+
+    assert stage.submit(3, key=3, timeout=0.01) is False
+    assert stage.metrics()['dropped'] == 1
+    block.set()
+    stage.finish()
+
+
+def test_slow_inference_does_not_stall_reading():
+    batches = [[('evt', i) for i in range(10)] for _ in range(20)]
+    handled = []
+
+    def read_batch():
+        return batches.pop() if batches else []
+
+    def handle(parsed):
+        handled.append(parsed)
+        pipeline.request_analysis(parsed[1])
+
+    def analyze(pid):
+        time.sleep(0.2)
+
+    pipeline = EventPipeline(read_batch, lambda e: e, handle, analyze,
+                             is_exhausted=lambda: not batches,
+                             config={'inference_workers': 1, 'idle_sleep': 0.01})
+    pipeline.start()
+
+    # Leitura e handlers terminam enquanto a inferência ainda está ocupada
+    deadline = time.time() + 2
+    while len(handled) < 200 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(handled) == 200
+    assert pipeline.metrics()['inference']['coalesced'] > 0
+
+    assert pipeline.finished.wait(5)
+
+
+def test_detector_replay_through_pipeline(make_detector, write_events):
+    events = []
+    for n, pid in enumerate((1111, 2222, 3333)):
+        events.extend(malicious_activity(pid, start_record=n * 10 + 1))
+    path = write_events(events)
+
+    detector = make_detector(ReplayEventSource(path, speed=0))
+    detector.running = True
+    detector._monitor_sysmon_events()
+
+    metrics = detector.pipeline.metrics()
+    assert detector.stats['events_processed'] == len(events)
+    assert metrics['reader']['events_read'] == len(events)
+    assert metrics['handler']['processed'] == len(events)
+    assert metrics['inference']['processed'] >= 3
+    assert detector.stats['memory_injections'] == 3
+    assert detector.stats['malware_detected'] >= 3
+    assert detector.running is False
+
+
+def test_detector_replay_resumes_from_checkpoint(make_detector, write_events, tmp_path):
+    events = []
+    for n, pid in enumerate((1111, 2222)):
+        events.extend(malicious_activity(pid, start_record=n * 10 + 1))
+    path = write_events(events)
+    checkpoint = {'enabled': True, 'path': 'state/checkpoint.json', 'save_interval': 1.0, 'replay': True}
+
+    detector = make_detector(ReplayEventSource(path, speed=0), checkpoint=checkpoint)
+    detector.running = True
+    detector._monitor_sysmon_events()
+
+    assert detector.stats['events_processed'] == len(events)
+    saved = json.loads((tmp_path / 'state' / 'checkpoint.json').read_text(encoding='utf-8'))
+    assert saved['record_number'] == 15
+
+    # Reinício com eventos novos no arquivo: só eles são processados
+    with open(path, 'a', encoding='utf-8') as f:
+        for event in malicious_activity(3333, start_record=21):
+            f.write(json.dumps(event) + '\n')
+
+    detector = make_detector(ReplayEventSource(path, speed=0), checkpoint=checkpoint)
+    detector.running = True
+    detector._monitor_sysmon_events()
+
+    assert detector.stats['events_processed'] == 5
+    assert set(detector.process_api_calls) == {'3333'}
+    assert detector.checkpoint.record_number == 25
+
+
+def test_detector_stop_does_not_reopen_replay(make_detector, write_events, tmp_path):
+    events = []
+    for n in range(8):
+        events.extend(malicious_activity(5000 + n, start_record=n * 5 + 1))
+    path = write_events(events)
+    checkpoint = {'enabled': True, 'path': 'state/checkpoint.json', 'save_interval': 0, 'replay': True}
+
+    # 20 ms entre eventos: stop() chega no meio do replay
+    source = ReplayEventSource(path, speed=0.05, batch_size=1)
+    detector = make_detector(source, checkpoint=checkpoint)
+    detector.running = True
+    monitor = threading.Thread(target=detector._monitor_sysmon_events)
+    monitor.start()
+    time.sleep(0.2)
+
+    detector.stop()
+    processed = detector.stats['events_processed']
+    assert detector.pipeline.finished.is_set()
+    assert 0 < processed < len(events)
+    assert source.read() == []
+
+    # Leitor parado antes do close(): nada relido do início, checkpoint no último processado
+    time.sleep(0.2)
+    monitor.join(5)
+    assert detector.stats['events_processed'] == processed == source.events_emitted
+    saved = json.loads((tmp_path / 'state' / 'checkpoint.json').read_text(encoding='utf-8'))
+    assert saved['record_number'] == processed
+
+
+def test_detector_push_ingestion_from_pipe(make_detector):
+    read_fd, write_fd = os.pipe()
+    detector = make_detector(PipeEventSource(os.fdopen(read_fd, 'r', encoding='utf-8')))
+    detector.running = True
+    monitor = threading.Thread(target=detector._monitor_sysmon_events)
+    monitor.start()
+
+    events = malicious_activity(4242) + malicious_activity(4343, start_record=11)
+    for event in events:
+        os.write(write_fd, (json.dumps(event) + '\n').encode('utf-8'))
+    deadline = time.monotonic() + 5
+    while detector.stats['events_processed'] < len(events) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # Leitor bloqueado na fonte: sem acordar a cada idle_sleep (0.1 s) enquanto espera
+    empty_reads = detector.pipeline.metrics()['reader']['empty_reads']
+    time.sleep(0.5)
+    assert detector.pipeline.metrics()['reader']['empty_reads'] - empty_reads <= 1
+
+    os.close(write_fd)
+    monitor.join(5)
+
+    assert not monitor.is_alive()
+    assert detector.stats['events_processed'] == len(events)
+    assert detector.stats['malware_detected'] >= 2
@@ -0,0 +1,62 @@
+"""
+TESTES DO ACUMULADOR INCREMENTAL DE FEATURES
+"""
+
+import random
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from conftest import BENIGN_SEQUENCES, MALWARE_SEQUENCES
+from feature_accumulator import FeatureAccumulator
+
+API_CALLS = ['CreateProcess', 'connect:api.openai.com:443', 'OpenProcess:lsass.exe',
+             'CreateFile:.exe', 'LoadLibrary:kernel32.dll', 'CreateRemoteThread', 'RegSetValue']
+
+
+@pytest.mark.parametrize('params', [
+    {},
+    {'ngram_range': (1, 2)},
+    {'ngram_range': (1, 3), 'sublinear_tf': True},
+    {'token_pattern': r'\S+', 'lowercase': False, 'ngram_range': (1, 2), 'dtype': np.float32},
+    {'stop_words': ['exe'], 'binary': True, 'ngram_range': (1, 2), 'max_df': 0.9},
+])
+def test_sliding_window_matches_vectorizer(params):
+    rng = random.Random(0)
+    corpus = [' '.join(rng.choices(API_CALLS, k=30)) for _ in range(40)]
+    vectorizer = TfidfVectorizer(**params).fit(corpus)
+    accumulator = FeatureAccumulator.from_vectorizer(vectorizer)
+
+    window = accumulator.new_window(maxlen=25)
+    history = []
+    for i in range(200):
+        api_call = rng.choice(API_CALLS)
+        window.append(api_call)
+        history = (history + [api_call])[-25:]
+        if i % 41 == 40:
+            window.trim(5)
+            history = history[-5:]
+
+        expected = vectorizer.transform([' '.join(history)]).toarray()
+        assert np.array_equal(accumulator.transform([window]).toarray(), expected)
+
+
+def test_char_analyzer_not_supported():
+    vectorizer = TfidfVectorizer(analyzer='char').fit(['abc'])
+    assert FeatureAccumulator.from_vectorizer(vectorizer) is None
+
+
+def test_detector_uses_accumulated_counts(make_detector):
+    detector = make_detector()
+    for pid, sequence in enumerate(BENIGN_SEQUENCES + MALWARE_SEQUENCES):
+        for api_call in sequence.split():
+            detector._record_api_call(pid, api_call)
+
+    pids = sorted(detector.process_features)
+    counts = detector.feature_accumulator.count_matrix([detector.process_features[p] for p in pids])
+    calls = [list(detector.process_api_calls[p]) for p in pids]
+
+    incremental = detector._predict_batch(calls, pids, counts)
+    from_text = detector._predict_batch(calls, pids)
+    assert [r['probabilities'] for r in incremental] == [r['probabilities'] for r in from_text]
@@ -0,0 +1,122 @@
+"""
+TESTES DO ARMAZENAMENTO LIMITADO DE ESTADO POR PROCESSO
+"""
+
+from process_state import ProcessStateStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_expires_inactive_processes():
+    clock = FakeClock()
+    store = ProcessStateStore(ttl_seconds=10, clock=clock)
+    store.record(1, 'NtClose')
+    clock.now = 5
+    store.record(2, 'NtClose')
+    clock.now = 12
+
+    assert store.expire() == 1
+    assert 1 not in store and 2 in store
+    assert store.metrics()['evicted_ttl'] == 1
+    assert store.total_calls == 1
+
+
+def test_lru_evicts_least_recently_active():
+    store = ProcessStateStore(max_processes=2, ttl_seconds=None)
+    store.record(1, 'a')
+    store.record(2, 'b')
+    store.record(1, 'c')
+    store.record(3, 'd')
+
+    assert sorted(store.states) == [1, 3]
+    assert store.metrics()['evicted_lru'] == 1
+    assert store.metrics()['peak_processes'] == 2
+
+
+def test_memory_budget_bounds_estimate():
+    store = ProcessStateStore(buffer_size=1000, max_processes=None, ttl_seconds=None, memory_budget_mb=1)
+    for pid in range(1000):
+        for _ in range(100):
+            store.record(pid, 'NtReadFile')
+
+    assert store.estimated_bytes <= store.memory_budget
+    assert store.metrics()['evicted_memory'] > 0
+    assert store.total_calls == sum(len(state.calls) for state in store.states.values())
+
+
+def test_trim_remove_and_views_keep_accounting():
+    store = ProcessStateStore(buffer_size=5)
+    for i in range(8):
+        store.record(7, f'call{i}')
+    store.touch(7).info = {'suspicious_score': 0}
+
+    assert store.total_calls == 5
+    store.trim(7, 2)
+    assert list(store.view('calls')[7]) == ['call6', 'call7']
+    assert store.total_calls == 2
+
+    info = store.view('info')
+    info[7]['suspicious_score'] += 30
+    assert store.get(7).info['suspicious_score'] == 30
+    assert 8 not in info
+
+    store.remove(7)
+    assert store.total_calls == 0 and len(store.view('calls')) == 0
+
+
+def test_detector_state_stays_bounded_under_pid_flood(make_detector):
+    detector = make_detector(process_state={'max_processes': 50, 'ttl_seconds': 3600,
+                                            'memory_budget_mb': 256, 'buffer_size': 500})
+    for pid in range(1000, 3000):
+        detector._handle_registry_event({'ProcessId': pid, 'TargetObject': 'HKLM\\Software\\x'})
+
+    metrics = detector.process_state.metrics()
+    assert metrics['processes'] == 50
+    assert metrics['evicted_lru'] == 1950
+    assert sorted(detector.process_api_calls) == list(range(2950, 3000))
+
+
+def test_shared_ring_windows_follow_eviction_and_trim():
+    from threat_indicators import THREAT_PATTERNS, IndicatorScanner
+
+    store = ProcessStateStore(buffer_size=4)
+    scanner = IndicatorScanner(THREAT_PATTERNS, table=store.table)
+    store.indicators_factory = scanner.new_window
+    for api_call in ['VirtualAlloc', 'CryptEncrypt', 'NtClose', 'NtClose', 'NtClose', 'RegSetValue']:
+        store.record(1, api_call)
+
+    state = store.get(1)
+    assert list(state.calls) == ['NtClose', 'NtClose', 'NtClose', 'RegSetValue']
+    assert state.indicators.category_counts == {'memory_operations': 0, 'obfuscation': 0, 'persistence': 1}
+
+    store.trim(1, 0)
+    assert state.indicators.category_counts['persistence'] == 0
+    assert store.total_calls == 0
+
+
+def test_detector_token_table_survives_distinct_destinations(make_detector):
+    detector = make_detector(process_state={'max_processes': 50, 'ttl_seconds': 3600,
+                                            'memory_budget_mb': 256, 'buffer_size': 100})
+    table = detector.api_tokens
+    destinations = table.max_tokens + 5000
+    for i in range(destinations):
+        detector._handle_network_connect({'ProcessId': 4000 + i % 60, 'DestinationIp': f'10.{i >> 16}.{(i >> 8) & 255}.{i & 255}',
+                                          'DestinationPort': 443})
+
+    metrics = table.metrics()
+    assert metrics['overflowed'] == 0 and metrics['reclaimed'] > 0
+    assert len(table) <= table.max_tokens
+
+    # Buffers e janelas continuam apontando para os textos certos
+    last = destinations - 1
+    calls = list(detector.process_state.get(4000 + last % 60).calls)
+    assert calls[-1] == f'connect:10.{last >> 16}.{(last >> 8) & 255}.{last & 255}:443'
+    for state in detector.process_state.states.values():
+        rebuilt = detector.indicator_scanner.window_for(list(state.calls))
+        assert state.indicators.pattern_counts == rebuilt.pattern_counts
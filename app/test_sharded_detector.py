@@ -0,0 +1,148 @@
+"""
+TESTES DO DETECTOR EM PROCESSOS (SHARDS POR PID)
+"""
+
+import json
+import threading
+import time
+
+from conftest import malicious_activity, sysmon_event
+from event_sources import ReplayEventSource, record_from_dict
+from sharded_detector import ShardedMalwareDetector, shard_of
+
+
+def test_events_of_a_process_go_to_the_same_shard():
+    # CreateRemoteThread/ProcessAccess seguem o processo de origem, não o alvo
+    records = [record_from_dict(event) for event in malicious_activity(4242)]
+    records.append(record_from_dict(sysmon_event(10, 99, SourceProcessId=4242, TargetProcessId=4)))
+    assert len({shard_of(record, 4) for record in records}) == 1
+
+
+def test_sharded_replay_merges_detections(tmp_path, monkeypatch, model_path, write_events):
+    monkeypatch.chdir(tmp_path)
+    pids = (1111, 2222, 3333, 4444)
+    events = []
+    for n, pid in enumerate(pids):
+        events.extend(malicious_activity(pid, start_record=n * 10 + 1))
+
+    detector = ShardedMalwareDetector(model_path, event_source=ReplayEventSource(write_events(events), speed=0),
+                                      workers=2)
+    detector.config['quarantine_enabled'] = False
+    detector.config['save_evidence'] = False
+    detector.running = True
+    detector._monitor_sysmon_events()
+
+    assert detector.stats['events_processed'] == len(events)
+    assert sum(detector.routed) == len(events)
+    assert set(detector.shard_stats) == {0, 1}
+    assert detector.stats['memory_injections'] == len(pids)
+    # Detecções dos dois workers no fluxo único deste processo
+    assert {str(result['pid']) for result in detector.detections} == {str(pid) for pid in pids}
+    assert detector.stats['malware_detected'] >= len(pids)
+    assert (tmp_path / 'logs' / 'shard-0' / 'sysmon_detector.jsonl').exists()
+    detector.shutdown_logging()
+
+
+class RecordingShardedDetector(ShardedMalwareDetector):
+    """Guarda cada posição enviada ao checkpoint com o progresso informado pelos workers"""
+
+    def _setup_checkpoint(self):
+        super()._setup_checkpoint()
+        self.commits = []
+        if self.checkpoint:
+            commit = self.checkpoint.commit
+
+            def record(record_number):
+                self.commits.append((record_number, list(self.shard_progress)))
+                commit(record_number)
+
+            self.checkpoint.commit = record
+
+
+def test_sharded_checkpoint_stops_mid_stream_and_resumes(tmp_path, monkeypatch, model_path, write_events):
+    monkeypatch.chdir(tmp_path)
+    events = []
+    for n in range(12):
+        events.extend(malicious_activity(6000 + n, start_record=n * 5 + 1))
+    path = write_events(events)
+    shard_by_record = {record.RecordNumber: shard_of(record, 2) for record in map(record_from_dict, events)}
+
+    def detector_for(source):
+        detector = RecordingShardedDetector(model_path, event_source=source, workers=2)
+        detector.config['quarantine_enabled'] = False
+        detector.config['save_evidence'] = False
+        detector.config['checkpoint'] = {'enabled': True, 'path': 'state/checkpoint.json',
+                                         'save_interval': 0, 'replay': True}
+        return detector
+
+    # 20 ms entre eventos: stop() chega no meio do replay
+    first = detector_for(ReplayEventSource(path, speed=0.05, batch_size=1))
+    first.running = True
+    monitor = threading.Thread(target=first._monitor_sysmon_events)
+    monitor.start()
+    deadline = time.monotonic() + 120
+    while first.stats['events_processed'] < 10 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    first.stop()
+    monitor.join(30)
+    processed = first.stats['events_processed']
+    assert 10 <= processed < len(events)
+
+    # Nenhuma posição à frente de um evento que o worker dele ainda não tinha tratado
+    for record_number, progress in first.commits:
+        for earlier in range(1, record_number + 1):
+            assert earlier <= progress[shard_by_record[earlier]]
+    saved = json.loads((tmp_path / 'state' / 'checkpoint.json').read_text(encoding='utf-8'))
+    assert saved['record_number'] == processed
+
+    # Retomada: só os eventos restantes, cada um uma vez
+    second = detector_for(ReplayEventSource(path, speed=0))
+    second.running = True
+    second._monitor_sysmon_events()
+    assert second.stats['events_processed'] == len(events) - processed
+    saved = json.loads((tmp_path / 'state' / 'checkpoint.json').read_text(encoding='utf-8'))
+    assert saved['record_number'] == len(events)
+    first.shutdown_logging()
+    second.shutdown_logging()
+
+
+class DeadShardDetector(ShardedMalwareDetector):
+    """Worker 0 morre logo depois de ficar pronto"""
+
+    def _start_shards(self):
+        super()._start_shards()
+        self._processes[0].kill()
+        self._processes[0].join()
+
+
+def test_dead_worker_aborts_routing_without_hanging(tmp_path, monkeypatch, model_path, write_events):
+    monkeypatch.chdir(tmp_path)
+    events = []
+    for n in range(40):
+        events.extend(malicious_activity(7000 + n, start_record=n * 5 + 1))
+    records = [record_from_dict(event) for event in events]
+
+    detector = DeadShardDetector(model_path, event_source=ReplayEventSource(write_events(events), speed=0),
+                                 workers=2)
+    detector.config['quarantine_enabled'] = False
+    detector.config['save_evidence'] = False
+    detector.config['sharding'] = {**detector.config['sharding'], 'batch_size': 1, 'queue_size': 1,
+                                   'put_timeout': 0.1}
+    detector.config['checkpoint'] = {'enabled': True, 'path': 'state/checkpoint.json',
+                                     'save_interval': 0, 'replay': True}
+    detector.running = True
+    monitor = threading.Thread(target=detector._monitor_sysmon_events)
+    monitor.start()
+    monitor.join(60)
+
+    assert not monitor.is_alive()
+    assert not detector.running
+    assert detector._shards_idle.is_set()
+    detector.stop()
+
+    # Checkpoint antes do primeiro evento do worker morto
+    first_lost = min(record.RecordNumber for record in records if shard_of(record, 2) == 0)
+    checkpoint = tmp_path / 'state' / 'checkpoint.json'
+    if checkpoint.exists():
+        assert json.loads(checkpoint.read_text(encoding='utf-8'))['record_number'] < first_lost
+    detector.shutdown_logging()
@@ -0,0 +1,53 @@
+"""
+TESTES DOS INDICADORES DE AMEAÇA INCREMENTAIS
+"""
+
+import random
+
+from threat_indicators import COMBINATION_PATTERNS, THREAT_PATTERNS, IndicatorScanner
+
+API_CALLS = ['VirtualAlloc', 'WriteProcessMemory', 'CreateRemoteThread', 'SetWindowsHookExA',
+             'connect:api.openai.com:443', 'connect:10.0.0.5:80', 'HttpSendRequestA', 'CryptEncrypt',
+             'RegSetValue', 'NtClose', 'ReadFile', 'LoadLibrary:kernel32.dll', 'Base64Decode']
+
+
+def full_scan_counts(api_calls):
+    """Contagem original: padrões distintos presentes na string unida"""
+    api_string = ' '.join(api_calls).lower()
+    return {name: sum(1 for pattern in patterns if pattern in api_string)
+            for name, patterns in {**THREAT_PATTERNS, **COMBINATION_PATTERNS}.items()}
+
+
+def test_window_counts_match_full_scan_with_eviction():
+    scanner = IndicatorScanner({**THREAT_PATTERNS, **COMBINATION_PATTERNS})
+    rng = random.Random(3)
+    window = scanner.new_window(maxlen=20)
+    history = []
+    for _ in range(300):
+        api_call = rng.choice(API_CALLS)
+        window.append(api_call)
+        history.append(api_call)
+        expected = full_scan_counts(history[-20:])
+        assert {name: window.distinct(name) for name in expected} == expected
+
+    window.trim(5)
+    expected = full_scan_counts(history[-5:])
+    assert {name: window.distinct(name) for name in expected} == expected
+
+
+def test_categories_for_single_text():
+    scanner = IndicatorScanner({'ai_domains': ['openai.com'], 'suspicious_commands': ['cmd', 'powershell']})
+    assert scanner.categories('API.OpenAI.com') == {'ai_domains'}
+    assert scanner.categories('C:\\Windows\\System32\\cmd.exe /c whoami') == {'suspicious_commands'}
+    assert scanner.categories('example.org') == set()
+
+
+def test_detector_threat_score_uses_incremental_counters(make_detector):
+    detector = make_detector()
+    for api_call in ['VirtualAlloc', 'CreateRemoteThread', 'CryptEncrypt'] + ['NtClose'] * 8 + ['connect:x:80']:
+        detector._record_api_call(4242, api_call)
+    api_calls = list(detector.process_api_calls[4242])
+
+    # memory 2 + injection 1 + obfuscation 1 = 4 padrões * 15, mais o bônus de 50 (cap 100)
+    assert detector._calculate_threat_score(4242, api_calls) == 100
+    assert detector._calculate_threat_score(999, ['VirtualAlloc', 'NtClose']) == 15
@@ -0,0 +1,177 @@
+"""
+INDICADORES DE AMEAÇA INCREMENTAIS
+Todas as listas de indicadores (padrões de API do threat score, comandos
+suspeitos, palavras-chave e domínios de IA) viram um único autômato
+Aho-Corasick construído na inicialização.
+
+Cada API call é escaneada uma vez ao ser registrada (com cache por ID da
+tabela de internamento) e atualiza os contadores por categoria da janela do
+processo; o threat score só lê esses contadores, sem refazer ' '.join() do
+buffer.
+"""
+
+from aho_corasick import AhoCorasick
+from api_tokens import ApiTokenTable, TokenRing
+
+# Padrões de API calls usados no threat score (15 pontos por padrão presente)
+THREAT_PATTERNS = {
+    'memory_operations': ['virtualalloc', 'writeprocessmemory', 'createremotethread'],
+    'injection_patterns': ['createremotethread', 'setwindowshook', 'ntmapviewofsection'],
+    'ai_communication': ['connect:api', 'connect:openai', 'httpsendrequest'],
+    'obfuscation': ['cryptencrypt', 'cryptdecrypt', 'base64'],
+    'persistence': ['regsetvalue', 'createservice', 'setwindowshook']
+}
+
+# Combinação injeção + rede (bônus de comportamento polimórfico)
+COMBINATION_PATTERNS = {
+    'combo_injection': ['createremotethread'],
+    'combo_network': ['connect:']
+}
+
+SUSPICIOUS_COMMANDS = ['powershell', 'cmd', 'wscript', 'cscript', 'regsvr32', 'rundll32']
+
+AI_DOMAINS = [
+    'openai.com', 'api.openai.com', 'chat.openai.com',
+    'anthropic.com', 'api.anthropic.com',
+    'googleapis.com', 'api.google.com',
+    'azure.com', 'api.azure.com',
+    'huggingface.co', 'api.huggingface.co'
+]
+
+
+class IndicatorScanner:
+    """
+    Autômato único para todas as categorias de indicadores
+
+    Um mesmo padrão pode pertencer a várias categorias (ex.: setwindowshook em
+    injection_patterns e persistence); ele é cadastrado uma vez só.
+    """
+
+    def __init__(self, categories, table=None):
+        patterns = []
+        pattern_ids = {}
+        self.category_patterns = {}
+        for category, words in categories.items():
+            ids = []
+            for word in words:
+                word = word.lower()
+                if word not in pattern_ids:
+                    pattern_ids[word] = len(patterns)
+                    patterns.append(word)
+                ids.append(pattern_ids[word])
+            self.category_patterns[category] = frozenset(ids)
+
+        self.pattern_ids = pattern_ids
+        self.automaton = AhoCorasick(patterns)
+        self.pattern_categories = [
+            tuple(category for category, ids in self.category_patterns.items() if pattern_id in ids)
+            for pattern_id in range(len(patterns))
+        ]
+        self.table = table if table is not None else ApiTokenTable()
+        self.table.on_reclaim.append(self._forget_ids)
+        self._id_patterns = []
+
+    def token_patterns(self, api_call):
+        """Pattern ids distintos presentes em uma API call"""
+        return tuple(sorted(self.automaton.matches(api_call.lower())))
+
+    def id_patterns(self, token_id):
+        """Pattern ids de uma API call internada (escaneada uma vez por ID)"""
+        cache = self._id_patterns
+        if token_id < len(cache):
+            found = cache[token_id]
+            if found is not None:
+                return found
+        else:
+            cache.extend([None] * (token_id + 1 - len(cache)))
+        found = self.token_patterns(self.table.text(token_id))
+        cache[token_id] = found
+        return found
+
+    def _forget_ids(self, token_ids):
+        """IDs recuperados pela tabela: descartar os padrões em cache"""
+        cache = self._id_patterns
+        for token_id in token_ids:
+            if token_id < len(cache):
+                cache[token_id] = None
+
+    def categories(self, text):
+        """Categorias com algum padrão presente no texto"""
+        found = set()
+        for pattern_id in self.automaton.matches(text.lower()):
+            found.update(self.pattern_categories[pattern_id])
+        return found
+
+    def new_window(self, maxlen=None, calls=None):
+        """Criar janela de contadores (calls: TokenRing compartilhado com o buffer)"""
+        return ProcessIndicators(self, maxlen, calls)
+
+    def window_for(self, api_calls, maxlen=None):
+        """Janela preenchida a partir de uma lista de API calls"""
+        window = ProcessIndicators(self, maxlen)
+        for api_call in api_calls:
+            window.append(api_call)
+        return window
+
+
+class ProcessIndicators:
+    """
+    Contadores de indicadores da janela de API calls de um processo
+
+    pattern_counts: em quantas API calls da janela cada padrão aparece
+    category_counts: quantos padrões distintos de cada categoria estão presentes
+    """
+
+    __slots__ = ('scanner', 'calls', 'pattern_counts', 'category_counts', 'maxlen')
+
+    def __init__(self, scanner, maxlen=None, calls=None):
+        self.scanner = scanner
+        self.calls = calls if calls is not None else TokenRing(maxlen)
+        self.pattern_counts = {}
+        self.category_counts = {}
+        self.maxlen = self.calls.capacity
+
+    def __len__(self):
+        return len(self.calls)
+
+    def append(self, api_call):
+        """Registrar API call no fim da janela"""
+        if self.calls.full:
+            self.removing()
+        self.calls.append(self.scanner.table.intern(api_call))
+        self.added()
+
+    def trim(self, keep):
+        """Manter somente as últimas keep API calls"""
+        while len(self.calls) > keep:
+            self.removing()
+            self.calls.popleft()
+
+    def added(self):
+        """Contar os padrões da API call mais recente da janela"""
+        pattern_counts = self.pattern_counts
+        for pattern_id in self.scanner.id_patterns(self.calls[-1]):
+            count = pattern_counts.get(pattern_id, 0)
+            pattern_counts[pattern_id] = count + 1
+            if count == 0:
+                self._update_categories(pattern_id, 1)
+
+    def removing(self):
+        """Descontar os padrões da API call mais antiga (antes de removê-la)"""
+        pattern_counts = self.pattern_counts
+        for pattern_id in self.scanner.id_patterns(self.calls[0]):
+            count = pattern_counts[pattern_id] - 1
+            if count:
+                pattern_counts[pattern_id] = count
+            else:
+                del pattern_counts[pattern_id]
+                self._update_categories(pattern_id, -1)
+
+    def _update_categories(self, pattern_id, delta):
+        category_counts = self.category_counts
+        for category in self.scanner.pattern_categories[pattern_id]:
+            category_counts[category] = category_counts.get(category, 0) + delta
+
+    def distinct(self, category):
+        """Número de padrões distintos da categoria presentes na janela"""
+        return self.category_counts.get(category, 0)
@@ -0,0 +1,67 @@
+"""
+AUTÔMATO AHO-CORASICK
+Busca simultânea de vários padrões (substrings) em uma única passada pelo
+texto, independente do número de padrões cadastrados.
+"""
+
+from collections import deque
+
+
+class AhoCorasick:
+    """
+    Autômato construído uma vez a partir de uma lista de padrões
+
+    Os padrões são identificados pela posição na lista (pattern id).
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                state = next_state
+            self.output[state] += (pattern_id,)
+
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                # Padrões que terminam no estado de falha também terminam aqui
+                self.output[child] += self.output[self.fail[child]]
+
+    def iter_matches(self, text):
+        """Gerar (posição final, pattern id) de cada ocorrência"""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in output[state]:
+                yield position, pattern_id
+
+    def matches(self, text):
+        """Conjunto dos pattern ids presentes no texto"""
+        return {pattern_id for _, pattern_id in self.iter_matches(text)}
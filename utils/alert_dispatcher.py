@@ -0,0 +1,343 @@
+"""
+ENVIO DE ALERTAS EM SEGUNDO PLANO (WEBHOOK)
+O caminho de detecção só chama submit(), que coloca o alerta em uma fila
+limitada e retorna imediatamente; uma thread de envio:
+
+- reutiliza conexões HTTP (requests.Session com pool, keep-alive)
+- agrupa rajadas: alertas que chegam dentro de batch_window viram uma única
+  mensagem com até max_batch embeds (limite do Discord: 10 por mensagem)
+- repete com backoff exponencial em erros de rede/5xx e respeita o
+  Retry-After das respostas 429 (cabeçalho ou campo retry_after do corpo)
+- grava em disco (JSON lines) os alertas que não couberam na fila ou que
+  esgotaram as tentativas; o arquivo é reenviado depois, inclusive após
+  reiniciar o detector
+- mede a latência de entrega (da chamada a submit() até a resposta 2xx)
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_STOP = object()
+
+
+def discord_payload(embeds, username='Modelo Defensivo'):
+    """Corpo de webhook do Discord com vários embeds"""
+    return {'embeds': embeds, 'username': username}
+
+
+def percentile(values, fraction):
+    """Percentil por vizinho mais próximo (values já ordenados)"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(fraction * (len(values) - 1)))))
+    return values[index]
+
+
+class SpillQueue:
+    """Fila em disco (JSON lines) para alertas não entregues"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._read())
+
+    def push(self, items):
+        if not items:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for item in items:
+                    f.write(json.dumps(item, default=str) + '\n')
+
+    def pop(self, count):
+        """Remover e devolver os count itens mais antigos"""
+        with self._lock:
+            items = self._read()
+            if not items:
+                return []
+            head, rest = items[:count], items[count:]
+            if rest:
+                tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    for item in rest:
+                        f.write(json.dumps(item, default=str) + '\n')
+                os.replace(tmp_path, self.path)
+            else:
+                self.path.unlink()
+            return head
+
+    def _read(self):
+        if not self.path.exists():
+            return []
+        items = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        items.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # linha truncada (ex.: queda durante a escrita)
+        return items
+
+
+class AlertDispatcher:
+    """
+    Entrega assíncrona de alertas para um webhook
+
+    Args:
+        url: URL do webhook
+        build_embed: Função alerta -> embed (dict)
+        build_payload: Função lista de embeds -> corpo JSON da requisição
+        spill_path: Arquivo da fila em disco (None desativa)
+        on_delivered: Chamada com a lista de alertas entregues em cada envio
+        latency_histogram: Histogram (instrumentation) que recebe cada latência de entrega
+    """
+
+    def __init__(self, url, build_embed=None, build_payload=discord_payload, max_batch=10,
+                 batch_window=0.5, queue_size=1000, max_retries=5, backoff_base=1.0,
+                 backoff_max=60.0, timeout=10, spill_path=None, spill_retry_interval=30.0,
+                 on_delivered=None, logger=None, session=None, latency_histogram=None):
+        self.url = url
+        self.build_embed = build_embed or (lambda alert: alert)
+        self.build_payload = build_payload
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.spill = SpillQueue(spill_path) if spill_path else None
+        self.spill_retry_interval = spill_retry_interval
+        self.on_delivered = on_delivered
+        self.logger = logger
+        self.latency_histogram = latency_histogram
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._stopping = threading.Event()
+        self._next_spill_attempt = 0.0
+        self._latencies = deque(maxlen=1000)
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'submitted': 0,
+            'delivered': 0,
+            'failed': 0,
+            'requests': 0,
+            'retries': 0,
+            'rate_limited': 0,
+            'spilled': 0,
+            'recovered': 0
+        }
+
+    @classmethod
+    def from_config(cls, url, config=None, **kwargs):
+        options = dict(config or {})
+        options.update(kwargs)
+        return cls(url, **options)
+
+    def start(self):
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        """Enviar o que já está na fila (até timeout) e gravar o restante em disco"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+        self._spill_remaining()
+
+    def submit(self, alert):
+        """Enfileirar alerta sem bloquear; devolve False se foi para o disco ou perdido"""
+        item = {'alert': alert, 'queued_at': time.time()}
+        self._count('submitted')
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self._spill([item])
+            return False
+
+    def metrics(self):
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            stats = dict(self.stats)
+        return {
+            **stats,
+            'queued': self.queue.qsize(),
+            'latency_p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+            'latency_p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+            'latency_max_ms': round(latencies[-1] * 1000, 1) if latencies else 0.0
+        }
+
+    # ------------------------------------------------------------------
+    # Thread de envio
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if batch:
+                self._deliver(batch)
+
+    def _next_batch(self):
+        """Próximo lote: fila em disco quando a memória está vazia, senão a rajada"""
+        if self.queue.empty():
+            recovered = self._recover_spilled()
+            if recovered:
+                return recovered
+        try:
+            first = self.queue.get(timeout=1.0)
+        except queue.Empty:
+            return []
+        if first is _STOP:
+            return None
+
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self.queue.get(timeout=max(remaining, 0)) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self.queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _recover_spilled(self):
+        if self.spill is None or time.monotonic() < self._next_spill_attempt:
+            return []
+        batch = self.spill.pop(self.max_batch)
+        if batch:
+            self._count('recovered', len(batch))
+        return batch
+
+    def _deliver(self, batch):
+        payload = self.build_payload([self.build_embed(item['alert']) for item in batch])
+        attempt = 0
+        while True:
+            outcome, retry_after = self._post(payload)
+            if outcome == 'ok':
+                self._record_delivery(batch)
+                return
+            if outcome == 'fail':
+                self._count('failed', len(batch))
+                return
+            if attempt >= self.max_retries or self._stopping.is_set():
+                self._spill(batch)
+                self._next_spill_attempt = time.monotonic() + self.spill_retry_interval
+                return
+            delay = retry_after if retry_after is not None else self.backoff(attempt)
+            attempt += 1
+            self._count('retries')
+            self._stopping.wait(delay)
+
+    def backoff(self, attempt):
+        """Espera antes da tentativa attempt + 1 (exponencial, limitada)"""
+        return min(self.backoff_max, self.backoff_base * (2 ** min(attempt, 16)))
+
+    def _post(self, payload):
+        """Uma requisição: ('ok' | 'retry' | 'fail', Retry-After em segundos ou None)"""
+        self._count('requests')
+        try:
+            response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            self._log('warning', f"Erro de rede ao enviar alerta: {e}")
+            return 'retry', None
+
+        status = response.status_code
+        if 200 <= status < 300:
+            return 'ok', None
+        if status == 429:
+            self._count('rate_limited')
+            return 'retry', self._retry_after(response)
+        if status >= 500:
+            self._log('warning', f"Webhook respondeu {status}; repetindo")
+            return 'retry', None
+        self._log('error', f"Webhook recusou o alerta ({status}); descartado")
+        return 'fail', None
+
+    def _retry_after(self, response):
+        """Segundos pedidos pelo servidor (cabeçalho Retry-After ou retry_after do Discord)"""
+        try:
+            header = response.headers.get('Retry-After')
+            if header is not None:
+                return min(float(header), self.backoff_max)
+            body = response.json()
+            if 'retry_after' in body:
+                return min(float(body['retry_after']), self.backoff_max)
+        except (ValueError, TypeError, AttributeError):
+            pass
+        return None
+
+    def _record_delivery(self, batch):
+        now = time.time()
+        latencies = [now - item['queued_at'] for item in batch]
+        with self._stats_lock:
+            self.stats['delivered'] += len(batch)
+            self._latencies.extend(latencies)
+        if self.latency_histogram is not None:
+            for latency in latencies:
+                self.latency_histogram.observe(latency)
+        if self.on_delivered:
+            self.on_delivered([item['alert'] for item in batch])
+
+    def _spill(self, items):
+        if self.spill is None:
+            self._count('failed', len(items))
+            self._log('error', f"{len(items)} alertas perdidos (fila cheia, sem fila em disco)")
+            return
+        self.spill.push(items)
+        self._count('spilled', len(items))
+
+    def _spill_remaining(self):
+        items = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                items.append(item)
+        if items:
+            self._spill(items)
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _log(self, level, message):
+        if self.logger:
+            getattr(self.logger, level)(message)
@@ -0,0 +1,245 @@
+"""
+INTERNAMENTO DE API CALLS
+Cada API call distinta ('CreateFile', 'connect:host:443', ...) recebe um ID
+inteiro em uma tabela compartilhada; os buffers por processo guardam apenas os
+IDs em array('H') (2 bytes por chamada) em vez de referências para strings.
+
+- ApiTokenTable: string <-> ID (até 65535 chamadas distintas ao mesmo tempo;
+  IDs sem referência em nenhum buffer são reaproveitados quando a tabela enche)
+- TokenRing: buffer circular de IDs com capacidade máxima
+- ApiSequence: TokenRing + tabela, usado como um deque(maxlen) de strings
+"""
+
+import threading
+from array import array
+
+
+class ApiTokenTable:
+    """
+    Tabela de internamento compartilhada entre processos
+
+    Buffers de processos guardam IDs com acquire()/release() (contagem de
+    referências). Quando a tabela enche, os IDs sem referência (ex.: destinos
+    'connect:host:porta' de processos já descartados) são recuperados e os
+    ouvintes (caches por ID) avisados por on_reclaim. Só se todos os IDs
+    estiverem em uso novas API calls recebem OVERFLOW_ID, cujo texto é vazio
+    (não gera tokens no TF-IDF nem nos indicadores).
+    """
+
+    MAX_TOKENS = 65535
+    OVERFLOW_ID = 65535
+
+    def __init__(self, max_tokens=MAX_TOKENS):
+        self.max_tokens = min(max_tokens, self.MAX_TOKENS)
+        self.ids = {}
+        self.texts = []
+        self.refs = []
+        self.overflowed = 0
+        self.reclaimed = 0
+        self.on_reclaim = []
+        self._free = []
+        self._unreferenced = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.texts) - len(self._free)
+
+    def intern(self, api_call):
+        """ID da API call (cadastrada na primeira ocorrência, sem referência)"""
+        token_id = self.ids.get(api_call)
+        if token_id is not None:
+            return token_id
+        with self._lock:
+            return self._intern(api_call)
+
+    def acquire(self, api_call):
+        """ID da API call com uma referência (não é recuperado até release)"""
+        with self._lock:
+            token_id = self._intern(api_call)
+            if token_id != self.OVERFLOW_ID:
+                self.refs[token_id] += 1
+            return token_id
+
+    def release(self, token_id):
+        """Devolver uma referência obtida com acquire"""
+        if token_id == self.OVERFLOW_ID:
+            return
+        with self._lock:
+            remaining = self.refs[token_id] - 1
+            self.refs[token_id] = remaining
+            if not remaining:
+                self._unreferenced += 1
+
+    def text(self, token_id):
+        return self.texts[token_id] if token_id < len(self.texts) else ''
+
+    def metrics(self):
+        return {'tokens': len(self), 'capacity': self.max_tokens, 'overflowed': self.overflowed,
+                'reclaimed': self.reclaimed}
+
+    def _intern(self, api_call):
+        token_id = self.ids.get(api_call)
+        if token_id is not None:
+            return token_id
+        if not self._free and len(self.texts) >= self.max_tokens:
+            self._reclaim()
+        if self._free:
+            token_id = self._free.pop()
+            self.texts[token_id] = api_call
+            self._unreferenced += 1
+        elif len(self.texts) < self.max_tokens:
+            token_id = len(self.texts)
+            self.texts.append(api_call)
+            self.refs.append(0)
+            self._unreferenced += 1
+        else:
+            self.overflowed += 1
+            return self.OVERFLOW_ID
+        self.ids[api_call] = token_id
+        return token_id
+
+    def _reclaim(self):
+        """Liberar IDs sem referência (só varre se algum ID ficou sem referência)"""
+        if not self._unreferenced:
+            return
+        self._unreferenced = 0
+        freed = [token_id for token_id, count in enumerate(self.refs) if not count]
+        for token_id in freed:
+            del self.ids[self.texts[token_id]]
+            self.texts[token_id] = ''
+        self._free = freed[::-1]
+        self.reclaimed += len(freed)
+        for listener in self.on_reclaim:
+            listener(freed)
+
+
+class TokenRing:
+    """
+    Buffer circular de IDs em array('H')
+
+    Cresce conforme necessário até capacity (processos com poucas API calls
+    ocupam pouco) e depois sobrescreve o mais antigo.
+    """
+
+    __slots__ = ('buffer', 'start', 'size', 'capacity')
+
+    def __init__(self, capacity=None):
+        self.buffer = array('H')
+        self.start = 0
+        self.size = 0
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError('índice fora do buffer')
+        return self.buffer[(self.start + index) % len(self.buffer)]
+
+    def __iter__(self):
+        buffer, start, size = self.buffer, self.start, self.size
+        length = len(buffer)
+        for i in range(size):
+            yield buffer[(start + i) % length]
+
+    @property
+    def full(self):
+        return self.capacity is not None and self.size >= self.capacity
+
+    @property
+    def nbytes(self):
+        return self.buffer.itemsize * len(self.buffer)
+
+    def append(self, token_id):
+        """Adicionar ID no fim; devolve o ID descartado se o buffer estava cheio"""
+        if self.full:
+            evicted = self.buffer[self.start]
+            self.buffer[self.start] = token_id
+            self.start = (self.start + 1) % len(self.buffer)
+            return evicted
+        if len(self.buffer) > self.size:
+            # Posição liberada por popleft()
+            self.buffer[(self.start + self.size) % len(self.buffer)] = token_id
+        else:
+            if self.start:
+                self._compact()
+            self.buffer.append(token_id)
+        self.size += 1
+        return None
+
+    def popleft(self):
+        if not self.size:
+            raise IndexError('buffer vazio')
+        token_id = self.buffer[self.start]
+        self.start = (self.start + 1) % len(self.buffer)
+        self.size -= 1
+        if not self.size:
+            self.buffer = array('H')
+            self.start = 0
+        return token_id
+
+    def trim(self, keep):
+        """Manter somente os últimos keep IDs"""
+        if self.size > keep:
+            self.buffer = array('H', self.ids()[self.size - keep:])
+            self.start = 0
+            self.size = len(self.buffer)
+
+    def ids(self):
+        """IDs do mais antigo para o mais recente"""
+        if not self.size:
+            return []
+        end = self.start + self.size
+        if end <= len(self.buffer):
+            return self.buffer[self.start:end].tolist()
+        return (self.buffer[self.start:] + self.buffer[:end - len(self.buffer)]).tolist()
+
+    def _compact(self):
+        """Reorganizar em ordem linear (após popleft) antes de voltar a crescer"""
+        self.buffer = array('H', self.ids())
+        self.start = 0
+
+
+class ApiSequence:
+    """Sequência de API calls de um processo (interface de deque de strings)"""
+
+    __slots__ = ('table', 'ring')
+
+    def __init__(self, table, maxlen=None):
+        self.table = table
+        self.ring = TokenRing(maxlen)
+
+    @property
+    def maxlen(self):
+        return self.ring.capacity
+
+    def __len__(self):
+        return self.ring.size
+
+    def __iter__(self):
+        text = self.table.text
+        return (text(token_id) for token_id in self.ring)
+
+    def __getitem__(self, index):
+        return self.table.text(self.ring[index])
+
+    def append(self, api_call):
+        evicted = self.ring.append(self.table.acquire(api_call))
+        if evicted is not None:
+            self.table.release(evicted)
+
+    def popleft(self):
+        token_id = self.ring.popleft()
+        self.table.release(token_id)
+        return token_id
+
+    def clear(self):
+        """Esvaziar a sequência devolvendo as referências dos IDs"""
+        while self.ring.size:
+            self.popleft()
+
+    def ids(self):
+        return self.ring.ids()
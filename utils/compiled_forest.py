@@ -0,0 +1,283 @@
+"""
+RANDOM FOREST COMPILADO
+Exporta um RandomForestClassifier treinado para arrays NumPy contíguos
+(feature, threshold, filhos e probabilidades das folhas) e avalia amostras sem
+a validação e o pool de threads do scikit-learn a cada chamada.
+
+As probabilidades são idênticas às do predict_proba do scikit-learn: mesma
+conversão para float32, mesma comparação <= com o threshold em float64, mesma
+normalização das folhas e soma das árvores na mesma ordem.
+
+O .npz guarda a impressão digital das árvores de origem (forest_fingerprint);
+load_scorer só reaproveita o arquivo se ela bater com o modelo carregado.
+
+Uso:
+    python compiled_forest.py modelo.joblib modelo_compiled.npz
+"""
+
+import argparse
+import hashlib
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+FORMAT_VERSION = 1
+TREE_LEAF = -1
+
+
+class CompiledForest:
+    """
+    Floresta achatada: todas as árvores em arrays únicos indexados por nó
+
+    As folhas apontam para si mesmas (threshold +inf), então a travessia é um
+    número fixo de passos vetorizados (max_depth) sobre todas as árvores.
+    """
+
+    # Linhas densificadas por vez quando a entrada é esparsa
+    CHUNK_ROWS = 256
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, n_features, max_depth,
+                 fingerprint=None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = int(n_features)
+        self.max_depth = int(max_depth)
+        self.n_estimators = len(self.roots)
+        self.fingerprint = str(fingerprint) if fingerprint is not None else None
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Compilar um RandomForestClassifier (ou ExtraTreesClassifier) treinado"""
+        if not is_forest(forest):
+            raise TypeError(f"Modelo {type(forest).__name__} não é uma floresta de classificação treinada")
+        estimators = forest.estimators_
+        if getattr(forest, 'n_outputs_', 1) != 1:
+            raise TypeError("Florestas com múltiplas saídas não são suportadas")
+
+        n_classes = len(forest.classes_)
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in estimators:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == TREE_LEAF
+            nodes = np.arange(tree.node_count)
+
+            # Probabilidade por nó normalizada como no DecisionTreeClassifier.predict_proba
+            proba = tree.value[:, 0, :n_classes].copy()
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            proba /= normalizer
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            values.append(proba)
+            roots.append(offset)
+
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.array(roots),
+            classes=forest.classes_,
+            n_features=forest.n_features_in_,
+            max_depth=max_depth,
+            fingerprint=forest_fingerprint(forest)
+        )
+
+    def predict_proba(self, X):
+        """Probabilidades por classe (X denso ou esparso, uma linha por amostra)"""
+        if sparse.issparse(X):
+            X = X.tocsr()
+            n_rows = X.shape[0]
+            if n_rows == 1:
+                # Caminho rápido para uma amostra (análise em tempo real)
+                x = np.zeros(X.shape[1], dtype=np.float32)
+                x[X.indices] = X.data
+                return self._predict_dense(x)
+            out = np.empty((n_rows, len(self.classes_)), dtype=np.float64)
+            for start in range(0, n_rows, self.CHUNK_ROWS):
+                stop = min(start + self.CHUNK_ROWS, n_rows)
+                out[start:stop] = self._predict_dense(X[start:stop].toarray())
+            return out
+        return self._predict_dense(np.asarray(X))
+
+    def predict(self, X):
+        proba = self.predict_proba(X)
+        return self.classes_.take(proba.argmax(axis=1), axis=0)
+
+    def _predict_dense(self, X):
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Esperado {self.n_features_in_} features, recebido {X.shape[1]}")
+
+        # Mesmo dtype usado pelas árvores do scikit-learn
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.shape[0] == 1:
+            return self._predict_row(X[0])[np.newaxis]
+
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_estimators))
+
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        # Soma sequencial das árvores (mesma ordem de acumulação do scikit-learn)
+        proba = np.cumsum(self.value[nodes], axis=1)[:, -1]
+        proba /= self.n_estimators
+        return proba
+
+    def _predict_row(self, x):
+        feature, threshold, left, right = self.feature, self.threshold, self.left, self.right
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            nodes = np.where(x[feature[nodes]] <= threshold[nodes], left[nodes], right[nodes])
+
+        proba = np.cumsum(self.value[nodes], axis=0)[-1]
+        proba /= self.n_estimators
+        return proba
+
+    def to_arrays(self):
+        """Arrays que descrevem a floresta (para .npz ou bundle do modelo)"""
+        arrays = {
+            'format_version': np.array(FORMAT_VERSION),
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'value': self.value,
+            'roots': self.roots,
+            'classes': self.classes_,
+            'n_features': np.array(self.n_features_in_),
+            'max_depth': np.array(self.max_depth)
+        }
+        if self.fingerprint is not None:
+            arrays['fingerprint'] = np.array(self.fingerprint)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, data):
+        """Reconstruir a partir de to_arrays() (aceita arrays memory-mapped sem copiar)"""
+        version = int(data['format_version'])
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Versão do modelo compilado não suportada: {version}")
+        return cls(
+            feature=data['feature'],
+            threshold=data['threshold'],
+            left=data['left'],
+            right=data['right'],
+            value=data['value'],
+            roots=data['roots'],
+            classes=data['classes'],
+            n_features=data['n_features'],
+            max_depth=data['max_depth'],
+            fingerprint=data['fingerprint'] if 'fingerprint' in data else None
+        )
+
+    def save(self, path):
+        """Salvar arrays em .npz sem compressão"""
+        np.savez(path, **self.to_arrays())
+        return Path(path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls.from_arrays(data)
+
+
+def is_forest(model):
+    """
+    RandomForestClassifier/ExtraTreesClassifier treinado
+
+    Outros ensembles também têm estimators_ (VotingClassifier com florestas,
+    GradientBoosting com um array de regressores, Bagging com subconjuntos de
+    features) e não seguem a média simples das árvores compilada aqui.
+    """
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+    if not isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        return False
+    estimators = getattr(model, 'estimators_', None)
+    return bool(estimators) and all(hasattr(estimator, 'tree_') for estimator in estimators)
+
+
+def forest_fingerprint(forest):
+    """Hash das árvores do sklearn (features, thresholds, filhos, folhas e classes)"""
+    digest = hashlib.sha256(np.asarray(forest.classes_).astype(str).tobytes())
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        for array in (tree.feature, tree.threshold, tree.children_left, tree.children_right, tree.value):
+            digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def compiled_path_for(model_path):
+    """Caminho padrão do modelo compilado ao lado do .joblib"""
+    model_path = Path(model_path)
+    return model_path.with_name(f"{model_path.stem}_compiled.npz")
+
+
+def compile_model(model):
+    """Compilar o modelo se for uma floresta suportada; None caso contrário"""
+    try:
+        return CompiledForest.from_sklearn(model)
+    except TypeError:
+        return None
+
+
+def load_scorer(model, model_path=None):
+    """
+    Escolher o avaliador usado na inferência
+
+    Usa o .npz exportado ao lado do modelo quando ele foi gerado a partir
+    das mesmas árvores (impressão digital igual); senão compila a floresta em
+    memória. Modelos que não são florestas (ex.: VotingClassifier com
+    XGBoost) continuam com o próprio predict_proba do scikit-learn.
+    """
+    if model_path is not None and is_forest(model):
+        path = compiled_path_for(model_path)
+        if path.exists():
+            compiled = CompiledForest.load(path)
+            # .npz de um treino anterior (ou sem impressão digital): recompilar
+            if compiled.fingerprint is not None and compiled.fingerprint == forest_fingerprint(model):
+                return compiled
+    compiled = compile_model(model)
+    return compiled if compiled is not None else model
+
+
+def main():
+    import joblib
+
+    parser = argparse.ArgumentParser(description='Exportar RandomForest treinado para arrays NumPy')
+    parser.add_argument('model', help='Modelo .joblib (floresta ou dict com chave "model")')
+    parser.add_argument('output', nargs='?', help='Arquivo .npz de saída (padrão: <modelo>_compiled.npz)')
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    if isinstance(model, dict):
+        model = model['model']
+
+    compiled = CompiledForest.from_sklearn(model)
+    output = compiled.save(args.output or compiled_path_for(args.model))
+    print(f"✅ Modelo compilado salvo em: {output}")
+    print(f"🌳 Árvores: {compiled.n_estimators} | Nós: {len(compiled.feature)} | Profundidade: {compiled.max_depth}")
+
+
+if __name__ == "__main__":
+    main()
@@ -166,6 +166,7 @@ import os
 sys.path.insert(0, os.path.dirname(__file__))
 
 from malware_detection_system import MalwareDetectionSystem
+from inference_server import InferenceServer
 
 class MalwareDetectionService(win32serviceutil.ServiceFramework):
     _svc_name_ = "MalwarePolymorphicDetector"
@@ -176,6 +177,7 @@ class MalwareDetectionService(win32serviceutil.ServiceFramework):
         win32serviceutil.ServiceFramework.__init__(self, args)
         self.hWaitStop = win32event.CreateEvent(None, 0, 0, None)
         self.detector = None
+        self.inference_server = None
         
         # Configurar logging
         logging.basicConfig(
@@ -188,13 +190,23 @@ class MalwareDetectionService(win32serviceutil.ServiceFramework):
         self.ReportServiceStatus(win32service.SERVICE_STOP_PENDING)
         if self.detector:
             self.detector.stop_realtime_monitoring()
+        if self.inference_server:
+            self.inference_server.stop()
         win32event.SetEvent(self.hWaitStop)
         
     def SvcDoRun(self):
         try:
+            # Modelo único no servidor de inferência (named pipe local); o detector
+            # do serviço e execuções avulsas do RealtimeMalwareDetector
+            # (--model-server) usam a mesma cópia em memória. A authkey (gerada
+            # no perfil da conta do serviço ou $INFERENCE_AUTHKEY) autentica os dois lados
+            self.inference_server = InferenceServer("production_model.joblib").start()
+            logging.info(f"Servidor de inferência em {self.inference_server.address}")
+            
             # Inicializar detector
             self.detector = MalwareDetectionSystem()
-            self.detector.load_model("production_model.joblib")
+            self.detector.connect_inference_server(self.inference_server.address,
+                                                   self.inference_server.authkey)
             
             # Iniciar monitoramento
             self.detector.start_realtime_monitoring()
@@ -355,7 +367,7 @@ class SysmonConfiguration:
     def _get_sysmon_config_template(self):
         """Template de configuração otimizada para malware polimórfico"""
         
-        return '''<?xml version="1.0" encoding="UTF-8"?>
+        return r'''<?xml version="1.0" encoding="UTF-8"?>
 <Sysmon schemaversion="4.82">
   <!-- Configuração otimizada para detecção de malware polimórfico controlado por LLM -->
   <HashAlgorithms>md5,sha256</HashAlgorithms>
@@ -511,8 +523,16 @@ class PerformanceMonitor:
     """
     
     def __init__(self, detector):
+        import psutil
+        
         self.detector = detector
         self.metrics_history = []
+        
+        # cpu_percent(interval=None) mede desde a chamada anterior: a primeira
+        # chamada só inicia a contagem, e a coleta não precisa bloquear
+        psutil.cpu_percent(interval=None)
+        self.current_process = psutil.Process()
+        self.current_process.cpu_percent(interval=None)
         self.alert_thresholds = {
             'cpu_usage': 80,      # %
             'memory_usage': 85,   # %
@@ -553,8 +573,8 @@ class PerformanceMonitor:
         import time
         import psutil
         
-        # Métricas do sistema
-        cpu_percent = psutil.cpu_percent(interval=1)
+        # Métricas do sistema (CPU média desde a coleta anterior, sem bloquear)
+        cpu_percent = psutil.cpu_percent(interval=None)
         memory = psutil.virtual_memory()
         disk_io = psutil.disk_io_counters()
         
@@ -562,7 +582,7 @@ class PerformanceMonitor:
         detector_metrics = self.detector.get_performance_metrics()
         
         # Métricas de processos Python
-        current_process = psutil.Process()
+        current_process = self.current_process
         
         metrics = {
             'timestamp': time.time(),
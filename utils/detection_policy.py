@@ -0,0 +1,170 @@
+"""
+POLÍTICA DE DETECÇÃO COMPILADA
+Listas de configuração (whitelist, processos críticos, extensões e diretórios
+suspeitos, chaves de persistência) compiladas uma única vez:
+
+- nomes de processo -> frozenset (busca O(1))
+- extensões -> trie de sufixos (custo proporcional ao nome do arquivo, não à lista)
+- diretórios/chaves -> regex única montada a partir de uma trie, que o motor
+  de regex percorre caractere a caractere em vez de testar cada item
+
+O objeto é imutável; para recarregar, monte uma nova política e troque a
+referência (PolicyReloader faz isso quando o arquivo de configuração muda).
+"""
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+POLICY_KEYS = ('whitelist_processes', 'critical_processes', 'suspicious_extensions',
+               'suspicious_directories', 'persistence_keys')
+
+
+def process_basename(image):
+    """Nome do executável em minúsculas (aceita caminhos Windows em qualquer SO)"""
+    if not image:
+        return ''
+    return image.rpartition('\\')[2].rpartition('/')[2].lower()
+
+
+def trie_regex(words):
+    """
+    Regex equivalente a (w1|w2|...) montada a partir de uma trie
+
+    Prefixos comuns são fatorados, então o motor de regex decide o ramo pelo
+    próximo caractere. Devolve None para lista vazia.
+    """
+    trie = {}
+    for word in words:
+        if not word:
+            continue
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+    if not trie:
+        return None
+    return re.compile(_trie_pattern(trie))
+
+
+def _trie_pattern(node):
+    terminal = '' in node
+    branches = [re.escape(char) + _trie_pattern(child)
+                for char, child in sorted(node.items()) if char != '']
+    if not branches:
+        return ''
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+    pattern = '(?:' + '|'.join(branches) + ')'
+    return pattern + '?' if terminal else pattern
+
+
+class SuffixTrie:
+    """Trie de sufixos invertidos (ex.: extensões '.exe', '.tar.gz')"""
+
+    def __init__(self, suffixes):
+        self.root = {}
+        for suffix in suffixes:
+            if not suffix:
+                continue
+            node = self.root
+            for char in reversed(suffix):
+                node = node.setdefault(char, {})
+            node[''] = suffix
+
+    def match(self, text):
+        """Maior sufixo cadastrado que termina text, ou None"""
+        node = self.root
+        found = None
+        for char in reversed(text):
+            node = node.get(char)
+            if node is None:
+                break
+            found = node.get('', found)
+        return found
+
+
+class DetectionPolicy:
+    """Listas da configuração compiladas para consulta em tempo constante"""
+
+    def __init__(self, whitelist_processes=(), critical_processes=(), suspicious_extensions=(),
+                 suspicious_directories=(), persistence_keys=()):
+        self.whitelist = frozenset(name.lower() for name in whitelist_processes)
+        self.critical = frozenset(name.lower() for name in critical_processes)
+        self.extensions = SuffixTrie(ext.lower() for ext in suspicious_extensions)
+        self._directories = trie_regex(d.lower() for d in suspicious_directories)
+        self._persistence = trie_regex(k.lower() for k in persistence_keys)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(**{key: config.get(key) or () for key in POLICY_KEYS})
+
+    def is_whitelisted(self, process_name):
+        return process_name.lower() in self.whitelist
+
+    def is_critical(self, process_name):
+        return process_name.lower() in self.critical
+
+    def suspicious_extension(self, filename):
+        """Extensão suspeita com que o arquivo termina, ou None"""
+        return self.extensions.match(filename.lower()) if filename else None
+
+    def suspicious_directory(self, path):
+        """Primeiro diretório suspeito contido no caminho, ou None"""
+        if self._directories is None or not path:
+            return None
+        match = self._directories.search(path.lower())
+        return match.group(0) if match else None
+
+    def is_persistence_key(self, target_object):
+        if self._persistence is None or not target_object:
+            return False
+        return self._persistence.search(target_object.lower()) is not None
+
+
+class PolicyReloader:
+    """
+    Recompila a política quando o arquivo de configuração muda (mtime)
+
+    check() é barato (um stat) e pode ser chamado de laços periódicos; a
+    política nova substitui a antiga em uma única atribuição.
+    """
+
+    def __init__(self, config, config_path=None, on_reload=None):
+        self.config = config
+        self.config_path = Path(config_path) if config_path else None
+        self.on_reload = on_reload
+        self.policy = DetectionPolicy.from_config(config)
+        self._mtime = self._current_mtime()
+        self._lock = threading.Lock()
+
+    def _current_mtime(self):
+        try:
+            return os.stat(self.config_path).st_mtime_ns if self.config_path else None
+        except OSError:
+            return None
+
+    def check(self):
+        """Recarregar se o arquivo mudou; devolve True quando recarregou"""
+        mtime = self._current_mtime()
+        if mtime is None or mtime == self._mtime:
+            return False
+        with self._lock:
+            if mtime == self._mtime:
+                return False
+            self._mtime = mtime
+            return self.reload()
+
+    def reload(self):
+        """Reler as listas da política do arquivo e trocar a política ativa"""
+        with open(self.config_path, 'r') as f:
+            user_config = json.load(f)
+        for key in POLICY_KEYS:
+            if key in user_config:
+                self.config[key] = user_config[key]
+        self.policy = DetectionPolicy.from_config(self.config)
+        if self.on_reload is not None:
+            self.on_reload(self.policy)
+        return True
@@ -0,0 +1,139 @@
+"""
+CHECKPOINT DA LEITURA DE EVENTOS (RETOMADA APÓS QUEDA OU REINÍCIO)
+Guarda em disco o RecordNumber do último evento já processado de uma fonte
+(log do Sysmon ou arquivo de replay), para que a próxima execução continue
+no registro seguinte em vez de reler o log inteiro ou perder eventos.
+
+- EventCheckpoint: posição em memória a cada evento processado e gravação
+  atômica (arquivo temporário + os.replace) no máximo a cada save_interval
+  segundos e em flush(). Numa queda do processo são relidos no máximo os
+  eventos dos últimos save_interval segundos; numa parada normal, nenhum.
+- CheckpointedReader: laço de leitura para os coletores: retoma do
+  checkpoint, entrega os eventos em ordem e só confirma cada um depois que
+  o consumidor terminou de processá-lo.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+class EventCheckpoint:
+    """
+    Último RecordNumber processado de uma fonte, persistido em JSON
+
+    Args:
+        path: Arquivo do checkpoint
+        source_key: Identificação da fonte (canal ou arquivo); checkpoint de
+                    outra fonte é ignorado
+        save_interval: Segundos mínimos entre gravações (0 = a cada commit)
+    """
+
+    def __init__(self, path, source_key, save_interval=1.0):
+        self.path = Path(path)
+        self.source_key = source_key
+        self.save_interval = save_interval
+        self.record_number = None
+        self.saves = 0
+
+        self._saved_number = None
+        self._saved_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Ler o checkpoint; devolve o último RecordNumber processado ou None"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('source') != self.source_key:
+            return None
+        number = data.get('record_number')
+        if isinstance(number, int) and number > 0:
+            self.record_number = self._saved_number = number
+        return self.record_number
+
+    def commit(self, record_number):
+        """Marcar record_number como processado (grava se save_interval passou)"""
+        if not record_number or (self.record_number is not None and record_number <= self.record_number):
+            return
+        self.record_number = record_number
+        if time.monotonic() - self._saved_at >= self.save_interval:
+            self.save()
+
+    def flush(self):
+        """Gravar a posição atual se ainda não estiver em disco"""
+        if self.record_number != self._saved_number:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            number = self.record_number
+            if number is None:
+                return
+            data = {'source': self.source_key, 'record_number': number,
+                    'updated_at': datetime.now().isoformat(timespec='seconds')}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp = self.path.with_name(self.path.name + '.tmp')
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp, self.path)
+            self._saved_number = number
+            self._saved_at = time.monotonic()
+            self.saves += 1
+
+
+class CheckpointedReader:
+    """
+    Leitura incremental de uma fonte de eventos com checkpoint
+
+    Args:
+        source: EventSource (SysmonEventSource, ReplayEventSource)
+        checkpoint: EventCheckpoint da fonte
+        poll_interval: Espera máxima (s) quando não há eventos novos
+        from_end: Sem checkpoint, começar pelos eventos novos em vez do
+                  início do log
+    """
+
+    def __init__(self, source, checkpoint, poll_interval=1.0, from_end=False):
+        self.source = source
+        self.checkpoint = checkpoint
+        self.poll_interval = poll_interval
+        self.from_end = from_end
+
+    def events(self, running=lambda: True):
+        """
+        Gerar eventos novos enquanto running() for verdadeiro
+
+        O evento é confirmado no checkpoint quando o consumidor pede o
+        próximo; se o consumidor sair do laço (break), o evento atual não é
+        confirmado e volta na próxima execução.
+        """
+        start_after = self.checkpoint.load()
+        if start_after is None and self.from_end:
+            start_after = self.source.latest_record()
+        if start_after:
+            self.source.resume_after(start_after)
+
+        self.source.open()
+        try:
+            while running():
+                batch = self.source.read()
+                if not batch:
+                    if self.source.exhausted:
+                        break
+                    # Fonte por assinatura acorda com o próximo evento
+                    self.source.wait(self.poll_interval)
+                    continue
+                for event in batch:
+                    yield event
+                    self.checkpoint.commit(event.RecordNumber)
+                    if not running():
+                        return
+        finally:
+            self.checkpoint.flush()
+            self.source.close()
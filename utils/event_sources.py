@@ -0,0 +1,692 @@
+"""
+FONTES DE EVENTOS DO SYSMON
+Abstração da leitura de eventos usada pelos detectores e coletores:
+- SysmonEventSource: leitura ao vivo do log do Sysmon (Windows + pywin32)
+- SysmonSubscriptionSource: assinatura do log (EvtSubscribe), eventos por callback
+- ReplayEventSource: reprodução de eventos gravados (XML exportado do EVTX ou JSONL)
+- PipeEventSource: eventos JSONL empurrados por um pipe (FIFO ou stdin)
+
+O replay permite testar carga e medir eventos/segundo fora do Windows.
+"""
+
+import json
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import win32evtlog
+except ImportError:
+    # Fora do Windows apenas as fontes de replay estão disponíveis
+    win32evtlog = None
+
+SYSMON_CHANNEL = "Microsoft-Windows-Sysmon/Operational"
+EVENT_TAG = "{http://schemas.microsoft.com/win/2004/08/events/event}Event"
+
+
+class SysmonRecord:
+    """
+    Evento gravado com a mesma interface do PyEventLogRecord do pywin32
+    (EventID, TimeGenerated, ComputerName, RecordNumber, StringInserts)
+    """
+
+    __slots__ = ('EventID', 'TimeGenerated', 'ComputerName', 'RecordNumber',
+                 'StringInserts', 'EventData')
+
+    def __init__(self, event_id, time_generated=None, computer_name='',
+                 record_number=0, string_inserts=(), event_data=None):
+        self.EventID = event_id
+        self.TimeGenerated = time_generated
+        self.ComputerName = computer_name
+        self.RecordNumber = record_number
+        self.StringInserts = tuple(string_inserts)
+        # Campos nomeados (Data Name="...") quando o arquivo os fornece
+        self.EventData = event_data or {}
+
+    def __repr__(self):
+        return f"SysmonRecord(EventID={self.EventID}, RecordNumber={self.RecordNumber})"
+
+
+class EventSource:
+    """
+    Interface comum das fontes de eventos
+
+    read() devolve um lote (lista) de eventos; lista vazia significa que não há
+    eventos novos no momento. exhausted indica que a fonte terminou (replay).
+
+    resume_after(n) antes de open() faz a leitura começar no registro n + 1
+    (retomada por checkpoint); last_record é o RecordNumber do último evento
+    entregue, e eventos com RecordNumber <= last_record nunca são entregues
+    de novo.
+
+    Depois de close(), read() devolve lista vazia até um novo open() (a fonte
+    não é reaberta por um leitor que ainda não parou).
+    """
+
+    name = 'base'
+    start_after = None
+    last_record = 0
+    closed = False
+    # Fontes push avisam a chegada de eventos; as demais são consultadas periodicamente
+    push = False
+
+    @property
+    def checkpoint_key(self):
+        """Identificação da fonte gravada junto com o checkpoint"""
+        return self.name
+
+    def resume_after(self, record_number):
+        """Começar a leitura depois do registro record_number"""
+        self.start_after = record_number
+        self.last_record = record_number or 0
+
+    def latest_record(self):
+        """RecordNumber do evento mais recente já gravado (None se desconhecido)"""
+        return None
+
+    def _new_records(self, records):
+        """Descartar eventos já entregues e atualizar last_record"""
+        if records:
+            if self.last_record and records[0].RecordNumber <= self.last_record:
+                records = [record for record in records if record.RecordNumber > self.last_record]
+            if records:
+                self.last_record = records[-1].RecordNumber
+        return records
+
+    def open(self):
+        """Abrir a fonte de eventos"""
+
+    def read(self):
+        """Ler próximo lote de eventos"""
+        raise NotImplementedError
+
+    def close(self):
+        """Fechar a fonte de eventos"""
+
+    def wait(self, timeout):
+        """Aguardar eventos novos por até timeout segundos (polling: só dorme)"""
+        time.sleep(timeout)
+
+    def is_available(self):
+        """Verificar se a fonte pode ser usada neste host"""
+        return True
+
+    @property
+    def exhausted(self):
+        return False
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SysmonEventSource(EventSource):
+    """Leitura ao vivo do log do Sysmon via win32evtlog.ReadEventLog"""
+
+    name = 'sysmon'
+
+    def __init__(self, channel=SYSMON_CHANNEL):
+        self.channel = channel
+        self.handle = None
+        self.flags = None
+        self._seek_record = None
+
+    @property
+    def checkpoint_key(self):
+        return self.channel
+
+    def is_available(self):
+        if win32evtlog is None:
+            return False
+        try:
+            hand = win32evtlog.OpenEventLog(None, self.channel)
+            win32evtlog.CloseEventLog(hand)
+            return True
+        except Exception:
+            return False
+
+    def open(self):
+        if win32evtlog is None:
+            raise RuntimeError("pywin32 não está disponível - use uma fonte de replay")
+        self.handle = win32evtlog.OpenEventLog(None, self.channel)
+        self.flags = win32evtlog.EVENTLOG_FORWARDS_READ | win32evtlog.EVENTLOG_SEQUENTIAL_READ
+        self._seek_record = None
+        self.closed = False
+
+        if self.start_after:
+            oldest = win32evtlog.GetOldestEventLogRecord(self.handle)
+            newest = oldest + win32evtlog.GetNumberOfEventLogRecords(self.handle) - 1
+            if self.start_after > newest:
+                # Log limpo (numeração recomeçou): ler desde o início
+                self.last_record = 0
+            elif self.start_after >= oldest:
+                # Posicionar no último processado; _new_records descarta ele mesmo
+                self._seek_record = self.start_after
+            # start_after < oldest: registros sobrescritos, ler desde o mais antigo
+
+    def latest_record(self):
+        handle = win32evtlog.OpenEventLog(None, self.channel)
+        try:
+            count = win32evtlog.GetNumberOfEventLogRecords(handle)
+            return win32evtlog.GetOldestEventLogRecord(handle) + count - 1 if count else None
+        finally:
+            win32evtlog.CloseEventLog(handle)
+
+    def read(self):
+        if self.closed:
+            return []
+        if self.handle is None:
+            self.open()
+        if self._seek_record is not None:
+            # Leitura posicionada; as seguintes continuam sequenciais a partir dela
+            flags = win32evtlog.EVENTLOG_FORWARDS_READ | win32evtlog.EVENTLOG_SEEK_READ
+            records = win32evtlog.ReadEventLog(self.handle, flags, self._seek_record) or []
+            self._seek_record = None
+        else:
+            records = win32evtlog.ReadEventLog(self.handle, self.flags, 0) or []
+        return self._new_records(records)
+
+    def close(self):
+        self.closed = True
+        if self.handle is not None:
+            try:
+                win32evtlog.CloseEventLog(self.handle)
+            except Exception:
+                pass
+            self.handle = None
+
+
+class PushEventSource(EventSource):
+    """
+    Base das fontes por assinatura
+
+    O produtor (callback do Windows ou thread lendo um pipe) chama publish()
+    a cada evento; read() só esvazia a caixa de entrada e wait() bloqueia até
+    o próximo evento, sem acordar periodicamente com a fonte ociosa.
+
+    Args:
+        batch_size: Máximo de eventos devolvidos por read()
+    """
+
+    push = True
+
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+        self.events_published = 0
+        self.errors = 0
+        self._inbox = deque()
+        self._ready = threading.Condition()
+        self._ended = False
+
+    def open(self):
+        with self._ready:
+            self._inbox.clear()
+            self._ended = False
+
+    def publish(self, record):
+        """Entregar um evento (chamado pelo produtor)"""
+        with self._ready:
+            self._inbox.append(record)
+            self.events_published += 1
+            self._ready.notify()
+
+    def publish_many(self, records):
+        """Entregar um lote de eventos de uma vez"""
+        with self._ready:
+            self._inbox.extend(records)
+            self.events_published += len(records)
+            self._ready.notify()
+
+    def end(self):
+        """Fim dos eventos (pipe fechado ou fonte encerrada); acorda quem espera"""
+        with self._ready:
+            self._ended = True
+            self._ready.notify_all()
+
+    def read(self):
+        with self._ready:
+            inbox = self._inbox
+            batch = [inbox.popleft() for _ in range(min(len(inbox), self.batch_size))]
+        return self._new_records(batch)
+
+    def wait(self, timeout):
+        with self._ready:
+            if not self._inbox and not self._ended:
+                self._ready.wait(timeout)
+
+    def close(self):
+        self.end()
+
+    @property
+    def exhausted(self):
+        return self._ended and not self._inbox
+
+
+class SysmonSubscriptionSource(PushEventSource):
+    """
+    Assinatura do log do Sysmon via EvtSubscribe
+
+    O serviço de log chama o callback a cada evento gravado; o XML do evento
+    vira um SysmonRecord (EventData nomeado) e chega ao pipeline sem polling.
+    Usa o mesmo checkpoint da leitura por ReadEventLog (RecordNumber do canal).
+    """
+
+    name = 'sysmon-subscribe'
+
+    def __init__(self, channel=SYSMON_CHANNEL, batch_size=500):
+        super().__init__(batch_size)
+        self.channel = channel
+        self.subscription = None
+
+    @property
+    def checkpoint_key(self):
+        return self.channel
+
+    def is_available(self):
+        if win32evtlog is None or not hasattr(win32evtlog, 'EvtSubscribe'):
+            return False
+        return SysmonEventSource(self.channel).is_available()
+
+    def latest_record(self):
+        return SysmonEventSource(self.channel).latest_record()
+
+    def open(self):
+        if win32evtlog is None:
+            raise RuntimeError("pywin32 não está disponível - use uma fonte de replay")
+        super().open()
+
+        flags, query = win32evtlog.EvtSubscribeToFutureEvents, '*'
+        if self.start_after:
+            if self.start_after > (self.latest_record() or 0):
+                # Log limpo (numeração recomeçou): ler desde o início
+                self.last_record = 0
+                flags = win32evtlog.EvtSubscribeStartAtOldestRecord
+            else:
+                # Eventos gravados com o leitor parado e, em seguida, os novos
+                flags = win32evtlog.EvtSubscribeStartAtOldestRecord
+                query = f"*[System[EventRecordID>{int(self.start_after)}]]"
+
+        self.subscription = win32evtlog.EvtSubscribe(self.channel, flags, Callback=self._on_event,
+                                                     Query=query)
+
+    def _on_event(self, action, context, event):
+        # Thread do serviço de log: só converte e enfileira
+        try:
+            if action != win32evtlog.EvtSubscribeActionDeliver:
+                self.errors += 1
+                return 0
+            xml = win32evtlog.EvtRender(event, win32evtlog.EvtRenderEventXml)
+            self.publish(record_from_xml(ET.fromstring(xml)))
+        except Exception:
+            self.errors += 1
+        return 0
+
+    def close(self):
+        # Liberar o handle cancela a assinatura
+        self.subscription = None
+        super().close()
+
+
+def live_event_source(channel=SYSMON_CHANNEL, subscribe=True):
+    """Fonte ao vivo do Sysmon: assinatura quando disponível, senão ReadEventLog"""
+    if subscribe:
+        source = SysmonSubscriptionSource(channel)
+        if source.is_available():
+            return source
+    return SysmonEventSource(channel)
+
+
+class ReplayEventSource(EventSource):
+    """
+    Reprodução de eventos gravados do Sysmon
+
+    Formatos aceitos (detectados pela extensão):
+    - .xml: eventos exportados do EVTX (wevtutil qe /f:xml, Get-WinEvent ToXml)
+    - .jsonl/.json: um evento por linha com EventID, TimeCreated, Computer,
+      EventRecordID e EventData (dict nomeado) ou StringInserts (lista)
+
+    Args:
+        path: Arquivo gravado
+        speed: Multiplicador do tempo original (2.0 = 2x mais rápido);
+               0 ou None reproduz o mais rápido possível
+        batch_size: Máximo de eventos devolvidos por read()
+        loop: Recomeçar do início ao chegar no fim do arquivo
+
+    Com resume_after(n), a primeira passada pelo arquivo pula os eventos com
+    EventRecordID <= n.
+    """
+
+    name = 'replay'
+
+    def __init__(self, path, speed=1.0, batch_size=50, loop=False):
+        self.path = Path(path)
+        self.speed = speed if speed and speed > 0 else 0
+        self.batch_size = batch_size
+        self.loop = loop
+
+        self._records = None
+        self._pending = None
+        self._finished = False
+        self._first_event_time = None
+        self._replay_start = None
+
+        # Estatísticas do replay
+        self.events_emitted = 0
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def checkpoint_key(self):
+        return str(self.path.resolve())
+
+    def is_available(self):
+        return self.path.exists()
+
+    def open(self):
+        self._records = self._iter_records()
+        self._pending = None
+        self._finished = False
+        self._first_event_time = None
+        self._replay_start = None
+        self.last_record = self.start_after or 0
+        self.started_at = time.perf_counter()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+        self._records = None
+        self._pending = None
+
+    @property
+    def exhausted(self):
+        return self._finished
+
+    @property
+    def elapsed(self):
+        """Tempo de parede do replay em segundos"""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def events_per_second(self):
+        elapsed = self.elapsed
+        return self.events_emitted / elapsed if elapsed > 0 else 0.0
+
+    def read(self):
+        if self.closed:
+            return []
+        if self._records is None:
+            self.open()
+        if self._finished:
+            return []
+
+        batch = []
+        now = time.perf_counter()
+
+        while len(batch) < self.batch_size:
+            record = self._next_record()
+            if record is None:
+                break
+
+            # Respeitar o intervalo original entre eventos (ajustado pela velocidade)
+            if self.speed and not self._is_due(record, now):
+                self._pending = record
+                break
+
+            batch.append(record)
+
+        self.events_emitted += len(batch)
+        return self._new_records(batch)
+
+    def _next_record(self):
+        """Próximo evento do arquivo (ou o pendente ainda não devido)"""
+        if self._pending is not None:
+            record, self._pending = self._pending, None
+            return record
+
+        try:
+            return next(self._records)
+        except StopIteration:
+            if self.loop and self.events_emitted > 0:
+                # Nova passada: a numeração dos registros recomeça
+                self.last_record = 0
+                self._records = self._iter_records()
+                self._first_event_time = None
+                return self._next_record()
+            self._finished = True
+            self.finished_at = time.perf_counter()
+            return None
+
+    def _is_due(self, record, now):
+        """Verificar se o evento já deve ser entregue no tempo de replay"""
+        event_time = record.TimeGenerated
+        if event_time is None:
+            return True
+
+        if self._first_event_time is None:
+            self._first_event_time = event_time
+            self._replay_start = now
+            return True
+
+        offset = (event_time - self._first_event_time).total_seconds() / self.speed
+        return now >= self._replay_start + offset
+
+    def _iter_records(self):
+        suffix = self.path.suffix.lower()
+        if suffix in ('.jsonl', '.json', '.ndjson'):
+            records = self._iter_jsonl()
+        else:
+            records = self._iter_xml()
+        if self.start_after and not self.events_emitted:
+            start_after = self.start_after
+            records = (record for record in records if record.RecordNumber > start_after)
+        return records
+
+    def _iter_jsonl(self):
+        """Ler eventos de um arquivo JSONL, linha a linha"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                yield record_from_dict(json.loads(line))
+
+    def _iter_xml(self):
+        """
+        Ler eventos de XML exportado do EVTX em streaming
+
+        A exportação do wevtutil concatena elementos <Event> sem raiz, por isso
+        o conteúdo é envolvido em uma raiz sintética. Cada <Event> lido sai da
+        árvore (removido do elemento pai), então a memória não cresce com o
+        tamanho do arquivo.
+        """
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        parser.feed('<Events>')
+        open_elements = []
+
+        with open(self.path, 'r', encoding='utf-8-sig') as f:
+            first_chunk = True
+            while True:
+                chunk = f.read(64 * 1024)
+                if not chunk:
+                    break
+                if first_chunk:
+                    chunk = _strip_xml_declaration(chunk)
+                    first_chunk = False
+                parser.feed(chunk)
+                yield from self._drain_xml(parser, open_elements)
+
+        parser.feed('</Events>')
+        yield from self._drain_xml(parser, open_elements)
+        parser.close()
+
+    @staticmethod
+    def _drain_xml(parser, open_elements):
+        # open_elements: pilha dos elementos abertos (raiz sintética, <Events> do arquivo, ...)
+        push, pop = open_elements.append, open_elements.pop
+        for kind, element in parser.read_events():
+            if kind == 'start':
+                push(element)
+                continue
+            pop()
+            tag = element.tag
+            if tag == EVENT_TAG or tag[-5:] == 'Event' and _local_name(tag) == 'Event':
+                yield record_from_xml(element)
+                if open_elements:
+                    open_elements[-1].remove(element)
+                element.clear()
+
+
+class PipeEventSource(PushEventSource):
+    """
+    Eventos JSONL empurrados por um pipe (FIFO, stdin ou arquivo já aberto)
+
+    Equivalente de replay da assinatura do Windows: uma thread fica bloqueada
+    na leitura e publica cada evento assim que a linha chega (ex.:
+    `tail -f eventos.jsonl > fifo`). O fim do pipe encerra a fonte.
+
+    Args:
+        path: Caminho do FIFO, '-' para stdin ou objeto de arquivo em texto
+        batch_size: Máximo de eventos devolvidos por read()
+    """
+
+    name = 'pipe'
+
+    def __init__(self, path, batch_size=500):
+        super().__init__(batch_size)
+        self.path = path
+        self._thread = None
+
+    @property
+    def checkpoint_key(self):
+        return f"pipe:{self.path}" if isinstance(self.path, (str, Path)) else 'pipe'
+
+    def is_available(self):
+        return not isinstance(self.path, (str, Path)) or self.path == '-' or Path(self.path).exists()
+
+    def open(self):
+        super().open()
+        self._thread = threading.Thread(target=self._feed, name='pipe-reader', daemon=True)
+        self._thread.start()
+
+    def _feed(self):
+        stream = None
+        try:
+            if self.path == '-':
+                stream = sys.stdin
+            elif isinstance(self.path, (str, Path)):
+                # Abrir um FIFO bloqueia até o escritor conectar
+                stream = open(self.path, 'r', encoding='utf-8')
+            else:
+                stream = self.path
+            for line in stream:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self.publish(record_from_dict(json.loads(line)))
+                except ValueError:
+                    self.errors += 1
+        except OSError:
+            self.errors += 1
+        finally:
+            if stream is not None and stream is not sys.stdin:
+                stream.close()
+            self.end()
+
+
+def record_from_dict(data):
+    """Converter evento JSON (dict) em SysmonRecord"""
+    event_id = int(data.get('EventID', data.get('Id', 0)))
+    event_data = data.get('EventData')
+
+    if isinstance(event_data, dict):
+        inserts = [_as_text(value) for value in event_data.values()]
+    else:
+        inserts = data.get('StringInserts')
+        if inserts is None:
+            inserts = [prop.get('Value') if isinstance(prop, dict) else prop
+                       for prop in data.get('Properties', [])]
+        inserts = [_as_text(value) for value in inserts]
+        event_data = None
+
+    return SysmonRecord(
+        event_id=event_id,
+        time_generated=parse_event_time(data.get('TimeCreated')),
+        computer_name=data.get('Computer', data.get('MachineName', '')),
+        record_number=int(data.get('EventRecordID', data.get('RecordId', 0)) or 0),
+        string_inserts=inserts,
+        event_data=event_data
+    )
+
+
+def record_from_xml(element):
+    """Converter elemento <Event> (schema de eventos do Windows) em SysmonRecord"""
+    event_id = 0
+    time_generated = None
+    computer = ''
+    record_number = 0
+    event_data = {}
+    inserts = []
+
+    for child in element.iter():
+        tag = _local_name(child.tag)
+        if tag == 'EventID':
+            event_id = int(child.text or 0)
+        elif tag == 'TimeCreated':
+            time_generated = parse_event_time(child.get('SystemTime'))
+        elif tag == 'Computer':
+            computer = child.text or ''
+        elif tag == 'EventRecordID':
+            record_number = int(child.text or 0)
+        elif tag == 'Data':
+            value = child.text or ''
+            inserts.append(value)
+            name = child.get('Name')
+            if name:
+                event_data[name] = value
+
+    return SysmonRecord(event_id, time_generated, computer, record_number, inserts, event_data)
+
+
+def parse_event_time(value):
+    """Converter SystemTime do Windows (ISO 8601, até 7 casas decimais) em datetime"""
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value)
+
+    text = str(value).strip().rstrip('Z')
+    if '.' in text:
+        base, fraction = text.split('.', 1)
+        text = f"{base}.{fraction[:6]}"
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return None
+
+
+def _strip_xml_declaration(chunk):
+    chunk = chunk.lstrip()
+    if chunk.startswith('<?xml'):
+        end = chunk.find('?>')
+        if end != -1:
+            chunk = chunk[end + 2:]
+    return chunk
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1] if '}' in tag else tag
+
+
+def _as_text(value):
+    return '' if value is None else str(value)
@@ -0,0 +1,454 @@
+"""
+SERVIDOR DE INFERÊNCIA (UM MODELO PARA VÁRIOS DETECTORES)
+Cada detector carrega a própria cópia da floresta e do vectorizer; com o
+serviço do Windows e execuções avulsas do RealtimeMalwareDetector na mesma
+máquina, a memória cresce com o número de processos. O servidor mantém um
+único modelo e atende os detectores por uma conexão local (named pipe no
+Windows, socket Unix nos demais sistemas).
+
+- Clientes enviam sequências de API calls (texto); o TF-IDF, a seleção, o
+  PCA e o predict_proba rodam no servidor, então o cliente não carrega nada.
+- Micro-lotes: pedidos de todos os clientes que chegam em até max_wait
+  segundos (ou até max_batch linhas) viram uma única inferência. Cada
+  cliente tem no máximo um pedido pendente, então o lote fecha sem esperar
+  quando todos os clientes conectados já estão nele.
+- Coalescência: sequências idênticas no mesmo lote (ex.: processos recém
+  criados com as mesmas APIs de inicialização) são avaliadas uma vez só.
+
+As mensagens usam pickle (multiprocessing.connection), então toda conexão é
+autenticada com authkey, inclusive a local: sem ela, outro usuário que crie o
+socket ou o named pipe antes do servidor executaria código no detector (que
+costuma rodar como administrador). O handshake do multiprocessing autentica
+os dois lados (cliente prova a chave ao servidor e vice-versa) antes de
+qualquer pickle. Sem authkey explícita (ou $INFERENCE_AUTHKEY), o servidor gera
+uma e a grava em runtime_dir()/authkey (0600), onde os clientes do mesmo
+usuário a encontram; detectores de outro usuário recebem a chave pela
+configuração. O socket Unix padrão também fica em runtime_dir(), um diretório
+0700 do usuário, e não direto no /tmp. Endereço TCP ('host:porta') exige
+authkey explícita.
+
+Uso:
+    python inference_server.py --model modelo.bundle [--address ENDERECO]
+"""
+
+import argparse
+import os
+import queue
+import secrets
+import stat
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_PIPE = r'\\.\pipe\modelo-defensivo-inferencia'
+DEFAULT_SOCKET = 'inferencia.sock'
+AUTHKEY_FILE = 'authkey'
+AUTHKEY_ENV = 'INFERENCE_AUTHKEY'
+
+
+def runtime_dir():
+    """
+    Diretório privado do usuário para o socket e a chave (criado com 0700)
+
+    $XDG_RUNTIME_DIR/modelo-defensivo ou <tmp>/modelo-defensivo-<uid>; no
+    Windows, %LOCALAPPDATA%\\modelo-defensivo (ACL do perfil do usuário).
+    """
+    if sys.platform == 'win32':
+        path = Path(os.environ.get('LOCALAPPDATA') or Path.home()) / 'modelo-defensivo'
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    base = os.environ.get('XDG_RUNTIME_DIR')
+    path = Path(base) / 'modelo-defensivo' if base else Path(tempfile.gettempdir()) / f'modelo-defensivo-{os.getuid()}'
+    try:
+        path.mkdir(mode=0o700)
+    except FileExistsError:
+        pass
+    # Diretório criado antes por outro usuário (ou link) não serve
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{path} não é um diretório privado do usuário atual")
+    return path
+
+
+def default_address():
+    """Endereço local padrão: named pipe no Windows, socket Unix (em runtime_dir()) nos demais"""
+    if sys.platform == 'win32':
+        return DEFAULT_PIPE
+    return str(runtime_dir() / DEFAULT_SOCKET)
+
+
+def shared_authkey(create=False):
+    """
+    Chave da variável $INFERENCE_AUTHKEY ou de runtime_dir()/authkey
+
+    create: gerar e gravar a chave (0600) se ainda não existir (servidor).
+    Devolve None se não houver chave e create for falso.
+    """
+    if os.environ.get(AUTHKEY_ENV):
+        return os.environ[AUTHKEY_ENV].encode('utf-8')
+    path = runtime_dir() / AUTHKEY_FILE
+    if create:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(secrets.token_hex(32))
+    try:
+        return path.read_text(encoding='utf-8').strip().encode('utf-8')
+    except FileNotFoundError:
+        return None
+
+
+def parse_address(address):
+    """'host:porta' vira endereço TCP; o resto é named pipe ou caminho de socket Unix"""
+    address = address or default_address()
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and '/' not in address and '\\' not in address:
+        return (host or '127.0.0.1', int(port))
+    return address
+
+
+def _authkey(authkey):
+    if isinstance(authkey, str):
+        return authkey.encode('utf-8')
+    return authkey
+
+
+def _remove_stale_socket(path):
+    """Remover o socket de uma execução anterior (só se for um socket deste usuário)"""
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise FileExistsError(f"{path} existe e não é um socket do usuário atual")
+    os.unlink(path)
+
+
+class InferenceModel:
+    """
+    Modelo com o mesmo pré-processamento do detector Sysmon
+
+    Args:
+        model_path: Bundle (.bundle), dict joblib ou modelo joblib isolado
+        vectorizer_path: TfidfVectorizer joblib (só para o modelo isolado)
+        encoder_path: LabelEncoder joblib (só para o modelo isolado)
+    """
+
+    def __init__(self, model_path, vectorizer_path=None, encoder_path=None):
+        # Só o servidor carrega scikit-learn; o processo cliente importa apenas este módulo
+        import joblib
+        from compiled_forest import load_scorer
+        from model_bundle import load_model_file
+
+        data = load_model_file(model_path)
+        if not isinstance(data, dict):
+            data = {
+                'model': data,
+                'tfidf_vectorizer': joblib.load(vectorizer_path) if vectorizer_path else None,
+                'label_encoder': joblib.load(encoder_path) if encoder_path else None
+            }
+        self.model_path = str(model_path)
+        self.vectorizer = data.get('tfidf_vectorizer')
+        self.feature_selector = data.get('feature_selector')
+        self.pca = data.get('pca')
+        self.label_encoder = data.get('label_encoder')
+        self.scorer = load_scorer(data['model'], model_path)
+
+    @property
+    def classes(self):
+        """Rótulos na ordem das colunas das probabilidades"""
+        if self.label_encoder is not None:
+            return [str(label) for label in self.label_encoder.inverse_transform(self.scorer.classes_)]
+        return [str(label) for label in self.scorer.classes_]
+
+    def transform(self, sequences):
+        X = self.vectorizer.transform(sequences)
+        if self.feature_selector is not None:
+            X = self.feature_selector.transform(X)
+        if self.pca is not None:
+            try:
+                X = self.pca.transform(X)
+            except TypeError:
+                # PCA de versões antigas do scikit-learn não aceita entrada esparsa
+                X = self.pca.transform(X.toarray())
+        return X
+
+    def predict(self, sequences):
+        """Probabilidades (n x classes) e rótulo previsto de cada sequência"""
+        probabilities = self.scorer.predict_proba(self.transform(sequences))
+        predictions = self.scorer.classes_.take(probabilities.argmax(axis=1))
+        if self.label_encoder is not None:
+            predictions = self.label_encoder.inverse_transform(predictions)
+        return probabilities, [str(label) for label in predictions]
+
+
+class _Request:
+    __slots__ = ('conn', 'request_id', 'sequences')
+
+    def __init__(self, conn, request_id, sequences):
+        self.conn = conn
+        self.request_id = request_id
+        self.sequences = sequences
+
+
+class InferenceServer:
+    """
+    Servidor local de inferência com micro-lotes
+
+    Args:
+        model: InferenceModel ou caminho do modelo
+        address: Named pipe, socket Unix ou 'host:porta' (padrão: default_address())
+        authkey: Chave compartilhada com os clientes; sem ela, shared_authkey()
+                 (gerada na primeira execução). Obrigatória em 'host:porta'.
+        max_batch: Linhas máximas por inferência
+        max_wait: Segundos que o primeiro pedido espera por outros antes da inferência
+    """
+
+    def __init__(self, model, address=None, authkey=None, max_batch=256, max_wait=0.002):
+        self.address = address or default_address()
+        self.authkey = _authkey(authkey)
+        if isinstance(parse_address(self.address), tuple) and not self.authkey:
+            raise ValueError(f"Endereço TCP {self.address} exige authkey (mensagens pickle sem autenticação)")
+        self.authkey = self.authkey or shared_authkey(create=True)
+        self.model = model if isinstance(model, InferenceModel) else InferenceModel(model)
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+
+        self.stats = {'connections': 0, 'requests': 0, 'rows': 0, 'unique_rows': 0,
+                      'batches': 0, 'errors': 0}
+
+        self._listener = None
+        self._clients = 0
+        self._clients_lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._threads = []
+        self._running = False
+
+    def start(self):
+        """Abrir o endereço e iniciar as threads de conexão e de inferência"""
+        address = parse_address(self.address)
+        if isinstance(address, str) and not address.startswith('\\\\'):
+            _remove_stale_socket(address)
+        self._listener = Listener(address, authkey=self.authkey)
+        self._running = True
+        for target, name in ((self._accept_loop, 'inference-accept'), (self._batch_loop, 'inference-batch')):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        """Parar de aceitar conexões e encerrar o laço de inferência"""
+        if not self._running:
+            return
+        self._running = False
+        try:
+            # accept() bloqueado não acorda com close(): uma conexão vazia o libera
+            Client(parse_address(self.address), authkey=self.authkey).close()
+        except OSError:
+            pass
+        self._listener.close()
+        self._requests.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while self._running:
+                time.sleep(1)
+        finally:
+            self.stop()
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                # Cliente com chave errada ou listener fechado
+                continue
+            if not self._running:
+                conn.close()
+                break
+            self.stats['connections'] += 1
+            threading.Thread(target=self._serve_connection, args=(conn,),
+                             name='inference-conn', daemon=True).start()
+
+    def _serve_connection(self, conn):
+        """Receber os pedidos de um cliente; as respostas saem pela thread de inferência"""
+        with self._clients_lock:
+            self._clients += 1
+        try:
+            conn.send(('hello', {'classes': self.model.classes, 'model': Path(self.model.model_path).name}))
+            while self._running:
+                kind, request_id, sequences = conn.recv()
+                if kind == 'predict':
+                    self._requests.put(_Request(conn, request_id, sequences))
+                elif kind == 'stats':
+                    # O cliente espera uma resposta por vez: nenhum lote pendente nesta conexão
+                    conn.send(('stats', request_id, dict(self.stats)))
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self._clients_lock:
+                self._clients -= 1
+
+    def _batch_loop(self):
+        """Juntar os pedidos que chegam em até max_wait segundos em uma inferência"""
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            batch, rows = [request], len(request.sequences)
+            deadline = time.monotonic() + self.max_wait
+            # Com todos os clientes no lote não há outro pedido a esperar
+            while rows < self.max_batch and len(batch) < self._clients:
+                try:
+                    request = self._requests.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._requests.put(None)
+                    break
+                batch.append(request)
+                rows += len(request.sequences)
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        # Sequências repetidas no lote são avaliadas uma vez
+        unique = {}
+        positions = [[unique.setdefault(sequence, len(unique)) for sequence in request.sequences]
+                     for request in batch]
+
+        try:
+            probabilities, labels = self.model.predict(list(unique)) if unique else (None, [])
+            replies = [('result', request.request_id, probabilities[rows], [labels[row] for row in rows])
+                       for request, rows in zip(batch, positions)]
+        except Exception as e:
+            self.stats['errors'] += 1
+            replies = [('error', request.request_id, str(e)) for request in batch]
+
+        self.stats['batches'] += 1
+        self.stats['requests'] += len(batch)
+        self.stats['rows'] += sum(len(rows) for rows in positions)
+        self.stats['unique_rows'] += len(unique)
+
+        for request, reply in zip(batch, replies):
+            try:
+                request.conn.send(reply)
+            except (OSError, ValueError):
+                # Cliente desconectou antes da resposta
+                pass
+
+
+class InferenceClient:
+    """
+    Cliente do servidor de inferência (mesma interface de predição do modelo local)
+
+    Args:
+        address: Endereço do servidor (padrão: default_address())
+        authkey: Chave compartilhada com o servidor (padrão: shared_authkey())
+        timeout: Segundos máximos aguardando uma resposta
+    """
+
+    def __init__(self, address=None, authkey=None, timeout=5.0):
+        self.address = address or default_address()
+        self.authkey = _authkey(authkey) or shared_authkey()
+        if not self.authkey:
+            # Sem chave a resposta do endereço seria desserializada sem autenticar o servidor
+            raise PermissionError(f"Sem authkey para {self.address} (use authkey, ${AUTHKEY_ENV} "
+                                  f"ou {runtime_dir() / AUTHKEY_FILE})")
+        self.timeout = timeout
+        self.classes = None
+        self.info = {}
+
+        self._conn = None
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._connect()
+
+    def _connect(self):
+        try:
+            self._conn = Client(parse_address(self.address), authkey=self.authkey)
+        except AssertionError as e:
+            # Outro processo no endereço falando fora do handshake (Python < 3.12 usa assert)
+            raise AuthenticationError(f"Handshake inválido em {self.address}") from e
+        _, self.info = self._conn.recv()
+        self.classes = self.info['classes']
+
+    def predict(self, sequences):
+        """Probabilidades (n x classes) e rótulo previsto de cada sequência"""
+        reply = self._request('predict', list(sequences))
+        if reply[0] == 'error':
+            raise RuntimeError(f"Erro no servidor de inferência: {reply[2]}")
+        _, _, probabilities, labels = reply
+        return np.asarray(probabilities), labels
+
+    def server_stats(self):
+        """Contadores do servidor (pedidos, linhas, linhas únicas, inferências)"""
+        return self._request('stats')[2]
+
+    def _request(self, kind, payload=None):
+        with self._lock:
+            if self._conn is None:
+                self._connect()
+            self._next_id += 1
+            try:
+                self._conn.send((kind, self._next_id, payload))
+                if not self._conn.poll(self.timeout):
+                    raise TimeoutError(f"Servidor de inferência sem resposta em {self.timeout}s")
+                return self._conn.recv()
+            except (OSError, EOFError, TimeoutError):
+                # Resposta atrasada ou conexão perdida: reconectar no próximo pedido
+                self.close()
+                raise
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor de inferência compartilhado pelos detectores')
+    parser.add_argument('--model', required=True, help='Bundle (.bundle) ou modelo .joblib')
+    parser.add_argument('--vectorizer', help='TfidfVectorizer joblib (modelo isolado)')
+    parser.add_argument('--encoder', help='LabelEncoder joblib (modelo isolado)')
+    parser.add_argument('--address', help=f'Named pipe, socket Unix ou host:porta (padrão: {default_address()})')
+    parser.add_argument('--authkey', default=os.environ.get(AUTHKEY_ENV),
+                        help='Chave compartilhada com os clientes, obrigatória em host:porta '
+                             f'(padrão: ${AUTHKEY_ENV} ou a chave gerada em {AUTHKEY_FILE} no '
+                             'diretório privado do usuário)')
+    parser.add_argument('--max-batch', type=int, default=256, help='Linhas máximas por inferência')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0, help='Espera máxima para formar um lote')
+    args = parser.parse_args()
+
+    if isinstance(parse_address(args.address), tuple) and not args.authkey:
+        parser.error('endereço host:porta exige --authkey (ou $INFERENCE_AUTHKEY)')
+
+    server = InferenceServer(InferenceModel(args.model, args.vectorizer, args.encoder), args.address,
+                             args.authkey, args.max_batch, args.max_wait_ms / 1000)
+    print(f"🧠 Servidor de inferência em {server.address} (classes: {server.model.classes})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Servidor de inferência parado")
+    finally:
+        stats = server.stats
+        print(f"📊 Pedidos: {stats['requests']} | Linhas: {stats['rows']} "
+              f"(únicas: {stats['unique_rows']}) | Inferências: {stats['batches']}")
+
+
+if __name__ == "__main__":
+    main()
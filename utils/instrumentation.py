@@ -0,0 +1,251 @@
+"""
+INSTRUMENTAÇÃO DO CAMINHO QUENTE (HISTOGRAMAS, CONTADORES, /metrics)
+Latências são registradas em histogramas log-lineares no estilo HDR: cada
+potência de 2 (em nanossegundos) é dividida em 8 faixas, o que dá erro
+relativo de no máximo 12,5% em qualquer escala (de 1 ns a minutos) com um
+vetor fixo de contadores. observe_ns() é só aritmética de inteiros e um
+incremento de lista, sem lock e sem alocação.
+
+Contadores e gauges podem ser lidos por uma função no momento da coleta
+(ex.: profundidade das filas, estatísticas já existentes), sem custo no
+caminho quente.
+
+MetricsServer expõe o registro no formato texto do Prometheus em
+http://127.0.0.1:<porta>/metrics.
+
+Os incrementos não usam lock: com várias threads observando o mesmo
+histograma, raramente uma contagem pode se perder (aceitável para métricas).
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter_ns
+
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+BUCKET_COUNT = 64 * SUB_BUCKETS
+
+# Limites "le" exportados (segundos): de 1 µs a 10 s
+EXPORT_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+                  1e-3, 2.5e-3, 5e-3, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+EXPORT_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def bucket_bounds(index):
+    """Intervalo [início, fim) em ns coberto pela faixa index"""
+    if index < SUB_BUCKETS:
+        return index, index + 1
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    mantissa = (index & (SUB_BUCKETS - 1)) | SUB_BUCKETS
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class Histogram:
+    """Histograma log-linear de durações em nanossegundos"""
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+
+    def observe_ns(self, value):
+        if value < SUB_BUCKETS:
+            index = value if value > 0 else 0
+        else:
+            shift = value.bit_length() - SUB_BUCKET_BITS - 1
+            index = (shift << SUB_BUCKET_BITS) + (value >> shift)
+            if index >= BUCKET_COUNT:
+                index = BUCKET_COUNT - 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+
+    def observe_since(self, started_ns):
+        """Registrar o tempo decorrido desde started_ns (time.perf_counter_ns())"""
+        self.observe_ns(perf_counter_ns() - started_ns)
+
+    def observe(self, seconds):
+        self.observe_ns(int(seconds * 1e9))
+
+    def quantile_ns(self, fraction, counts=None):
+        """Valor (ns, meio da faixa) abaixo do qual está a fração pedida das observações"""
+        counts = counts if counts is not None else list(self.counts)
+        total = sum(counts)
+        if not total:
+            return 0
+        rank = max(1, int(round(fraction * total)))
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                low, high = bucket_bounds(index)
+                return (low + high - 1) // 2
+        return bucket_bounds(BUCKET_COUNT - 1)[0]
+
+    def summary(self):
+        """count, média e percentis em microssegundos"""
+        counts = list(self.counts)
+        count = sum(counts)
+        return {
+            'count': count,
+            'mean_us': round(self.total / count / 1000, 2) if count else 0.0,
+            'p50_us': round(self.quantile_ns(0.50, counts) / 1000, 2),
+            'p99_us': round(self.quantile_ns(0.99, counts) / 1000, 2),
+            'max_us': round(self._max_ns(counts) / 1000, 2)
+        }
+
+    def _max_ns(self, counts):
+        for index in range(len(counts) - 1, -1, -1):
+            if counts[index]:
+                return bucket_bounds(index)[1] - 1
+        return 0
+
+
+class MetricsRegistry:
+    """Métricas agrupadas por família (nome) e rótulos, com saída para o Prometheus"""
+
+    def __init__(self, prefix=''):
+        self.prefix = prefix
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help_text, **labels):
+        """Histograma de latência (exportado em segundos)"""
+        return self._register(name, 'histogram', help_text, labels, Histogram)
+
+    def counter(self, name, help_text, read, **labels):
+        """Contador lido na coleta: read() devolve o total acumulado"""
+        return self._register(name, 'counter', help_text, labels, lambda: read)
+
+    def gauge(self, name, help_text, read, **labels):
+        """Valor instantâneo lido na coleta (ex.: profundidade de fila)"""
+        return self._register(name, 'gauge', help_text, labels, lambda: read)
+
+    def histograms(self, name):
+        """{rótulos: Histogram} de uma família"""
+        family = self._families.get(self.prefix + name)
+        return dict(family['metrics']) if family else {}
+
+    def _register(self, name, kind, help_text, labels, factory):
+        name = self.prefix + name
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families.setdefault(name, {'kind': kind, 'help': help_text, 'metrics': {}})
+            if family['kind'] != kind:
+                raise ValueError(f"Métrica {name} já registrada como {family['kind']}")
+            if key not in family['metrics']:
+                family['metrics'][key] = factory()
+            return family['metrics'][key]
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            families = [(name, dict(family, metrics=dict(family['metrics'])))
+                        for name, family in sorted(self._families.items())]
+        for name, family in families:
+            kind = family['kind']
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, metric in family['metrics'].items():
+                if kind == 'histogram':
+                    lines.extend(_render_histogram(name, key, metric))
+                else:
+                    try:
+                        value = metric()
+                    except Exception:
+                        continue
+                    lines.append(f"{name}{_labels(key)} {_number(value)}")
+            if kind == 'histogram':
+                quantiles = f"{name}_quantile"
+                lines.append(f"# HELP {quantiles} Percentis de {name} (segundos)")
+                lines.append(f"# TYPE {quantiles} gauge")
+                for key, metric in family['metrics'].items():
+                    counts = list(metric.counts)
+                    for fraction in EXPORT_QUANTILES:
+                        value = metric.quantile_ns(fraction, counts) / 1e9
+                        lines.append(f"{quantiles}{_labels(key + (('quantile', fraction),))} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _render_histogram(name, key, histogram):
+    counts = list(histogram.counts)
+    lines = []
+    cumulative = 0
+    index = 0
+    for bound in EXPORT_BUCKETS:
+        limit_ns = bound * 1e9
+        # Faixas inteiras abaixo do limite (a faixa que o cruza fica para o próximo)
+        while index < BUCKET_COUNT and bucket_bounds(index)[1] <= limit_ns:
+            cumulative += counts[index]
+            index += 1
+        lines.append(f"{name}_bucket{_labels(key + (('le', bound),))} {cumulative}")
+    total = sum(counts)
+    lines.append(f"{name}_bucket{_labels(key + (('le', '+Inf'),))} {total}")
+    lines.append(f"{name}_sum{_labels(key)} {_number(histogram.total / 1e9)}")
+    lines.append(f"{name}_count{_labels(key)} {total}")
+    return lines
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    inner = ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return '{' + inner + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+class MetricsServer:
+    """Servidor HTTP local que responde GET /metrics com o registro"""
+
+    def __init__(self, registry, host='127.0.0.1', port=9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics-server',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,157 @@
+"""
+LEITOR EM STREAMING DO MAL-API-2019
+Lê all_analysis_data.txt linha a linha junto com labels.csv (um rótulo por
+linha, sem cabeçalho), mantendo em memória apenas as linhas das famílias
+selecionadas.
+
+Opcionalmente constrói um índice de offsets em bytes de cada linha, salvo ao
+lado do arquivo de dados, para que execuções seguintes leiam só as linhas
+selecionadas com seek().
+
+Uso:
+    python malapi_loader.py ../mal-api-2019/all_analysis_data.txt ../mal-api-2019/labels.csv --families Spyware Trojan --index
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+MAL_API_FAMILIES = ('Adware', 'Backdoor', 'Downloader', 'Dropper', 'Spyware', 'Trojan', 'Virus', 'Worms')
+
+
+def read_labels(labels_file):
+    """Ler labels.csv (uma família por linha, na ordem das linhas de dados)"""
+    with open(labels_file, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f]
+
+
+def iter_mal_api(data_file, labels_file, families=None, skip_empty=True):
+    """
+    Percorrer o dataset em streaming
+
+    Yields:
+        (índice da linha, família, API calls como texto)
+    """
+    families = set(families) if families else None
+
+    with open(labels_file, 'r', encoding='utf-8') as labels, open(data_file, 'rb') as data:
+        for index, (label, line) in enumerate(zip(labels, data)):
+            label = label.strip()
+            if families is not None and label not in families:
+                continue
+
+            api_calls = line.decode('utf-8', errors='ignore').strip()
+            if skip_empty and not api_calls:
+                continue
+            yield index, label, api_calls
+
+
+def iter_mal_api_chunks(data_file, labels_file, families=None, chunk_size=1000, index=None):
+    """
+    Ler o dataset em blocos de DataFrame (colunas api_calls e label)
+
+    Com index (offsets de build_offset_index/load_offset_index), só as linhas
+    das famílias selecionadas são lidas do disco.
+    """
+    if index is not None:
+        rows = iter_selected_rows(data_file, labels_file, index, families)
+    else:
+        rows = iter_mal_api(data_file, labels_file, families)
+
+    chunk = []
+    for _, label, api_calls in rows:
+        chunk.append({'api_calls': api_calls, 'label': label})
+        if len(chunk) >= chunk_size:
+            yield pd.DataFrame(chunk)
+            chunk = []
+    if chunk:
+        yield pd.DataFrame(chunk)
+
+
+def load_mal_api(data_file, labels_file, families=('Spyware',), use_index=False, index_file=None):
+    """Carregar as famílias selecionadas em um DataFrame (api_calls, label)"""
+    index = load_offset_index(data_file, index_file, build=True) if use_index else None
+    chunks = list(iter_mal_api_chunks(data_file, labels_file, families, chunk_size=5000, index=index))
+    if not chunks:
+        return pd.DataFrame(columns=['api_calls', 'label'])
+    return pd.concat(chunks, ignore_index=True)
+
+
+def default_index_path(data_file):
+    data_file = Path(data_file)
+    return data_file.with_name(f"{data_file.name}.offsets.npz")
+
+
+def build_offset_index(data_file, index_file=None):
+    """Construir e salvar o offset (em bytes) do início de cada linha"""
+    offsets = []
+    position = 0
+    with open(data_file, 'rb') as f:
+        for line in f:
+            offsets.append(position)
+            position += len(line)
+
+    stat = os.stat(data_file)
+    offsets = np.array(offsets, dtype=np.uint64)
+    np.savez(index_file or default_index_path(data_file), offsets=offsets,
+             size=np.array(stat.st_size), mtime=np.array(stat.st_mtime_ns))
+    return offsets
+
+
+def load_offset_index(data_file, index_file=None, build=False):
+    """
+    Carregar índice de offsets; reconstrói (build=True) se estiver ausente ou
+    se o arquivo de dados mudou desde a criação do índice
+    """
+    index_file = Path(index_file or default_index_path(data_file))
+    if index_file.exists():
+        stat = os.stat(data_file)
+        with np.load(index_file) as saved:
+            if int(saved['size']) == stat.st_size and int(saved['mtime']) == stat.st_mtime_ns:
+                return saved['offsets']
+    if build:
+        return build_offset_index(data_file, index_file)
+    return None
+
+
+def read_rows(data_file, rows, offsets):
+    """Ler linhas específicas com seek() usando o índice de offsets"""
+    with open(data_file, 'rb') as f:
+        for row in sorted(rows):
+            if row >= len(offsets):
+                continue
+            f.seek(int(offsets[row]))
+            yield row, f.readline().decode('utf-8', errors='ignore').strip()
+
+
+def iter_selected_rows(data_file, labels_file, offsets, families=None, skip_empty=True):
+    """Ler só as linhas das famílias selecionadas (labels.csv é pequeno)"""
+    labels = read_labels(labels_file)
+    families = set(families) if families else None
+    rows = [i for i, label in enumerate(labels) if families is None or label in families]
+
+    for row, api_calls in read_rows(data_file, rows, offsets):
+        if skip_empty and not api_calls:
+            continue
+        yield row, labels[row], api_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Leitura em streaming do mal-api-2019')
+    parser.add_argument('data_file', help='all_analysis_data.txt')
+    parser.add_argument('labels_file', help='labels.csv')
+    parser.add_argument('--families', nargs='+', default=['Spyware'], choices=MAL_API_FAMILIES)
+    parser.add_argument('--index', action='store_true', help='Construir/usar índice de offsets')
+    args = parser.parse_args()
+
+    df = load_mal_api(args.data_file, args.labels_file, args.families, use_index=args.index)
+    print(f"✅ {len(df)} amostras carregadas")
+    if len(df):
+        print(df['label'].value_counts().to_string())
+
+
+if __name__ == "__main__":
+    main()
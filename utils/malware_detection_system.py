@@ -21,7 +21,8 @@ import win32con
 # Bibliotecas de ML
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.decomposition import PCA
+from sklearn.decomposition import PCA, TruncatedSVD
+from scipy import sparse
 from sklearn.feature_selection import SelectKBest, mutual_info_classif
 from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
 from sklearn.preprocessing import StandardScaler, LabelEncoder
@@ -54,6 +55,9 @@ class MalwareDetectionSystem:
         self.feature_selector = None
         self.shap_explainer = None
         
+        # Cliente do servidor de inferência (modelo único compartilhado entre processos)
+        self.inference_client = None
+        
         # Configurações para detecção em tempo real
         self.api_calls_buffer = defaultdict(list)
         self.detection_threshold = 0.7
@@ -93,6 +97,10 @@ class MalwareDetectionSystem:
                 'n_components': 0.95,  # Preservar 95% da variância
                 'random_state': 42
             },
+            'svd': {
+                'n_components': 300,   # TruncatedSVD trabalha direto na matriz esparsa
+                'random_state': 42
+            },
             'feature_selection': {
                 'k_best': 2500  # 25-50% das características originais
             },
@@ -205,7 +213,7 @@ class MalwareDetectionSystem:
             # Seleção de características usando Mutual Information
             X_selected = self._feature_selection(X_tfidf, y_encoded)
             
-            # Aplicar PCA se necessário
+            # Aplicar PCA (TruncatedSVD para matriz esparsa) se necessário
             if X_selected.shape[1] > 1000:
                 X_final = self._apply_pca(X_selected)
             else:
@@ -241,10 +249,11 @@ class MalwareDetectionSystem:
         """Aplicar TF-IDF conforme framework teórico"""
         self.logger.info("Aplicando TF-IDF...")
         
-        self.tfidf_vectorizer = TfidfVectorizer(**self.config['tfidf'])
+        self.tfidf_vectorizer = TfidfVectorizer(dtype=np.float32, **self.config['tfidf'])
         X_tfidf = self.tfidf_vectorizer.fit_transform(text_series)
         
-        return X_tfidf.toarray()
+        # Manter esparso: SelectKBest, TruncatedSVD, RF e XGBoost aceitam CSR
+        return X_tfidf
     
     def _feature_selection(self, X, y):
         """Seleção de características usando Mutual Information"""
@@ -260,9 +269,15 @@ class MalwareDetectionSystem:
     
     def _apply_pca(self, X):
         """Aplicar PCA para redução de dimensionalidade"""
-        self.logger.info("Aplicando PCA...")
-        
-        self.pca = PCA(**self.config['pca'])
+        if sparse.issparse(X):
+            # PCA exige centralizar (densificar) a matriz; SVD truncado não
+            self.logger.info("Aplicando TruncatedSVD...")
+            svd_config = dict(self.config['svd'])
+            svd_config['n_components'] = min(svd_config['n_components'], X.shape[1] - 1)
+            self.pca = TruncatedSVD(**svd_config)
+        else:
+            self.logger.info("Aplicando PCA...")
+            self.pca = PCA(**self.config['pca'])
         X_pca = self.pca.fit_transform(X)
         
         explained_variance = sum(self.pca.explained_variance_ratio_)
@@ -340,7 +355,7 @@ class MalwareDetectionSystem:
         """Configurar SHAP para interpretabilidade"""
         try:
             # Usar uma amostra menor para SHAP devido à complexidade computacional
-            sample_size = min(100, len(X_train))
+            sample_size = min(100, X_train.shape[0])
             X_sample = X_train[:sample_size]
             
             self.shap_explainer = shap.Explainer(self.model.predict, X_sample)
@@ -364,22 +379,29 @@ class MalwareDetectionSystem:
         """
         Predição em tempo real para detecção de malware
         """
-        if self.model is None:
+        if self.model is None and self.inference_client is None:
             raise ValueError("Modelo não foi treinado")
         
         try:
             # Processar chamadas de API
             processed_calls = self._process_single_api_sequence(api_calls)
             
-            # Aplicar mesmo pré-processamento
-            X_processed = self._preprocess_single_sample(processed_calls)
-            
-            # Predição
-            prediction = self.model.predict([X_processed])[0]
-            probability = self.model.predict_proba([X_processed])[0]
-            
-            # Converter predição para rótulo original
-            predicted_label = self.label_encoder.inverse_transform([prediction])[0]
+            if self.inference_client is not None:
+                # Pré-processamento e predição no servidor de inferência
+                probabilities, labels = self.inference_client.predict([processed_calls])
+                probability, predicted_label = probabilities[0], labels[0]
+                classes = self.inference_client.classes
+            else:
+                # Aplicar mesmo pré-processamento
+                X_processed = self._preprocess_single_sample(processed_calls)
+                
+                # Predição
+                prediction = self.model.predict(X_processed)[0]
+                probability = self.model.predict_proba(X_processed)[0]
+                
+                # Converter predição para rótulo original
+                predicted_label = self.label_encoder.inverse_transform([prediction])[0]
+                classes = self.label_encoder.classes_
             
             # Calcular confiança
             confidence = np.max(probability)
@@ -391,7 +413,7 @@ class MalwareDetectionSystem:
                 'prediction': predicted_label,
                 'confidence': confidence,
                 'is_malware': is_malware,
-                'probabilities': dict(zip(self.label_encoder.classes_, probability)),
+                'probabilities': dict(zip(classes, probability)),
                 'timestamp': datetime.now(),
                 'process_info': process_info
             }
@@ -415,10 +437,10 @@ class MalwareDetectionSystem:
             return str(api_calls)
     
     def _preprocess_single_sample(self, api_sequence):
-        """Pré-processar uma única amostra para predição"""
+        """Pré-processar uma única amostra para predição (linha esparsa 1 x n)"""
         # Aplicar TF-IDF
         if self.tfidf_vectorizer:
-            X_tfidf = self.tfidf_vectorizer.transform([api_sequence]).toarray()
+            X_tfidf = self.tfidf_vectorizer.transform([api_sequence])
         else:
             # Se não houver TF-IDF, assumir que é numérico
             X_tfidf = np.array([api_sequence])
@@ -431,11 +453,14 @@ class MalwareDetectionSystem:
         
         # PCA
         if self.pca:
+            if isinstance(self.pca, PCA) and sparse.issparse(X_selected):
+                # Modelos antigos com PCA denso: densificar só as features selecionadas
+                X_selected = X_selected.toarray()
             X_final = self.pca.transform(X_selected)
         else:
             X_final = X_selected
         
-        return X_final[0]
+        return X_final
     
     def start_realtime_monitoring(self):
         """Iniciar monitoramento em tempo real com Sysmon"""
@@ -634,6 +659,14 @@ class MalwareDetectionSystem:
         
         self.logger.info(f"Modelo carregado de: {filepath}")
     
+    def connect_inference_server(self, address=None, authkey=None, timeout=5.0):
+        """Usar o servidor de inferência (inference_server.py) em vez de um modelo carregado"""
+        from inference_server import InferenceClient
+        
+        self.inference_client = InferenceClient(address, authkey, timeout)
+        self.logger.info(f"Servidor de inferência: {self.inference_client.address} "
+                         f"(modelo {self.inference_client.info.get('model')})")
+    
     def get_performance_metrics(self):
         """Obter métricas de performance"""
         metrics = self.detection_metrics.copy()
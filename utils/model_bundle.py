@@ -0,0 +1,271 @@
+"""
+BUNDLE ÚNICO DO MODELO
+Um arquivo versionado com tudo o que a inferência precisa: modelo, vocabulário
+e IDF do TF-IDF, colunas do seletor de features, componentes do PCA/SVD,
+classes dos rótulos e metadados.
+
+Os componentes são guardados como arrays NumPy sem compressão (joblib), então
+o carregamento com mmap_mode='r' só mapeia o arquivo: vários detectores no
+mesmo host compartilham as páginas e a partida leva milissegundos.
+
+RandomForest é guardado já compilado (compiled_forest.py). Outros modelos
+(ex.: VotingClassifier com XGBoost) são guardados como objeto pickle.
+
+Uso:
+    python model_bundle.py --dict modelo.joblib modelo.bundle
+    python model_bundle.py --model m.joblib --vectorizer v.joblib --encoder e.joblib modelo.bundle
+"""
+
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import sklearn
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfTransformer, TfidfVectorizer
+
+from compiled_forest import CompiledForest, compile_model
+
+BUNDLE_FORMAT = 'tcc-malware-model-bundle'
+BUNDLE_VERSION = 1
+
+# Parâmetros do TfidfVectorizer necessários para reproduzir o transform
+VECTORIZER_PARAMS = (
+    'input', 'encoding', 'decode_error', 'strip_accents', 'lowercase', 'token_pattern',
+    'stop_words', 'analyzer', 'ngram_range', 'binary', 'norm', 'use_idf', 'smooth_idf',
+    'sublinear_tf', 'dtype'
+)
+
+
+class LabelClasses:
+    """Substituto leve do LabelEncoder (apenas classes_ e inverse_transform)"""
+
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes)
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y, dtype=np.intp)]
+
+    def transform(self, labels):
+        index = {label: i for i, label in enumerate(self.classes_.tolist())}
+        return np.array([index[label] for label in labels])
+
+
+class ColumnSelector:
+    """Seleção de features por índice de coluna (equivale ao SelectKBest.transform)"""
+
+    def __init__(self, indices):
+        self.indices = indices
+
+    def transform(self, X):
+        return X[:, self.indices]
+
+
+class LinearProjection:
+    """Projeção do PCA/TruncatedSVD a partir dos componentes salvos"""
+
+    def __init__(self, components, mean=None, explained_variance=None, whiten=False):
+        self.components_ = components
+        self.mean_ = mean
+        self.explained_variance_ = explained_variance
+        self.whiten = whiten
+        self.n_components_ = components.shape[0]
+
+    def transform(self, X):
+        X_transformed = X @ self.components_.T
+        if self.mean_ is not None:
+            X_transformed -= np.reshape(self.mean_, (1, -1)) @ self.components_.T
+        if self.whiten:
+            scale = np.sqrt(self.explained_variance_)
+            scale[scale < np.finfo(scale.dtype).eps] = np.finfo(scale.dtype).eps
+            X_transformed /= scale
+        return np.asarray(X_transformed)
+
+
+class ModelBundle:
+    """Componentes prontos para inferência carregados de um bundle"""
+
+    def __init__(self, data):
+        self.metadata = dict(data['metadata'])
+        self.version = int(data['bundle_version'])
+
+        if data.get('forest') is not None:
+            self.model = CompiledForest.from_arrays(data['forest'])
+        else:
+            self.model = data.get('model_object')
+
+        self.tfidf_vectorizer = _build_vectorizer(data.get('vectorizer'))
+        self.feature_selector = _build_selector(data.get('selector'))
+        self.pca = _build_projection(data.get('projection'))
+        classes = data.get('classes')
+        self.label_encoder = LabelClasses(classes) if classes is not None else None
+
+    def components(self):
+        """Componentes no formato de dict usado pelo SysmonMalwareDetector"""
+        return {
+            'model': self.model,
+            'tfidf_vectorizer': self.tfidf_vectorizer,
+            'feature_selector': self.feature_selector,
+            'pca': self.pca,
+            'scaler': None,
+            'label_encoder': self.label_encoder,
+            'metadata': self.metadata
+        }
+
+
+def save_bundle(path, model, vectorizer=None, label_encoder=None, feature_selector=None,
+                pca=None, metadata=None):
+    """Salvar modelo e pré-processamento em um único arquivo versionado"""
+    compiled = model if isinstance(model, CompiledForest) else compile_model(model)
+    classes = label_encoder.classes_ if label_encoder is not None else None
+
+    data = {
+        'bundle_format': BUNDLE_FORMAT,
+        'bundle_version': BUNDLE_VERSION,
+        'metadata': {
+            'created_at': datetime.now().isoformat(),
+            'sklearn_version': sklearn.__version__,
+            'model_type': type(model).__name__,
+            'compiled': compiled is not None,
+            'n_features': int(getattr(model, 'n_features_in_', 0)),
+            'classes': [str(c) for c in classes] if classes is not None else None,
+            **(metadata or {})
+        },
+        'forest': compiled.to_arrays() if compiled is not None else None,
+        'model_object': None if compiled is not None else model,
+        'vectorizer': _vectorizer_arrays(vectorizer),
+        'selector': _selector_arrays(feature_selector),
+        'projection': _projection_arrays(pca),
+        'classes': np.asarray(classes) if classes is not None else None
+    }
+
+    # Sem compressão: requisito para o carregamento com mmap_mode
+    joblib.dump(data, path, compress=0)
+    return Path(path)
+
+
+def load_bundle(path, mmap_mode='r'):
+    """Carregar bundle com os arrays mapeados em memória"""
+    data = joblib.load(path, mmap_mode=mmap_mode)
+    if not is_bundle_data(data):
+        raise ValueError(f"{path} não é um bundle de modelo")
+    return ModelBundle(data)
+
+
+def load_model_file(path, mmap_mode='r'):
+    """
+    Carregar bundle ou modelo legado (dict joblib) em uma única leitura
+
+    Devolve o dict no formato do SysmonMalwareDetector (model, tfidf_vectorizer,
+    feature_selector, pca, scaler, label_encoder).
+    """
+    data = joblib.load(path, mmap_mode=mmap_mode)
+    if is_bundle_data(data):
+        return ModelBundle(data).components()
+    return data
+
+
+def is_bundle_data(data):
+    if not isinstance(data, dict) or data.get('bundle_format') != BUNDLE_FORMAT:
+        return False
+    if int(data.get('bundle_version', 0)) > BUNDLE_VERSION:
+        raise ValueError(f"Versão do bundle não suportada: {data['bundle_version']}")
+    return True
+
+
+def _vectorizer_arrays(vectorizer):
+    if vectorizer is None:
+        return None
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    params = vectorizer.get_params()
+    return {
+        'params': {name: params[name] for name in VECTORIZER_PARAMS if name in params},
+        'terms': np.array(terms),
+        'idf': np.asarray(vectorizer.idf_, dtype=np.float64) if vectorizer.use_idf else None
+    }
+
+
+def _build_vectorizer(data):
+    if data is None:
+        return None
+    params = dict(data['params'])
+    vectorizer = TfidfVectorizer(**params)
+    terms = data['terms'].tolist()
+    vectorizer.vocabulary_ = dict(zip(terms, range(len(terms))))
+
+    if vectorizer.use_idf:
+        vectorizer.idf_ = data['idf']
+    else:
+        vectorizer._tfidf = TfidfTransformer(
+            norm=vectorizer.norm, use_idf=False, sublinear_tf=vectorizer.sublinear_tf
+        ).fit(sparse.csr_matrix((1, len(terms))))
+    return vectorizer
+
+
+def _selector_arrays(selector):
+    if selector is None:
+        return None
+    if isinstance(selector, ColumnSelector):
+        return {'indices': selector.indices}
+    return {'indices': selector.get_support(indices=True).astype(np.int32)}
+
+
+def _build_selector(data):
+    return ColumnSelector(data['indices']) if data is not None else None
+
+
+def _projection_arrays(pca):
+    if pca is None:
+        return None
+    return {
+        'components': pca.components_,
+        'mean': getattr(pca, 'mean_', None),
+        'explained_variance': getattr(pca, 'explained_variance_', None),
+        'whiten': bool(getattr(pca, 'whiten', False))
+    }
+
+
+def _build_projection(data):
+    if data is None:
+        return None
+    return LinearProjection(data['components'], data['mean'],
+                            data['explained_variance'], data['whiten'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Converter modelo treinado para bundle único')
+    parser.add_argument('output', help='Arquivo do bundle (ex.: modelo.bundle)')
+    parser.add_argument('--dict', help='Modelo em dict joblib (formato do detector Sysmon)')
+    parser.add_argument('--model', help='Modelo joblib (formato do DefensiveModelTrainer)')
+    parser.add_argument('--vectorizer', help='TfidfVectorizer joblib')
+    parser.add_argument('--encoder', help='LabelEncoder joblib')
+    args = parser.parse_args()
+
+    if args.dict:
+        data = joblib.load(args.dict)
+        components = {
+            'model': data['model'],
+            'vectorizer': data.get('tfidf_vectorizer'),
+            'label_encoder': data.get('label_encoder'),
+            'feature_selector': data.get('feature_selector'),
+            'pca': data.get('pca')
+        }
+        source = args.dict
+    elif args.model:
+        components = {
+            'model': joblib.load(args.model),
+            'vectorizer': joblib.load(args.vectorizer) if args.vectorizer else None,
+            'label_encoder': joblib.load(args.encoder) if args.encoder else None
+        }
+        source = args.model
+    else:
+        parser.error("informe --dict ou --model")
+
+    output = save_bundle(args.output, metadata={'source': str(source)}, **components)
+    print(f"✅ Bundle salvo em: {output} ({output.stat().st_size / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
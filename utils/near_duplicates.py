@@ -0,0 +1,134 @@
+"""
+FILTRO DE QUASE-DUPLICATAS (MINHASH + LSH)
+Remove amostras cujo conjunto de API calls tem similaridade de Jaccard maior
+que o limiar com alguma amostra já mantida, na ordem do dataset.
+
+Em vez de comparar cada amostra com todas as mantidas (O(n²)), cada conjunto
+vira uma assinatura MinHash dividida em bandas; só as amostras que colidem em
+alguma banda são candidatas, e a similaridade dos candidatos é confirmada com
+o Jaccard exato. Assim não há falsos positivos; a chance de perder um par
+acima do limiar é limitada por max_miss na escolha das bandas.
+"""
+
+import zlib
+
+import numpy as np
+
+# Primo de Mersenne 2^31 - 1: a * x + b cabe em uint64 sem overflow
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def jaccard(a, b):
+    """Similaridade de Jaccard entre dois conjuntos (0 quando ambos vazios)"""
+    union = len(a | b)
+    return len(a & b) / union if union > 0 else 0
+
+
+def lsh_params(threshold, num_perm=128, max_miss=0.001):
+    """
+    Escolher (bandas, linhas por banda) para o limiar
+
+    Usa o maior número de linhas por banda (menos candidatos falsos) cuja
+    probabilidade de não detectar um par com Jaccard = threshold, (1 - s^r)^b,
+    fica abaixo de max_miss.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if (1 - threshold ** rows) ** bands <= max_miss:
+            best = (bands, rows)
+        else:
+            break
+    return best
+
+
+class MinHasher:
+    """Assinaturas MinHash com hashes universais (a * x + b) mod p por permutação"""
+
+    # Limite do cache de hashes por token distinto
+    TOKEN_CACHE_SIZE = 200000
+
+    def __init__(self, num_perm=128, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._token_cache = {}
+
+    def token_hashes(self, token):
+        hashes = self._token_cache.get(token)
+        if hashes is None:
+            x = np.uint64(zlib.crc32(token.encode('utf-8')))
+            hashes = ((self.a * x + self.b) % MERSENNE_PRIME).astype(np.uint32)
+            if len(self._token_cache) >= self.TOKEN_CACHE_SIZE:
+                self._token_cache.clear()
+            self._token_cache[token] = hashes
+        return hashes
+
+    def signature(self, tokens):
+        """Assinatura de um conjunto não vazio de tokens"""
+        return np.min([self.token_hashes(token) for token in tokens], axis=0)
+
+
+class NearDuplicateFilter:
+    """
+    Índice LSH das amostras mantidas
+
+    add_if_unique() reproduz o laço guloso original: a amostra é mantida se
+    nenhuma amostra já mantida tiver Jaccard > threshold com ela.
+    """
+
+    def __init__(self, threshold, num_perm=128, seed=1, max_miss=0.001):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, seed)
+        self.bands, self.rows = lsh_params(threshold, num_perm, max_miss)
+        self.buckets = [{} for _ in range(self.bands)]
+        self.kept_sets = []
+        self.comparisons = 0
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [signature[i * rows:(i + 1) * rows].tobytes() for i in range(self.bands)]
+
+    def add_if_unique(self, tokens):
+        """Manter o conjunto se não for quase-duplicata; devolve True se mantido"""
+        tokens = frozenset(tokens)
+        if not tokens:
+            # Conjunto vazio tem similaridade 0 com tudo: sempre mantido
+            self.kept_sets.append(tokens)
+            return True
+
+        keys = self._band_keys(self.hasher.signature(tokens))
+        candidates = set()
+        for band, key in zip(self.buckets, keys):
+            candidates.update(band.get(key, ()))
+
+        kept_sets = self.kept_sets
+        for candidate in candidates:
+            self.comparisons += 1
+            if jaccard(tokens, kept_sets[candidate]) > self.threshold:
+                return False
+
+        position = len(kept_sets)
+        kept_sets.append(tokens)
+        for band, key in zip(self.buckets, keys):
+            band.setdefault(key, []).append(position)
+        return True
+
+
+def remove_near_duplicates(texts, threshold, num_perm=128, seed=1, max_miss=0.001):
+    """Posições das amostras mantidas (tokens separados por espaço)"""
+    dedup = NearDuplicateFilter(threshold, num_perm, seed, max_miss)
+    return [i for i, text in enumerate(texts) if dedup.add_if_unique(text.split())]
+
+
+def remove_near_duplicates_exact(texts, threshold):
+    """Implementação O(n²) original, mantida como referência para testes e benchmark"""
+    kept_sets = []
+    kept = []
+    for i, text in enumerate(texts):
+        words = set(text.split())
+        if all(jaccard(words, other) <= threshold for other in kept_sets):
+            kept_sets.append(words)
+            kept.append(i)
+    return kept
@@ -0,0 +1,135 @@
+"""
+AMOSTRAGEM DE PROCESSOS COM UM ÚNICO AGENDADOR
+Substitui uma thread por PID (cada uma com seu time.sleep) por um heap de
+prazos: a cada passada, só os processos acompanhados cujo prazo venceu são
+lidos, com os atributos pré-carregados de uma vez (Process.as_dict, que usa
+oneshot) em objetos psutil.Process mantidos entre passadas (cpu_percent
+precisa da leitura anterior).
+
+- interval: segundos entre duas amostras do mesmo processo
+- max_concurrent: máximo de amostras por passada; os demais processos vencidos
+  ficam para a próxima passada, na ordem dos prazos (nenhum fica sem amostra)
+- processos que terminaram saem do acompanhamento (on_exit); a descoberta de
+  processos novos/encerrados fica com a ProcessTable (process_table.py)
+"""
+
+import heapq
+import itertools
+import time
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil é dependência do detector
+    psutil = None
+
+DEFAULT_ATTRS = ('cpu_percent',)
+
+
+class ProcessSampler:
+    """
+    Agendador de amostras para os processos acompanhados
+
+    sample(pid, info) recebe o dict de atributos pré-carregados do processo.
+    process_factory(pid) cria o objeto de processo (psutil.Process por padrão).
+    """
+
+    def __init__(self, sample, interval=2.0, max_concurrent=10, attrs=DEFAULT_ATTRS,
+                 on_exit=None, clock=time.monotonic, process_factory=None):
+        self.sample = sample
+        self.interval = interval
+        self.max_concurrent = max_concurrent
+        self.attrs = list(attrs)
+        self.on_exit = on_exit
+        self.clock = clock
+        self.process_factory = process_factory or psutil.Process
+
+        self.due = {}
+        self.processes = {}
+        self._heap = []
+        self._sequence = itertools.count()
+        self._started = None
+        self.stats = {
+            'passes': 0,
+            'samples': 0,
+            'deferred': 0,
+            'exited': 0,
+            'errors': 0,
+            'last_pass_ms': 0.0
+        }
+
+    def __len__(self):
+        return len(self.due)
+
+    def __contains__(self, pid):
+        return pid in self.due
+
+    def track(self, pid, delay=0.0):
+        """Acompanhar processo (primeira amostra após delay segundos)"""
+        self._schedule(pid, self.clock() + delay)
+
+    def untrack(self, pid):
+        """Parar de acompanhar (a entrada no heap é ignorada ao sair)"""
+        self.due.pop(pid, None)
+        self.processes.pop(pid, None)
+
+    def poll(self):
+        """Uma passada: amostrar os processos com prazo vencido"""
+        started = time.perf_counter()
+        now = self.clock()
+        if self._started is None:
+            self._started = now
+
+        self._sample_due(now)
+        self.stats['passes'] += 1
+        self.stats['last_pass_ms'] = round((time.perf_counter() - started) * 1000, 3)
+
+    def metrics(self):
+        elapsed = self.clock() - self._started if self._started is not None else 0
+        return {
+            'tracked': len(self.due),
+            'samples_per_second': round(self.stats['samples'] / elapsed, 2) if elapsed > 0 else 0.0,
+            **self.stats
+        }
+
+    def _schedule(self, pid, due):
+        self.due[pid] = due
+        heapq.heappush(self._heap, (due, next(self._sequence), pid))
+
+    def _read(self, pid):
+        """Atributos do processo, ou None se ele terminou"""
+        try:
+            proc = self.processes.get(pid)
+            if proc is None:
+                proc = self.processes[pid] = self.process_factory(pid)
+            return proc.as_dict(self.attrs)
+        except psutil.NoSuchProcess:
+            return None
+
+    def _sample_due(self, now):
+        heap = self._heap
+        sampled = 0
+        while heap and heap[0][0] <= now:
+            if self.max_concurrent and sampled >= self.max_concurrent:
+                self.stats['deferred'] += sum(1 for due in self.due.values() if due <= now)
+                break
+
+            due, _, pid = heapq.heappop(heap)
+            if self.due.get(pid) != due:
+                continue  # descartada por untrack() ou reagendada
+
+            info = self._read(pid)
+            if info is None:
+                self.untrack(pid)
+                self.stats['exited'] += 1
+                if self.on_exit:
+                    self.on_exit(pid)
+                continue
+
+            try:
+                self.sample(pid, info)
+            except Exception:
+                self.stats['errors'] += 1
+            sampled += 1
+            self.stats['samples'] += 1
+            if pid in self.due:
+                self._schedule(pid, now + self.interval)
@@ -0,0 +1,197 @@
+"""
+TABELA DE PROCESSOS INCREMENTAL (SPAWN/EXIT)
+Em vez de percorrer todos os processos com psutil.process_iter() a cada
+segundo, mantém um snapshot indexado por (pid, create_time) e, a cada poll(),
+só lê a lista de PIDs (barata) e descreve os processos novos:
+
+- spawn: PID que não estava no snapshot (ou PID reutilizado)
+- exit: PID que sumiu da lista
+
+Backends:
+- ProcBackend: Linux, lendo /proc diretamente (listdir + /proc/<pid>/stat)
+- PsutilBackend: qualquer SO (psutil.pids() + psutil.Process só nos novos)
+
+A cada verify_every polls o create_time dos processos conhecidos é relido
+para detectar PIDs reutilizados entre dois polls (exit + spawn).
+"""
+
+import os
+import sys
+import threading
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - o backend /proc não precisa de psutil
+    psutil = None
+
+INFO_KEYS = ('pid', 'name', 'exe', 'ppid', 'create_time')
+
+
+class ProcBackend:
+    """Leitura direta de /proc (Linux)"""
+
+    def __init__(self, root='/proc'):
+        self.root = root
+        self.clock_ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+        self.boot_time = self._read_boot_time()
+
+    def _read_boot_time(self):
+        with open(os.path.join(self.root, 'stat'), 'rb') as f:
+            for line in f:
+                if line.startswith(b'btime'):
+                    return float(line.split()[1])
+        return 0.0
+
+    def pids(self):
+        return {int(name) for name in os.listdir(self.root) if name.isdigit()}
+
+    def _stat(self, pid):
+        """(comm, campos a partir do 3º) de /proc/<pid>/stat, ou None se o processo saiu"""
+        try:
+            with open(os.path.join(self.root, str(pid), 'stat'), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        # comm pode conter espaços e parênteses: vai até o último ')'
+        left, _, right = data.rpartition(b')')
+        comm = left.partition(b'(')[2].decode('utf-8', 'replace')
+        return comm, right.split()
+
+    def _create_time(self, fields):
+        return round(self.boot_time + int(fields[19]) / self.clock_ticks, 2)
+
+    def create_time(self, pid):
+        stat = self._stat(pid)
+        return self._create_time(stat[1]) if stat else None
+
+    def describe(self, pid):
+        stat = self._stat(pid)
+        if stat is None:
+            return None
+        comm, fields = stat
+        try:
+            exe = os.readlink(os.path.join(self.root, str(pid), 'exe'))
+        except OSError:
+            exe = None
+        # comm é truncado em 15 caracteres; nesse caso usar o nome do executável
+        name = comm
+        if exe and len(comm) >= 15:
+            base = os.path.basename(exe)
+            if base.startswith(comm):
+                name = base
+        return {'pid': pid, 'name': name, 'exe': exe, 'ppid': int(fields[1]),
+                'create_time': self._create_time(fields)}
+
+
+class PsutilBackend:
+    """psutil.pids() a cada poll; psutil.Process somente para PIDs novos"""
+
+    def pids(self):
+        return set(psutil.pids())
+
+    def create_time(self, pid):
+        try:
+            return round(psutil.Process(pid).create_time(), 2)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+
+    def describe(self, pid):
+        try:
+            info = psutil.Process(pid).as_dict(list(INFO_KEYS))
+        except psutil.NoSuchProcess:
+            return None
+        if info.get('create_time') is None:
+            return None
+        info['create_time'] = round(info['create_time'], 2)
+        return info
+
+
+def default_backend():
+    if sys.platform.startswith('linux') and os.path.isdir('/proc'):
+        return ProcBackend()
+    return PsutilBackend()
+
+
+class ProcessTable:
+    """
+    Snapshot dos processos com entrega de deltas aos assinantes
+
+    entries: pid -> info (dict com pid, name, exe, ppid, create_time); a
+    chave lógica do processo é (pid, create_time).
+    O primeiro poll() entrega todos os processos existentes como spawn.
+    """
+
+    def __init__(self, backend=None, verify_every=30):
+        self.backend = backend or default_backend()
+        self.verify_every = verify_every
+        self.entries = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self.stats = {
+            'polls': 0,
+            'spawned': 0,
+            'exited': 0,
+            'reused_pids': 0
+        }
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, pid):
+        return pid in self.entries
+
+    def get(self, pid):
+        return self.entries.get(pid)
+
+    def keys(self):
+        """Chaves (pid, create_time) do snapshot atual"""
+        return [(pid, info['create_time']) for pid, info in self.entries.items()]
+
+    def subscribe(self, on_spawn=None, on_exit=None):
+        """on_spawn(info) e on_exit(info) são chamados a cada poll()"""
+        self._subscribers.append((on_spawn, on_exit))
+
+    def poll(self):
+        """Atualizar o snapshot; devolve (spawned, exited) com os infos"""
+        with self._lock:
+            spawned, exited = self._diff()
+        for on_spawn, on_exit in self._subscribers:
+            if on_exit:
+                for info in exited:
+                    on_exit(info)
+            if on_spawn:
+                for info in spawned:
+                    on_spawn(info)
+        return spawned, exited
+
+    def _diff(self):
+        backend = self.backend
+        entries = self.entries
+        current = backend.pids()
+        self.stats['polls'] += 1
+
+        exited = [entries.pop(pid) for pid in set(entries) - current]
+        new_pids = current - entries.keys()
+
+        if self.verify_every and self.stats['polls'] % self.verify_every == 0:
+            for pid, info in list(entries.items()):
+                create_time = backend.create_time(pid)
+                if create_time != info['create_time']:
+                    exited.append(entries.pop(pid))
+                    if create_time is not None:
+                        new_pids.add(pid)
+                        self.stats['reused_pids'] += 1
+
+        spawned = []
+        for pid in sorted(new_pids):
+            info = backend.describe(pid)
+            if info is not None:
+                entries[pid] = info
+                spawned.append(info)
+
+        self.stats['spawned'] += len(spawned)
+        self.stats['exited'] += len(exited)
+        return spawned, exited
+
+    def metrics(self):
+        return {'processes': len(self.entries), **self.stats}
@@ -0,0 +1,214 @@
+"""
+PROFILER AMOSTRAL (PILHAS COLAPSADAS PARA FLAMEGRAPH)
+Uma thread de amostragem lê sys._current_frames() a cada `interval` segundos
+e conta a pilha de cada thread. Não instrumenta as chamadas (ao contrário do
+cProfile), então o custo fica na thread de amostragem e o pipeline roda na
+velocidade normal.
+
+Amostras de threads paradas (Condition.wait, Queue.get/put bloqueados,
+select(), linhas com sleep()) são contadas à parte e ficam fora das pilhas,
+a não ser com include_idle=True.
+
+Saídas:
+- write_collapsed(): uma linha "thread;modulo:funcao;... contagem" por pilha,
+  formato aceito por flamegraph.pl, speedscope e inferno
+- summary(): amostras próprias (self) e inclusivas (total) por função,
+  agrupadas pelos padrões fnmatch de `focus`
+"""
+
+import fnmatch
+import linecache
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+# (módulo, função) folha de uma thread bloqueada
+IDLE_FUNCTIONS = {
+    ('threading', 'wait'),
+    ('threading', '_wait_for_tstate_lock'),
+    ('selectors', 'select'),
+}
+
+
+def frame_label(code):
+    """Rótulo 'modulo:Classe.funcao' de um code object"""
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{Path(code.co_filename).stem}:{name}"
+
+
+def is_idle(frame):
+    """Verdadeiro quando a thread está esperando (a folha é uma espera ou um sleep)"""
+    code = frame.f_code
+    if (Path(code.co_filename).stem, code.co_name) in IDLE_FUNCTIONS:
+        return True
+    return 'sleep(' in linecache.getline(code.co_filename, frame.f_lineno)
+
+
+class SamplingProfiler:
+    """
+    Profiler estatístico de todas as threads do processo
+
+    Args:
+        interval: Segundos entre amostras
+        include_idle: Manter nas pilhas as amostras de threads bloqueadas
+        max_depth: Quadros mais internos mantidos por pilha
+    """
+
+    def __init__(self, interval=0.005, include_idle=False, max_depth=64):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.max_depth = max_depth
+
+        self.stacks = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self.ticks = 0
+        self.duration = 0.0
+
+        self._labels = {}
+        self._thread_names = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = 0.0
+
+    def start(self):
+        self._stop.clear()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self.duration += time.perf_counter() - self._started
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(skip=own)
+
+    def sample(self, skip=None):
+        """Registrar uma amostra de cada thread (exceto skip)"""
+        self.ticks += 1
+        for ident, frame in sys._current_frames().items():
+            if ident == skip:
+                continue
+            if is_idle(frame):
+                self.idle_samples += 1
+                if not self.include_idle:
+                    continue
+            self.samples += 1
+            self.stacks[(self._thread_name(ident),) + self._stack(frame)] += 1
+
+    def _stack(self, frame):
+        labels = self._labels
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = frame_label(code)
+            stack.append(label)
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    def _thread_name(self, ident):
+        name = self._thread_names.get(ident)
+        if name is None:
+            self._thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            name = self._thread_names.setdefault(ident, f"thread-{ident}")
+        return name
+
+    def collapsed(self):
+        """Linhas 'thread;quadro;...;quadro contagem' (mais amostradas primeiro)"""
+        return [f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()]
+
+    def write_collapsed(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('\n'.join(self.collapsed()) + '\n', encoding='utf-8')
+        return path
+
+    def function_stats(self):
+        """{função: {'self': n, 'total': n}} em amostras (total conta a função uma vez por pilha)"""
+        stats = {}
+        for stack, count in self.stacks.items():
+            frames = stack[1:]
+            for label in set(frames):
+                stats.setdefault(label, {'self': 0, 'total': 0})['total'] += count
+            if frames:
+                stats[frames[-1]]['self'] += count
+        return stats
+
+    def summary(self, focus=None, top=20):
+        """
+        Resumo por função
+
+        Args:
+            focus: {grupo: [padrões fnmatch de 'modulo:Classe.funcao']}; cada
+                   função entra no primeiro grupo cujo padrão casar
+            top: Funções listadas em 'top_self'
+        """
+        stats = self.function_stats()
+        active = self.samples or 1
+
+        def entry(label, values):
+            return {'function': label, 'self': values['self'], 'total': values['total'],
+                    'self_pct': round(values['self'] / active * 100, 2),
+                    'total_pct': round(values['total'] / active * 100, 2)}
+
+        groups = {name: [] for name in (focus or {})}
+        for label in stats:
+            for name, patterns in (focus or {}).items():
+                if any(fnmatch.fnmatchcase(label, pattern) for pattern in patterns):
+                    groups[name].append(label)
+                    break
+
+        group_summary = {}
+        for name, labels in groups.items():
+            members = set(labels)
+            inclusive = sum(count for stack, count in self.stacks.items() if members.intersection(stack[1:]))
+            group_summary[name] = {
+                'total': inclusive,
+                'total_pct': round(inclusive / active * 100, 2),
+                'functions': sorted((entry(label, stats[label]) for label in labels),
+                                    key=lambda item: (-item['total'], item['function']))
+            }
+
+        ranked = sorted(stats.items(), key=lambda item: (-item[1]['self'], item[0]))[:top]
+        return {
+            'interval_ms': self.interval * 1000,
+            'duration_s': round(self.duration, 3),
+            'ticks': self.ticks,
+            'samples': self.samples,
+            'idle_samples': self.idle_samples,
+            'groups': group_summary,
+            'top_self': [entry(label, values) for label, values in ranked]
+        }
+
+
+def format_summary(summary, limit=8):
+    """Texto legível do summary() para o console"""
+    lines = [f"Amostras: {summary['samples']} ativas / {summary['idle_samples']} ociosas "
+             f"em {summary['duration_s']}s (intervalo {summary['interval_ms']:g} ms)"]
+    for name, group in summary['groups'].items():
+        lines.append(f"[{name}] {group['total_pct']:.1f}% das amostras ativas")
+        for item in group['functions'][:limit]:
+            lines.append(f"   {item['total_pct']:6.1f}% total {item['self_pct']:6.1f}% self  {item['function']}")
+    lines.append("[top self]")
+    for item in summary['top_self'][:limit]:
+        lines.append(f"   {item['self_pct']:6.1f}% self  {item['function']}")
+    return '\n'.join(lines)
@@ -0,0 +1,132 @@
+"""
+LOGGING ASSÍNCRONO E ESTRUTURADO
+O caminho quente (ingestão de eventos) só cria o LogRecord e o coloca em uma
+fila limitada; formatação e escrita em disco ficam com uma thread
+QueueListener.
+
+- LazyQueueHandler: não formata a mensagem na thread que registrou (os args
+  do estilo %s são aplicados no listener); fila cheia descarta e conta
+- SampledLogger: repassa só 1 de cada `every` mensagens DEBUG de um logger de
+  alto volume (INFO e acima nunca são amostrados)
+- JsonLinesFormatter: uma linha JSON compacta por registro; extra={'fields':
+  {...}} vira um objeto estruturado em vez de texto
+- rotating_jsonl_handler: arquivo JSON lines com rotação por tamanho
+
+Como os args são formatados depois, não passe objetos que serão alterados
+logo após a chamada de log.
+"""
+
+import itertools
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Registro -> {"ts", "level", "logger", "line", "msg", ["fields"], ["exc"]}"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'line': record.lineno,
+            'msg': record.getMessage()
+        }
+        fields = getattr(record, 'fields', None)
+        if fields is not None:
+            # Registros nomeados (namedtuple) viram objeto JSON, não lista
+            entry['fields'] = fields._asdict() if hasattr(fields, '_asdict') else fields
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+class LazyQueueHandler(QueueHandler):
+    """QueueHandler que adia a formatação para o listener"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.listener = None
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DrainingQueueListener(QueueListener):
+    """QueueListener que espera espaço na fila para o sinal de parada"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class SampledLogger(logging.LoggerAdapter):
+    """Logger com amostragem das mensagens DEBUG (1 a cada `every`)"""
+
+    def __init__(self, logger, every=1):
+        super().__init__(logger, {})
+        self.every = max(1, int(every))
+        self._counter = itertools.count()
+
+    def process(self, msg, kwargs):
+        return msg, kwargs
+
+    def debug(self, msg, *args, **kwargs):
+        if next(self._counter) % self.every:
+            return
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        kwargs.setdefault('stacklevel', 2)
+        self.logger._log(logging.DEBUG, msg, args, **kwargs)
+
+
+def rotating_jsonl_handler(path, level=logging.NOTSET, logger_name=None,
+                           max_bytes=10 * 1024 * 1024, backup_count=5):
+    """Arquivo JSON lines com rotação; logger_name restringe a um ramo de loggers"""
+    handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                  encoding='utf-8', delay=True)
+    handler.setLevel(level)
+    handler.setFormatter(JsonLinesFormatter())
+    if logger_name:
+        # logging.Filter(nome) aceita o logger e seus filhos
+        handler.addFilter(logging.Filter(logger_name))
+    return handler
+
+
+def start_queue_logging(logger, handlers, queue_size=10000):
+    """
+    Ligar logger -> fila -> listener(handlers) e iniciar o listener
+
+    Chamadas repetidas para o mesmo logger substituem (e param) a fila
+    anterior, sem acumular handlers. Devolve o LazyQueueHandler; use
+    stop_queue_logging() para esvaziar a fila e fechar os arquivos.
+    """
+    stop_queue_logging(logger)
+    queue_handler = LazyQueueHandler(queue.Queue(maxsize=queue_size))
+    queue_handler.listener = DrainingQueueListener(queue_handler.queue, *handlers,
+                                                   respect_handler_level=True)
+    logger.addHandler(queue_handler)
+    queue_handler.listener.start()
+    return queue_handler
+
+
+def stop_queue_logging(logger):
+    """Esvaziar a fila, parar o listener e fechar os handlers do logger"""
+    for handler in list(logger.handlers):
+        if isinstance(handler, LazyQueueHandler):
+            logger.removeHandler(handler)
+            if handler.listener is not None:
+                handler.listener.stop()
+                for target in handler.listener.handlers:
+                    target.close()
+                handler.listener = None
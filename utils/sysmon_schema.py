@@ -0,0 +1,173 @@
+"""
+SCHEMA DOS EVENTOS DO SYSMON E PARSER POR NOME DE CAMPO
+Tabela dos campos do EventData de cada Event ID (1-29, schema 4.90 do
+Sysmon 15), na ordem em que aparecem nos StringInserts do log.
+
+Para cada Event ID é gerado uma vez um registro compacto (namedtuple, sem
+__dict__ por instância, EventID como constante da classe) com os campos do
+schema. O parser só monta a tupla:
+
+- StringInserts (leitura ao vivo): mapeados por posição; versões antigas do
+  Sysmon com menos campos são completadas com '' e campos extras de versões
+  novas são ignorados
+- EventData nomeado (replay de XML/JSON): mapeado por nome, em qualquer ordem
+
+Os registros têm get(campo, padrão) como um dict, então os handlers leem
+event_data.get('ProcessId') sem saber qual Event ID chegou.
+"""
+
+from collections import namedtuple
+from operator import itemgetter
+
+from event_sources import SysmonRecord
+
+_PROCESS = ('RuleName', 'UtcTime', 'ProcessGuid', 'ProcessId', 'Image')
+_REGISTRY = ('RuleName', 'EventType', 'UtcTime', 'ProcessGuid', 'ProcessId', 'Image', 'TargetObject')
+_PIPE = ('RuleName', 'EventType', 'UtcTime', 'ProcessGuid', 'ProcessId', 'PipeName', 'Image', 'User')
+_WMI = ('RuleName', 'EventType', 'UtcTime', 'Operation', 'User')
+_FILE_DELETE = ('RuleName', 'UtcTime', 'ProcessGuid', 'ProcessId', 'User', 'Image', 'TargetFilename', 'Hashes')
+
+# Event ID -> (nome do tipo, campos na ordem dos StringInserts)
+SYSMON_SCHEMA = {
+    1: ('ProcessCreate', _PROCESS + (
+        'FileVersion', 'Description', 'Product', 'Company', 'OriginalFileName', 'CommandLine',
+        'CurrentDirectory', 'User', 'LogonGuid', 'LogonId', 'TerminalSessionId', 'IntegrityLevel',
+        'Hashes', 'ParentProcessGuid', 'ParentProcessId', 'ParentImage', 'ParentCommandLine',
+        'ParentUser')),
+    2: ('FileCreateTime', _PROCESS + ('TargetFilename', 'CreationUtcTime', 'PreviousCreationUtcTime',
+                                      'User')),
+    3: ('NetworkConnect', _PROCESS + (
+        'User', 'Protocol', 'Initiated', 'SourceIsIpv6', 'SourceIp', 'SourceHostname', 'SourcePort',
+        'SourcePortName', 'DestinationIsIpv6', 'DestinationIp', 'DestinationHostname',
+        'DestinationPort', 'DestinationPortName')),
+    4: ('SysmonServiceStateChange', ('UtcTime', 'State', 'Version', 'SchemaVersion')),
+    5: ('ProcessTerminate', _PROCESS + ('User',)),
+    6: ('DriverLoad', ('RuleName', 'UtcTime', 'ImageLoaded', 'Hashes', 'Signed', 'Signature',
+                       'SignatureStatus')),
+    7: ('ImageLoad', _PROCESS + (
+        'ImageLoaded', 'FileVersion', 'Description', 'Product', 'Company', 'OriginalFileName',
+        'Hashes', 'Signed', 'Signature', 'SignatureStatus', 'User')),
+    8: ('CreateRemoteThread', (
+        'RuleName', 'UtcTime', 'SourceProcessGuid', 'SourceProcessId', 'SourceImage',
+        'TargetProcessGuid', 'TargetProcessId', 'TargetImage', 'NewThreadId', 'StartAddress',
+        'StartModule', 'StartFunction', 'SourceUser', 'TargetUser')),
+    9: ('RawAccessRead', _PROCESS + ('Device', 'User')),
+    10: ('ProcessAccess', (
+        'RuleName', 'UtcTime', 'SourceProcessGUID', 'SourceProcessId', 'SourceThreadId',
+        'SourceImage', 'TargetProcessGUID', 'TargetProcessId', 'TargetImage', 'GrantedAccess',
+        'CallTrace', 'SourceUser', 'TargetUser')),
+    11: ('FileCreate', _PROCESS + ('TargetFilename', 'CreationUtcTime', 'User')),
+    12: ('RegistryObjectAddDelete', _REGISTRY + ('User',)),
+    13: ('RegistryValueSet', _REGISTRY + ('Details', 'User')),
+    14: ('RegistryRename', _REGISTRY + ('NewName', 'User')),
+    15: ('FileCreateStreamHash', _PROCESS + ('TargetFilename', 'CreationUtcTime', 'Hash', 'Contents',
+                                            'User')),
+    16: ('SysmonConfigStateChange', ('UtcTime', 'Configuration', 'ConfigurationFileHash')),
+    17: ('PipeCreated', _PIPE),
+    18: ('PipeConnected', _PIPE),
+    19: ('WmiEventFilter', _WMI + ('EventNamespace', 'Name', 'Query')),
+    20: ('WmiEventConsumer', _WMI + ('Name', 'Type', 'Destination')),
+    21: ('WmiEventConsumerToFilter', _WMI + ('Consumer', 'Filter')),
+    22: ('DnsQuery', ('RuleName', 'UtcTime', 'ProcessGuid', 'ProcessId', 'QueryName', 'QueryStatus',
+                     'QueryResults', 'Image', 'User')),
+    23: ('FileDelete', _FILE_DELETE + ('IsExecutable', 'Archived')),
+    24: ('ClipboardChange', _PROCESS + ('Session', 'ClientInfo', 'Hashes', 'Archived', 'User')),
+    25: ('ProcessTampering', _PROCESS + ('Type', 'User')),
+    26: ('FileDeleteDetected', _FILE_DELETE + ('IsExecutable',)),
+    27: ('FileBlockExecutable', _FILE_DELETE),
+    28: ('FileBlockShredding', _FILE_DELETE + ('IsExecutable',)),
+    29: ('FileExecutableDetected', _FILE_DELETE),
+}
+
+
+class _EventFields:
+    """Acesso por nome compatível com dict (get) para os registros gerados"""
+
+    __slots__ = ()
+    _index = {}
+
+    def get(self, name, default=None):
+        index = self._index.get(name)
+        return default if index is None else self[index]
+
+
+def _record_type(event_id, name, fields):
+    base = namedtuple(f'{name}Fields', fields)
+    return type(name, (_EventFields, base), {
+        '__slots__': (),
+        'EventID': event_id,
+        '_index': {field: index for index, field in enumerate(fields)}
+    })
+
+
+# Event ID -> (tipo do registro, número de campos, leitor dos campos nomeados)
+_SPECS = {}
+RECORD_TYPES = {}
+for _event_id, (_name, _fields) in SYSMON_SCHEMA.items():
+    RECORD_TYPES[_event_id] = _record_type(_event_id, _name, _fields)
+    # itemgetter com um único campo devolveria o valor, não uma tupla
+    _pick = itemgetter(*_fields) if len(_fields) > 1 else (lambda named, f=_fields: (named[f[0]],))
+    _SPECS[_event_id] = (RECORD_TYPES[_event_id], len(_fields), _pick)
+
+# Event IDs fora do schema (ex.: 255, erro do Sysmon) não têm campos
+UnknownEvent = _record_type(None, 'UnknownEvent', ())
+_UNKNOWN_SPEC = (UnknownEvent, 0, lambda named: ())
+_PADDING = ('',) * max(len(fields) for _, fields in SYSMON_SCHEMA.values())
+_new_record = tuple.__new__
+
+# Event ID -> (posição, nome) do PID do processo responsável (origem nos eventos 8 e 10)
+_PID_FIELDS = {}
+for _event_id, (_name, _fields) in SYSMON_SCHEMA.items():
+    _pid_name = 'SourceProcessId' if 'SourceProcessId' in _fields else 'ProcessId'
+    if _pid_name in _fields:
+        _PID_FIELDS[_event_id] = (_fields.index(_pid_name), _pid_name)
+
+
+def event_fields(event_id):
+    """Campos do EventData do Event ID, na ordem dos StringInserts"""
+    return SYSMON_SCHEMA[event_id][1]
+
+
+def parse_sysmon_record(event):
+    """
+    Converter evento do Sysmon (PyEventLogRecord ou SysmonRecord) em registro nomeado
+
+    Devolve None quando o evento não tem dados (sem StringInserts/EventData).
+    """
+    # Só o SysmonRecord do replay traz EventData (getattr com padrão custaria uma exceção por evento)
+    if type(event) is SysmonRecord and event.EventData:
+        return _from_named(event)
+
+    inserts = event.StringInserts
+    if not inserts:
+        return None
+    record_type, width, _ = _SPECS.get(event.EventID & 0xFFFF, _UNKNOWN_SPEC)
+    if len(inserts) != width:
+        inserts = (tuple(inserts) + _PADDING)[:width]
+    return _new_record(record_type, inserts)
+
+
+def _from_named(event):
+    record_type, _, pick = _SPECS.get(event.EventID & 0xFFFF, _UNKNOWN_SPEC)
+    named = event.EventData
+    try:
+        values = pick(named)
+    except KeyError:
+        values = [named.get(field, '') for field in record_type._fields]
+    return _new_record(record_type, values)
+
+
+def event_pid(event):
+    """
+    PID do processo responsável pelo evento, lido direto do evento bruto
+
+    É o mesmo PID que os handlers usam como chave (SourceProcessId nos
+    eventos 8 e 10). Devolve '' quando o Event ID não tem processo.
+    """
+    field = _PID_FIELDS.get(event.EventID & 0xFFFF)
+    if field is None:
+        return ''
+    if type(event) is SysmonRecord and event.EventData:
+        return event.EventData.get(field[1], '')
+    inserts = event.StringInserts
+    return inserts[field[0]] if inserts and len(inserts) > field[0] else ''
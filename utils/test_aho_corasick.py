@@ -0,0 +1,29 @@
+"""
+TESTES DO AUTÔMATO AHO-CORASICK
+"""
+
+import random
+
+from aho_corasick import AhoCorasick
+
+
+def test_matches_equal_substring_scan():
+    patterns = ['he', 'she', 'his', 'hers', 'connect:', 'connect:api', 'api', 'a']
+    automaton = AhoCorasick(patterns)
+    rng = random.Random(7)
+    alphabet = 'hersiconta:p'
+    for _ in range(500):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        expected = {i for i, pattern in enumerate(patterns) if pattern in text}
+        assert automaton.matches(text) == expected
+
+
+def test_iter_matches_reports_overlapping_occurrences():
+    automaton = AhoCorasick(['aa', 'a'])
+    assert sorted(automaton.iter_matches('aaa')) == [(0, 1), (1, 0), (1, 1), (2, 0), (2, 1)]
+
+
+def test_empty_patterns_are_ignored():
+    automaton = AhoCorasick(['', 'x'])
+    assert automaton.matches('xyz') == {1}
+    assert automaton.matches('') == set()
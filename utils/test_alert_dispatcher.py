@@ -0,0 +1,125 @@
+"""
+TESTES DO ENVIO DE ALERTAS (SERVIDOR HTTP LOCAL COMO WEBHOOK)
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from alert_dispatcher import AlertDispatcher, SpillQueue
+
+
+class StubWebhook:
+    """Webhook local: responde com os status da fila responses (depois 204)"""
+
+    def __init__(self):
+        self.requests = []
+        self.clients = set()
+        self.responses = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                stub.requests.append((time.monotonic(), body))
+                stub.clients.add(self.client_address)
+                status, headers = stub.responses.pop(0) if stub.responses else (204, {})
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/webhook'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def embeds(self):
+        return [embed for _, body in self.requests for embed in body['embeds']]
+
+
+@pytest.fixture
+def webhook():
+    stub = StubWebhook()
+    yield stub
+    stub.server.shutdown()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'tempo esgotado'
+        time.sleep(0.01)
+
+
+def test_burst_is_batched_over_one_pooled_connection(webhook):
+    dispatcher = AlertDispatcher(webhook.url, build_embed=lambda alert: {'title': alert['pid']},
+                                 batch_window=0.2).start()
+    for pid in range(25):
+        assert dispatcher.submit({'pid': pid})
+
+    wait_for(lambda: dispatcher.metrics()['delivered'] == 25)
+    dispatcher.stop()
+
+    assert [len(body['embeds']) for _, body in webhook.requests] == [10, 10, 5]
+    assert [embed['title'] for embed in webhook.embeds()] == list(range(25))
+    assert len(webhook.clients) == 1
+    metrics = dispatcher.metrics()
+    assert metrics['requests'] == 3 and metrics['latency_p95_ms'] > 0
+
+
+def test_rate_limit_honours_retry_after(webhook):
+    webhook.responses = [(429, {'Retry-After': '0.3'})]
+    delivered = []
+    dispatcher = AlertDispatcher(webhook.url, batch_window=0, backoff_base=5,
+                                 on_delivered=delivered.extend).start()
+    dispatcher.submit({'pid': 1})
+
+    wait_for(lambda: delivered)
+    dispatcher.stop()
+
+    (first, _), (second, _) = webhook.requests
+    assert 0.3 <= second - first < 5
+    assert dispatcher.metrics()['rate_limited'] == 1
+    assert delivered == [{'pid': 1}]
+
+
+def test_failed_batches_spill_to_disk_and_recover_after_restart(webhook, tmp_path):
+    spill_path = tmp_path / 'alertas_pendentes.jsonl'
+    webhook.responses = [(503, {})] * 3
+    dispatcher = AlertDispatcher(webhook.url, batch_window=0, max_retries=2, backoff_base=0.01,
+                                 spill_path=spill_path).start()
+    dispatcher.submit({'pid': 7})
+    wait_for(lambda: dispatcher.metrics()['spilled'] == 1)
+    dispatcher.stop()
+    assert len(SpillQueue(spill_path)) == 1
+
+    restarted = AlertDispatcher(webhook.url, spill_path=spill_path).start()
+    wait_for(lambda: restarted.metrics()['delivered'] == 1)
+    restarted.stop()
+    assert webhook.requests[-1][1]['embeds'] == [{'pid': 7}]
+    assert not spill_path.exists()
+
+
+def test_full_queue_spills_and_client_errors_are_not_retried(webhook, tmp_path):
+    dispatcher = AlertDispatcher(webhook.url, queue_size=1, spill_path=tmp_path / 'spill.jsonl')
+    assert dispatcher.submit({'pid': 1})
+    assert not dispatcher.submit({'pid': 2})
+    assert dispatcher.metrics()['spilled'] == 1
+
+    webhook.responses = [(400, {})]
+    dispatcher.start()
+    wait_for(lambda: dispatcher.metrics()['delivered'] == 1)
+    dispatcher.stop()
+    metrics = dispatcher.metrics()
+    assert metrics['failed'] == 1 and metrics['recovered'] == 1
+    assert metrics['requests'] == 2
+    assert webhook.embeds() == [{'pid': 1}, {'pid': 2}]
@@ -0,0 +1,98 @@
+"""
+TESTES DO INTERNAMENTO DE API CALLS
+"""
+
+import random
+from collections import deque
+
+import pytest
+
+from api_tokens import ApiSequence, ApiTokenTable, TokenRing
+
+
+def test_table_interns_and_overflows():
+    table = ApiTokenTable(max_tokens=2)
+    assert table.acquire('NtClose') == table.intern('NtClose') == 0
+    assert table.acquire('connect:host:443') == 1
+    assert table.acquire('ReadFile') == ApiTokenTable.OVERFLOW_ID
+    assert table.text(ApiTokenTable.OVERFLOW_ID) == ''
+    assert table.metrics() == {'tokens': 2, 'capacity': 2, 'overflowed': 1, 'reclaimed': 0}
+
+
+def test_ring_matches_deque_with_popleft_and_trim():
+    rng = random.Random(5)
+    ring = TokenRing(capacity=7)
+    reference = deque(maxlen=7)
+    for i in range(300):
+        action = rng.random()
+        if action < 0.1 and reference:
+            assert ring.popleft() == reference.popleft()
+        elif action < 0.15:
+            ring.trim(3)
+            while len(reference) > 3:
+                reference.popleft()
+        else:
+            full = len(reference) == 7
+            oldest = reference[0] if full else None
+            assert ring.append(i) == oldest
+            reference.append(i)
+        assert ring.ids() == list(reference)
+        assert list(ring) == list(reference)
+        if reference:
+            assert ring[0] == reference[0] and ring[-1] == reference[-1]
+    assert ring.nbytes <= 7 * 2
+
+
+def test_ring_index_errors():
+    ring = TokenRing(capacity=2)
+    with pytest.raises(IndexError):
+        ring[0]
+    with pytest.raises(IndexError):
+        ring.popleft()
+
+
+def test_api_sequence_behaves_like_deque_of_strings():
+    table = ApiTokenTable()
+    sequence = ApiSequence(table, maxlen=3)
+    for api_call in ['CreateProcess', 'NtClose', 'connect:a:80', 'NtClose']:
+        sequence.append(api_call)
+
+    assert list(sequence) == ['NtClose', 'connect:a:80', 'NtClose']
+    assert ' '.join(sequence) == 'NtClose connect:a:80 NtClose'
+    assert len(sequence) == 3 and sequence.maxlen == 3
+    assert sequence[-1] == 'NtClose'
+    assert sequence.ids() == [1, 2, 1]
+    assert len(table) == 3
+
+
+def test_table_reclaims_unreferenced_ids_when_full():
+    table = ApiTokenTable(max_tokens=3)
+    forgotten = []
+    table.on_reclaim.append(forgotten.extend)
+    held = table.acquire('connect:a:443')
+    dropped = table.acquire('connect:b:443')
+    table.intern('DNSQuery:c')
+    table.release(dropped)
+
+    new_id = table.acquire('connect:d:443')
+    assert new_id != ApiTokenTable.OVERFLOW_ID
+    assert sorted(forgotten) == [1, 2]
+    assert table.text(held) == 'connect:a:443' and table.text(new_id) == 'connect:d:443'
+    assert table.intern('connect:b:443') not in (held, new_id)
+    assert table.metrics() == {'tokens': 3, 'capacity': 3, 'overflowed': 0, 'reclaimed': 2}
+
+    # Todos os IDs referenciados: só então OVERFLOW_ID
+    table.acquire('connect:b:443')
+    table.acquire('DNSQuery:e')
+    assert table.acquire('DNSQuery:e') == ApiTokenTable.OVERFLOW_ID
+    assert table.metrics()['overflowed'] == 2
+
+
+def test_api_sequence_releases_evicted_and_cleared_ids():
+    table = ApiTokenTable()
+    sequence = ApiSequence(table, maxlen=2)
+    for api_call in ['a', 'b', 'a', 'c']:
+        sequence.append(api_call)
+    assert table.refs[table.intern('a')] == 1 and table.refs[table.intern('b')] == 0
+    sequence.clear()
+    assert len(sequence) == 0 and not any(table.refs)
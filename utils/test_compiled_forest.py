@@ -0,0 +1,80 @@
+"""
+TESTES DO RANDOM FOREST COMPILADO
+"""
+
+import numpy as np
+import pytest
+from scipy import sparse
+from sklearn.ensemble import (ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier,
+                              VotingClassifier)
+from sklearn.linear_model import LogisticRegression
+
+from compiled_forest import CompiledForest, compiled_path_for, load_scorer
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = sparse.random(300, 120, density=0.05, format='csr', random_state=1)
+    y = rng.integers(0, 3, size=300)
+    return X, np.array(['Benign', 'Spyware', 'Trojan'])[y]
+
+
+@pytest.mark.parametrize('forest', [
+    RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0, n_jobs=1),
+    RandomForestClassifier(n_estimators=10, random_state=0, class_weight='balanced'),
+    ExtraTreesClassifier(n_estimators=10, random_state=0),
+])
+def test_matches_sklearn(data, forest):
+    X, y = data
+    forest.fit(X, y)
+    compiled = CompiledForest.from_sklearn(forest)
+
+    assert np.allclose(compiled.predict_proba(X), forest.predict_proba(X), rtol=0, atol=1e-12)
+    assert np.array_equal(compiled.predict(X.toarray()), forest.predict(X))
+    for i in range(5):
+        assert np.allclose(compiled.predict_proba(X[i]), forest.predict_proba(X[i]), rtol=0, atol=1e-12)
+
+
+def test_sequential_forest_is_bitwise_identical(data):
+    X, y = data
+    forest = RandomForestClassifier(n_estimators=30, random_state=3, n_jobs=1).fit(X, y)
+    assert np.array_equal(CompiledForest.from_sklearn(forest).predict_proba(X), forest.predict_proba(X))
+
+
+def test_save_load_and_scorer_selection(data, tmp_path):
+    X, y = data
+    forest = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    model_path = tmp_path / 'modelo.joblib'
+    CompiledForest.from_sklearn(forest).save(compiled_path_for(model_path))
+
+    scorer = load_scorer(forest, model_path)
+    assert isinstance(scorer, CompiledForest)
+    assert np.array_equal(scorer.predict_proba(X), CompiledForest.from_sklearn(forest).predict_proba(X))
+
+    # .npz de outro treino com as mesmas classes e features: ignorado
+    retrained = RandomForestClassifier(n_estimators=5, random_state=1).fit(X, y)
+    scorer = load_scorer(retrained, model_path)
+    assert np.array_equal(scorer.predict_proba(X), retrained.predict_proba(X))
+
+    # Modelos que não são florestas continuam com o sklearn
+    linear = LogisticRegression().fit(X, y)
+    assert load_scorer(linear) is linear
+
+
+@pytest.mark.parametrize('make_model', [
+    lambda: VotingClassifier([('rf', RandomForestClassifier(n_estimators=5, random_state=0)),
+                              ('lr', LogisticRegression())], voting='soft'),
+    lambda: GradientBoostingClassifier(n_estimators=5, random_state=0),
+])
+def test_other_ensembles_keep_sklearn_predict_proba(data, tmp_path, make_model):
+    X, y = data
+    model = make_model().fit(X, y)
+    with pytest.raises(TypeError):
+        CompiledForest.from_sklearn(model)
+
+    # Mesmo com um .npz ao lado do modelo (ex.: floresta de um treino anterior)
+    model_path = tmp_path / 'modelo.joblib'
+    forest = RandomForestClassifier(n_estimators=3, random_state=0).fit(X, y)
+    CompiledForest.from_sklearn(forest).save(compiled_path_for(model_path))
+    assert load_scorer(model, model_path) is model
@@ -0,0 +1,69 @@
+"""
+TESTES DA POLÍTICA DE DETECÇÃO COMPILADA
+"""
+
+import json
+import os
+
+from detection_policy import DetectionPolicy, PolicyReloader, SuffixTrie, process_basename, trie_regex
+
+
+def test_process_basename_handles_windows_paths():
+    assert process_basename('C:\\Windows\\System32\\LSASS.EXE') == 'lsass.exe'
+    assert process_basename('/usr/bin/python3') == 'python3'
+    assert process_basename('') == ''
+
+
+def test_trie_regex_matches_like_substring_scan():
+    words = ['temp', 'tmp', 'appdata\\local\\temp', 'te', 'programdata', 'users\\public']
+    pattern = trie_regex(words)
+    texts = ['c:\\users\\bob\\appdata\\local\\temp', 'c:\\windows', 'd:\\tm', 'c:\\users\\public\\x',
+             'c:\\programdata\\a', 'c:\\tex']
+    for text in texts:
+        assert (pattern.search(text) is not None) == any(word in text for word in words)
+    assert trie_regex([]) is None
+
+
+def test_suffix_trie_returns_longest_suffix():
+    trie = SuffixTrie(['.gz', '.tar.gz', '.exe'])
+    assert trie.match('backup.tar.gz') == '.tar.gz'
+    assert trie.match('a.gz') == '.gz'
+    assert trie.match('setup.exe') == '.exe'
+    assert trie.match('notes.txt') is None
+
+
+def test_policy_lookups_are_case_insensitive():
+    policy = DetectionPolicy(
+        whitelist_processes=['System', 'svchost.exe'],
+        critical_processes=['lsass.exe'],
+        suspicious_extensions=['.ps1'],
+        suspicious_directories=['users\\public'],
+        persistence_keys=['currentversion\\run']
+    )
+    assert policy.is_whitelisted('system')
+    assert policy.is_critical('LSASS.exe')
+    assert policy.suspicious_extension('C:\\x\\Payload.PS1') == '.ps1'
+    assert policy.suspicious_directory('C:\\Users\\Public\\drop') == 'users\\public'
+    assert policy.is_persistence_key('HKLM\\Software\\Microsoft\\Windows\\CurrentVersion\\Run\\x')
+    assert not policy.is_persistence_key('HKLM\\Software\\Classes')
+
+
+def test_reloader_swaps_policy_when_file_changes(tmp_path):
+    config_path = tmp_path / 'config.json'
+    config_path.write_text(json.dumps({'whitelist_processes': ['a.exe']}))
+    config = {'whitelist_processes': ['a.exe'], 'detection_threshold': 0.5}
+    reloaded = []
+    reloader = PolicyReloader(config, config_path, on_reload=reloaded.append)
+
+    assert not reloader.check()
+
+    config_path.write_text(json.dumps({'whitelist_processes': ['b.exe'], 'detection_threshold': 0.9}))
+    stat = os.stat(config_path)
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert reloader.check()
+    assert reloaded == [reloader.policy]
+    assert reloader.policy.is_whitelisted('B.EXE')
+    assert not reloader.policy.is_whitelisted('a.exe')
+    # Só as listas da política são recarregadas
+    assert config['detection_threshold'] == 0.5
@@ -0,0 +1,68 @@
+"""
+TESTES DO CHECKPOINT DE LEITURA
+Retomada da leitura pelo RecordNumber usando a fonte de replay
+"""
+
+import json
+
+from event_checkpoint import CheckpointedReader, EventCheckpoint
+from event_sources import ReplayEventSource
+
+
+def _write_jsonl(path, first, last):
+    with open(path, 'a', encoding='utf-8') as f:
+        for number in range(first, last + 1):
+            f.write(json.dumps({'EventID': 1, 'TimeCreated': 1_700_000_000 + number,
+                                'Computer': 'VM-TCC', 'EventRecordID': number,
+                                'EventData': {'ProcessId': str(number)}}) + '\n')
+
+
+def _reader(events, checkpoint_path):
+    source = ReplayEventSource(events, speed=0, batch_size=4)
+    return CheckpointedReader(source, EventCheckpoint(checkpoint_path, source.checkpoint_key,
+                                                      save_interval=0), poll_interval=0)
+
+
+def test_checkpoint_saves_atomically_and_ignores_other_sources(tmp_path):
+    path = tmp_path / 'state' / 'checkpoint.json'
+    checkpoint = EventCheckpoint(path, 'Microsoft-Windows-Sysmon/Operational', save_interval=60)
+
+    checkpoint.commit(10)
+    checkpoint.commit(7)
+    assert checkpoint.record_number == 10
+    assert checkpoint.saves == 1
+
+    # Dentro do save_interval só a memória avança; flush() grava o resto
+    checkpoint.commit(11)
+    assert json.loads(path.read_text())['record_number'] == 10
+    checkpoint.flush()
+    checkpoint.flush()
+    assert checkpoint.saves == 2
+    assert list(path.parent.iterdir()) == [path]
+
+    assert EventCheckpoint(path, 'Microsoft-Windows-Sysmon/Operational').load() == 11
+    assert EventCheckpoint(path, 'outro.jsonl').load() is None
+    assert EventCheckpoint(tmp_path / 'inexistente.json', 'x').load() is None
+
+
+def test_reader_resumes_after_last_processed_event(tmp_path):
+    events = tmp_path / 'eventos.jsonl'
+    checkpoint_path = tmp_path / 'checkpoint.json'
+    _write_jsonl(events, 1, 10)
+
+    # Consumidor para no 6º evento sem terminar de processá-lo
+    seen = []
+    for event in _reader(events, checkpoint_path).events():
+        if event.RecordNumber == 6:
+            break
+        seen.append(event.RecordNumber)
+    assert seen == [1, 2, 3, 4, 5]
+    assert json.loads(checkpoint_path.read_text())['record_number'] == 5
+
+    resumed = [event.RecordNumber for event in _reader(events, checkpoint_path).events()]
+    assert resumed == [6, 7, 8, 9, 10]
+
+    # Eventos gravados depois da parada: só os novos são lidos
+    _write_jsonl(events, 11, 13)
+    assert [event.RecordNumber for event in _reader(events, checkpoint_path).events()] == [11, 12, 13]
+    assert list(_reader(events, checkpoint_path).events()) == []
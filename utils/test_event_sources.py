@@ -0,0 +1,187 @@
+"""
+TESTES DAS FONTES DE EVENTOS
+Valida o replay de eventos gravados (XML do EVTX e JSONL) fora do Windows
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+from event_sources import PipeEventSource, ReplayEventSource, SysmonEventSource, parse_event_time
+
+XML_EVENTS = """<?xml version="1.0" encoding="utf-8"?>
+<Event xmlns="http://schemas.microsoft.com/win/2004/08/events/event">
+  <System>
+    <EventID>1</EventID>
+    <TimeCreated SystemTime="2025-09-08T13:00:00.1234567Z"/>
+    <EventRecordID>101</EventRecordID>
+    <Computer>VM-TCC</Computer>
+  </System>
+  <EventData>
+    <Data Name="RuleName">-</Data>
+    <Data Name="UtcTime">2025-09-08 13:00:00.123</Data>
+    <Data Name="ProcessGuid">{guid}</Data>
+    <Data Name="ProcessId">4242</Data>
+    <Data Name="Image">C:\\Temp\\malwaretcc.exe</Data>
+  </EventData>
+</Event>
+<Event xmlns="http://schemas.microsoft.com/win/2004/08/events/event">
+  <System>
+    <EventID>3</EventID>
+    <TimeCreated SystemTime="2025-09-08T13:00:02.0000000Z"/>
+    <EventRecordID>102</EventRecordID>
+    <Computer>VM-TCC</Computer>
+  </System>
+  <EventData>
+    <Data Name="RuleName"></Data>
+    <Data Name="ProcessId">4242</Data>
+  </EventData>
+</Event>
+"""
+
+
+def _write_jsonl(path, count, step_seconds=0.0):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            f.write(json.dumps({
+                'EventID': 1,
+                'TimeCreated': 1_700_000_000 + i * step_seconds,
+                'Computer': 'VM-TCC',
+                'EventRecordID': i + 1,
+                'EventData': {'RuleName': '-', 'UtcTime': '', 'ProcessGuid': '', 'ProcessId': str(1000 + i)}
+            }) + '\n')
+
+
+def _drain(source):
+    events = []
+    while not source.exhausted:
+        events.extend(source.read())
+    return events
+
+
+def test_xml_replay_preserves_inserts_and_names(tmp_path):
+    path = tmp_path / 'eventos.xml'
+    path.write_text(XML_EVENTS, encoding='utf-8')
+
+    events = _drain(ReplayEventSource(path, speed=0))
+
+    assert [e.EventID for e in events] == [1, 3]
+    assert events[0].StringInserts[3] == '4242'
+    assert events[0].StringInserts[4] == 'C:\\Temp\\malwaretcc.exe'
+    assert events[0].EventData['Image'] == 'C:\\Temp\\malwaretcc.exe'
+    assert events[0].RecordNumber == 101
+    assert events[0].ComputerName == 'VM-TCC'
+    assert events[1].StringInserts[0] == ''
+
+
+def test_xml_replay_with_root_element(tmp_path):
+    path = tmp_path / 'eventos.xml'
+    body = XML_EVENTS.split('?>', 1)[1]
+    path.write_text(f"<Events>{body}</Events>", encoding='utf-8')
+
+    assert len(_drain(ReplayEventSource(path, speed=0))) == 2
+
+
+def test_jsonl_replay_respects_batch_size(tmp_path):
+    path = tmp_path / 'eventos.jsonl'
+    _write_jsonl(path, 120)
+
+    source = ReplayEventSource(path, speed=0, batch_size=50)
+    sizes = []
+    while not source.exhausted:
+        batch = source.read()
+        if batch:
+            sizes.append(len(batch))
+
+    assert sizes == [50, 50, 20]
+    assert source.events_emitted == 120
+    assert source.events_per_second > 0
+
+
+def test_replay_speed_paces_events(tmp_path):
+    path = tmp_path / 'eventos.jsonl'
+    _write_jsonl(path, 3, step_seconds=1.0)
+
+    # 1 segundo entre eventos reproduzido a 20x = 50ms entre eventos
+    source = ReplayEventSource(path, speed=20)
+    assert len(source.read()) == 1
+    assert source.read() == []
+
+    time.sleep(0.06)
+    assert len(source.read()) == 1
+
+
+def test_parse_event_time_truncates_windows_precision():
+    parsed = parse_event_time('2025-09-08T13:00:00.1234567Z')
+    assert parsed.microsecond == 123456
+
+
+def test_live_source_unavailable_without_pywin32():
+    import event_sources
+
+    if event_sources.win32evtlog is None:
+        assert SysmonEventSource().is_available() is False
+
+
+def test_replay_resume_after_skips_processed_records(tmp_path):
+    path = tmp_path / 'eventos.jsonl'
+    _write_jsonl(path, 10)
+
+    source = ReplayEventSource(path, speed=0, batch_size=3)
+    source.resume_after(6)
+    events = _drain(source)
+
+    assert [event.RecordNumber for event in events] == [7, 8, 9, 10]
+    assert source.last_record == 10
+
+
+def test_pipe_source_wakes_on_event_and_ends_with_pipe(tmp_path):
+    read_fd, write_fd = os.pipe()
+    source = PipeEventSource(os.fdopen(read_fd, 'r', encoding='utf-8'))
+    source.open()
+
+    # Sem eventos, wait() bloqueia até o timeout
+    started = time.perf_counter()
+    source.wait(0.05)
+    assert time.perf_counter() - started >= 0.04
+    assert source.read() == []
+
+    line = json.dumps({'EventID': 1, 'EventRecordID': 7, 'EventData': {'ProcessId': '42'}}) + '\n'
+    threading.Timer(0.02, os.write, (write_fd, line.encode('utf-8'))).start()
+    started = time.perf_counter()
+    source.wait(5)
+    assert time.perf_counter() - started < 1
+
+    events = source.read()
+    assert [(event.RecordNumber, event.EventData['ProcessId']) for event in events] == [(7, '42')]
+    assert not source.exhausted
+
+    os.close(write_fd)
+    source.wait(5)
+    assert source.exhausted
+
+
+def test_xml_replay_memory_stays_flat_on_large_file(tmp_path):
+    # Eventos já lidos não podem continuar pendurados na raiz sintética
+    template = XML_EVENTS.split('?>', 1)[1].split('</Event>', 1)[0] + '</Event>\n'
+    count = 20000
+    path = tmp_path / 'grande.xml'
+    with open(path, 'w', encoding='utf-8') as f:
+        for n in range(1, count + 1):
+            f.write(template.replace('<EventRecordID>101<', f'<EventRecordID>{n}<'))
+
+    source = ReplayEventSource(path, speed=0)
+    marks = {}
+    tracemalloc.start()
+    try:
+        for n, record in enumerate(source._iter_records(), 1):
+            if n in (count // 4, count):
+                marks[n] = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    assert n == count and record.RecordNumber == count
+    # Antes: ~75 bytes por evento (1 MiB nos 15000 eventos entre as medições)
+    assert marks[count] - marks[count // 4] < 256 * 1024
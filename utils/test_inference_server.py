@@ -0,0 +1,172 @@
+"""
+TESTES DO SERVIDOR DE INFERÊNCIA
+Mesmo resultado do modelo local, micro-lotes entre clientes e coalescência
+"""
+
+import os
+import stat
+import sys
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import LabelEncoder
+
+from inference_server import InferenceClient, InferenceModel, InferenceServer
+
+TEXTS = [
+    'CreateProcess LoadLibrary CreateFile OpenProcess RegSetValue',
+    'CreateProcess CreateRemoteThread OpenProcess WriteProcessMemory',
+    'connect InternetOpen HttpSendRequest CryptEncrypt DeleteFile',
+    'LoadLibrary LoadLibrary CreateFile ReadFile CloseHandle',
+] * 10
+LABELS = ['Benign', 'Trojan', 'Spyware', 'Benign'] * 10
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2))
+    encoder = LabelEncoder().fit(LABELS)
+    model = RandomForestClassifier(n_estimators=8, random_state=0).fit(
+        vectorizer.fit_transform(TEXTS), encoder.transform(LABELS))
+    path = tmp_path / 'modelo.joblib'
+    joblib.dump({'model': model, 'tfidf_vectorizer': vectorizer, 'label_encoder': encoder,
+                 'feature_selector': None, 'pca': None}, path)
+    return path
+
+
+@pytest.fixture
+def server(model_path, tmp_path):
+    server = InferenceServer(model_path, address=str(tmp_path / 'inferencia.sock'), authkey='tcc',
+                             max_wait=0.05).start()
+    yield server
+    server.stop()
+
+
+def test_clients_share_batches_and_match_local_model(server, model_path):
+    expected_proba, expected_labels = InferenceModel(model_path).predict(TEXTS[:4])
+    clients = [InferenceClient(server.address, authkey='tcc') for _ in range(4)]
+    assert clients[0].classes == ['Benign', 'Spyware', 'Trojan']
+
+    # Quatro detectores pedem ao mesmo tempo as mesmas quatro sequências
+    results = [None] * len(clients)
+    barrier = threading.Barrier(len(clients))
+
+    def ask(index):
+        barrier.wait()
+        results[index] = clients[index].predict(TEXTS[:4])
+
+    threads = [threading.Thread(target=ask, args=(index,)) for index in range(len(clients))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for probabilities, labels in results:
+        np.testing.assert_allclose(probabilities, expected_proba)
+        assert labels == expected_labels
+
+    stats = clients[0].server_stats()
+    assert stats['requests'] == 4 and stats['rows'] == 16
+    assert stats['batches'] < stats['requests']
+    assert stats['unique_rows'] < stats['rows']
+    for client in clients:
+        client.close()
+
+
+def test_rejects_wrong_key_and_keeps_serving(server):
+    with pytest.raises(AuthenticationError):
+        InferenceClient(server.address, authkey='errada')
+
+    client = InferenceClient(server.address, authkey='tcc')
+    _, labels = client.predict([TEXTS[1]])
+    assert labels == ['Trojan']
+    client.close()
+
+
+def test_tcp_address_requires_authkey(model_path):
+    # Conexões TCP com pickle sem autenticação permitiriam executar código no servidor
+    with pytest.raises(ValueError):
+        InferenceServer(model_path, address='127.0.0.1:0')
+
+    server = InferenceServer(model_path, address='127.0.0.1:0', authkey='tcc')
+    assert server.authkey == b'tcc'
+
+
+@pytest.fixture
+def private_runtime(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path))
+    monkeypatch.delenv('INFERENCE_AUTHKEY', raising=False)
+    return tmp_path / 'modelo-defensivo'
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='socket Unix e permissões POSIX')
+def test_local_default_uses_generated_key_in_private_dir(model_path, private_runtime):
+    with pytest.raises(PermissionError):
+        InferenceClient()
+
+    server = InferenceServer(model_path, max_wait=0.01).start()
+    try:
+        assert Path(server.address).parent == private_runtime
+        assert stat.S_IMODE(os.stat(private_runtime).st_mode) == 0o700
+        assert stat.S_IMODE(os.stat(private_runtime / 'authkey').st_mode) == 0o600
+        assert server.authkey == (private_runtime / 'authkey').read_bytes()
+
+        # Cliente do mesmo usuário encontra a chave; chave errada é recusada
+        client = InferenceClient()
+        assert client.predict([TEXTS[1]])[1] == ['Trojan']
+        client.close()
+        with pytest.raises(AuthenticationError):
+            InferenceClient(authkey='errada')
+    finally:
+        server.stop()
+
+
+class _Payload:
+    executed = False
+
+    def __reduce__(self):
+        return (_Payload._run, ())
+
+    @staticmethod
+    def _run():
+        _Payload.executed = True
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='socket Unix e permissões POSIX')
+def test_client_does_not_unpickle_from_unauthenticated_listener(tmp_path):
+    # Outro processo ocupando o endereço sem a chave: o handshake falha antes de qualquer pickle
+    address = str(tmp_path / 'impostor.sock')
+    listener = Listener(address, authkey=None)
+
+    def impostor():
+        conn = listener.accept()
+        try:
+            conn.send(('hello', _Payload()))
+            conn.recv_bytes()
+        except (EOFError, OSError):
+            pass
+        conn.close()
+
+    thread = threading.Thread(target=impostor, daemon=True)
+    thread.start()
+    with pytest.raises(AuthenticationError):
+        InferenceClient(address, authkey='tcc')
+    thread.join(5)
+    listener.close()
+    assert not _Payload.executed
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='socket Unix e permissões POSIX')
+def test_start_does_not_remove_foreign_files(model_path, tmp_path):
+    path = tmp_path / 'nao-e-socket.sock'
+    path.write_text('dados', encoding='utf-8')
+    with pytest.raises(FileExistsError):
+        InferenceServer(model_path, address=str(path), authkey='tcc').start()
+    assert path.read_text(encoding='utf-8') == 'dados'
@@ -0,0 +1,82 @@
+"""
+TESTES DA INSTRUMENTAÇÃO (HISTOGRAMAS HDR E ENDPOINT /metrics)
+"""
+
+import random
+import urllib.request
+
+import pytest
+
+from instrumentation import BUCKET_COUNT, Histogram, MetricsRegistry, MetricsServer, bucket_bounds
+
+
+def test_buckets_are_contiguous_and_contain_their_values():
+    previous_end = 0
+    for index in range(BUCKET_COUNT - 1):
+        start, end = bucket_bounds(index)
+        assert start == previous_end and end > start
+        previous_end = end
+
+    for value in (0, 1, 7, 8, 15, 16, 17, 1000, 123_456_789, 2 ** 40):
+        histogram = Histogram()
+        histogram.observe_ns(value)
+        index = histogram.counts.index(1)
+        start, end = bucket_bounds(index)
+        assert start <= value < end
+
+
+def test_quantiles_stay_within_bucket_resolution():
+    rng = random.Random(7)
+    values = sorted(int(rng.lognormvariate(10, 2)) for _ in range(20000))
+    histogram = Histogram()
+    for value in values:
+        histogram.observe_ns(value)
+
+    for fraction in (0.5, 0.9, 0.99):
+        exact = values[int(fraction * len(values)) - 1]
+        assert histogram.quantile_ns(fraction) == pytest.approx(exact, rel=0.13)
+    assert histogram.count == len(values) and histogram.total == sum(values)
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry(prefix='app_')
+    parse = registry.histogram('stage_latency_seconds', 'Latência', stage='parse')
+    for micros in (3, 3, 40, 2000):
+        parse.observe(micros / 1e6)
+    events = {'total': 5}
+    registry.counter('events_total', 'Eventos', lambda: events['total'])
+    registry.gauge('queue_depth', 'Fila', lambda: 1 / 0, stage='parser')
+
+    text = registry.render()
+    lines = text.splitlines()
+    assert '# TYPE app_stage_latency_seconds histogram' in lines
+    assert 'app_stage_latency_seconds_bucket{stage="parse",le="5e-06"} 2' in lines
+    assert 'app_stage_latency_seconds_bucket{stage="parse",le="0.0001"} 3' in lines
+    assert 'app_stage_latency_seconds_bucket{stage="parse",le="+Inf"} 4' in lines
+    assert 'app_stage_latency_seconds_count{stage="parse"} 4' in lines
+    assert 'app_events_total 5' in lines
+    assert any(line.startswith('app_stage_latency_seconds_quantile{stage="parse",quantile="0.99"}')
+               for line in lines)
+    # Métrica que falha na leitura (ex.: pipeline ainda não criado) é omitida
+    assert not any(line.startswith('app_queue_depth{') for line in lines)
+
+
+def test_registry_returns_the_same_metric_for_the_same_labels():
+    registry = MetricsRegistry()
+    first = registry.histogram('latency_seconds', 'x', stage='parse')
+    assert registry.histogram('latency_seconds', 'x', stage='parse') is first
+    assert registry.histogram('latency_seconds', 'x', stage='handler') is not first
+    with pytest.raises(ValueError):
+        registry.gauge('latency_seconds', 'x', lambda: 0)
+
+
+def test_metrics_server_serves_the_registry():
+    registry = MetricsRegistry()
+    registry.counter('events_total', 'Eventos', lambda: 42)
+    server = MetricsServer(registry, port=0).start()
+    try:
+        with urllib.request.urlopen(server.url, timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert 'events_total 42' in response.read().decode('utf-8')
+    finally:
+        server.stop()
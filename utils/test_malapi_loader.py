@@ -0,0 +1,74 @@
+"""
+TESTES DO LEITOR EM STREAMING DO MAL-API-2019
+"""
+
+from malapi_loader import (build_offset_index, iter_mal_api, iter_mal_api_chunks,
+                           load_mal_api, load_offset_index, read_rows)
+
+ROWS = [
+    ('Spyware', 'ldrloadldl ldrgetprocedureaddress regopenkeyexa'),
+    ('Trojan', 'ntcreatefile ntwritefile'),
+    ('Spyware', ''),
+    ('Worms', 'socket connect send'),
+    ('Spyware', 'getasynckeystate setwindowshookexa çãõ'),
+]
+
+
+def write_dataset(tmp_path):
+    data_file = tmp_path / 'all_analysis_data.txt'
+    labels_file = tmp_path / 'labels.csv'
+    data_file.write_bytes(''.join(f"{calls}\n" for _, calls in ROWS).encode('utf-8'))
+    labels_file.write_text(''.join(f"{label}\n" for label, _ in ROWS), encoding='utf-8')
+    return data_file, labels_file
+
+
+def test_streaming_filters_families_and_skips_empty(tmp_path):
+    data_file, labels_file = write_dataset(tmp_path)
+
+    rows = list(iter_mal_api(data_file, labels_file, families=['Spyware']))
+
+    assert [row for row, _, _ in rows] == [0, 4]
+    assert rows[1][2] == ROWS[4][1]
+    assert len(list(iter_mal_api(data_file, labels_file))) == 4
+
+
+def test_chunks_have_bounded_size(tmp_path):
+    data_file, labels_file = write_dataset(tmp_path)
+
+    chunks = list(iter_mal_api_chunks(data_file, labels_file, chunk_size=3))
+
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    assert list(chunks[0].columns) == ['api_calls', 'label']
+
+
+def test_offset_index_reads_same_rows_as_streaming(tmp_path):
+    data_file, labels_file = write_dataset(tmp_path)
+
+    offsets = build_offset_index(data_file)
+    assert len(offsets) == len(ROWS)
+    assert dict(read_rows(data_file, [3, 1], offsets)) == {1: ROWS[1][1], 3: ROWS[3][1]}
+
+    families = ['Spyware', 'Worms']
+    streamed = load_mal_api(data_file, labels_file, families)
+    indexed = load_mal_api(data_file, labels_file, families, use_index=True)
+    assert streamed.equals(indexed)
+
+
+def test_offset_index_is_rebuilt_when_data_changes(tmp_path):
+    data_file, labels_file = write_dataset(tmp_path)
+    build_offset_index(data_file)
+
+    with open(data_file, 'ab') as f:
+        f.write(b'extra line\n')
+
+    assert load_offset_index(data_file) is None
+    assert len(load_offset_index(data_file, build=True)) == len(ROWS) + 1
+
+
+def test_empty_selection_returns_empty_frame(tmp_path):
+    data_file, labels_file = write_dataset(tmp_path)
+
+    df = load_mal_api(data_file, labels_file, families=['Adware'])
+
+    assert df.empty
+    assert list(df.columns) == ['api_calls', 'label']
@@ -0,0 +1,85 @@
+"""
+TESTES DO BUNDLE ÚNICO DO MODELO
+"""
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.decomposition import PCA, TruncatedSVD
+from sklearn.ensemble import RandomForestClassifier, VotingClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_selection import SelectKBest, chi2
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import LabelEncoder
+
+from compiled_forest import CompiledForest
+from model_bundle import load_bundle, load_model_file, save_bundle
+
+TEXTS = [
+    'CreateProcess LoadLibrary CreateFile OpenProcess RegSetValue',
+    'CreateProcess CreateRemoteThread OpenProcess WriteProcessMemory',
+    'connect InternetOpen HttpSendRequest CryptEncrypt DeleteFile',
+    'LoadLibrary LoadLibrary CreateFile ReadFile CloseHandle',
+] * 10
+LABELS = ['Benign', 'Trojan', 'Spyware', 'Benign'] * 10
+
+
+@pytest.fixture
+def pipeline():
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)
+    X = vectorizer.fit_transform(TEXTS)
+    encoder = LabelEncoder().fit(LABELS)
+    y = encoder.transform(LABELS)
+    selector = SelectKBest(chi2, k=12).fit(X, y)
+    return vectorizer, encoder, selector, selector.transform(X), y
+
+
+@pytest.mark.parametrize('make_reducer', [
+    lambda X: PCA(n_components=4, whiten=True).fit(X.toarray()),
+    lambda X: TruncatedSVD(n_components=4, random_state=0).fit(X),
+])
+def test_bundle_reproduces_pipeline(tmp_path, pipeline, make_reducer):
+    vectorizer, encoder, selector, X_selected, y = pipeline
+    reducer = make_reducer(X_selected)
+    model = RandomForestClassifier(n_estimators=10, random_state=0, n_jobs=1).fit(reducer.transform(X_selected), y)
+
+    path = save_bundle(tmp_path / 'modelo.bundle', model, vectorizer, encoder, selector, reducer)
+    bundle = load_bundle(path)
+
+    expected = reducer.transform(selector.transform(vectorizer.transform(TEXTS)))
+    X = bundle.pca.transform(bundle.feature_selector.transform(bundle.tfidf_vectorizer.transform(TEXTS)))
+    assert np.allclose(X, expected, atol=1e-12)
+    assert isinstance(bundle.model, CompiledForest)
+    assert np.array_equal(bundle.model.predict_proba(X), model.predict_proba(expected))
+    assert list(bundle.label_encoder.inverse_transform([0, 2])) == ['Benign', 'Trojan']
+    assert bundle.metadata['model_type'] == 'RandomForestClassifier'
+
+
+def test_arrays_are_memory_mapped(tmp_path, pipeline):
+    vectorizer, encoder, _, _, y = pipeline
+    model = RandomForestClassifier(n_estimators=3, random_state=0).fit(vectorizer.transform(TEXTS), y)
+    bundle = load_bundle(save_bundle(tmp_path / 'modelo.bundle', model, vectorizer, encoder))
+
+    assert isinstance(bundle.model.value.base, np.memmap)
+    assert not bundle.model.threshold.flags.writeable
+
+
+def test_non_forest_model_and_legacy_dict(tmp_path, pipeline):
+    vectorizer, encoder, _, _, y = pipeline
+    X = vectorizer.transform(TEXTS)
+    model = LogisticRegression().fit(X, y)
+
+    components = load_model_file(save_bundle(tmp_path / 'modelo.bundle', model, vectorizer, encoder))
+    assert np.allclose(components['model'].predict_proba(components['tfidf_vectorizer'].transform(TEXTS)),
+                       model.predict_proba(X))
+
+    # Ensemble com florestas dentro (malware_detection_system.py): guardado como objeto
+    voting = VotingClassifier([('rf', RandomForestClassifier(n_estimators=5, random_state=0)),
+                               ('lr', LogisticRegression())], voting='soft').fit(X, y)
+    bundle = load_bundle(save_bundle(tmp_path / 'votacao.bundle', voting, vectorizer, encoder))
+    assert not bundle.metadata['compiled']
+    assert np.allclose(bundle.model.predict_proba(X), voting.predict_proba(X))
+
+    legacy = {'model': model, 'tfidf_vectorizer': vectorizer}
+    joblib.dump(legacy, tmp_path / 'legado.joblib')
+    assert set(load_model_file(tmp_path / 'legado.joblib')) == {'model', 'tfidf_vectorizer'}
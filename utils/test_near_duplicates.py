@@ -0,0 +1,54 @@
+"""
+TESTES DO FILTRO DE QUASE-DUPLICATAS
+"""
+
+import numpy as np
+
+from near_duplicates import (NearDuplicateFilter, jaccard, lsh_params, remove_near_duplicates,
+                             remove_near_duplicates_exact)
+
+
+def near_duplicate_corpus(n_base=60, copies=4, seed=3):
+    """Amostras base distintas e cópias com poucas APIs trocadas"""
+    rng = np.random.default_rng(seed)
+    vocab = [f"Api{i}" for i in range(2000)]
+    texts = []
+    for _ in range(n_base):
+        base = list(rng.choice(vocab, size=80, replace=False))
+        texts.append(' '.join(base))
+        for _ in range(copies):
+            variant = list(base)
+            changes = int(rng.integers(0, 12))
+            for position in rng.choice(len(variant), size=changes, replace=False):
+                variant[position] = str(rng.choice(vocab))
+            texts.append(' '.join(variant))
+    order = rng.permutation(len(texts))
+    return [texts[i] for i in order]
+
+
+def test_matches_exact_greedy_filter():
+    texts = near_duplicate_corpus()
+    for threshold in (0.7, 0.9):
+        assert remove_near_duplicates(texts, threshold) == remove_near_duplicates_exact(texts, threshold)
+
+
+def test_never_keeps_pair_above_threshold():
+    texts = near_duplicate_corpus(n_base=30)
+    kept = [set(texts[i].split()) for i in remove_near_duplicates(texts, 0.8)]
+    for i, a in enumerate(kept):
+        for b in kept[i + 1:]:
+            assert jaccard(a, b) <= 0.8
+
+
+def test_empty_samples_are_kept():
+    dedup = NearDuplicateFilter(0.9)
+    assert dedup.add_if_unique([])
+    assert dedup.add_if_unique([])
+    assert dedup.add_if_unique(['NtClose'])
+    assert not dedup.add_if_unique(['NtClose'])
+
+
+def test_lsh_params_bound_miss_probability():
+    bands, rows = lsh_params(0.9, num_perm=128, max_miss=0.001)
+    assert bands * rows <= 128
+    assert (1 - 0.9 ** rows) ** bands <= 0.001
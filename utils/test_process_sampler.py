@@ -0,0 +1,109 @@
+"""
+TESTES DO AGENDADOR DE AMOSTRAGEM DE PROCESSOS
+"""
+
+import psutil
+
+from process_sampler import ProcessSampler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeProcesses:
+    """psutil.Process falso: processos vivos e contagem de leituras"""
+
+    def __init__(self, pids):
+        self.pids = set(pids)
+        self.created = 0
+        self.reads = 0
+
+    def __call__(self, pid):
+        self.created += 1
+        table = self
+
+        class Proc:
+            def as_dict(self, attrs):
+                if pid not in table.pids:
+                    raise psutil.NoSuchProcess(pid)
+                table.reads += 1
+                return {'cpu_percent': 5.0}
+
+        return Proc()
+
+
+def make_sampler(pids, **kwargs):
+    clock = FakeClock()
+    table = FakeProcesses(pids)
+    sampled = []
+    sampler = ProcessSampler(lambda pid, info: sampled.append(pid), clock=clock, process_factory=table, **kwargs)
+    return sampler, clock, table, sampled
+
+
+def test_only_due_processes_are_read_and_objects_are_reused():
+    sampler, clock, table, sampled = make_sampler([1, 2, 3], interval=2.0)
+    for pid in (1, 2, 3):
+        sampler.track(pid)
+
+    sampler.poll()
+    assert sorted(sampled) == [1, 2, 3]
+
+    clock.now = 1.0
+    sampler.poll()
+    assert len(sampled) == 3 and table.reads == 3
+
+    clock.now = 2.0
+    sampler.poll()
+    assert len(sampled) == 6
+    assert table.created == 3
+
+
+def test_cap_defers_without_starving():
+    sampler, clock, _, sampled = make_sampler(range(10), interval=1.0, max_concurrent=4)
+    for pid in range(10):
+        sampler.track(pid)
+
+    sampler.poll()
+    assert sampled == [0, 1, 2, 3]
+    assert sampler.stats['deferred'] == 6
+
+    sampler.poll()
+    sampler.poll()
+    assert sorted(sampled) == list(range(10))
+
+    clock.now = 1.0
+    sampler.poll()
+    assert sampled[10:] == [0, 1, 2, 3]
+
+
+def test_exited_and_untracked_processes_leave_schedule():
+    exited = []
+    sampler, clock, table, sampled = make_sampler([1, 2, 3], on_exit=exited.append)
+    for pid in (1, 2, 3):
+        sampler.track(pid)
+    table.pids.discard(2)
+    sampler.untrack(3)
+
+    sampler.poll()
+    assert sampled == [1]
+    assert exited == [2]
+    assert 2 not in sampler and 3 not in sampler
+
+    clock.now = 4.0
+    metrics = sampler.metrics()
+    assert metrics['tracked'] == 1 and metrics['exited'] == 1
+    assert metrics['samples_per_second'] == 0.25
+
+
+def test_real_process_attributes_prefetched():
+    seen = {}
+    sampler = ProcessSampler(seen.__setitem__, attrs=('cpu_percent', 'memory_info'))
+    sampler.track(psutil.Process().pid)
+    sampler.poll()
+    info = seen[psutil.Process().pid]
+    assert info['cpu_percent'] is not None and info['memory_info'].rss > 0
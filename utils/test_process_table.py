@@ -0,0 +1,100 @@
+"""
+TESTES DA TABELA DE PROCESSOS INCREMENTAL
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from process_table import ProcBackend, ProcessTable
+
+
+class FakeBackend:
+    """Backend em memória: pid -> (name, create_time)"""
+
+    def __init__(self, processes):
+        self.processes = dict(processes)
+        self.described = []
+
+    def pids(self):
+        return set(self.processes)
+
+    def create_time(self, pid):
+        entry = self.processes.get(pid)
+        return entry[1] if entry else None
+
+    def describe(self, pid):
+        self.described.append(pid)
+        name, create_time = self.processes[pid]
+        return {'pid': pid, 'name': name, 'exe': None, 'ppid': 1, 'create_time': create_time}
+
+
+def test_first_poll_spawns_everything_then_only_deltas():
+    backend = FakeBackend({1: ('init', 1.0), 10: ('a.exe', 5.0)})
+    table = ProcessTable(backend)
+    events = []
+    table.subscribe(on_spawn=lambda info: events.append(('spawn', info['pid'])),
+                    on_exit=lambda info: events.append(('exit', info['pid'])))
+
+    table.poll()
+    assert events == [('spawn', 1), ('spawn', 10)]
+
+    events.clear()
+    backend.processes[11] = ('b.exe', 6.0)
+    del backend.processes[10]
+    spawned, exited = table.poll()
+    assert events == [('exit', 10), ('spawn', 11)]
+    assert [info['name'] for info in spawned] == ['b.exe']
+    assert sorted(table.keys()) == [(1, 1.0), (11, 6.0)]
+
+    table.poll()
+    assert backend.described == [1, 10, 11]
+
+
+def test_reused_pid_detected_on_verification():
+    backend = FakeBackend({7: ('old.exe', 1.0)})
+    table = ProcessTable(backend, verify_every=2)
+    table.poll()
+
+    backend.processes[7] = ('new.exe', 9.0)
+    spawned, exited = table.poll()
+    assert [info['name'] for info in exited] == ['old.exe']
+    assert [info['name'] for info in spawned] == ['new.exe']
+    assert table.metrics()['reused_pids'] == 1
+
+
+def test_proc_backend_parses_stat(tmp_path):
+    (tmp_path / 'stat').write_text('cpu  1 2 3\nbtime 1000\n')
+    proc = tmp_path / '42'
+    proc.mkdir()
+    # comm com espaço e parênteses; starttime (campo 22) = 250 ticks
+    fields = ['S', '7'] + ['0'] * 17 + ['250'] + ['0'] * 10
+    (proc / 'stat').write_text('42 (my (proc) x) ' + ' '.join(fields))
+    (tmp_path / 'self').mkdir()
+
+    backend = ProcBackend(str(tmp_path))
+    backend.clock_ticks = 100
+    assert backend.pids() == {42}
+    info = backend.describe(42)
+    assert info == {'pid': 42, 'name': 'my (proc) x', 'exe': None, 'ppid': 7, 'create_time': 1002.5}
+    assert backend.describe(43) is None
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self'), reason='requer /proc (Linux)')
+def test_proc_backend_sees_real_child_spawn_and_exit():
+    table = ProcessTable(ProcBackend())
+    table.poll()
+
+    child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+    try:
+        spawned, _ = table.poll()
+        assert child.pid in [info['pid'] for info in spawned]
+        assert table.get(child.pid)['ppid'] == os.getpid()
+    finally:
+        child.kill()
+        child.wait()
+
+    _, exited = table.poll()
+    assert child.pid in [info['pid'] for info in exited]
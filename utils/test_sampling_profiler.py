@@ -0,0 +1,70 @@
+"""
+TESTES DO PROFILER AMOSTRAL (PILHAS COLAPSADAS E RESUMO POR FUNÇÃO)
+"""
+
+import threading
+import time
+
+from sampling_profiler import SamplingProfiler, format_summary
+
+
+def busy_leaf(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+def busy_parent(seconds):
+    return busy_leaf(seconds)
+
+
+def test_samples_busy_thread_and_skips_idle_ones():
+    stop = threading.Event()
+    waiter = threading.Thread(target=stop.wait, name='waiter', daemon=True)
+    waiter.start()
+    worker = threading.Thread(target=busy_parent, args=(0.3,), name='worker')
+
+    with SamplingProfiler(interval=0.002) as profiler:
+        worker.start()
+        worker.join()
+    stop.set()
+
+    lines = profiler.collapsed()
+    worker_lines = [line for line in lines if line.startswith('worker;')]
+    assert worker_lines
+    stack, count = worker_lines[0].rsplit(' ', 1)
+    assert stack.endswith('test_sampling_profiler:busy_parent;test_sampling_profiler:busy_leaf')
+    assert int(count) > 0
+    assert not any(line.startswith('waiter;') for line in lines)
+    assert profiler.idle_samples > 0
+
+
+def test_summary_groups_self_and_total_samples():
+    profiler = SamplingProfiler()
+    profiler.samples = 10
+    profiler.stacks.update({
+        ('main', 'app:run', 'app:Detector._handle_a', 'app:helper'): 6,
+        ('main', 'app:run', 'app:Detector._predict_batch'): 3,
+        ('main', 'app:run'): 1
+    })
+
+    summary = profiler.summary({'handler': ['*._handle_*', 'app:helper'],
+                                'inference': ['*._predict_batch']})
+    handler = summary['groups']['handler']
+    assert handler['total'] == 6 and handler['total_pct'] == 60.0
+    functions = {item['function']: item for item in handler['functions']}
+    assert functions['app:Detector._handle_a']['self'] == 0
+    assert functions['app:Detector._handle_a']['total'] == 6
+    assert functions['app:helper']['self'] == 6
+    assert summary['groups']['inference']['functions'][0]['self_pct'] == 30.0
+    assert summary['top_self'][0]['function'] == 'app:helper'
+    assert '[handler] 60.0%' in format_summary(summary)
+
+
+def test_write_collapsed(tmp_path):
+    profiler = SamplingProfiler()
+    profiler.stacks.update({('main', 'a:f', 'a:g'): 2, ('main', 'a:f'): 5})
+    path = profiler.write_collapsed(tmp_path / 'out' / 'run.collapsed')
+    assert path.read_text(encoding='utf-8').splitlines() == ['main;a:f 5', 'main;a:f;a:g 2']
@@ -0,0 +1,130 @@
+"""
+TESTES DO LOGGING ASSÍNCRONO E ESTRUTURADO
+"""
+
+import json
+import logging
+import queue
+
+import pytest
+
+from structured_logging import (LazyQueueHandler, SampledLogger, rotating_jsonl_handler,
+                                start_queue_logging, stop_queue_logging)
+
+
+@pytest.fixture
+def logger(request):
+    logger = logging.getLogger(f"test_structured_logging.{request.node.name}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    yield logger
+    stop_queue_logging(logger)
+
+
+def read_jsonl(path):
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def test_records_are_written_as_json_lines_with_fields(logger, tmp_path):
+    path = tmp_path / 'events.jsonl'
+    start_queue_logging(logger, [rotating_jsonl_handler(path, logging.DEBUG)])
+
+    logger.debug("Evento ID %s parseado", 3, extra={'fields': {'ProcessId': 42, 'Image': 'C:\\a.exe'}})
+    try:
+        raise ValueError("falhou")
+    except ValueError:
+        logger.exception("Erro ao processar evento")
+    stop_queue_logging(logger)
+
+    parsed, error = read_jsonl(path)
+    assert parsed['msg'] == "Evento ID 3 parseado"
+    assert parsed['level'] == 'DEBUG' and parsed['logger'] == logger.name
+    assert parsed['fields'] == {'ProcessId': 42, 'Image': 'C:\\a.exe'}
+    assert 'ValueError: falhou' in error['exc']
+
+
+def test_child_logger_handler_and_levels(logger, tmp_path):
+    main, child = tmp_path / 'main.jsonl', tmp_path / 'child.jsonl'
+    start_queue_logging(logger, [
+        rotating_jsonl_handler(main, logging.INFO),
+        rotating_jsonl_handler(child, logger_name=f"{logger.name}.events")
+    ])
+    events = logging.getLogger(f"{logger.name}.events")
+
+    logger.debug("debug principal")
+    logger.info("info principal")
+    events.debug("debug de evento")
+    stop_queue_logging(logger)
+
+    assert [r['msg'] for r in read_jsonl(main)] == ["info principal"]
+    assert [r['msg'] for r in read_jsonl(child)] == ["debug de evento"]
+
+
+def test_message_is_not_formatted_by_the_logging_thread():
+    formatted = []
+
+    class Arg:
+        def __str__(self):
+            formatted.append(True)
+            return 'arg'
+
+    logger = logging.getLogger('test_structured_logging.lazy')
+    logger.propagate = False
+    handler = LazyQueueHandler(queue.Queue())
+    logger.addHandler(handler)
+    logger.warning("valor: %s", Arg())
+    logger.removeHandler(handler)
+
+    record = handler.queue.get_nowait()
+    assert not formatted and record.msg == "valor: %s"
+    assert record.getMessage() == "valor: arg"
+
+
+def test_sampled_logger_keeps_one_debug_in_every_n(logger):
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+
+    sampled = SampledLogger(logger, every=10)
+    for i in range(100):
+        sampled.debug("evento %s", i)
+    sampled.warning("aviso")
+
+    assert [r.getMessage() for r in records[:3]] == ["evento 0", "evento 10", "evento 20"]
+    assert len(records) == 11 and records[-1].levelname == 'WARNING'
+    assert all(r.funcName == 'test_sampled_logger_keeps_one_debug_in_every_n' for r in records)
+    logger.removeHandler(handler)
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = LazyQueueHandler(queue.Queue(maxsize=2))
+    record = logging.LogRecord('x', logging.INFO, __file__, 1, 'msg', (), None)
+    for _ in range(5):
+        handler.handle(record)
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_files_rotate_by_size(logger, tmp_path):
+    path = tmp_path / 'main.jsonl'
+    start_queue_logging(logger, [rotating_jsonl_handler(path, max_bytes=2000, backup_count=2)])
+    for i in range(200):
+        logger.info("linha %s", i)
+    stop_queue_logging(logger)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['main.jsonl', 'main.jsonl.1', 'main.jsonl.2']
+    assert read_jsonl(path)[-1]['msg'] == "linha 199"
+
+
+def test_restart_replaces_the_queue_without_duplicating_records(logger, tmp_path):
+    first, second = tmp_path / 'a.jsonl', tmp_path / 'b.jsonl'
+    start_queue_logging(logger, [rotating_jsonl_handler(first)])
+    logger.info("antes")
+    start_queue_logging(logger, [rotating_jsonl_handler(second)])
+    logger.info("depois")
+    stop_queue_logging(logger)
+
+    assert [r['msg'] for r in read_jsonl(first)] == ["antes"]
+    assert [r['msg'] for r in read_jsonl(second)] == ["depois"]
+    assert not any(isinstance(h, LazyQueueHandler) for h in logger.handlers)
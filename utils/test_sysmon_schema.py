@@ -0,0 +1,77 @@
+"""
+TESTES DO SCHEMA E DO PARSER NOMEADO DE EVENTOS DO SYSMON
+"""
+
+import json
+import logging
+from datetime import datetime
+
+from event_sources import SysmonRecord
+from structured_logging import JsonLinesFormatter
+from sysmon_schema import SYSMON_SCHEMA, UnknownEvent, event_fields, parse_sysmon_record
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def positional(event_id, **values):
+    inserts = [str(values.get(field, '')) for field in event_fields(event_id)]
+    return SysmonRecord(event_id, NOW, 'VM-TCC', 1, inserts)
+
+
+def test_schema_covers_all_sysmon_event_ids():
+    assert sorted(SYSMON_SCHEMA) == list(range(1, 30))
+    for event_id, (_, fields) in SYSMON_SCHEMA.items():
+        assert len(set(fields)) == len(fields), event_id
+
+
+def test_string_inserts_are_mapped_by_schema_position():
+    create = parse_sysmon_record(positional(1, ProcessId=10, ParentImage='C:\\explorer.exe',
+                                            CommandLine='a.exe -x', LogonGuid='{guid}'))
+    assert create.EventID == 1 and len(create) == len(event_fields(1))
+    assert create.get('ParentImage') == 'C:\\explorer.exe'
+    assert create.get('CommandLine') == 'a.exe -x'
+    assert create.ProcessId == '10'
+
+    access = parse_sysmon_record(positional(10, SourceProcessId=7, SourceThreadId=99, TargetProcessId=600,
+                                            TargetImage='C:\\Windows\\System32\\lsass.exe'))
+    assert access.get('SourceProcessId') == '7'
+    assert access.get('TargetProcessId') == '600'
+    assert access.get('TargetImage').endswith('lsass.exe')
+
+    network = parse_sysmon_record(positional(3, ProcessId=5, DestinationHostname='api.openai.com',
+                                             DestinationPort=443))
+    assert network.get('DestinationHostname') == 'api.openai.com'
+    assert network.get('DestinationPort') == '443'
+
+    registry = parse_sysmon_record(positional(13, ProcessId=8, TargetObject='HKLM\\Run\\x'))
+    assert registry.get('ProcessId') == '8' and registry.get('TargetObject') == 'HKLM\\Run\\x'
+
+
+def test_older_and_newer_schema_versions_and_named_data():
+    short = parse_sysmon_record(SysmonRecord(11, NOW, 'PC', 1, ['', 'utc', '{g}', '12', 'a.exe']))
+    assert short.get('ProcessId') == '12' and short.get('TargetFilename') == ''
+
+    extra = event_fields(5) + ('CampoNovo',)
+    longer = parse_sysmon_record(SysmonRecord(5, NOW, 'PC', 1, [f'v{i}' for i in range(len(extra))]))
+    assert longer.get('ProcessId') == 'v3' and longer.get('CampoNovo', 'ausente') == 'ausente'
+
+    named = {'TargetImage': 'lsass.exe', 'SourceProcessId': '7'}
+    record = parse_sysmon_record(SysmonRecord(10, NOW, 'PC', 1, list(named.values()), named))
+    assert record.get('SourceProcessId') == '7' and record.get('TargetImage') == 'lsass.exe'
+    assert record.get('GrantedAccess') == ''
+
+
+def test_unknown_and_empty_events():
+    unknown = parse_sysmon_record(SysmonRecord(255, NOW, 'PC', 1, ['erro']))
+    assert isinstance(unknown, UnknownEvent) and unknown.get('ProcessId') is None
+    assert parse_sysmon_record(SysmonRecord(1, NOW, 'PC', 1, [])) is None
+
+
+def test_records_are_compact_and_log_as_json_objects():
+    record = parse_sysmon_record(positional(22, ProcessId=3, QueryName='api.openai.com'))
+    assert not hasattr(record, '__dict__')
+
+    log_record = logging.LogRecord('events', logging.DEBUG, __file__, 1, 'Evento', (), None)
+    log_record.fields = record
+    entry = json.loads(JsonLinesFormatter().format(log_record))
+    assert entry['fields']['QueryName'] == 'api.openai.com' and entry['fields']['ProcessId'] == '3'